@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure publishing an installation to the build cache and installing it from the cache.
+
+Creates a simulated installation with text files and binary files that refer to the installation
+prefix, publishes it to a build cache, and installs it from the cache at a shorter prefix, which 
+replaces the prefix in every file.  Reports the time of each step and the size of the archive.
+
+Usage::
+
+    python benchmarks/build_cache.py [TEXT_FILES] [BINARY_FILES] [BINARY_KIB]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'packages'))
+# pylint: disable=wrong-import-position
+from taucmdr.cf.software import SoftwarePackageError, build_cache
+
+
+class Package(object):
+    """A simulated :any:`Installation`."""
+
+    def __init__(self, prefix):
+        self.name = self.title = 'package'
+        self.uid = '0123456789'
+        self.install_prefix = prefix
+        self.unmanaged = False
+        self.dependencies = {}
+
+    def verify(self):
+        if not os.path.isdir(os.path.join(self.install_prefix, 'lib')):
+            raise SoftwarePackageError("%s is not installed" % self.name)
+
+
+def populate(prefix, text_files, binary_files, binary_kib):
+    """Create files that refer to `prefix`."""
+    for subdir in 'include', 'lib':
+        os.makedirs(os.path.join(prefix, subdir))
+    for i in xrange(text_files):
+        with open(os.path.join(prefix, 'include', 'header%d.h' % i), 'w') as fout:
+            fout.write('/* Installed in %s */\n' % prefix)
+            fout.write('#define VALUE_%d %d\n' % (i, i) * 100)
+    block = os.urandom(1024).replace('\0', '\1')
+    for i in xrange(binary_files):
+        with open(os.path.join(prefix, 'lib', 'lib%d.so' % i), 'wb') as fout:
+            fout.write('\x7fELF\0%s/lib\0' % prefix)
+            fout.write(block * binary_kib)
+
+
+def main(argv):
+    """Program entry point."""
+    text_files = int(argv[0]) if argv else 2000
+    binary_files = int(argv[1]) if len(argv) > 1 else 100
+    binary_kib = int(argv[2]) if len(argv) > 2 else 512
+    workdir = tempfile.mkdtemp()
+    try:
+        pkg = Package(os.path.join(workdir, 'a_long_storage_prefix', 'package', '0123456789'))
+        populate(pkg.install_prefix, text_files, binary_files, binary_kib)
+        cache = os.path.join(workdir, 'cache')
+        start = time.time()
+        path, = build_cache.publish(pkg, cache)
+        print "publish  %.2f seconds, archive %.1f MiB" % (time.time() - start, os.path.getsize(path) / 1048576.0)
+        pkg.install_prefix = os.path.join(workdir, 'short', 'package', '0123456789')
+        start = time.time()
+        assert build_cache.restore(pkg, cache)
+        print "restore  %.2f seconds" % (time.time() - start)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
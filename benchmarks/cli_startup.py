@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure TAU Commander command line startup time.
+
+Creates a scratch project whose target uses a forced TAU makefile, as in managed_build.py, then 
+runs ``tau --help``, ``tau dashboard``, and ``tau gcc --version`` in new processes and reports 
+the average wall clock time of each command.
+
+Usage::
+
+    python benchmarks/cli_startup.py [CALLS]
+"""
+
+import os
+import sys
+import time
+import subprocess
+import scratch
+# pylint: disable=wrong-import-order
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+from taucmdr.model.project import Project
+from taucmdr.model.target import Target
+
+TAU = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'scripts', 'tau')
+
+COMMANDS = [['--help'], ['dashboard'], ['gcc', '--version']]
+
+
+def run(argv, calls):
+    """Run ``tau`` with arguments `argv` `calls` times and return the elapsed time."""
+    cmd = [sys.executable, TAU] + argv
+    env = dict(os.environ, __TAUCMDR_DISABLE_PAGER__='1')
+    with open(os.devnull, 'w') as devnull:
+        start = time.time()
+        for _ in xrange(calls):
+            subprocess.check_call(cmd, stdout=devnull, env=env)
+        return time.time() - start
+
+
+def main(argv):
+    """Program entry point."""
+    calls = int(argv[0]) if argv else 20
+    try:
+        scratch.setup_project()
+        tau_prefix = os.path.join(scratch.SCRATCH, 'tau')
+        makefile = os.path.join(tau_prefix, 'x86_64', 'lib', 'Makefile.tau')
+        os.makedirs(os.path.dirname(makefile))
+        open(makefile, 'w').close()
+        expr = Project.selected().experiment()
+        Target.controller(PROJECT_STORAGE).update({'tau_source': tau_prefix, 'forced_makefile': makefile}, 
+                                                  expr['target'])
+        for cmd in COMMANDS:
+            run(cmd, 1)
+            elapsed = run(cmd, calls)
+            print "tau %-16s %d calls in %.3f seconds (%.1f ms/call)" % (' '.join(cmd), calls, elapsed, 
+                                                                         1000 * elapsed / calls)
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
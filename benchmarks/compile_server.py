@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure ``tau cc`` invocations with and without the compile server.
+
+Creates a scratch project whose target uses a forced TAU makefile, as in managed_build.py, and
+repeatedly runs ``tau gcc`` in new processes to preprocess an empty file.  Each invocation is a
+new ``tau`` process, as it would be in a parallel build.
+
+Usage::
+
+    python benchmarks/compile_server.py [CALLS]
+"""
+
+import os
+import sys
+import time
+import subprocess
+import scratch
+# pylint: disable=wrong-import-order
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+from taucmdr.model.project import Project
+from taucmdr.model.target import Target
+
+TAU = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'scripts', 'tau')
+
+
+def build(calls):
+    """Run ``tau gcc`` `calls` times and return the elapsed time."""
+    cmd = [sys.executable, TAU, 'gcc', '-E', '-x', 'c', '-o', os.devnull, os.devnull]
+    with open(os.devnull, 'w') as devnull:
+        start = time.time()
+        for _ in xrange(calls):
+            subprocess.check_call(cmd, stdout=devnull)
+        return time.time() - start
+
+
+def main(argv):
+    """Program entry point."""
+    calls = int(argv[0]) if argv else 50
+    try:
+        scratch.setup_project()
+        tau_prefix = os.path.join(scratch.SCRATCH, 'tau')
+        makefile = os.path.join(tau_prefix, 'x86_64', 'lib', 'Makefile.tau')
+        os.makedirs(os.path.dirname(makefile))
+        open(makefile, 'w').close()
+        expr = Project.selected().experiment()
+        Target.controller(PROJECT_STORAGE).update({'tau_source': tau_prefix, 'forced_makefile': makefile}, 
+                                                  expr['target'])
+        build(1)
+        elapsed = build(calls)
+        print "without server: %d calls in %.3f seconds (%.1f ms/call)" % (calls, elapsed, 1000 * elapsed / calls)
+        subprocess.check_call([sys.executable, TAU, 'server', 'start', '--workers', '2'], stdout=open(os.devnull, 'w'))
+        try:
+            build(1)
+            elapsed = build(calls)
+        finally:
+            subprocess.check_call([sys.executable, TAU, 'server', 'stop'], stdout=open(os.devnull, 'w'))
+        print "with server:    %d calls in %.3f seconds (%.1f ms/call)" % (calls, elapsed, 1000 * elapsed / calls)
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure compiler probing by new ``tau`` processes.
+
+Every ``tau`` process that configures an experiment checks the target's compilers by executing 
+them, e.g. ``gcc --version``.  This benchmark creates a scratch project whose target uses a forced
+TAU makefile, so no TAU installation is required, then starts new Python processes that each 
+configure the experiment once and counts the subprocesses they start.
+
+Usage::
+
+    python benchmarks/compiler_probe.py [NUM_PROCESSES]
+"""
+
+import os
+import sys
+import time
+import subprocess
+import scratch
+# pylint: disable=wrong-import-order
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+from taucmdr.model.project import Project
+from taucmdr.model.target import Target
+
+PACKAGES = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'packages')
+
+CHILD = """
+import sys, subprocess
+sys.path.insert(0, %(packages)r)
+popen_init = subprocess.Popen.__init__
+def counting_init(self, *args, **kwargs):
+    sys.stderr.write('SUBPROCESS\\n')
+    popen_init(self, *args, **kwargs)
+subprocess.Popen.__init__ = counting_init
+from taucmdr.model.project import Project
+Project.selected().experiment().configure()
+"""
+
+
+def main(argv):
+    """Program entry point."""
+    num_procs = int(argv[0]) if argv else 20
+    try:
+        scratch.setup_project()
+        tau_prefix = os.path.join(scratch.SCRATCH, 'tau')
+        makefile = os.path.join(tau_prefix, 'x86_64', 'lib', 'Makefile.tau')
+        os.makedirs(os.path.dirname(makefile))
+        open(makefile, 'w').close()
+        expr = Project.selected().experiment()
+        Target.controller(PROJECT_STORAGE).update({'tau_source': tau_prefix, 'forced_makefile': makefile}, 
+                                                  expr['target'])
+        PROJECT_STORAGE.disconnect_database()
+        child = CHILD % {'packages': PACKAGES}
+        for label in 'first', 'later':
+            count = 1 if label == 'first' else num_procs
+            subprocesses = 0
+            start = time.time()
+            for _ in xrange(count):
+                proc = subprocess.Popen([sys.executable, '-c', child], stderr=subprocess.PIPE)
+                _, stderr = proc.communicate()
+                assert proc.returncode == 0, stderr
+                subprocesses += stderr.count('SUBPROCESS\n')
+            elapsed = time.time() - start
+            print "%s: %d processes in %.3f seconds (%.1f ms/process, %.1f subprocesses/process)" % (
+                label, count, elapsed, 1000 * elapsed / count, float(subprocesses) / count)
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
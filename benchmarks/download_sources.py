@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure downloading several source archives one at a time and concurrently.
+
+Serves files from a local HTTP server that waits before it answers each request and sends data
+at a limited rate, like a remote archive server.  Downloads the files one at a time and with
+:any:`download.fetch_all`, then downloads one file again after the connection drops halfway.
+
+Usage::
+
+    python benchmarks/download_sources.py [FILES] [KIB] [LATENCY] [KIB_PER_SECOND]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+from SocketServer import ThreadingMixIn
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'packages'))
+# pylint: disable=wrong-import-position
+from taucmdr import download
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    """A slow archive server."""
+
+    daemon_threads = True
+
+    def __init__(self, data, latency, rate):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), Handler)
+        self.data = data
+        self.latency = latency
+        self.rate = rate
+        self.drop = set()
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Sends :any:`Server.data` with range requests."""
+
+    def log_message(self, *_):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        start = 0
+        byte_range = self.headers.getheader('Range')
+        if byte_range:
+            start = int(byte_range.split('=')[1].split('-')[0])
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d' % (start, len(server.data) - 1, len(server.data)))
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(server.data) - start))
+        self.end_headers()
+        stop = len(server.data)
+        if self.path in server.drop:
+            server.drop.remove(self.path)
+            stop = (start + stop) // 2
+        chunk = 16 * 1024
+        for offset in xrange(start, stop, chunk):
+            self.wfile.write(server.data[offset:min(offset + chunk, stop)])
+            time.sleep(float(chunk) / server.rate)
+        if stop < len(server.data):
+            self.wfile.flush()
+            self.connection.shutdown(2)
+
+
+def main(argv):
+    """Program entry point."""
+    files = int(argv[0]) if argv else 6
+    kib = int(argv[1]) if len(argv) > 1 else 1024
+    latency = float(argv[2]) if len(argv) > 2 else 0.5
+    rate = int(argv[3]) if len(argv) > 3 else 2048
+    server = Server(os.urandom(kib * 1024), latency, rate * 1024)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    url = 'http://127.0.0.1:%d' % server.server_address[1]
+    workdir = tempfile.mkdtemp()
+    try:
+        serial = [(url + '/serial%d.tgz' % i, os.path.join(workdir, 'serial%d.tgz' % i)) for i in xrange(files)]
+        start = time.time()
+        for src, dest in serial:
+            download.fetch(src, dest)
+        print "one at a time  %.2f seconds" % (time.time() - start)
+        concurrent = [(url + '/concurrent%d.tgz' % i, os.path.join(workdir, 'concurrent%d.tgz' % i))
+                      for i in xrange(files)]
+        start = time.time()
+        assert not download.fetch_all(concurrent)
+        print "fetch_all      %.2f seconds" % (time.time() - start)
+        server.drop.add('/dropped.tgz')
+        start = time.time()
+        download.fetch(url + '/dropped.tgz', os.path.join(workdir, 'dropped.tgz'))
+        print "dropped once   %.2f seconds" % (time.time() - start)
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure extracting a source archive.
+
+Creates a gzipped tar archive of source files whose first member is a file and
+extracts it as :any:`Installation._prepare_src` does: first by listing the archive members to find
+the top-level directory and drive the progress bar and then extracting, as before, and then with 
+the single streaming pass of :any:`util.extract_archive`.  The last row repeats the streaming 
+extraction after the archive's member index has been stored.
+
+Usage::
+
+    python benchmarks/extract_archive.py [FILES] [KIB]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tarfile
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'packages'))
+# pylint: disable=wrong-import-position
+from taucmdr import util
+
+
+def populate(src, files, kib):
+    """Create `files` source files of about `kib` KiB in directories of 100 files."""
+    line = 'int value_%d = %d; /* some source text */\n'
+    for i in xrange(files):
+        path = os.path.join(src, 'dir%d' % (i // 100), 'file%d.c' % i)
+        util.mkdirp(os.path.dirname(path))
+        with open(path, 'w') as fout:
+            for j in xrange(kib * 1024 // len(line)):
+                fout.write(line % (j, i * j))
+
+
+def listed_extract(archive, dest):
+    """Extract `archive` the way :any:`Installation._prepare_src` did before streaming extraction."""
+    with tarfile.open(archive) as fin:
+        # archive_toplevel
+        if not fin.firstmember.isdir():
+            min([member.name for member in fin.getmembers() if member.isdir()], key=len)
+    with tarfile.open(archive) as fin:
+        # _show_extract_progress
+        members = fin.getmembers()
+        fin.extractall(dest, members=members)
+
+
+def main(argv):
+    """Program entry point."""
+    files = int(argv[0]) if argv else 1000
+    kib = int(argv[1]) if len(argv) > 1 else 128
+    workdir = tempfile.mkdtemp()
+    try:
+        populate(os.path.join(workdir, 'pkg-1.0'), files, kib)
+        archive = os.path.join(workdir, 'pkg-1.0.tgz')
+        with tarfile.open(archive, 'w:gz') as fout:
+            # The first member is a file, so the top-level directory needs a full listing
+            fout.add(os.path.join(workdir, 'pkg-1.0', 'dir0', 'file0.c'), 'pkg-1.0/dir0/file0.c')
+            fout.add(os.path.join(workdir, 'pkg-1.0'), 'pkg-1.0')
+        print "archive        %.1f MiB" % (os.path.getsize(archive) / 1048576.0)
+        for label, extract in (('listed', listed_extract),
+                               ('streaming', lambda archive, dest: util.extract_archive(archive, dest, False)),
+                               ('indexed', lambda archive, dest: (util.archive_toplevel(archive),
+                                                                  util.extract_archive(archive, dest, False)))):
+            dest = os.path.join(workdir, label)
+            start = time.time()
+            if label == 'streaming':
+                # acquire_source reads the top-level directory before extraction
+                util.archive_toplevel(archive)
+            extract(archive, dest)
+            print "%-14s %.2f seconds" % (label, time.time() - start)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
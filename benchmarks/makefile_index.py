@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure finding a TAU makefile by its tags.
+
+Creates a TAU library directory with many makefiles and library files, then finds the makefile 
+for a set of tags by listing and parsing the makefile names, as before, and with the makefile 
+index.  Each lookup uses a new :any:`TauInstallation`, like a new ``tau`` command.
+
+Usage::
+
+    python benchmarks/makefile_index.py [MAKEFILES] [LIBRARIES] [LOOKUPS]
+"""
+
+import os
+import sys
+import glob
+import time
+import shutil
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'packages'))
+# pylint: disable=wrong-import-position,protected-access
+from taucmdr import util
+from taucmdr.cf.software.tau_installation import TauInstallation
+
+TAGS = ['icpc', 'pgi', 'mpi', 'pdt', 'papi', 'openmp', 'ompt', 'python', 'cupti', 'pthread', 'shmem', 'scorep']
+
+
+def installation(prefix):
+    """A :any:`TauInstallation` with only the attributes used by makefile matching."""
+    inst = TauInstallation.__new__(TauInstallation)
+    inst._install_prefix = prefix
+    inst._lib_subdir = os.path.join('x86_64', 'lib')
+    inst._makefile_index = None
+    inst._incompatible_tags = lambda: set(['pgi', 'shmem'])
+    return inst
+
+
+def listed_match(inst, config_tags):
+    """Find a makefile the way :any:`TauInstallation._match_makefile` did before the index."""
+    dangerous_tags = inst._incompatible_tags()
+    approx_tags = None
+    approx_makefile = None
+    for makefile in glob.glob(os.path.join(inst.lib_path, 'Makefile.tau*')):
+        tags = inst._makefile_tags(makefile)
+        if config_tags <= tags:
+            if tags <= config_tags:
+                return makefile
+            elif not tags.intersection(dangerous_tags):
+                if not approx_tags or tags < approx_tags:
+                    approx_makefile = makefile
+                    approx_tags = tags
+    return approx_makefile
+
+
+def main(argv):
+    """Program entry point."""
+    makefiles = int(argv[0]) if argv else 64
+    libraries = int(argv[1]) if len(argv) > 1 else 2000
+    lookups = int(argv[2]) if len(argv) > 2 else 200
+    workdir = tempfile.mkdtemp()
+    try:
+        lib_path = installation(workdir).lib_path
+        util.mkdirp(lib_path)
+        for i in xrange(makefiles):
+            tags = ['uid'] + [tag for j, tag in enumerate(TAGS) if i & (1 << j)]
+            open(os.path.join(lib_path, 'Makefile.tau-%s' % '-'.join(tags)), 'w').close()
+        for i in xrange(libraries):
+            open(os.path.join(lib_path, 'libtau-%d.so' % i), 'w').close()
+        config_tags = set(['uid', 'mpi', 'pdt', 'papi', 'openmp'])
+        expected = listed_match(installation(workdir), config_tags)
+        for label, match in (('listed', listed_match), ('indexed', TauInstallation._match_makefile)):
+            start = time.time()
+            for _ in xrange(lookups):
+                assert match(installation(workdir), config_tags) == expected
+            print "%-8s %.3f ms per lookup" % (label, (time.time() - start) * 1000 / lookups)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure installing independent software packages at the same time.
+
+Installs simulated packages shaped like a TAU installation with PDT, PAPI, and binutils: three 
+packages without dependencies, then TAU.  Each package runs a serial ``configure`` step, then ``make``
+with the flags from :any:`parallel_make_flags` on a makefile of independent compile steps.  The steps
+sleep instead of compiling so that the result does not depend on the number of cores on this host.
+Reports the time to install the packages one after another, as before, and with :any:`scheduler`.
+
+Usage::
+
+    python benchmarks/parallel_install.py [MAX_MAKE_JOBS] [CONFIGURE_SECONDS] [STEPS] [STEP_SECONDS]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'packages'))
+# pylint: disable=wrong-import-position
+from taucmdr.cf.software import SoftwarePackageError, scheduler
+from taucmdr.cf.software.installation import parallel_make_flags
+
+
+class Package(object):
+    """A simulated :any:`Installation`."""
+
+    def __init__(self, prefix, name, shape, *dependencies):
+        self.name = self.title = name
+        self.install_prefix = os.path.join(prefix, name)
+        self.dependencies = dict((dep.name, dep) for dep in dependencies)
+        self.shape = shape
+
+    def verify(self):
+        if not os.path.exists(os.path.join(self.install_prefix, 'installed')):
+            raise SoftwarePackageError("%s is not installed" % self.name)
+
+    def needs_install(self, force_reinstall=False):
+        return True
+
+    def build(self):
+        configure_seconds, steps, step_seconds = self.shape
+        os.makedirs(self.install_prefix)
+        makefile = os.path.join(self.install_prefix, 'Makefile')
+        with open(makefile, 'w') as fout:
+            targets = ' '.join('step%d' % i for i in xrange(steps))
+            fout.write('all: %s\n\ttouch installed\n' % targets)
+            fout.write('step%%:\n\tsleep %s\n' % step_seconds)
+        subprocess.check_call(['sleep', str(configure_seconds)])
+        with open(os.devnull, 'w') as devnull:
+            subprocess.check_call(['make'] + parallel_make_flags(), cwd=self.install_prefix, stdout=devnull)
+
+
+def main(argv):
+    """Program entry point."""
+    os.environ['__TAUCMDR_MAX_MAKE_JOBS__'] = argv[0] if argv else '16'
+    shape = (float(argv[1]) if len(argv) > 1 else 1.0, 
+             int(argv[2]) if len(argv) > 2 else 48, 
+             float(argv[3]) if len(argv) > 3 else 0.25)
+    for label in 'one at a time', 'scheduler':
+        prefix = tempfile.mkdtemp()
+        try:
+            deps = [Package(prefix, name, shape) for name in ('pdt', 'papi', 'binutils')]
+            tau = Package(prefix, 'tau', shape, *deps)
+            start = time.time()
+            if label == 'scheduler':
+                scheduler.install(tau)
+            else:
+                for pkg in deps + [tau]:
+                    pkg.build()
+            elapsed = time.time() - start
+            tau.verify()
+        finally:
+            shutil.rmtree(prefix)
+        print "%-14s %.2f seconds" % (label, elapsed)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure the compiler wrapper scripts with and without the pass-through file.
+
+Creates a scratch project whose target uses a forced TAU makefile and whose measurement does 
+not instrument source code, so TAU's compiler wrappers are not needed.  Selecting the experiment 
+writes the project's pass-through file.  The ``tau_gcc`` wrapper script then preprocesses an empty 
+file in a new process for every call, first with the pass-through file and then without it.
+
+Usage::
+
+    python benchmarks/passthrough.py [CALLS]
+"""
+
+import os
+import sys
+import time
+import subprocess
+# The wrapper scripts invoke this script when they cannot use the pass-through file
+os.environ['__TAUCMDR_SCRIPT__'] = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'scripts', 'tau')
+import scratch # pylint: disable=wrong-import-position
+# pylint: disable=wrong-import-order
+from taucmdr.cf.compiler import PASSTHROUGH_FILE
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+from taucmdr.model.experiment import Experiment
+from taucmdr.model.project import Project
+from taucmdr.model.target import Target
+
+
+def build(wrapper, calls):
+    """Run a compiler wrapper command `calls` times and return the elapsed time."""
+    cmd = wrapper + ['-E', '-x', 'c', '-o', os.devnull, os.devnull]
+    with open(os.devnull, 'w') as devnull:
+        start = time.time()
+        for _ in xrange(calls):
+            subprocess.check_call(cmd, stdout=devnull)
+        return time.time() - start
+
+
+def main(argv):
+    """Program entry point."""
+    calls = int(argv[0]) if argv else 50
+    try:
+        scratch.setup_project()
+        tau_prefix = os.path.join(scratch.SCRATCH, 'tau')
+        makefile = os.path.join(tau_prefix, 'x86_64', 'lib', 'Makefile.tau')
+        os.makedirs(os.path.dirname(makefile))
+        open(makefile, 'w').close()
+        expr = Project.selected().experiment()
+        targ = Target.controller(PROJECT_STORAGE).one(expr['target'])
+        Target.controller(PROJECT_STORAGE).update({'tau_source': tau_prefix, 'forced_makefile': makefile}, targ.eid)
+        Project.selected().experiment().configure()
+        Experiment.select(expr['name'])
+        assert os.path.exists(os.path.join(PROJECT_STORAGE.prefix, PASSTHROUGH_FILE))
+        wrapper = ['sh', os.path.join(PROJECT_STORAGE.prefix, 'bin', targ['name'], 'tau_gcc')]
+        elapsed = build(wrapper, calls)
+        print "pass-through:    %d calls in %.3f seconds (%.1f ms/call)" % (calls, elapsed, 1000 * elapsed / calls)
+        # The command the wrapper scripts executed before they read the pass-through file
+        elapsed = build([sys.executable, os.environ['__TAUCMDR_SCRIPT__'], 'build', 'gcc'], calls)
+        print "tau build gcc:   %d calls in %.3f seconds (%.1f ms/call)" % (calls, elapsed, 1000 * elapsed / calls)
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure the cost of exporting and importing a project with many trials.
+
+Creates a scratch project with many trials, each with a small data directory, exports it with
+``tau project export --trial-data``, and imports the archive into a second project directory.
+
+Usage::
+
+    python benchmarks/project_export.py [NUM_TRIALS]
+"""
+
+import os
+import sys
+import time
+import resource
+import importlib
+import scratch
+# pylint: disable=wrong-import-order
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+from taucmdr.cli.commands.initialize import COMMAND as initialize_cmd
+from taucmdr.cli.commands.project.export import COMMAND as export_cmd
+from taucmdr.model.project import Project
+from taucmdr.model.trial import Trial
+from taucmdr.mvc.controller import IDENTITY_MAP
+
+import_cmd = importlib.import_module('taucmdr.cli.commands.project.import').COMMAND # pylint: disable=invalid-name
+
+
+def max_rss():
+    """Peak resident set size of this process in megabytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def main(argv):
+    """Program entry point."""
+    num_trials = int(argv[0]) if argv else 10000
+    try:
+        scratch.setup_project()
+        expr = Project.controller().selected().populate('experiment')
+        trials = Trial.controller(PROJECT_STORAGE).create_many([
+            {'number': number, 'experiment': expr.eid, 'command': 'true', 'cwd': os.getcwd(), 
+             'phase': 'completed'} for number in xrange(num_trials)])
+        for trial in trials:
+            with open(os.path.join(trial.prefix, 'profile.0.0.0'), 'w') as fout:
+                fout.write('%d templated_functions_MULTI_TIME\n' % trial['number'])
+        archive = os.path.join(scratch.SCRATCH, 'proj.tgz')
+        rss = max_rss()
+        start = time.time()
+        scratch.run_command(export_cmd, ['--trial-data', '--output', archive])
+        print "Exported %d trials in %.3f seconds (%.1f MB archive, peak RSS +%.1f MB)" % (
+            num_trials, time.time() - start, os.path.getsize(archive) / 1048576.0, max_rss() - rss)
+        dest = os.path.join(scratch.SCRATCH, 'import')
+        os.makedirs(dest)
+        os.chdir(dest)
+        # Find project storage in the new directory
+        PROJECT_STORAGE.disconnect_database()
+        PROJECT_STORAGE._prefix = None # pylint: disable=protected-access
+        IDENTITY_MAP.invalidate(PROJECT_STORAGE)
+        scratch.run_command(initialize_cmd, ['--bare', '--project-name', 'import'])
+        rss = max_rss()
+        start = time.time()
+        scratch.run_command(import_cmd, [archive])
+        print "Imported %d trials in %.3f seconds (peak RSS +%.1f MB)" % (
+            num_trials, time.time() - start, max_rss() - rss)
+        imported = Trial.controller(PROJECT_STORAGE).one({'number': num_trials - 1})
+        assert os.path.exists(os.path.join(imported.prefix, 'profile.0.0.0'))
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Scratch project shared by the benchmarks.
+
+Importing this module points the system and user storage levels at a temporary directory so
+benchmarks never modify a real TAU Commander installation.  Import it before any other 
+:py:mod:`taucmdr` module.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+SCRATCH = tempfile.mkdtemp()
+os.environ['__TAUCMDR_SYSTEM_PREFIX__'] = os.path.join(SCRATCH, 'system')
+os.environ['__TAUCMDR_USER_PREFIX__'] = os.path.join(SCRATCH, 'user')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'packages'))
+
+# pylint: disable=wrong-import-position
+from taucmdr import logger
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+from taucmdr.cli.commands.initialize import COMMAND as initialize_cmd
+from taucmdr.cli.commands.target.create import COMMAND as target_create_cmd
+from taucmdr.cli.commands.application.create import COMMAND as application_create_cmd
+from taucmdr.cli.commands.measurement.create import COMMAND as measurement_create_cmd
+from taucmdr.cli.commands.experiment.create import COMMAND as experiment_create_cmd
+from taucmdr.model.project import Project
+from taucmdr.model.trial import Trial
+
+
+def run_command(cmd, argv):
+    """Run a command with its output discarded."""
+    # pylint: disable=protected-access
+    stdout, stream = sys.stdout, logger._STDOUT_HANDLER.stream
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = logger._STDOUT_HANDLER.stream = devnull
+        try:
+            cmd.main(argv)
+        finally:
+            sys.stdout, logger._STDOUT_HANDLER.stream = stdout, stream
+
+
+def setup_project():
+    """Create a scratch project with a selected experiment."""
+    os.makedirs(os.path.join(SCRATCH, 'project'))
+    os.chdir(os.path.join(SCRATCH, 'project'))
+    run_command(initialize_cmd, ['--bare'])
+    run_command(target_create_cmd, ['targ', '--tau', 'nightly', '--pdt', 'None', '--binutils', 'None', 
+                                     '--libunwind', 'None', '--papi', 'None'])
+    run_command(application_create_cmd, ['app'])
+    run_command(measurement_create_cmd, ['meas', '--profile', 'tau', '--sample', 'F'])
+    run_command(experiment_create_cmd, ['expr', '--target', 'targ', '--application', 'app', '--measurement', 'meas'])
+    # Select the experiment without configuring it, i.e. without installing TAU
+    proj_ctrl = Project.controller()
+    proj = proj_ctrl.selected()
+    proj_ctrl.update({'experiment': proj.populate('experiments')[0].eid}, proj.eid)
+
+
+def trial_create(environment='e30='):
+    """Replay the record operations of one ``tau trial create``.
+    
+    Args:
+        environment (str): Value of the trial's base64 encoded `environment` field.
+    """
+    proj = Project.controller().selected()
+    expr = proj.populate('experiment')
+    ctrl = Trial.controller(PROJECT_STORAGE)
+    trial = ctrl.create({'number': expr.next_trial_number(), 'experiment': expr.eid, 
+                         'command': 'true', 'cwd': os.getcwd(), 'phase': 'initializing'})
+    ctrl.update({'phase': 'executing', 'begin_time': '2016-01-01T00:00:00'}, trial.eid)
+    ctrl.update({'end_time': '2016-01-01T00:00:01', 'return_code': 0, 'elapsed': 1.0, 'data_size': 0}, trial.eid)
+    ctrl.update({'phase': 'completed', 'environment': environment}, trial.eid)
+
+
+def cleanup():
+    """Delete the scratch directory."""
+    shutil.rmtree(SCRATCH, ignore_errors=True)
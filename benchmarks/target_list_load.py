@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure the cost of ``tau target list`` as a project's trial history grows.
+
+Creates a scratch project, then runs ``tau target list`` with an empty trial history and again 
+after adding trials with large `environment` fields.  Reports the database tables each run loaded
+and the time it took.  For comparison, also reports the time to parse every table as a command 
+must when all tables are stored in a single file.
+
+Usage::
+
+    python benchmarks/target_list_load.py [NUM_TRIALS] [ENVIRONMENT_KB]
+"""
+
+import os
+import sys
+import time
+import json
+import base64
+import scratch
+# pylint: disable=wrong-import-order
+from taucmdr.cf.storage import local_file
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+from taucmdr.cli.commands.target.list import COMMAND as target_list_cmd
+
+
+def measure(repeat=5):
+    """Returns (tables loaded, best seconds) for ``tau target list`` with a cold database cache."""
+    # pylint: disable=protected-access
+    load = local_file._JsonTableStorage._load
+    loaded = set()
+    def _load(storage, name):
+        loaded.add(name)
+        return load(storage, name)
+    local_file._JsonTableStorage._load = _load
+    best = None
+    try:
+        for _ in xrange(repeat):
+            PROJECT_STORAGE.disconnect_database()
+            start = time.time()
+            scratch.run_command(target_list_cmd, [])
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        local_file._JsonTableStorage._load = load
+    return sorted(loaded), best
+
+
+def parse_all_tables():
+    """Returns seconds needed to parse every table file in the project database."""
+    dbfile = PROJECT_STORAGE.dbfile
+    start = time.time()
+    for fname in os.listdir(dbfile):
+        with open(os.path.join(dbfile, fname)) as fin:
+            json.load(fin)
+    return time.time() - start
+
+
+def main(argv):
+    """Program entry point."""
+    num_trials = int(argv[0]) if argv else 200
+    environment_kb = int(argv[1]) if len(argv) > 1 else 64
+    try:
+        scratch.setup_project()
+        tables, empty = measure()
+        print "Tables loaded: %s" % ', '.join(tables)
+        environment = base64.b64encode(os.urandom(environment_kb * 768))
+        for _ in xrange(num_trials):
+            scratch.trial_create(environment)
+        PROJECT_STORAGE.disconnect_database()
+        trial_file = os.path.join(PROJECT_STORAGE.dbfile, 'Trial.json')
+        tables, full = measure()
+        print "Tables loaded: %s" % ', '.join(tables)
+        print "%-24s %10s" % ('', 'seconds')
+        print "%-24s %10.3f" % ('empty', empty)
+        print "%-24s %10.3f" % ('%d trials (%.1f MB)' % (num_trials, os.path.getsize(trial_file) / 1048576.0), full)
+        print "%-24s %10.3f" % ('parse all tables', parse_all_tables())
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
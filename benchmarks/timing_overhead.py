@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure the overhead of TAU Commander's timing spans.
+
+Times a loop of empty ``timing.span`` blocks and a loop of project storage transactions in a scratch 
+project, each in a new process with ``__TAUCMDR_TIMING__`` unset and set.  An empty ``with`` block
+shows the cost of the loop itself.
+
+Usage::
+
+    python benchmarks/timing_overhead.py [CALLS]
+"""
+
+import os
+import sys
+import time
+import subprocess
+import scratch
+# pylint: disable=wrong-import-order
+from taucmdr import timing
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+
+HERE = os.path.dirname(os.path.realpath(__file__))
+
+
+class _Empty(object):
+    def __enter__(self):
+        return self
+    def __exit__(self, ex_type, value, traceback):
+        return False
+
+
+def measure(calls):
+    """Print the time per call of each loop in this process."""
+    empty = _Empty()
+    start = time.time()
+    for _ in xrange(calls):
+        with empty:
+            pass
+    loop = time.time() - start
+    start = time.time()
+    for _ in xrange(calls):
+        with timing.span('benchmark', 'benchmark'):
+            pass
+    spans = time.time() - start
+    start = time.time()
+    for _ in xrange(calls // 100):
+        with PROJECT_STORAGE:
+            pass
+    transactions = time.time() - start
+    del timing._SPANS[:] # pylint: disable=protected-access
+    print "%-10s empty with %.3f us, span %.3f us, transaction %.1f us" % (
+        'enabled' if timing.ENABLED else 'disabled', 1e6 * loop / calls, 1e6 * spans / calls, 
+        1e6 * transactions / (calls // 100))
+
+
+def main(argv):
+    """Program entry point."""
+    if argv and argv[0] == '--measure':
+        measure(int(argv[1]))
+        return
+    calls = argv[0] if argv else '100000'
+    try:
+        scratch.setup_project()
+        for output in ('', os.path.join(scratch.SCRATCH, 'timing.txt')):
+            env = dict(os.environ, __TAUCMDR_TIMING__=output, PYTHONPATH=os.path.join(HERE, '..', 'packages'))
+            subprocess.check_call([sys.executable, os.path.join(HERE, 'timing_overhead.py'), '--measure', calls], cwd=os.getcwd(), env=env)
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
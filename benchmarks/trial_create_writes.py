@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Count database writes made by the record operations of ``tau trial create``.
+
+Creates a scratch project with one experiment then replays the storage operations that 
+:any:`TrialController.perform` makes for each trial (create, begin, end, and complete) with 
+write-back enabled and disabled.  The program itself is not executed so no TAU installation
+is required.
+
+Usage::
+
+    python benchmarks/trial_create_writes.py [NUM_TRIALS]
+"""
+
+import sys
+import time
+import scratch
+# pylint: disable=wrong-import-order
+from taucmdr.cf.storage import local_file
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+
+
+class WriteCounter(object):
+    """Counts JSON files written by :any:`LocalFileStorage`."""
+
+    def __init__(self):
+        self.count = 0
+        self._write_json = local_file._write_json # pylint: disable=protected-access
+
+    def __enter__(self):
+        def write_json(path, data):
+            self.count += 1
+            self._write_json(path, data)
+        local_file._write_json = write_json # pylint: disable=protected-access
+        return self
+
+    def __exit__(self, ex_type, value, traceback):
+        local_file._write_json = self._write_json # pylint: disable=protected-access
+
+
+def measure(write_back, num_trials):
+    """Returns (writes, seconds) for `num_trials` trials."""
+    local_file.LocalFileStorage.WRITE_BACK = write_back
+    with WriteCounter() as counter:
+        start = time.time()
+        for _ in xrange(num_trials):
+            scratch.trial_create()
+        PROJECT_STORAGE.disconnect_database()
+        elapsed = time.time() - start
+    return counter.count, elapsed
+
+
+def main(argv):
+    """Program entry point."""
+    num_trials = int(argv[0]) if argv else 20
+    try:
+        scratch.setup_project()
+        print "%-14s %8s %14s %10s" % ('mode', 'writes', 'writes/trial', 'seconds')
+        for label, write_back in ('write-through', False), ('write-back', True):
+            writes, elapsed = measure(write_back, num_trials)
+            print "%-14s %8d %14.1f %10.3f" % (label, writes, float(writes) / num_trials, elapsed)
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
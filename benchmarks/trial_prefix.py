@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure the cost of looking up trial data directories.
+
+Creates a scratch project with many trials then reads every trial's data 
+files as ``tau trial show`` and ``tau dashboard`` do.  Each lookup uses the 
+trial's prefix several times.
+
+Usage::
+
+    python benchmarks/trial_prefix.py [NUM_TRIALS]
+"""
+
+import os
+import sys
+import time
+import scratch
+# pylint: disable=wrong-import-order
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+from taucmdr.model.project import Project
+from taucmdr.model.trial import Trial
+
+
+def main(argv):
+    """Program entry point."""
+    num_trials = int(argv[0]) if argv else 1000
+    try:
+        scratch.setup_project()
+        expr = Project.controller().selected().populate('experiment')
+        ctrl = Trial.controller(PROJECT_STORAGE)
+        with PROJECT_STORAGE:
+            for number in xrange(num_trials):
+                ctrl.create({'number': number, 'experiment': expr.eid, 'command': 'true', 
+                             'cwd': os.getcwd(), 'phase': 'completed', 'data_size': 1})
+        trials = ctrl.all()
+        start = time.time()
+        for trial in trials:
+            trial.get_data_files()
+        elapsed = time.time() - start
+        print "Found data files of %d trials in %.3f seconds" % (num_trials, elapsed)
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure the cost of renumbering many trials.
+
+Creates a scratch project with many trials then reverses their numbers as
+``tau trial renumber`` would, counting the database files written.
+
+Usage::
+
+    python benchmarks/trial_renumber.py [NUM_TRIALS]
+"""
+
+import os
+import sys
+import time
+import scratch
+# pylint: disable=wrong-import-order
+from trial_create_writes import WriteCounter
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+from taucmdr.model.project import Project
+from taucmdr.model.trial import Trial
+
+
+def main(argv):
+    """Program entry point."""
+    num_trials = int(argv[0]) if argv else 1000
+    try:
+        scratch.setup_project()
+        expr = Project.controller().selected().populate('experiment')
+        ctrl = Trial.controller(PROJECT_STORAGE)
+        with PROJECT_STORAGE:
+            for number in xrange(num_trials):
+                ctrl.create({'number': number, 'experiment': expr.eid, 'command': 'true', 
+                             'cwd': os.getcwd(), 'phase': 'completed'})
+        old_trials = range(num_trials)
+        new_trials = list(reversed(old_trials))
+        with WriteCounter() as counter:
+            start = time.time()
+            ctrl.renumber(old_trials, new_trials)
+            PROJECT_STORAGE.disconnect_database()
+            elapsed = time.time() - start
+        assert [trial['number'] for trial in ctrl.search({'number': 0})] == [0]
+        print "Renumbered %d trials in %.3f seconds with %d writes" % (num_trials, elapsed, counter.count)
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
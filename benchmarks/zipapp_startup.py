@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Compare TAU Commander startup from the packages directory and from ``packages.zip``.
+
+Builds ``packages.zip`` with ``setup.py build_zipapp`` in a scratch directory beside a copy of the 
+``tau`` script.  Creates a scratch project whose target uses a forced TAU makefile, as in 
+managed_build.py.  Then runs ``tau --help`` and ``tau gcc --version`` with both layouts, reporting 
+the average wall clock time and the number of files Python tried to open while searching for modules 
+(the ``# trying`` lines printed by ``python -vv``).
+
+Usage::
+
+    python benchmarks/zipapp_startup.py [CALLS]
+"""
+
+import os
+import sys
+import time
+import shutil
+import subprocess
+import scratch
+# pylint: disable=wrong-import-order
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+from taucmdr.model.project import Project
+from taucmdr.model.target import Target
+
+TOPDIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+
+COMMANDS = [['--help'], ['gcc', '--version']]
+
+
+def run(tau, argv, calls):
+    """Run `tau` with arguments `argv` `calls` times and return the elapsed time."""
+    cmd = [sys.executable, tau] + argv
+    env = dict(os.environ, __TAUCMDR_DISABLE_PAGER__='1')
+    with open(os.devnull, 'w') as devnull:
+        start = time.time()
+        for _ in xrange(calls):
+            subprocess.check_call(cmd, stdout=devnull, env=env)
+        return time.time() - start
+
+
+def count_probes(tau, argv):
+    """Count the files Python tries to open while importing modules for one `tau` command."""
+    cmd = [sys.executable, '-vv', tau] + argv
+    env = dict(os.environ, __TAUCMDR_DISABLE_PAGER__='1')
+    with open(os.devnull, 'w') as devnull:
+        proc = subprocess.Popen(cmd, stdout=devnull, stderr=subprocess.PIPE, env=env)
+        stderr = proc.communicate()[1]
+    return sum(1 for line in stderr.splitlines() if line.startswith('# trying '))
+
+
+def main(argv):
+    """Program entry point."""
+    calls = int(argv[0]) if argv else 20
+    try:
+        zipapp_bin = os.path.join(scratch.SCRATCH, 'zipapp', 'bin')
+        os.makedirs(zipapp_bin)
+        shutil.copy(os.path.join(TOPDIR, 'scripts', 'tau'), zipapp_bin)
+        with open(os.devnull, 'w') as devnull:
+            subprocess.check_call([sys.executable, 'setup.py', 'build_zipapp', 
+                                   '--output', os.path.join(zipapp_bin, '..', 'packages.zip')], 
+                                  cwd=TOPDIR, stdout=devnull, stderr=devnull)
+        scratch.setup_project()
+        tau_prefix = os.path.join(scratch.SCRATCH, 'tau')
+        makefile = os.path.join(tau_prefix, 'x86_64', 'lib', 'Makefile.tau')
+        os.makedirs(os.path.dirname(makefile))
+        open(makefile, 'w').close()
+        expr = Project.selected().experiment()
+        Target.controller(PROJECT_STORAGE).update({'tau_source': tau_prefix, 'forced_makefile': makefile}, 
+                                                  expr['target'])
+        for label, tau in (('packages', os.path.join(TOPDIR, 'scripts', 'tau')), 
+                           ('packages.zip', os.path.join(zipapp_bin, 'tau'))):
+            for cmd in COMMANDS:
+                run(tau, cmd, 1)
+                elapsed = run(tau, cmd, calls)
+                print "%-13s tau %-14s %d calls in %.3f seconds (%.1f ms/call), %d files tried" % (
+                    label, ' '.join(cmd), calls, elapsed, 1000 * elapsed / calls, count_probes(tau, cmd))
+    finally:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
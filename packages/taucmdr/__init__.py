@@ -132,7 +132,7 @@ def version_banner():
             "hostname": socket.gethostname(),
             "platform": platform.platform(),
             "cwd": os.getcwd(),
-            "termsize": 'x'.join([str(dim) for dim in taucmdr.logger.TERM_SIZE]),
+            "termsize": 'x'.join([str(dim) for dim in taucmdr.logger.get_terminal_size()]),
             "frozen": getattr(sys, 'frozen', False),
             "python": sys.executable,
             "pyversion": platform.python_version(),
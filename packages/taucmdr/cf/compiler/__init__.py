@@ -66,12 +66,15 @@ change from system to system.
 import os
 import re
 import stat
+import pipes
+import shlex
 import getpass
 from datetime import datetime
 from subprocess import CalledProcessError
-from taucmdr import logger, util, TAUCMDR_SCRIPT
+from taucmdr import logger, util, TAUCMDR_SCRIPT, PROJECT_DIR
 from taucmdr.error import ConfigurationError
 from taucmdr.cf.objects import TrackedInstance, KeyedRecord
+from taucmdr.cf.probe import probe_output
 
 
 LOGGER = logger.get_logger(__name__)
@@ -85,9 +88,108 @@ _COMPILER_WRAPPER_TEMPLATE = """#!/bin/sh
 # Created: %(date)s
 # Author: %(user)s
 #
+# Use the compiler directly if the selected experiment does not need TAU's 
+# compiler wrappers.  See %(passthrough_file)s in the project directory.
+tau_project="$PWD"
+while [ -n "$tau_project" ] && [ ! -d "$tau_project/%(project_dir)s" ]; do
+    tau_project="${tau_project%%/*}"
+done
+tau_passthrough="$tau_project/%(project_dir)s/%(passthrough_file)s"
+if [ -r "$tau_passthrough" ]; then
+    tau_command=%(command)s
+    . "$tau_passthrough"
+fi
 %(taucmdr_script)s build %(command)s "$@" 
 """
 
+_PASSTHROUGH_TEMPLATE = """#
+# WARNING: DO NOT EDIT THIS FILE.
+# This file is generated automatically.  Any changes made here may be lost!
+#
+# Created: %(date)s
+# Author: %(user)s
+#
+# %(description)s
+#
+# Sourced by the compiler wrapper scripts with $tau_command set to the wrapped
+# compiler command and $tau_passthrough set to the path to this file.
+tau_passthrough_stamp=%(stamp)s
+tau_stamp=
+read -r tau_stamp 2>/dev/null < %(stamp_path)s
+if [ "$tau_stamp" != "$tau_passthrough_stamp" ]; then
+    # Configuration has changed, let TAU Commander decide
+    return
+fi
+for tau_record_path in %(record_paths)s; do
+    if [ ! "$tau_passthrough" -nt "$tau_record_path" ]; then
+        # Records may have changed since this file was written, let TAU Commander decide
+        return
+    fi
+done
+case "$tau_command" in
+%(cases)s
+esac
+"""
+
+PASSTHROUGH_FILE = 'passthrough.sh'
+"""str: Name of the file in the project directory listing compiler commands that do not need TAU Commander."""
+
+
+_PASSTHROUGH_STAMP_PATTERN = re.compile(r'^tau_passthrough_stamp=(.*)$', re.MULTILINE)
+
+
+def generate_passthrough(path, commands, record_paths, stamp_path, stamp, description):
+    """Generate the file that lets compiler wrapper scripts execute compilers directly.
+    
+    The compiler wrapper scripts created by :any:`InstalledCompiler.generate_wrapper` source `path` 
+    and execute the compiler command listed in the file for their wrapped command, if any.  The file
+    is ignored unless the first line of `stamp_path` is `stamp`.  Modification times are too coarse 
+    to be trusted on their own, so the file is also ignored unless it is strictly newer than every
+    path in `record_paths`.
+    
+    Args:
+        path (str): Path to the file.
+        commands (dict): Compiler command and options indexed by wrapped compiler command.
+        record_paths (list): Paths that invalidate the file when modified.
+        stamp_path (str): Path to a file whose first line identifies the configuration.
+        stamp (str): Identifier of the configuration `commands` were chosen for.
+        description (str): Comment describing the file's contents.
+    """
+    cases = ['    %s) exec %s "$@" ;;' % (pipes.quote(command), ' '.join(pipes.quote(arg) for arg in cmd))
+             for command, cmd in sorted(commands.iteritems())]
+    text = _PASSTHROUGH_TEMPLATE % {'date': str(datetime.now()),
+                                    'user': getpass.getuser(),
+                                    'description': description,
+                                    'stamp': pipes.quote(stamp),
+                                    'stamp_path': pipes.quote(stamp_path),
+                                    'record_paths': ' '.join(pipes.quote(rpath) for rpath in record_paths),
+                                    'cases': '\n'.join(cases)}
+    # Anyone who can use the wrapper scripts should be able to read the file
+    util.atomic_write(path, text, 0666)
+
+
+def passthrough_stamp(path):
+    """Get the configuration identifier recorded by :any:`generate_passthrough`.
+    
+    Args:
+        path (str): Path to the file.
+        
+    Returns:
+        str: The `stamp` argument the file was generated with, or None if the file does not exist
+             or was not generated with a stamp.
+    """
+    try:
+        with open(path) as fin:
+            match = _PASSTHROUGH_STAMP_PATTERN.search(fin.read())
+    except IOError:
+        return None
+    if not match:
+        return None
+    try:
+        return shlex.split(match.group(1))[0]
+    except (ValueError, IndexError):
+        return None
+
 
 class Knowledgebase(object):
     """TAU compiler knowledgebase front-end."""
@@ -300,7 +402,7 @@ class _CompilerFamily(TrackedInstance):
         for family in with_regex:
             cmd = [absolute_path] + family.version_flags
             try:
-                stdout = util.get_command_output(cmd)
+                stdout = probe_output(cmd)
             except CalledProcessError as err:
                 messages.append(err.output)
                 LOGGER.debug("%s returned %d: %s", cmd, err.returncode, err.output)
@@ -310,7 +412,7 @@ class _CompilerFamily(TrackedInstance):
                     if family.show_wrapper_flags:
                         cmd = [absolute_path] + family.show_wrapper_flags
                         try:
-                            stdout = util.get_command_output(cmd)
+                            stdout = probe_output(cmd)
                         except CalledProcessError as err:
                             messages.append(err.output)
                             LOGGER.debug("%s returned %d: %s", cmd, err.returncode, err.output)
@@ -548,7 +650,7 @@ class InstalledCompiler(object):
         LOGGER.debug("Probing %s wrapper '%s'", self.info.short_descr, self.absolute_path)
         cmd = [self.absolute_path] + self.info.family.show_wrapper_flags
         try:
-            stdout = util.get_command_output(cmd)
+            stdout = probe_output(cmd)
         except CalledProcessError:
             # If this command didn't accept show_wrapper_flags then it's not a compiler wrapper to begin with,
             # i.e. another command just happens to be the same as a known compiler command.
@@ -695,7 +797,7 @@ class InstalledCompiler(object):
         if self._version_string is None:
             cmd = [self.absolute_path] + self.info.family.version_flags
             try:
-                self._version_string = util.get_command_output(cmd)
+                self._version_string = probe_output(cmd)
             except CalledProcessError:
                 raise ConfigurationError("Compiler command '%s' failed." % ' '.join(cmd),
                                          "Check that this command works outside of TAU.",
@@ -734,7 +836,9 @@ class InstalledCompiler(object):
             wrapper = _COMPILER_WRAPPER_TEMPLATE % {'date': str(datetime.now()),
                                                     'user': getpass.getuser(),
                                                     'taucmdr_script': TAUCMDR_SCRIPT,
-                                                    'command': self.command}
+                                                    'command': self.command,
+                                                    'project_dir': PROJECT_DIR,
+                                                    'passthrough_file': PASSTHROUGH_FILE}
             fout.write(wrapper)
         os.chmod(script_file, os.stat(script_file).st_mode | 0111)
 
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Test functions.
+
+Functions used for unit tests of the compiler wrapper scripts' pass-through file.
+"""
+
+import os
+import time
+import tempfile
+import subprocess
+from taucmdr import tests, PROJECT_DIR
+from taucmdr.cf import compiler
+from taucmdr.cf.compiler import PASSTHROUGH_FILE, generate_passthrough
+
+
+class PassthroughTest(tests.TestCase):
+    """Unit tests for generate_passthrough and the compiler wrapper template."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.root, PROJECT_DIR)
+        self.cwd = os.path.join(self.root, 'src')
+        os.makedirs(self.cwd)
+        self.record_path = os.path.join(self.prefix, 'records')
+        os.makedirs(self.record_path)
+        earlier = int(time.time()) - 10
+        os.utime(self.record_path, (earlier, earlier))
+        self.stamp_path = os.path.join(self.prefix, 'uid')
+        with open(self.stamp_path, 'w') as fout:
+            fout.write('abc123\n')
+        self.wrappers = {}
+        for command in 'cc', 'f90':
+            self.wrappers[command] = os.path.join(self.prefix, 'tau_' + command)
+            with open(self.wrappers[command], 'w') as fout:
+                # pylint: disable=protected-access
+                fout.write(compiler._COMPILER_WRAPPER_TEMPLATE % {'date': 'now', 'user': 'test',
+                                                                  'taucmdr_script': 'echo tau',
+                                                                  'command': command,
+                                                                  'project_dir': PROJECT_DIR,
+                                                                  'passthrough_file': PASSTHROUGH_FILE})
+        generate_passthrough(os.path.join(self.prefix, PASSTHROUGH_FILE), {'cc': ['echo', 'direct cc']},
+                             [self.record_path], self.stamp_path, 'abc123', 'Test')
+
+    def _wrap(self, command):
+        return subprocess.check_output(['sh', self.wrappers[command], 'a b.c'], cwd=self.cwd).strip()
+
+    def test_passthrough(self):
+        self.assertEqual(self._wrap('cc'), 'direct cc a b.c')
+
+    def test_not_listed(self):
+        self.assertEqual(self._wrap('f90'), 'tau build f90 a b.c')
+
+    def test_records_modified(self):
+        later = time.time() + 10
+        os.utime(self.record_path, (later, later))
+        self.assertEqual(self._wrap('cc'), 'tau build cc a b.c')
+
+    def test_records_same_time(self):
+        mtime = int(time.time())
+        for path in self.record_path, os.path.join(self.prefix, PASSTHROUGH_FILE):
+            os.utime(path, (mtime, mtime))
+        self.assertEqual(self._wrap('cc'), 'tau build cc a b.c')
+
+    def test_stamp_changed(self):
+        self.assertEqual(compiler.passthrough_stamp(os.path.join(self.prefix, PASSTHROUGH_FILE)), 'abc123')
+        with open(self.stamp_path, 'w') as fout:
+            fout.write('def456\n')
+        self.assertEqual(self._wrap('cc'), 'tau build cc a b.c')
+        os.remove(self.stamp_path)
+        self.assertEqual(self._wrap('cc'), 'tau build cc a b.c')
+
+    def test_no_passthrough_file(self):
+        os.remove(os.path.join(self.prefix, PASSTHROUGH_FILE))
+        self.assertEqual(self._wrap('cc'), 'tau build cc a b.c')
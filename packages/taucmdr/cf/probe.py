@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Persistent cache of probe command output.
+
+TAU Commander inspects installed programs by executing them, e.g. ``gcc --version`` or ``mpicc -show``.
+Some of these commands are slow, e.g. compiler wrappers that contact a license server, and every 
+``tau`` invocation would otherwise execute them again.  Probe output is kept in one file per probe 
+command in the ``probe`` directory of :any:`USER_STORAGE` and reused until the probed program or its 
+environment changes.  Each file is replaced atomically, so parallel ``tau`` processes (e.g. under
+``make -j``) neither lock nor rewrite each other's entries, and the user database is not modified.
+"""
+
+import os
+import json
+import atexit
+import hashlib
+from subprocess import CalledProcessError
+from taucmdr import logger, util
+from taucmdr.cf.storage import StorageError
+
+LOGGER = logger.get_logger(__name__)
+
+PROBE_ENVIRONMENT = ('PE_ENV', 'LOADEDMODULES', '_LMFILES_', 'CRAYPE_LINK_TYPE', 'CRAY_CPU_TARGET',
+                     'MPICH_CC', 'MPICH_CXX', 'MPICH_FC', 'MPICH_F77', 'MPICH_F90',
+                     'OMPI_CC', 'OMPI_CXX', 'OMPI_FC', 'OMPI_F77',
+                     'I_MPI_CC', 'I_MPI_CXX', 'I_MPI_FC', 'I_MPI_F77', 'I_MPI_F90')
+"""tuple: Environment variables that may change the output of a probe command."""
+
+CACHE_DIR = 'probe'
+"""str: Directory in the user storage prefix holding cached probe output."""
+
+MAX_ENTRIES = 256
+"""int: Maximum number of cached probe commands.  The least recently used entries are removed."""
+
+
+class _Stats(object):
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def log(cls):
+        if cls.hits or cls.misses:
+            LOGGER.debug("Probe cache: %d hits, %d misses", cls.hits, cls.misses)
+
+atexit.register(_Stats.log)
+
+
+def _signature(cmd):
+    stat = os.stat(cmd[0])
+    return {'file': [stat.st_ino, stat.st_mtime, stat.st_size],
+            'env': dict((var, os.environ.get(var)) for var in PROBE_ENVIRONMENT)}
+
+
+def _cache_dir():
+    from taucmdr.cf.storage.levels import USER_STORAGE
+    return os.path.join(USER_STORAGE.prefix, CACHE_DIR)
+
+
+def _prune(cache_dir):
+    """Remove the least recently used entries from `cache_dir` so at most :any:`MAX_ENTRIES` remain."""
+    names = [name for name in os.listdir(cache_dir) if not name.startswith('.')]
+    if len(names) <= MAX_ENTRIES:
+        return
+    entries = []
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            pass
+    entries.sort()
+    for _, path in entries[:len(entries) - MAX_ENTRIES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _load(path):
+    try:
+        with open(path) as fin:
+            entry = json.load(fin)
+    except (IOError, ValueError):
+        return None
+    try:
+        # Mark the entry as recently used so it is pruned last
+        os.utime(path, None)
+    except OSError:
+        pass
+    return entry
+
+
+def _store(cache_dir, path, entry):
+    util.atomic_write(path, json.dumps(entry))
+    _prune(cache_dir)
+
+
+def probe_output(cmd):
+    """Return the possibly cached output of a command that inspects an installed program.
+    
+    Like :any:`util.get_command_output`, but the output is also kept in user storage so later 
+    processes do not execute the command.  The cached output is used until the program file's 
+    inode, modification time, or size changes, or any variable in :any:`PROBE_ENVIRONMENT` changes.
+    Commands that return a non-zero exit code are cached as well.
+    
+    Args:
+        cmd (list): Absolute path to the probed program and its command line arguments.
+
+    Raises:
+        subprocess.CalledProcessError: return code was non-zero.
+        OSError: The program does not exist or is not executable.
+        
+    Returns:
+        str: Subprocess output.
+    """
+    if not (cmd[0] and os.path.isabs(cmd[0])):
+        return util.get_command_output(cmd)
+    try:
+        signature = _signature(cmd)
+    except OSError:
+        return util.get_command_output(cmd)
+    try:
+        cache_dir = _cache_dir()
+    except StorageError:
+        return util.get_command_output(cmd)
+    path = os.path.join(cache_dir, hashlib.sha1(repr(cmd)).hexdigest() + '.json')
+    entry = _load(path)
+    if entry and entry.get('cmd') == cmd and entry.get('signature') == signature:
+        _Stats.hits += 1
+        output = entry['output'].encode('utf-8')
+        if entry['returncode']:
+            raise CalledProcessError(entry['returncode'], cmd, output)
+        return output
+    _Stats.misses += 1
+    returncode = 0
+    try:
+        output = util.get_command_output(cmd)
+    except CalledProcessError as err:
+        returncode, output = err.returncode, err.output
+    try:
+        _store(cache_dir, path, {'cmd': cmd, 'signature': signature, 'returncode': returncode, 
+                                 'output': output.decode('utf-8')})
+    except UnicodeDecodeError:
+        LOGGER.debug("Not caching non-UTF-8 output of %s", cmd)
+    except (StorageError, IOError, OSError) as err:
+        LOGGER.debug("Could not cache output of %s: %s", cmd, err)
+    if returncode:
+        raise CalledProcessError(returncode, cmd, output)
+    return output
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Binary cache of software installations.
+
+A build cache is a directory, local or on a shared filesystem, of installed software packages.  Each
+package is stored as ``<cache>/<name>/<uid>.tar.gz``, where `uid` is the installation's UID, so 
+installations with the same source, target, and compilers share one entry.  Set 
+``__TAUCMDR_BUILD_CACHE__`` to the cache directory to install packages from the cache instead of 
+building them, and use ``tau experiment publish`` to add installations to the cache.
+
+Each archive holds ``build_cache.json`` followed by the installation prefix as ``prefix/``.  The JSON
+file records the installation prefixes of the package and its dependencies when it was published.
+When the archive is installed at a new prefix those paths are replaced in every file and symbolic
+link.  In binary files a path may only be replaced by a path that is not longer, and the rest of 
+the C string is padded with NUL characters.  If a binary file cannot be relocated then the package
+is built from source as usual.
+
+Because the cache may be on a shared filesystem, archives are not trusted when they are installed.
+Links must point into the installation prefix or a dependency's prefix, no member may be extracted
+through a symbolic link, and special files are rejected.
+"""
+
+import os
+import re
+import json
+import time
+import tarfile
+import tempfile
+from cStringIO import StringIO
+from taucmdr import logger, util, timing
+from taucmdr.error import ConfigurationError
+from taucmdr.cf.software import SoftwarePackageError
+
+LOGGER = logger.get_logger(__name__)
+
+METADATA_FILE = 'build_cache.json'
+"""str: Name of the archive member describing the installation."""
+
+PREFIX_DIR = 'prefix'
+"""str: Name of the archive member holding the installation prefix."""
+
+
+def cache_dir():
+    """Get the build cache directory.
+    
+    Returns:
+        str: Value of ``__TAUCMDR_BUILD_CACHE__``, or None if there is no build cache.
+    """
+    return os.environ.get('__TAUCMDR_BUILD_CACHE__') or None
+
+
+def cache_path(installation, cache=None):
+    """Get the path to an installation's archive in the build cache.
+    
+    Args:
+        installation (Installation): The installation.
+        cache (str): Build cache directory, or None to use :any:`cache_dir`.
+        
+    Returns:
+        str: Path to the archive, which may not exist, or None if there is no build cache.
+    """
+    cache = cache or cache_dir()
+    if not cache:
+        return None
+    return os.path.join(cache, installation.name, installation.uid + '.tar.gz')
+
+
+def contains(installation, cache=None):
+    """Check if the build cache has an archive of an installation.
+    
+    Args:
+        installation (Installation): The installation.
+        cache (str): Build cache directory, or None to use :any:`cache_dir`.
+        
+    Returns:
+        bool: True if the archive exists.
+    """
+    path = cache_path(installation, cache)
+    return bool(path and os.path.isfile(path))
+
+
+def _walk(root):
+    """Yield an installation and its dependencies, dependencies first, without repeating UIDs."""
+    seen = set()
+    def visit(installation):
+        if installation.uid in seen:
+            return
+        seen.add(installation.uid)
+        for dependency in installation.dependencies.itervalues():
+            for inst in visit(dependency):
+                yield inst
+        yield installation
+    return visit(root)
+
+
+def _prefixes(root):
+    return dict((installation.uid, installation.install_prefix) for installation in _walk(root))
+
+
+def _replace_binary(data, old, new):
+    if len(new) > len(old):
+        raise SoftwarePackageError("'%s' is longer than '%s'" % (new, old))
+    def pad(match):
+        text = match.group(0).replace(old, new)
+        return text + '\0' * (len(match.group(0)) - len(text))
+    return re.sub(re.escape(old) + '[^\0]*', pad, data)
+
+
+def _within(path, prefixes):
+    return any(path == prefix or path.startswith(prefix.rstrip('/') + '/') for prefix in prefixes)
+
+
+def _check_member(member, tmp_prefix, metadata):
+    """Check that an archive member can be extracted without escaping the installation prefix.
+    
+    Args:
+        member (TarInfo): An archive member under :any:`PREFIX_DIR`.
+        tmp_prefix (str): Directory the archive is being extracted to.
+        metadata (dict): Contents of :any:`METADATA_FILE`.
+        
+    Raises:
+        SoftwarePackageError: The member is not safe to extract.
+    """
+    def unlinked_path(name):
+        # Path to `name` in `tmp_prefix` if no part of it is a symbolic link, else None
+        path = os.path.normpath(os.path.join(tmp_prefix, name))
+        if os.path.realpath(path) != os.path.normpath(os.path.join(os.path.realpath(tmp_prefix), name)):
+            return None
+        return path
+    if not unlinked_path(os.path.dirname(member.name)):
+        raise SoftwarePackageError("Archive member '%s' is under a symbolic link" % member.name)
+    if member.issym():
+        prefixes = metadata['prefixes'].values()
+        target = member.linkname
+        if not os.path.isabs(target):
+            target = os.path.join(metadata['prefixes'][metadata['uid']], 
+                                  os.path.dirname(member.name)[len(PREFIX_DIR)+1:], target)
+        if not _within(os.path.normpath(target), prefixes):
+            raise SoftwarePackageError("Symbolic link '%s' points outside the installation prefix" % member.name)
+    elif member.islnk():
+        parts = member.linkname.split('/')
+        if parts[0] != PREFIX_DIR or '..' in parts:
+            raise SoftwarePackageError("Hard link '%s' points outside the installation prefix" % member.name)
+        target = unlinked_path(member.linkname)
+        if not (target and os.path.isfile(target)):
+            raise SoftwarePackageError("Hard link '%s' does not point to a file" % member.name)
+    elif not (member.isfile() or member.isdir()):
+        raise SoftwarePackageError("Archive member '%s' is not a file, directory, or link" % member.name)
+
+
+def relocate(prefix, replacements):
+    """Replace paths in every file and symbolic link under a directory.
+    
+    Args:
+        prefix (str): Directory to relocate.
+        replacements (list): (old, new) path pairs.  Longer paths are replaced first.
+        
+    Raises:
+        SoftwarePackageError: A binary file refers to a path that would be replaced by a longer path.
+    """
+    replacements = sorted([(old, new) for old, new in replacements if old != new], 
+                          key=lambda pair: len(pair[0]), reverse=True)
+    if not replacements:
+        return
+    for root, dirs, files in os.walk(prefix):
+        for name in dirs + files:
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                target = os.readlink(path)
+                for old, new in replacements:
+                    target = target.replace(old, new)
+                if target != os.readlink(path):
+                    os.remove(path)
+                    os.symlink(target, path)
+                continue
+            if name not in files or not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as fin:
+                data = fin.read()
+            found = [(old, new) for old, new in replacements if old in data]
+            if not found:
+                continue
+            binary = '\0' in data[:8192]
+            for old, new in found:
+                try:
+                    data = _replace_binary(data, old, new) if binary else data.replace(old, new)
+                except SoftwarePackageError as err:
+                    raise SoftwarePackageError("Cannot relocate '%s': %s" % (path, err))
+            mode = os.stat(path).st_mode
+            os.chmod(path, mode | 0200)
+            with open(path, 'wb') as fout:
+                fout.write(data)
+            os.chmod(path, mode)
+
+
+def restore(installation, cache=None):
+    """Install a package from the build cache.
+    
+    Args:
+        installation (Installation): The installation.  Its installation prefix must not exist.
+        cache (str): Build cache directory, or None to use :any:`cache_dir`.
+        
+    Returns:
+        bool: True if the package was installed from the cache and passed verification, False if the
+              cache has no usable archive for the package.
+    """
+    if not contains(installation, cache):
+        return False
+    path = cache_path(installation, cache)
+    prefix = installation.install_prefix
+    LOGGER.info("Installing %s from build cache '%s'", installation.title, path)
+    util.mkdirp(os.path.dirname(prefix))
+    tmp_prefix = tempfile.mkdtemp(dir=os.path.dirname(prefix))
+    installed = False
+    try:
+        with timing.span(installation.name, 'build cache', src=path):
+            metadata = None
+            dir_modes = []
+            # Read the archive once, in order, instead of seeking back for each member
+            with tarfile.open(path, 'r|gz') as archive:
+                for member in archive:
+                    parts = member.name.split('/')
+                    if member.name == METADATA_FILE:
+                        metadata = json.load(archive.extractfile(member))
+                    elif parts[0] == PREFIX_DIR and '..' not in parts:
+                        # build_cache.json comes first so links can be checked as they are read
+                        if not metadata or metadata.get('uid') != installation.uid:
+                            raise SoftwarePackageError("'%s' does not describe this installation" % METADATA_FILE)
+                        _check_member(member, tmp_prefix, metadata)
+                        if member.isdir():
+                            # Directories must stay writable until relocation is done
+                            dir_modes.append((os.path.join(prefix, *parts[1:]), member.mode))
+                            member.mode |= 0700
+                        archive.extract(member, tmp_prefix)
+                    else:
+                        raise SoftwarePackageError("Unexpected archive member '%s'" % member.name)
+            if not metadata or metadata.get('uid') != installation.uid:
+                raise SoftwarePackageError("'%s' does not describe this installation" % METADATA_FILE)
+            new_prefixes = _prefixes(installation)
+            relocate(os.path.join(tmp_prefix, PREFIX_DIR), 
+                     [(old.encode('utf-8'), new_prefixes[uid]) for uid, old in metadata['prefixes'].iteritems() 
+                      if uid in new_prefixes])
+            os.rename(os.path.join(tmp_prefix, PREFIX_DIR), prefix)
+            installed = True
+            for dir_path, mode in reversed(dir_modes):
+                os.chmod(dir_path, mode)
+            installation.verify()
+    except (IOError, OSError, ValueError, KeyError, tarfile.TarError, SoftwarePackageError) as err:
+        LOGGER.info("Cannot install %s from build cache: %s", installation.title, err)
+        if installed:
+            util.rmtree(prefix, ignore_errors=True)
+        return False
+    finally:
+        util.rmtree(tmp_prefix, ignore_errors=True)
+    return True
+
+
+def publish(root, cache=None, replace=False):
+    """Add an installation and its dependencies to the build cache.
+    
+    Installations of software that TAU Commander does not manage are skipped.
+    
+    Args:
+        root (Installation): The installation.
+        cache (str): Build cache directory, or None to use :any:`cache_dir`.
+        replace (bool): If True, replace archives that are already in the cache.
+        
+    Returns:
+        list: Paths to the new archives.
+        
+    Raises:
+        ConfigurationError: There is no build cache directory.
+        SoftwarePackageError: An installation did not pass verification.
+    """
+    cache = cache or cache_dir()
+    if not cache:
+        raise ConfigurationError("No build cache directory.", 
+                                 "Set the __TAUCMDR_BUILD_CACHE__ environment variable to a directory.")
+    published = []
+    for installation in _walk(root):
+        if installation.unmanaged:
+            continue
+        path = cache_path(installation, cache)
+        if os.path.exists(path) and not replace:
+            LOGGER.info("%s is already in build cache '%s'", installation.title, path)
+            continue
+        installation.verify()
+        LOGGER.info("Publishing %s to build cache '%s'", installation.title, path)
+        util.mkdirp(os.path.dirname(path))
+        metadata = json.dumps({'name': installation.name, 
+                               'uid': installation.uid, 
+                               'prefixes': _prefixes(installation)})
+        # Other processes never see a partial archive
+        tmp_path = os.path.join(os.path.dirname(path), '.%s.%d' % (os.path.basename(path), os.getpid()))
+        try:
+            with tarfile.open(tmp_path, 'w:gz') as archive:
+                info = tarfile.TarInfo(METADATA_FILE)
+                info.size = len(metadata)
+                info.mtime = time.time()
+                archive.addfile(info, StringIO(metadata))
+                archive.add(installation.install_prefix, arcname=PREFIX_DIR)
+            os.rename(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        published.append(path)
+    return published
@@ -31,13 +31,13 @@ import os
 import multiprocessing
 from subprocess import CalledProcessError
 from contextlib import contextmanager
-from taucmdr import logger, util
+from taucmdr import logger, util, timing, download
 from taucmdr.error import ConfigurationError
 from taucmdr.progress import ProgressIndicator
 from taucmdr.cf.storage import StorageError
 from taucmdr.cf.storage.levels import ORDERED_LEVELS
 from taucmdr.cf.storage.levels import highest_writable_storage 
-from taucmdr.cf.software import SoftwarePackageError
+from taucmdr.cf.software import SoftwarePackageError, build_cache
 from taucmdr.cf import compiler
 from taucmdr.cf.compiler import InstalledCompilerSet
 from taucmdr.cf.platforms import Architecture, OperatingSystem, HOST_OS, DARWIN
@@ -133,6 +133,28 @@ def tmpfs_prefix():
         return tmp_prefix
     
 
+def acquire_sources(installations):
+    """Acquire the source archives of several software packages at the same time.
+    
+    Packages that use an existing installation or already have a source archive are skipped.
+    
+    Args:
+        installations (list): :any:`Installation` objects.
+        
+    Returns:
+        list: Installations whose source archives could not be acquired.
+    """
+    # pylint: disable=protected-access
+    downloads = {}
+    for inst in installations:
+        if inst.src and not inst.unmanaged and not inst._find_archive():
+            downloads.setdefault(inst._download_path(), (inst.src, []))[1].append(inst)
+    if not downloads:
+        return []
+    errors = download.fetch_all([(src, dest) for dest, (src, _) in downloads.iteritems()])
+    return [inst for dest in errors for inst in downloads[dest][1]]
+
+
 @contextmanager
 def new_os_environ():
     old_environ = os.environ
@@ -317,23 +339,33 @@ class Installation(object):
                     LOGGER.debug("Cannot set group on '%s': %s", path, err)
                 progress_bar.update(i)
                 
-    def _acquire_source(self, reuse_archive):
+    def _find_archive(self):
         archive_file = os.path.basename(self.src)
+        for storage in ORDERED_LEVELS:
+            try:
+                archive = os.path.join(storage.prefix, "src", archive_file)
+            except StorageError:
+                continue
+            if os.path.exists(archive):
+                return archive
+        return None
+
+    def _download_path(self):
+        return os.path.join(highest_writable_storage().prefix, "src", os.path.basename(self.src))
+
+    def _acquire_source(self, reuse_archive):
         if reuse_archive:
-            for storage in ORDERED_LEVELS:
-                try:
-                    archive = os.path.join(storage.prefix, "src", archive_file)
-                except StorageError:
-                    continue
-                if os.path.exists(archive):
-                    return archive
-        archive_prefix = os.path.join(highest_writable_storage().prefix, "src")
-        archive = os.path.join(archive_prefix, os.path.basename(self.src))
+            archive = self._find_archive()
+            if archive:
+                return archive
+        archive = self._download_path()
         try:
             util.download(self.src, archive)
-        except IOError:
+        except IOError as err:
+            LOGGER.debug(err)
             hints = ("If a firewall is blocking access to this server, use another method to download "
-                     "'%s' and copy that file to '%s' before trying this operation." % (self.src, archive_prefix),
+                     "'%s' and copy that file to '%s' before trying this operation." % 
+                     (self.src, os.path.dirname(archive)),
                      "Check that the file or directory is accessible")
             raise ConfigurationError("Cannot acquire source archive '%s'." % self.src, *hints)
         return archive
@@ -358,8 +390,9 @@ class Installation(object):
         if self.unmanaged:
             return self.src
         archive = self._acquire_source(reuse_archive)
-        # Check that archive is valid by getting archive top-level directory
+        # Check that archive is valid by comparing it with its checksum and getting archive top-level directory
         try:
+            download.check(archive)
             util.archive_toplevel(archive)
         except IOError:
             if not reuse_archive:
@@ -367,6 +400,7 @@ class Installation(object):
             return self.acquire_source(reuse_archive=False)
         return archive
 
+    @timing.timed('prepare source', 'install phase')
     def _prepare_src(self, reuse_archive=True):
         """Prepares source code for installation.
         
@@ -439,9 +473,10 @@ class Installation(object):
         self.dependencies[name] = cls(sources, self.target_arch, self.target_os, self.compilers, *args, **kwargs)
 
     def install(self, force_reinstall=False):
-        """Execute the installation sequence in a sanitized environment.
+        """Install this package and any dependencies that need installing.
         
-        Modifies the system by building and installing software.
+        Modifies the system by building and installing software.  Packages that do not depend on
+        each other are built at the same time.  See :any:`scheduler.install`.
         
         Args:
             force_reinstall (bool): If True, reinstall even if the software package passes verification.
@@ -449,23 +484,53 @@ class Installation(object):
         Raises:
             SoftwarePackageError: Installation failed.
         """
-        for pkg in self.dependencies.itervalues():
-            pkg.install(force_reinstall)
+        from taucmdr.cf.software import scheduler
+        scheduler.install(self, force_reinstall)
+
+    def needs_install(self, force_reinstall=False):
+        """Check if this package must be built.
+        
+        Dependencies of a package that does not need to be built are not checked.
+        
+        Args:
+            force_reinstall (bool): If True, the package must be built even if it passes verification.
+            
+        Returns:
+            bool: True if the package must be built, False if the installation is valid.
+            
+        Raises:
+            SoftwarePackageError: The installation is invalid and the package cannot be built.
+        """
         if self.unmanaged or not force_reinstall:
             try:
-                return self.verify()
+                self.verify()
             except SoftwarePackageError as err:
                 if self.unmanaged:
                     raise SoftwarePackageError("%s source package is unavailable and the installation at '%s' "
                                                "is invalid: %s" % (self.title, self.install_prefix, err),
                                                "Specify source code path or URL to enable package reinstallation.")
-                elif not force_reinstall:
-                    LOGGER.debug(err)
+                LOGGER.debug(err)
+            else:
+                return False
+        return True
+
+    def build(self):
+        """Execute the installation sequence in a sanitized environment.
+        
+        Modifies the system by building and installing this package.  Dependencies must already be installed.
+        The package is installed from the build cache instead if the cache has it.
+        
+        Raises:
+            SoftwarePackageError: Installation failed.
+        """
         LOGGER.info("Installing %s to '%s'", self.title, self.install_prefix)
         if os.path.isdir(self.install_prefix):
             LOGGER.info("Cleaning %s installation prefix '%s'", self.title, self.install_prefix)
             util.rmtree(self.install_prefix, ignore_errors=True)
-        with new_os_environ(), util.umask(0o002):
+        if build_cache.restore(self):
+            self.set_group()
+            return
+        with timing.span(self.name, 'install'), new_os_environ(), util.umask(0o002):
             try:
                 self._src_prefix = self._prepare_src()
                 self.installation_sequence()
@@ -481,7 +546,7 @@ class Installation(object):
                 self._src_prefix = None
         # Verify the new installation
         LOGGER.info("Verifying %s installation...", self.title)
-        return self.verify()
+        self.verify()
 
     def installation_sequence(self):
         raise NotImplementedError
@@ -548,6 +613,7 @@ class MakeInstallation(Installation):
           make [flags] install [options]
     """
 
+    @timing.timed('make', 'install phase')
     def make(self, flags):
         """Invoke `make`.
         
@@ -567,6 +633,7 @@ class MakeInstallation(Installation):
                 util.add_error_stack(self._src_prefix)
                 raise SoftwarePackageError('%s compilation failed' % self.title)
 
+    @timing.timed('make install', 'install phase')
     def make_install(self, flags):
         """Invoke `make install`.
         
@@ -603,6 +670,7 @@ class AutotoolsInstallation(MakeInstallation):
         make [flags] install [options]
     """
     
+    @timing.timed('configure', 'install phase')
     def configure(self, flags):
         """Invoke `configure`.
         
@@ -654,6 +722,7 @@ class CMakeInstallation(MakeInstallation):
             LOGGER.warning("Cannot determine CMake version.  CMake 2.8 or higher is required.")
         return cmake
 
+    @timing.timed('cmake', 'install phase')
     def cmake(self, flags):
         """Invoke `cmake`.
         
@@ -31,7 +31,7 @@ TAU uses PDT for source instrumentation.
 """
 
 import os
-from taucmdr import logger, util
+from taucmdr import logger, util, timing
 from taucmdr.error import ConfigurationError
 from taucmdr.cf.software import SoftwarePackageError
 from taucmdr.cf.software.installation import AutotoolsInstallation
@@ -212,6 +212,7 @@ class PdtInstallation(AutotoolsInstallation):
             self._retry_verify = False
             self.verify()
     
+    @timing.timed('configure', 'install phase')
     def configure(self, _):
         family_flags = {GNU.name: '-GNU', INTEL.name: '-icpc', PGI.name: '-pgCC'}
         compiler_flag = family_flags.get(self.compilers[CXX].info.family.name, '')
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Install software packages and their dependencies.
+
+Each package is installed after the packages it depends on, but packages that do not depend on each 
+other are built at the same time in separate processes.  All builds share one budget of parallel 
+make jobs: ``__TAUCMDR_MAX_MAKE_JOBS__`` or one less than the number of CPU cores.  A build gets its
+share of the jobs left when it starts and returns them when it finishes, so the last package to be
+built, usually TAU, gets all of them.
+
+Each build holds an exclusive lock on its installation so that TAU Commander processes never build 
+the same package at the same time.  If a build fails then packages that do not depend on it are still
+built and kept, and the first failure is raised after the other builds finish.
+"""
+
+import os
+import Queue
+import logging
+import multiprocessing
+from taucmdr import logger, timing
+from taucmdr.cf.storage import lock
+from taucmdr.cf.software import SoftwarePackageError, build_cache
+from taucmdr.cf.software.installation import acquire_sources, parallel_make_flags, tmpfs_prefix
+
+LOGGER = logger.get_logger(__name__)
+
+_PENDING = 'pending'
+_RUNNING = 'running'
+_DONE = 'done'
+_FAILED = 'failed'
+
+
+class _Package(object):
+    """A package that must be built.
+    
+    Attributes:
+        installation (Installation): The installation to build.
+        duplicates (list): Other installations with the same installation prefix.
+        dependencies (list): Packages that must be built first.
+        state (str): One of the package states defined in this module.
+        jobs (int): Number of make jobs given to the build.
+        process (multiprocessing.Process): Process building the package, or None.
+    """
+    
+    def __init__(self, installation):
+        self.installation = installation
+        self.duplicates = []
+        self.dependencies = []
+        self.state = _PENDING
+        self.jobs = 0
+        self.process = None
+
+
+def plan(root, force_reinstall=False):
+    """Find the packages that must be built to install a package.
+    
+    Dependencies of packages that pass verification are not checked.  Installations that share an 
+    installation prefix are built once.
+    
+    Args:
+        root (Installation): The package to install.
+        force_reinstall (bool): If True, rebuild packages even if they pass verification.
+        
+    Returns:
+        list: :any:`_Package` objects, each after the packages it depends on.
+        
+    Raises:
+        SoftwarePackageError: A package is not installed correctly and cannot be built.
+    """
+    packages = {}
+    order = []
+    def visit(installation):
+        if not installation.needs_install(force_reinstall):
+            return None
+        prefix = installation.install_prefix
+        pkg = packages.get(prefix)
+        if pkg:
+            pkg.duplicates.append(installation)
+            return pkg
+        pkg = packages[prefix] = _Package(installation)
+        for dependency in installation.dependencies.itervalues():
+            dep_pkg = visit(dependency)
+            if dep_pkg and dep_pkg not in pkg.dependencies:
+                pkg.dependencies.append(dep_pkg)
+        order.append(pkg)
+        return pkg
+    visit(root)
+    return order
+
+
+def _build(installation, force_reinstall):
+    prefix = installation.install_prefix
+    package_lock = lock.get_lock(os.path.dirname(prefix), '.%s.lock' % os.path.basename(prefix))
+    with package_lock.exclusive():
+        if not force_reinstall:
+            # Another process may have built the package while we waited for the lock
+            try:
+                installation.verify()
+            except SoftwarePackageError:
+                pass
+            else:
+                LOGGER.info("%s was installed by another process", installation.title)
+                return
+        installation.build()
+
+
+def _worker(installation, force_reinstall, jobs, results):
+    """Build a package in a child process and report the outcome.
+    
+    Args:
+        installation (Installation): The installation to build.
+        force_reinstall (bool): If True, rebuild the package even if it passes verification.
+        jobs (int): Number of make jobs to use.
+        results (multiprocessing.Queue): Queue for (installation prefix, error) tuples, where error is None
+                                         or the failure message and hints.
+    """
+    os.environ['__TAUCMDR_MAX_MAKE_JOBS__'] = str(jobs)
+    # Progress bars of concurrent builds would draw over each other
+    os.environ['__TAUCMDR_PROGRESS_BARS__'] = 'disabled'
+    # The parent's locks are not held by this process
+    lock.reset_after_fork()
+    error = None
+    try:
+        _build(installation, force_reinstall)
+    except Exception as err: # pylint: disable=broad-except
+        LOGGER.debug("%s build failed", installation.title, exc_info=True)
+        error = getattr(err, 'value', str(err)), getattr(err, 'hints', [])
+    # The process exits without running atexit handlers
+    timing.write()
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+    results.put((installation.install_prefix, error))
+
+
+def _wait(running, results):
+    """Wait for at least one build to finish.
+    
+    Args:
+        running (list): Packages being built.
+        results (multiprocessing.Queue): Queue of build outcomes.
+        
+    Returns:
+        list: (package, error) tuples, where error is None or a :any:`SoftwarePackageError`.
+    """
+    finished = []
+    messages = {}
+    while not finished:
+        # A process that exited has already queued its message
+        exited = [pkg for pkg in running if not pkg.process.is_alive()]
+        try:
+            while True:
+                prefix, error = results.get(not (exited or messages), 1)
+                messages[prefix] = error
+        except Queue.Empty:
+            pass
+        for pkg in running:
+            prefix = pkg.installation.install_prefix
+            if prefix in messages:
+                error = messages.pop(prefix)
+                if error is not None:
+                    value, hints = error
+                    error = SoftwarePackageError(value, *hints)
+                finished.append((pkg, error))
+            elif pkg in exited:
+                finished.append((pkg, SoftwarePackageError("%s build exited with status %s" % 
+                                                           (pkg.installation.title, pkg.process.exitcode))))
+    for pkg, _ in finished:
+        pkg.process.join()
+    return finished
+
+
+def install(root, force_reinstall=False):
+    """Install a package and any of its dependencies that must be built.
+    
+    Args:
+        root (Installation): The package to install.
+        force_reinstall (bool): If True, rebuild packages even if they pass verification.
+        
+    Raises:
+        SoftwarePackageError: A package could not be installed.
+    """
+    pending = plan(root, force_reinstall)
+    if not pending:
+        return
+    # Download every missing source archive now instead of one at a time as each build starts.
+    # Builds that are missing a source archive report the problem themselves.
+    acquire_sources([pkg.installation for pkg in pending if not build_cache.contains(pkg.installation)])
+    free = int(parallel_make_flags()[1])
+    running = []
+    errors = []
+    results = None
+    try:
+        while pending or running:
+            for pkg in list(pending):
+                failed = [dep for dep in pkg.dependencies if dep.state == _FAILED]
+                if failed:
+                    LOGGER.info("Not installing %s because %s installation failed", 
+                                pkg.installation.title, failed[0].installation.title)
+                    pkg.state = _FAILED
+                    pending.remove(pkg)
+            ready = [pkg for pkg in pending if all(dep.state == _DONE for dep in pkg.dependencies)]
+            if len(ready) == 1 and not running:
+                # Every other package depends on this one, so build it in this process
+                pkg = ready[0]
+                pending.remove(pkg)
+                _build(pkg.installation, force_reinstall)
+                pkg.state = _DONE
+                for installation in pkg.duplicates:
+                    installation.verify()
+                continue
+            while ready and free:
+                pkg = ready.pop(0)
+                pkg.jobs = max(1, free // (len(ready) + 1))
+                free -= pkg.jobs
+                if results is None:
+                    # Children must not create the temporary directory since only this process deletes it
+                    tmpfs_prefix()
+                    results = multiprocessing.Queue()
+                LOGGER.info("Building %s with %d make jobs", pkg.installation.title, pkg.jobs)
+                pkg.process = multiprocessing.Process(target=_worker, 
+                                                      args=(pkg.installation, force_reinstall, pkg.jobs, results))
+                pkg.process.daemon = True
+                pkg.process.start()
+                pkg.state = _RUNNING
+                pending.remove(pkg)
+                running.append(pkg)
+            if not running:
+                continue
+            for pkg, error in _wait(running, results):
+                running.remove(pkg)
+                free += pkg.jobs
+                if error:
+                    LOGGER.debug("%s installation failed: %s", pkg.installation.title, error.value)
+                    pkg.state = _FAILED
+                    errors.append(error)
+                else:
+                    # Update this process's view of the new installation
+                    for installation in [pkg.installation] + pkg.duplicates:
+                        installation.verify()
+                    pkg.state = _DONE
+    finally:
+        for pkg in running:
+            pkg.process.terminate()
+    if errors:
+        raise errors[0]
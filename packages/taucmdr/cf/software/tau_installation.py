@@ -42,6 +42,7 @@ import re
 import sys
 import ast
 import glob
+import json
 import shutil
 import datetime
 import shlex
@@ -49,10 +50,10 @@ import resource
 import tempfile
 import multiprocessing
 from subprocess import CalledProcessError
-from taucmdr import logger, util
+from taucmdr import logger, util, timing
 from taucmdr.util import get_command_output
 from taucmdr.error import ConfigurationError, InternalError
-from taucmdr.cf.software import SoftwarePackageError
+from taucmdr.cf.software import SoftwarePackageError, build_cache
 from taucmdr.cf.software.installation import Installation, parallel_make_flags, new_os_environ
 from taucmdr.cf.compiler import host as host_compilers, InstalledCompilerSet
 from taucmdr.cf.compiler.host import CC, CXX, FC, UPC, GNU, APPLE_LLVM, IBM
@@ -63,6 +64,7 @@ from taucmdr.cf.compiler.caf import CAF_FC
 from taucmdr.cf.compiler.python import PY
 from taucmdr.cf.platforms import TauMagic, DARWIN, CRAY_CNL, IBM_BGL, IBM_BGP, IBM_BGQ, HOST_ARCH, HOST_OS
 from taucmdr.cf.platforms import INTEL_KNL, INTEL_KNC
+from taucmdr.cf.probe import probe_output
 
 
 LOGGER = logger.get_logger(__name__)
@@ -71,6 +73,8 @@ REPOS = {None: 'http://tau.uoregon.edu/tau.tgz'}
 
 NIGHTLY = 'http://fs.paratools.com/tau-nightly.tgz'
 
+MAKEFILE_INDEX = '.makefile_index.json'
+
 DATA_TOOLS = ['jumpshot',
               'paraprof',
               'perfdmf_configure',
@@ -150,6 +154,10 @@ PROFILE_ANALYSIS_TOOLS = 'paraprof', 'pprof'
 
 TRACE_ANALYSIS_TOOLS = 'jumpshot', 'vampir'
 
+_UNMANAGED_HINTS = ["Allow TAU Commander to manage your TAU configurations",
+                    "Check for earlier error or warning messages",
+                    "Ask your system administrator to build any missing TAU configurations mentioned above"]
+
 PROGRAM_LAUNCHERS = {'mpirun': ['-app', '--app', '-configfile'],
                      'mpiexec': ['-app', '--app', '-configfile'],
                      'mpiexec.hydra': ['-app', '--app', '-configfile'],
@@ -351,6 +359,7 @@ class TauInstallation(Installation):
                                               sources, target_arch, target_os, compilers, 
                                               REPOS, COMMANDS, None, None)
         self._tau_makefile = None
+        self._makefile_index = None
         self._install_tag = None
         self._all_sources = sources
         if self.src == 'nightly':
@@ -444,7 +453,7 @@ class TauInstallation(Installation):
         for met in self.metrics:
             mets.extend(met.split(','))
         self.metrics = mets
-        uses = lambda pkg: sources[pkg] if forced_makefile else getattr(self, 'uses_'+pkg) 
+        uses = lambda pkg: sources.get(pkg) if forced_makefile else getattr(self, 'uses_'+pkg) 
         for pkg in 'binutils', 'libunwind', 'papi', 'pdt', 'ompt', 'libotf2':
             if uses(pkg):
                 self.add_dependency(pkg, sources)
@@ -498,7 +507,8 @@ class TauInstallation(Installation):
         uid_parts.extend(sorted(comp.uid for comp in self.compilers.itervalues()))
         # TAU changes if any dependencies change.
         for pkg in 'binutils', 'libunwind', 'papi', 'pdt', 'ompt', 'libotf2', 'scorep':
-            if getattr(self, 'uses_'+pkg):
+            # Dependencies are not created for a forced makefile unless their sources are given
+            if getattr(self, 'uses_'+pkg) and pkg in self.dependencies:
                 uid_parts.append(self.dependencies[pkg].uid)
         # TAU changes if any of its hard-coded limits change
         uid_parts.extend([str(self._get_max_threads()), str(self._get_max_metrics())])
@@ -647,6 +657,69 @@ class TauInstallation(Installation):
                 self._verify_iowrapper(tau_makefile)
         LOGGER.debug("TAU installation at '%s' is valid", self.install_prefix)
 
+    def _installations(self):
+        """Iterate over this installation and its dependencies, recursively.
+        
+        Dependencies are neither installed nor verified if the TAU makefile was forced so they
+        are omitted in that case.
+        
+        Yields:
+            tuple: (str, Installation) path of package names from TAU to the package, and the package.
+        """
+        if self.forced_makefile:
+            yield 'tau', self
+            return
+        pending = [('tau', self)]
+        while pending:
+            path, pkg = pending.pop()
+            yield path, pkg
+            pending.extend((path+'/'+name, dep) for name, dep in pkg.dependencies.iteritems())
+
+    def configuration_stamp(self):
+        """Describe this installation after it has been installed and verified.
+        
+        See :any:`load_configuration_stamp`.
+        
+        Returns:
+            dict: Installation prefixes of TAU and all dependencies and the TAU makefile.
+        """
+        return {'prefixes': {path: pkg.install_prefix for path, pkg in self._installations()},
+                'tau_makefile': self._tau_makefile}
+
+    def load_configuration_stamp(self, stamp):
+        """Use a previously verified installation without verifying it again.
+        
+        The installation prefixes and makefile recorded by :any:`configuration_stamp` are used 
+        if they still exist.  Nothing else is checked so the caller must make sure that `stamp`
+        was recorded for an installation with the same configuration as this one.
+        
+        Args:
+            stamp (dict): Value returned by :any:`configuration_stamp`.
+            
+        Returns:
+            bool: True if this installation is ready to use, False if it must be installed.
+        """
+        self.check_env_compat()
+        try:
+            prefixes = stamp['prefixes']
+            makefile = stamp['tau_makefile']
+        except (KeyError, TypeError):
+            return False
+        pkgs = dict(self._installations())
+        if set(prefixes) != set(pkgs):
+            return False
+        for path in prefixes.itervalues():
+            if not os.path.isdir(path):
+                LOGGER.debug("'%s' no longer exists", path)
+                return False
+        if makefile and not os.path.isfile(makefile):
+            LOGGER.debug("'%s' no longer exists", makefile)
+            return False
+        for path, pkg in pkgs.iteritems():
+            pkg._set_install_prefix(prefixes[path]) # pylint: disable=protected-access
+        self._tau_makefile = makefile
+        return True
+
     def _select_flags(self, header, libglobs, user_libraries, wrap_cc, wrap_cxx, wrap_fc):
         def unique(seq):
             seen = set()
@@ -694,6 +767,7 @@ class TauInstallation(Installation):
             selected_library = '#'.join(parts)
         return selected_inc, selected_lib, selected_library
 
+    @timing.timed('configure', 'install phase')
     def configure(self):
         """Configures TAU
 
@@ -890,6 +964,7 @@ print(find_version())
         if util.create_subprocess(cmd, cwd=self._src_prefix, stdout=False, show_progress=True):
             raise SoftwarePackageError('TAU configure failed')
 
+    @timing.timed('make install', 'install phase')
     def make_install_minimal(self):
         cmd = ['make', '-k', 'install'] + parallel_make_flags()
         LOGGER.info('Compiling TAU utilities...')
@@ -898,6 +973,7 @@ print(find_version())
         # If they don't build then package verification will fail so no harm done.  
         util.create_subprocess(cmd, cwd=os.path.join(self._src_prefix, 'utils'), stdout=False, show_progress=True)
 
+    @timing.timed('make install', 'install phase')
     def make_install(self):
         """Installs TAU to ``self.install_prefix``.
 
@@ -911,45 +987,55 @@ print(find_version())
         if util.create_subprocess(cmd, cwd=self._src_prefix, stdout=False, show_progress=True):
             raise SoftwarePackageError('TAU compilation/installation failed')
 
-    def install(self, force_reinstall=False):
-        """Installs TAU.
-
-        Configures, compiles, and installs TAU with all necessarry makefiles and libraries.
+    def needs_install(self, force_reinstall=False):
+        """Check if TAU must be configured, compiled, and installed.
 
         Args:
             force_reinstall (bool): Set to True to force reinstall even if TAU is already installed and working.
 
+        Returns:
+            bool: True if TAU must be built, False if TAU is installed and working or the TAU makefile was forced.
+
         Raises:
-            SoftwarePackageError: TAU failed installation or did not pass verification after it was installed.
+            SoftwarePackageError: TAU is not installed correctly and cannot be reconfigured.
         """
         self.check_env_compat()
         if self.forced_makefile:
             forced_install_prefix = os.path.abspath(os.path.join(os.path.dirname(self.forced_makefile), '..', '..'))
             self._set_install_prefix(forced_install_prefix)
             LOGGER.warning("TAU makefile was forced! Not verifying TAU installation")
-            return
-        unmanaged_hints = ["Allow TAU Commander to manage your TAU configurations",
-                           "Check for earlier error or warning messages",
-                           "Ask your system administrator to build any missing TAU configurations mentioned above"]
+            return False
         if self.unmanaged or not force_reinstall:
             try:
-                return self.verify()
+                self.verify()
             except SoftwarePackageError as err:
                 if self.unmanaged:
                     raise SoftwarePackageError("%s source package is unavailable and the installation at '%s' "
                                                "is invalid:\n\n    %s" % (self.title, self.install_prefix, err),
-                                               *unmanaged_hints)
+                                               *_UNMANAGED_HINTS)
                 elif not force_reinstall:
                     LOGGER.info("TAU must be reconfigured: %s", err)
+            else:
+                return False
         if self.unmanaged and not util.path_accessible(self.src, 'w'):
             raise SoftwarePackageError("Unable to configure TAU: '%s' is not writable." % self.install_prefix,
-                                       *unmanaged_hints)
-        # Check dependencies after verifying TAU instead of before in case 
-        # we're using an unmanaged TAU or forced makefile. 
-        for pkg in self.dependencies.itervalues():
-            pkg.install(force_reinstall)
+                                       *_UNMANAGED_HINTS)
+        return True
+
+    def build(self):
+        """Configures, compiles, and installs TAU with all necessarry makefiles and libraries.
+
+        Dependencies must already be installed.
+
+        Raises:
+            SoftwarePackageError: TAU failed installation or did not pass verification after it was installed.
+        """
         LOGGER.info("Installing %s at '%s'", self.title, self.install_prefix)
-        with new_os_environ(), util.umask(002):
+        # The cache can only provide a whole TAU installation, not add a configuration to one
+        if not os.path.exists(self.install_prefix) and build_cache.restore(self):
+            self.set_group()
+            return
+        with timing.span(self.name, 'install'), new_os_environ(), util.umask(002):
             try:
                 # Keep reconfiguring the same source because that's how TAU works
                 if not (self.include_path and os.path.isdir(self.include_path)):
@@ -960,7 +1046,7 @@ print(find_version())
             except SoftwarePackageError as err:
                 if not util.path_accessible(self.install_prefix, 'w'):
                     err.value += ": the TAU installation at '%s' is not writable" % self.install_prefix
-                    err.hints = ["Grant write permission on '%s'" % self.install_prefix] + unmanaged_hints + err.hints
+                    err.hints = ["Grant write permission on '%s'" % self.install_prefix] + _UNMANAGED_HINTS + err.hints
                     parent_prefix = os.path.dirname(self.install_prefix)
                     if util.path_accessible(parent_prefix, 'w'):
                         err.value += " (but the parent directory is)"
@@ -970,7 +1056,7 @@ print(find_version())
                 raise
         # Verify the new installation
         LOGGER.info("Verifying %s installation...", self.title)
-        return self.verify()
+        self.verify()
     
     def installation_sequence(self):
         self.configure()
@@ -981,6 +1067,7 @@ print(find_version())
         # Rebuild makefile cache on next call to get_makefile() 
         # since a new, possibly better makefile is now available
         self._tau_makefile = None
+        self._update_makefile_index()
 
     def _compiler_tags(self):
         return {host_compilers.INTEL: 'intel' if self.tau_magic.operating_system is CRAY_CNL else 'icpc',
@@ -1073,26 +1160,103 @@ print(find_version())
     def _makefile_tags(self, makefile):
         return set(os.path.basename(makefile).split('.')[1].split('-')[1:])
 
+    def _makefile_index_path(self):
+        return os.path.join(self.install_prefix, MAKEFILE_INDEX)
+
+    def _update_makefile_index(self):
+        """Indexes the TAU makefiles in :any:`lib_path` by their tags.
+        
+        The index assigns each tag a bit and stores each makefile's tags as a bitmask.
+        It is stored in :any:`MAKEFILE_INDEX` in the installation prefix, keyed by the 
+        library subdirectory so installations for several targets can share a prefix. 
+        Failure to store the index is not an error.
+        
+        Returns:
+            dict: The makefile index of :any:`lib_path`.
+        """
+        try:
+            mtime = os.path.getmtime(self.lib_path)
+        except OSError:
+            return {'mtime': None, 'tags': [], 'makefiles': {}}
+        tags, bits, makefiles = [], {}, {}
+        for makefile in sorted(glob.glob(os.path.join(self.lib_path, 'Makefile.tau*'))):
+            mask = 0
+            for tag in self._makefile_tags(makefile):
+                if tag not in bits:
+                    bits[tag] = 1 << len(tags)
+                    tags.append(tag)
+                mask |= bits[tag]
+            makefiles[os.path.basename(makefile)] = mask
+        LOGGER.debug("Indexed makefiles in '%s': %s", self.lib_path, sorted(makefiles))
+        index = {'mtime': mtime, 'tags': tags, 'makefiles': makefiles}
+        self._makefile_index = index
+        path = self._makefile_index_path()
+        try:
+            with open(path) as fin:
+                indexes = json.load(fin)
+        except (IOError, ValueError):
+            indexes = {}
+        indexes[self._lib_subdir] = index
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            with open(tmp_path, 'w') as fout:
+                json.dump(indexes, fout)
+            os.rename(tmp_path, path)
+        except (IOError, OSError) as err:
+            LOGGER.debug("Unable to write makefile index '%s': %s", path, err)
+        return index
+
+    def _get_makefile_index(self):
+        """Returns the makefile index of :any:`lib_path`.
+        
+        The stored index is used while the modification time of :any:`lib_path` matches the index, 
+        i.e. until makefiles are added or removed, e.g. by building TAU outside of TAU Commander.
+        
+        Returns:
+            dict: The makefile index of :any:`lib_path`.
+        """
+        try:
+            mtime = os.path.getmtime(self.lib_path)
+        except OSError:
+            return {'mtime': None, 'tags': [], 'makefiles': {}}
+        if self._makefile_index and self._makefile_index['mtime'] == mtime:
+            return self._makefile_index
+        try:
+            with open(self._makefile_index_path()) as fin:
+                index = json.load(fin)[self._lib_subdir]
+        except (IOError, ValueError, KeyError, TypeError):
+            index = None
+        if not index or index.get('mtime') != mtime:
+            return self._update_makefile_index()
+        self._makefile_index = index
+        return index
+
     def _match_makefile(self, config_tags):
-        tau_makefiles = glob.glob(os.path.join(self.lib_path, 'Makefile.tau*'))
-        LOGGER.debug("Found makefiles: '%s'", tau_makefiles)
+        index = self._get_makefile_index()
         dangerous_tags = self._incompatible_tags()
         LOGGER.debug("Will not use makefiles containing tags: %s", dangerous_tags)
-        approx_tags = None
+        bits = dict((tag, 1 << i) for i, tag in enumerate(index['tags']))
+        missing = config_tags.difference(bits)
+        if missing:
+            LOGGER.debug("No makefile has tags: %s", missing)
+            return None
+        config_mask = sum(bits[tag] for tag in config_tags)
+        dangerous_mask = sum(bits[tag] for tag in dangerous_tags if tag in bits)
+        approx_mask = None
         approx_makefile = None
-        for makefile in tau_makefiles:
-            tags = self._makefile_tags(makefile)
-            LOGGER.debug("%s has tags: %s", makefile, tags)
-            if config_tags <= tags:
-                LOGGER.debug("%s contains desired tags: %s", makefile, config_tags)
-                if tags <= config_tags:
-                    LOGGER.debug("Found TAU makefile %s", makefile)
-                    return makefile
-                elif not tags.intersection(dangerous_tags):
-                    if not approx_tags or tags < approx_tags:
-                        approx_makefile = makefile
-                        approx_tags = tags
-        return approx_makefile
+        for makefile, mask in sorted(index['makefiles'].iteritems()):
+            if config_mask & ~mask:
+                continue
+            LOGGER.debug("%s contains desired tags: %s", makefile, config_tags)
+            if mask == config_mask:
+                LOGGER.debug("Found TAU makefile %s", makefile)
+                return os.path.join(self.lib_path, str(makefile))
+            elif not mask & dangerous_mask:
+                # Prefer the makefile with the fewest extra tags
+                if approx_mask is None or (mask != approx_mask and (mask & ~approx_mask) == 0):
+                    approx_makefile = makefile
+                    approx_mask = mask
+        return os.path.join(self.lib_path, str(approx_makefile)) if approx_makefile else None
     
     def get_makefile(self):
         """Returns an absolute path to a TAU_MAKEFILE.
@@ -1351,6 +1515,23 @@ print(find_version())
         else:
             return compiler.absolute_path
 
+    def get_passthrough_command(self, compiler):
+        """Get a command that compiles exactly as :any:`compile` would without TAU Commander.
+
+        Args:
+            compiler (InstalledCompiler): A compiler to find a command for.
+
+        Returns:
+            list: Compiler command without arguments, or None if compilation requires a TAU compiler 
+                  wrapper or options added by :any:`compiletime_config`.
+        """
+        if self.get_compiler_command(compiler) != compiler.absolute_path:
+            return None
+        if self.sample and not self.baseline:
+            # compiletime_config adds debugging symbols for sampling
+            return None
+        return [compiler.absolute_path]
+
     def compile(self, compiler, compiler_args):
         """Executes a compilation command.
 
@@ -1368,10 +1549,38 @@ print(find_version())
         Returns:
             int: Compiler return value (always 0 if no exception raised).
         """
+        cmd, env = self.compile_command(compiler)
+        return self.execute_compile(cmd + compiler_args, env)
+
+    def compile_command(self, compiler):
+        """Get the command and environment used to compile with TAU.
+
+        Args:
+            compiler (InstalledCompiler): A compiler command.
+
+        Returns:
+            tuple: (cmd, env) where `cmd` is the compiler wrapper command and options as a list, 
+                   to which the compiler command line arguments should be appended, and `env` 
+                   is a dictionary of environment variables.
+        """
         self.install()
         opts, env = self.compiletime_config(compiler)
-        compiler_cmd = self.get_compiler_command(compiler)
-        cmd = [compiler_cmd] + opts + compiler_args
+        return [self.get_compiler_command(compiler)] + opts, env
+
+    @staticmethod
+    def execute_compile(cmd, env):
+        """Executes a compilation command returned by :any:`compile_command`.
+
+        Args:
+            cmd (list): Compiler wrapper command, options, and compiler command line arguments.
+            env (dict): Environment variables.
+
+        Raises:
+            ConfigurationError: Compilation failed.
+
+        Returns:
+            int: Compiler return value (always 0 if no exception raised).
+        """
         tau_env_opts = sorted('%s=%s' % item for item in env.iteritems() if item[0].startswith('TAU_'))
         LOGGER.debug('\n'.join(tau_env_opts))
         LOGGER.debug(' '.join(cmd))
@@ -1660,7 +1869,7 @@ print(find_version())
     
     def _prep_data_analysis_tools(self):
         """Checks that data analysis tools are installed, or installs them if needed."""
-        if not glob.glob(os.path.join(self.lib_path, 'Makefile.tau*')):
+        if not self._get_makefile_index()['makefiles']:
             return self.install()
         for cmd in DATA_TOOLS:
             path = os.path.join(self.bin_path, cmd)
@@ -1832,7 +2041,7 @@ print(find_version())
     def get_python_version(self, python_path):
         _, env = self.runtime_config()
         cmd = [python_path , '--version']
-        out = util.get_command_output(cmd)
+        out = probe_output(cmd)
         p=re.compile('\d+\.\d+\.\d+')
         m = p.search(out)
         return m.group()
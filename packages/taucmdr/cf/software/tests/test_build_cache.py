@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Test functions.
+
+Functions used for unit tests of build_cache.py.
+"""
+
+import os
+import json
+import tarfile
+from cStringIO import StringIO
+from taucmdr import util
+from taucmdr.tests import TestCase
+from taucmdr.cf.software import SoftwarePackageError, build_cache
+
+
+class _Package(object):
+    """Stands in for an :any:`Installation`."""
+
+    def __init__(self, name, uid, *dependencies):
+        self.name = self.title = name
+        self.uid = uid
+        self.install_prefix = None
+        self.unmanaged = False
+        self.dependencies = dict((dep.name, dep) for dep in dependencies)
+
+    def verify(self):
+        if not os.path.isdir(self.install_prefix):
+            raise SoftwarePackageError("%s is not installed" % self.name)
+
+
+class BuildCacheTest(TestCase):
+    """Unit tests for :any:`build_cache`."""
+
+    def setUp(self):
+        self.workdir = os.path.join(os.getcwd(), self._testMethodName)
+        self.cache = os.path.join(self.workdir, 'cache')
+        self.dep = _Package('dep', 'd' * 8)
+        self.pkg = _Package('pkg', 'p' * 8, self.dep)
+        self._place(os.path.join(self.workdir, 'a_long_storage_prefix'))
+        old_prefix, dep_prefix = self.pkg.install_prefix, self.dep.install_prefix
+        util.mkdirp(os.path.join(old_prefix, 'lib'), os.path.join(old_prefix, 'etc'), dep_prefix)
+        with open(os.path.join(old_prefix, 'etc', 'config'), 'w') as fout:
+            fout.write("prefix=%s\ndep=%s/lib\n" % (old_prefix, dep_prefix))
+        with open(os.path.join(old_prefix, 'lib', 'libpkg.so'), 'wb') as fout:
+            fout.write('\x7fELF\xff\0%s/lib:%s/lib\0tail\0' % (old_prefix, dep_prefix))
+        os.symlink(os.path.join(old_prefix, 'lib', 'libpkg.so'), os.path.join(old_prefix, 'lib', 'link.so'))
+        os.chmod(os.path.join(old_prefix, 'etc'), 0555)
+        self.published = build_cache.publish(self.pkg, self.cache)
+
+    def tearDown(self):
+        for root, dirs, _ in os.walk(self.workdir):
+            for name in dirs:
+                os.chmod(os.path.join(root, name), 0755)
+
+    def _place(self, storage_prefix):
+        for package in self.pkg, self.dep:
+            package.install_prefix = os.path.join(storage_prefix, package.name, package.uid)
+
+    def test_publish(self):
+        self.assertEqual(self.published, [os.path.join(self.cache, 'dep', 'd' * 8 + '.tar.gz'),
+                                          os.path.join(self.cache, 'pkg', 'p' * 8 + '.tar.gz')])
+        self.assertEqual(build_cache.publish(self.pkg, self.cache), [])
+        self.assertEqual(len(build_cache.publish(self.pkg, self.cache, replace=True)), 2)
+
+    def test_restore(self):
+        self._place(os.path.join(self.workdir, 'short'))
+        prefix, dep_prefix = self.pkg.install_prefix, self.dep.install_prefix
+        self.assertTrue(build_cache.restore(self.pkg, self.cache))
+        with open(os.path.join(prefix, 'etc', 'config')) as fin:
+            self.assertEqual(fin.read(), "prefix=%s\ndep=%s/lib\n" % (prefix, dep_prefix))
+        with open(os.path.join(prefix, 'lib', 'libpkg.so'), 'rb') as fin:
+            data = fin.read()
+        paths = '%s/lib:%s/lib' % (prefix, dep_prefix)
+        padding = 2 * (len('a_long_storage_prefix') - len('short'))
+        self.assertEqual(data, '\x7fELF\xff\0%s%s\0tail\0' % (paths, '\0' * padding))
+        self.assertEqual(os.readlink(os.path.join(prefix, 'lib', 'link.so')), 
+                         os.path.join(prefix, 'lib', 'libpkg.so'))
+        self.assertEqual(os.stat(os.path.join(prefix, 'etc')).st_mode & 0777, 0555)
+
+    def test_restore_longer_prefix(self):
+        self._place(os.path.join(self.workdir, 'an_even_longer_storage_prefix'))
+        self.assertFalse(build_cache.restore(self.pkg, self.cache))
+        self.assertFalse(os.path.exists(self.pkg.install_prefix))
+        
+    def test_not_cached(self):
+        self.pkg.uid = 'x' * 8
+        self._place(os.path.join(self.workdir, 'short'))
+        self.assertFalse(build_cache.restore(self.pkg, self.cache))
+        self.assertFalse(build_cache.restore(self.pkg, None))
+
+    def _forge(self, *members):
+        """Replace the package's archive with one holding the given (name, type, linkname) members."""
+        self._place(os.path.join(self.workdir, 'a_long_storage_prefix'))
+        path = build_cache.cache_path(self.pkg, self.cache)
+        metadata = json.dumps({'name': 'pkg', 'uid': self.pkg.uid, 
+                               'prefixes': {self.pkg.uid: self.pkg.install_prefix, 
+                                            self.dep.uid: self.dep.install_prefix}})
+        with tarfile.open(path, 'w:gz') as archive:
+            info = tarfile.TarInfo(build_cache.METADATA_FILE)
+            info.size = len(metadata)
+            archive.addfile(info, StringIO(metadata))
+            for name, kind, linkname in members:
+                info = tarfile.TarInfo(name)
+                info.type = kind
+                info.linkname = linkname
+                info.mode = 0755 if kind == tarfile.DIRTYPE else 0644
+                if kind == tarfile.REGTYPE:
+                    info.size = len(name)
+                archive.addfile(info, StringIO(name) if kind == tarfile.REGTYPE else None)
+        self._place(os.path.join(self.workdir, 'short'))
+
+    def test_restore_symlink_outside(self):
+        self._forge(('prefix', tarfile.DIRTYPE, ''), 
+                    ('prefix/etc', tarfile.SYMTYPE, '/etc'))
+        self.assertFalse(build_cache.restore(self.pkg, self.cache))
+        self._forge(('prefix', tarfile.DIRTYPE, ''), 
+                    ('prefix/etc', tarfile.SYMTYPE, '../../../..'))
+        self.assertFalse(build_cache.restore(self.pkg, self.cache))
+        self.assertFalse(os.path.exists(self.pkg.install_prefix))
+
+    def test_restore_symlink_parent(self):
+        # Links to a dependency are allowed, but nothing may be extracted through them
+        old_dep_prefix = os.path.join(self.workdir, 'a_long_storage_prefix', 'dep', self.dep.uid)
+        self._forge(('prefix', tarfile.DIRTYPE, ''), 
+                    ('prefix/dep', tarfile.SYMTYPE, old_dep_prefix),
+                    ('prefix/dep/planted', tarfile.REGTYPE, ''))
+        self.assertFalse(build_cache.restore(self.pkg, self.cache))
+        self.assertFalse(os.path.exists(os.path.join(old_dep_prefix, 'planted')))
+        self._forge(('prefix', tarfile.DIRTYPE, ''), 
+                    ('prefix/dep', tarfile.SYMTYPE, old_dep_prefix))
+        self.assertTrue(build_cache.restore(self.pkg, self.cache))
+        self.assertEqual(os.readlink(os.path.join(self.pkg.install_prefix, 'dep')), self.dep.install_prefix)
+
+    def test_restore_hardlink_outside(self):
+        outside = os.path.join(self.workdir, 'outside')
+        with open(outside, 'w') as fout:
+            fout.write(outside)
+        old_prefix = self.pkg.install_prefix
+        for linkname in outside, 'prefix/../../outside', 'prefix/lib/libpkg.so':
+            self._forge(('prefix', tarfile.DIRTYPE, ''), 
+                        ('prefix/lib', tarfile.SYMTYPE, old_prefix + '/lib'),
+                        ('prefix/hard', tarfile.LNKTYPE, linkname))
+            self.assertFalse(build_cache.restore(self.pkg, self.cache))
+        self.assertEqual(os.stat(outside).st_nlink, 1)
+        self._forge(('prefix', tarfile.DIRTYPE, ''), 
+                    ('prefix/file', tarfile.REGTYPE, ''),
+                    ('prefix/hard', tarfile.LNKTYPE, 'prefix/file'))
+        self.assertTrue(build_cache.restore(self.pkg, self.cache))
+        self.assertEqual(os.stat(os.path.join(self.pkg.install_prefix, 'hard')).st_nlink, 2)
+
+    def test_restore_special_file(self):
+        self._forge(('prefix', tarfile.DIRTYPE, ''), 
+                    ('prefix/fifo', tarfile.FIFOTYPE, ''))
+        self.assertFalse(build_cache.restore(self.pkg, self.cache))
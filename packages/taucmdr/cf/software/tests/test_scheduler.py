@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Test functions.
+
+Functions used for unit tests of scheduler.py.
+"""
+
+import os
+import time
+from taucmdr import util
+from taucmdr.tests import TestCase
+from taucmdr.cf.software import SoftwarePackageError, scheduler
+
+
+class _Package(object):
+    """Stands in for an :any:`Installation` that takes a moment to build."""
+
+    def __init__(self, prefix, name, *dependencies, **kwargs):
+        self.name = self.title = name
+        self.install_prefix = os.path.join(prefix, kwargs.get('dirname', name))
+        self.dependencies = dict((dep.name, dep) for dep in dependencies)
+        self.fail = kwargs.get('fail', False)
+        self.src = None
+        self.unmanaged = False
+
+    @property
+    def marker(self):
+        return os.path.join(self.install_prefix, 'built')
+
+    def verify(self):
+        if not os.path.exists(self.marker):
+            raise SoftwarePackageError("%s is not installed" % self.name)
+
+    def needs_install(self, force_reinstall=False):
+        try:
+            self.verify()
+        except SoftwarePackageError:
+            return True
+        return force_reinstall
+
+    def build(self):
+        start = time.time()
+        time.sleep(0.2)
+        if self.fail:
+            raise SoftwarePackageError("%s failed" % self.name, "Try again")
+        util.mkdirp(self.install_prefix)
+        with open(self.marker, 'a') as fout:
+            fout.write('%f %f %s %d\n' % (start, time.time(), os.environ.get('__TAUCMDR_MAX_MAKE_JOBS__'), os.getpid()))
+
+    def builds(self):
+        """Return (start, end, jobs, pid) for each build."""
+        with open(self.marker) as fin:
+            return [(float(start), float(end), jobs, int(pid)) 
+                    for start, end, jobs, pid in (line.split() for line in fin)]
+
+
+class SchedulerTest(TestCase):
+    """Unit tests for :any:`scheduler`."""
+
+    def setUp(self):
+        self.prefix = os.path.join(os.getcwd(), self._testMethodName)
+        self._max_jobs = os.environ.get('__TAUCMDR_MAX_MAKE_JOBS__')
+        os.environ['__TAUCMDR_MAX_MAKE_JOBS__'] = '4'
+
+    def tearDown(self):
+        if self._max_jobs is None:
+            del os.environ['__TAUCMDR_MAX_MAKE_JOBS__']
+        else:
+            os.environ['__TAUCMDR_MAX_MAKE_JOBS__'] = self._max_jobs
+
+    def test_parallel(self):
+        first = _Package(self.prefix, 'first')
+        second = _Package(self.prefix, 'second')
+        root = _Package(self.prefix, 'root', first, second)
+        scheduler.install(root)
+        (start1, end1, jobs1, pid1), = first.builds()
+        (start2, end2, jobs2, pid2), = second.builds()
+        (start3, _, jobs3, pid3), = root.builds()
+        self.assertLess(start1, end2)
+        self.assertLess(start2, end1)
+        self.assertGreaterEqual(start3, max(end1, end2))
+        self.assertEqual((jobs1, jobs2, jobs3), ('2', '2', '4'))
+        self.assertNotEqual(pid1, os.getpid())
+        self.assertNotEqual(pid2, os.getpid())
+        self.assertEqual(pid3, os.getpid())
+
+    def test_failure(self):
+        good = _Package(self.prefix, 'good')
+        bad = _Package(self.prefix, 'bad', fail=True)
+        root = _Package(self.prefix, 'root', good, bad)
+        with self.assertRaises(SoftwarePackageError) as context:
+            scheduler.install(root)
+        self.assertEqual(context.exception.value, "bad failed")
+        self.assertEqual(context.exception.hints, ["Try again"])
+        good.verify()
+        self.assertFalse(os.path.exists(root.install_prefix))
+
+    def test_installed(self):
+        missing = _Package(self.prefix, 'missing')
+        root = _Package(self.prefix, 'root', missing)
+        util.mkdirp(root.install_prefix)
+        open(root.marker, 'w').close()
+        scheduler.install(root)
+        self.assertFalse(os.path.exists(missing.install_prefix))
+
+    def test_shared_prefix(self):
+        shared = _Package(self.prefix, 'shared')
+        other = _Package(self.prefix, 'other', _Package(self.prefix, 'copy', dirname='shared'))
+        root = _Package(self.prefix, 'root', shared, other)
+        self.assertEqual(len(scheduler.plan(root)), 3)
+        scheduler.install(root)
+        self.assertEqual(len(shared.builds()), 1)
+        self.assertEqual(len(root.builds()), 1)
+        
+    def test_force_reinstall(self):
+        dependency = _Package(self.prefix, 'dependency')
+        root = _Package(self.prefix, 'root', dependency)
+        scheduler.install(root)
+        scheduler.install(root, force_reinstall=True)
+        self.assertEqual(len(dependency.builds()), 2)
+        self.assertEqual(len(root.builds()), 2)
@@ -30,9 +30,70 @@
 Functions used for unit tests of tau_installation.py.
 """
 
-
+import os
+import json
+from taucmdr import util
 from taucmdr.tests import TestCase, not_implemented
+from taucmdr.cf.software.tau_installation import TauInstallation, MAKEFILE_INDEX
 
 @not_implemented
 class TauInstallationTest(TestCase):
     pass
+
+
+class MakefileIndexTest(TestCase):
+    """Unit tests for the TAU makefile index."""
+
+    def setUp(self):
+        # Only the attributes used by makefile matching
+        # pylint: disable=protected-access
+        self.inst = TauInstallation.__new__(TauInstallation)
+        self.inst._install_prefix = os.path.join(os.getcwd(), self._testMethodName)
+        self.inst._lib_subdir = os.path.join('x86_64', 'lib')
+        self.inst._makefile_index = None
+        self.inst._incompatible_tags = lambda: set(['mpi'])
+        util.mkdirp(self.inst.lib_path)
+        for tags in 'uid-pdt', 'uid-pdt-papi', 'uid-pdt-papi-openmp', 'uid-mpi-pdt-papi-python':
+            self._add_makefile(tags)
+        mtime = int(os.path.getmtime(self.inst.lib_path)) - 10
+        os.utime(self.inst.lib_path, (mtime, mtime))
+
+    def _add_makefile(self, tags):
+        with open(os.path.join(self.inst.lib_path, 'Makefile.tau-%s' % tags), 'w') as fout:
+            fout.write('# %s\n' % tags)
+
+    def _match(self, *tags):
+        # pylint: disable=protected-access
+        makefile = self.inst._match_makefile(set(tags))
+        return os.path.basename(makefile) if makefile else None
+
+    def test_exact(self):
+        self.assertEqual(self._match('uid', 'pdt', 'papi'), 'Makefile.tau-uid-pdt-papi')
+        self.assertEqual(self._match('papi', 'uid', 'pdt', 'mpi', 'python'), 'Makefile.tau-uid-mpi-pdt-papi-python')
+
+    def test_superset(self):
+        self.assertEqual(self._match('uid', 'openmp'), 'Makefile.tau-uid-pdt-papi-openmp')
+        # The makefile with python also has the incompatible 'mpi' tag
+        self.assertEqual(self._match('uid', 'papi'), 'Makefile.tau-uid-pdt-papi')
+        self.assertEqual(self._match('uid', 'python'), None)
+        self.assertEqual(self._match('uid', 'cupti'), None)
+
+    def test_stored(self):
+        # pylint: disable=protected-access
+        self._match('uid')
+        index_path = os.path.join(self.inst.install_prefix, MAKEFILE_INDEX)
+        with open(index_path) as fin:
+            index = json.load(fin)[self.inst._lib_subdir]
+        self.assertEqual(len(index['makefiles']), 4)
+        # Another process answers from the stored index without listing the makefiles
+        self.inst._makefile_index = None
+        os.rename(os.path.join(self.inst.lib_path, 'Makefile.tau-uid-pdt'),
+                  os.path.join(self.inst.install_prefix, 'Makefile.tau-uid-pdt'))
+        mtime = index['mtime']
+        os.utime(self.inst.lib_path, (mtime, mtime))
+        self.assertEqual(self._match('uid', 'pdt'), 'Makefile.tau-uid-pdt')
+
+    def test_new_makefile(self):
+        self.assertEqual(self._match('uid', 'pdt', 'cupti'), None)
+        self._add_makefile('uid-pdt-cupti')
+        self.assertEqual(self._match('uid', 'pdt', 'cupti'), 'Makefile.tau-uid-pdt-cupti')
@@ -83,12 +83,53 @@ class AbstractStorage(object):
     
     Record = StorageRecord
 
+    _change_listeners = []
+
     def __init__(self, name):
         self.name = name
         
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def add_change_listener(listener):
+        """Register a function to call whenever records in any storage container may have changed.
+        
+        Records may change when they are written, when a transaction begins or is rolled back, 
+        and when the database is purged, disconnected, or destroyed.  Caches of records, e.g. 
+        :any:`IDENTITY_MAP`, use this to discard stale records.
+        
+        Args:
+            listener: Callable accepting the changed :any:`AbstractStorage` as its only argument.
+        """
+        AbstractStorage._change_listeners.append(listener)
+
+    def _changed(self):
+        """Notify listeners registered with :any:`add_change_listener` that records may have changed."""
+        for listener in AbstractStorage._change_listeners:
+            listener(self)
+
+    def shared_lock(self):
+        """Lock the storage container so other processes may read but not modify it.
+        
+        Reading records does not require a lock since storage files are replaced atomically. 
+        Hold the shared lock to keep several related reads consistent with each other.
+        
+        Returns:
+            Context manager that holds the lock.
+        """
+        from taucmdr.cf.storage.lock import get_lock
+        return get_lock(self.prefix).shared()
+
+    def exclusive_lock(self):
+        """Lock the storage container so other processes may neither read nor modify it.
+        
+        Returns:
+            Context manager that holds the lock.
+        """
+        from taucmdr.cf.storage.lock import get_lock
+        return get_lock(self.prefix).exclusive()
+
     @abstractmethod
     def __len__(self):
         """Return the number of items in the key/value store."""
@@ -141,6 +182,14 @@ class AbstractStorage(object):
     def disconnect_database(self, *args, **kwargs):
         """Close the database for reading and writing."""
 
+    @abstractmethod
+    def record_paths(self):
+        """Get the files whose modification time changes when records in this storage change.
+        
+        Returns:
+            list: Absolute paths to files or directories, some of which may not exist.
+        """
+
     @abstractmethod
     def prefix(self):
         """Get the filesystem prefix for file storage.
@@ -254,6 +303,22 @@ class AbstractStorage(object):
             ValueError: Invalid value for `keys`.
         """
 
+    @abstractmethod
+    def referencing(self, field, eids, table_name=None):
+        """Find records that refer to any of the given element identifiers.
+        
+        A record refers to an element identifier if `field` is set to that identifier or to a 
+        list containing that identifier, i.e. `field` is a `model` or `collection` attribute.
+        
+        Args:
+            field (string): Name of the data field holding references.
+            eids (list): Element identifiers of the referenced records.
+            table_name (str): Name of the table to operate on.  See :any:`AbstractStorage.table`.
+
+        Returns:
+            list: Referencing data records.
+        """
+
     @abstractmethod
     def contains(self, keys, table_name=None, match_any=False):
         """Check if the specified table contains at least one matching record.
@@ -290,6 +355,20 @@ class AbstractStorage(object):
             Record: The new record.
         """
 
+    @abstractmethod
+    def insert_many(self, data, table_name=None):
+        """Create many new records at once.
+        
+        Equivalent to ``[insert(element) for element in data]`` but the table is modified only once.
+        
+        Args:
+            data (list): Data dictionaries to insert in table.
+            table_name (str): Name of the table to operate on.  See :any:`AbstractStorage.table`.
+            
+        Returns:
+            list: The new records in the same order as `data`.
+        """
+
     @abstractmethod
     def update(self, fields, keys, table_name=None, match_any=False):
         """Update records.
@@ -310,6 +389,18 @@ class AbstractStorage(object):
             ValueError: ``bool(keys) == False`` or invaild value for `keys`.
         """
 
+    @abstractmethod
+    def update_many(self, changes, table_name=None):
+        """Update many records at once, each with its own data.
+        
+        Equivalent to ``[update(fields, eid) for eid, fields in changes.iteritems()]`` but the 
+        table is modified only once.
+        
+        Args:
+            changes (dict): Data to record keyed by element identifier.
+            table_name (str): Name of the table to operate on.  See :any:`AbstractStorage.table`.
+        """
+
     @abstractmethod      
     def unset(self, fields, keys, table_name=None, match_any=False):
         """Update records by unsetting fields.
@@ -352,6 +443,17 @@ class AbstractStorage(object):
             ValueError: ``bool(keys) == False`` or invaild value for `keys`.
         """
 
+    @abstractmethod
+    def remove_many(self, eids, table_name=None):
+        """Delete many records at once.
+        
+        Equivalent to ``[remove(eid) for eid in eids]`` but the table is modified only once.
+        
+        Args:
+            eids (list): Element identifiers of the records to delete.
+            table_name (str): Name of the table to operate on.  See :any:`AbstractStorage.table`.
+        """
+
     @abstractmethod
     def purge(self, table_name=None):
         """Delete all records.
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Content-addressed storage for large record fields.
+
+Large field values, like a trial's environment or program output, are compressed and stored in
+files named by the SHA-256 digest of their content.  Records hold a short reference to the value
+so parsing the database never parses the large values, and identical values are stored only once.
+"""
+
+import os
+import zlib
+import errno
+import hashlib
+from taucmdr import logger, util
+from taucmdr.cf.storage import StorageError
+
+LOGGER = logger.get_logger(__name__)
+
+REF_PREFIX = 'sha256:'
+"""str: Prefix of every blob reference."""
+
+
+class BlobStore(object):
+    """A compressed, content-addressed file store.
+    
+    The blob with reference ``sha256:<digest>`` is stored in ``<prefix>/<digest[:2]>/<digest[2:]>``.
+    Blobs are never modified after they are written so concurrent writers of the same value are safe.
+    
+    Attributes:
+        prefix (str): Absolute path to the directory containing the blobs.
+    """
+    
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    @staticmethod
+    def is_ref(value):
+        """Check if a field value is a blob reference.
+        
+        Args:
+            value: A record field value.
+            
+        Returns:
+            bool: True if `value` is a blob reference, False otherwise.
+        """
+        return isinstance(value, basestring) and value.startswith(REF_PREFIX)
+
+    def _path(self, ref):
+        if not self.is_ref(ref):
+            raise ValueError(ref)
+        digest = ref[len(REF_PREFIX):]
+        return os.path.join(self.prefix, digest[:2], digest[2:])
+
+    def __contains__(self, ref):
+        return self.is_ref(ref) and os.path.exists(self._path(ref))
+
+    def put(self, data):
+        """Store a value.
+        
+        Does nothing if the value is already stored.
+        
+        Args:
+            data (str): The value to store.
+            
+        Returns:
+            str: Reference to the stored value.
+            
+        Raises:
+            StorageError: The blob could not be written.
+        """
+        if isinstance(data, unicode):
+            data = data.encode('utf-8')
+        ref = REF_PREFIX + hashlib.sha256(data).hexdigest()
+        path = self._path(ref)
+        if os.path.exists(path):
+            return ref
+        try:
+            util.atomic_write(path, zlib.compress(data), 0444)
+        except (IOError, OSError) as err:
+            raise StorageError("Failed to write blob '%s': %s" % (path, err), "Check that you have `write` access")
+        LOGGER.debug("Stored %d bytes as '%s'", len(data), path)
+        return ref
+
+    def get(self, ref):
+        """Retrieve a value.
+        
+        Args:
+            ref (str): Reference returned by :any:`put`.
+            
+        Returns:
+            str: The stored value.
+            
+        Raises:
+            ValueError: `ref` is not a blob reference.
+            StorageError: The blob is missing or corrupt.
+        """
+        path = self._path(ref)
+        try:
+            with open(path, 'rb') as fin:
+                data = zlib.decompress(fin.read())
+        except (IOError, zlib.error) as err:
+            raise StorageError("Failed to read blob '%s': %s" % (path, err))
+        if REF_PREFIX + hashlib.sha256(data).hexdigest() != ref:
+            raise StorageError("Blob '%s' is corrupt" % path)
+        return data
+
+    def size(self, ref):
+        """Returns the size in bytes of the compressed blob on disk without reading it.
+        
+        Args:
+            ref (str): Reference returned by :any:`put`.
+            
+        Returns:
+            int: Compressed size of the blob or None if the blob is missing.
+        """
+        try:
+            return os.path.getsize(self._path(ref))
+        except OSError:
+            return None
+
+    def remove(self, ref):
+        """Delete a value.
+        
+        Does nothing if the blob does not exist.  The caller must ensure that no record still refers to it.
+        
+        Args:
+            ref (str): Reference returned by :any:`put`.
+        """
+        try:
+            os.remove(self._path(ref))
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                raise StorageError("Failed to remove blob '%s': %s" % (self._path(ref), err))
@@ -40,19 +40,29 @@ want to install software packages at the project level to avoid quotas or in sit
 where :any:`USER_PREFIX` is not accessible from cluster compute nodes.
 """
 
+import os
 from taucmdr import SYSTEM_PREFIX, USER_PREFIX
 from taucmdr.cf.storage import StorageError
 from taucmdr.cf.storage.local_file import LocalFileStorage
-from taucmdr.cf.storage.project import ProjectStorage
+from taucmdr.cf.storage.sqlite_file import SqliteStorage
+from taucmdr.cf.storage.project import ProjectStorage, SqliteProjectStorage
 
 
-SYSTEM_STORAGE = LocalFileStorage('system', SYSTEM_PREFIX)
+SQLITE_LEVELS = [name.strip() for name in os.environ.get('__TAUCMDR_SQLITE_STORAGE__', '').split(',') if name]
+"""list: Names of storage levels that use the SQLite backend instead of a JSON file.
+
+Set the ``__TAUCMDR_SQLITE_STORAGE__`` environment variable to a comma-separated list of level 
+names, e.g. ``project,user``, to select the SQLite backend for those levels.  Existing JSON records
+are imported the first time the SQLite database is opened.
+"""
+
+SYSTEM_STORAGE = (SqliteStorage if 'system' in SQLITE_LEVELS else LocalFileStorage)('system', SYSTEM_PREFIX)
 """System-level data storage."""
 
-USER_STORAGE = LocalFileStorage('user', USER_PREFIX)
+USER_STORAGE = (SqliteStorage if 'user' in SQLITE_LEVELS else LocalFileStorage)('user', USER_PREFIX)
 """User-level data storage."""
 
-PROJECT_STORAGE = ProjectStorage()
+PROJECT_STORAGE = (SqliteProjectStorage if 'project' in SQLITE_LEVELS else ProjectStorage)()
 """Project-level data storage."""
 
 ORDERED_LEVELS = (PROJECT_STORAGE, USER_STORAGE, SYSTEM_STORAGE)
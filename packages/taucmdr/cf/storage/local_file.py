@@ -34,17 +34,64 @@ both the database and the key/value store.
 
 import os
 import json
+import stat
 import tinydb
 import tempfile
 from tinydb import operations
+from tinydb.storages import Storage
 from tinydb.middlewares import CachingMiddleware
-from taucmdr import logger, util
+from taucmdr import logger, util, timing
 from taucmdr.error import ConfigurationError
 from taucmdr.cf.storage import AbstractStorage, StorageRecord, StorageError
+from taucmdr.cf.storage.blob_store import BlobStore
 
 LOGGER = logger.get_logger(__name__)
 
 
+def _index_key(value):
+    """Convert a record field value to a hashable key for the in-memory indexes.
+    
+    Lists and dictionaries are converted to tuples and frozensets so that fields holding 
+    collections (e.g. a model's `collection` attributes) can be indexed.  Byte strings are
+    decoded so they hash the same as the equivalent unicode strings.
+    
+    Args:
+        value: A record field value as loaded from JSON.
+        
+    Returns:
+        A hashable object that compares equal to the key of any equal field value.
+    """
+    if isinstance(value, str):
+        try:
+            return value.decode('utf-8')
+        except UnicodeDecodeError:
+            return value
+    elif isinstance(value, list):
+        return tuple(_index_key(item) for item in value)
+    elif isinstance(value, dict):
+        return frozenset((key, _index_key(val)) for key, val in value.iteritems())
+    return value
+
+
+def _index_keys(kind, value):
+    """List the keys under which a record field value appears in an in-memory index.
+    
+    A ``'value'`` index maps whole field values to records to answer lookups like ``{'name': 'foo'}``.
+    A ``'references'`` index maps each element identifier held by a `model` or `collection` field to 
+    the records holding it, i.e. it is a reverse-reference index.
+    
+    Args:
+        kind (str): ``'value'`` or ``'references'``.
+        value: A record field value as loaded from JSON.
+        
+    Returns:
+        list: Hashable index keys.
+    """
+    if kind == 'references':
+        values = value if isinstance(value, list) else [value]
+        return [val for val in values if isinstance(val, (int, long)) and not isinstance(val, bool)]
+    return [_index_key(value)]
+
 
 class _JsonRecord(StorageRecord):
     eid_type = int
@@ -59,6 +106,16 @@ class _JsonRecord(StorageRecord):
         return json.dumps(self)
 
 
+def _write_json(path, data):
+    """Atomically replace a JSON file.
+    
+    Args:
+        path (str): Path to the JSON file.  The file may not exist.
+        data: JSON serializable data.
+    """
+    util.atomic_write(path, json.dumps(data))
+
+
 class _JsonFileStorage(tinydb.JSONStorage):
     """Allow read-only as well as read-write access to the JSON file.
     
@@ -77,11 +134,136 @@ class _JsonFileStorage(tinydb.JSONStorage):
             self.readonly = False
             LOGGER.debug("'%s' opened read-write", path)
 
-    def write(self, *args, **kwargs):
+    def write(self, data):
+        if self.readonly:
+            raise ConfigurationError("Cannot write to '%s'" % self.path, "Check that you have `write` access.")
+        _write_json(self.path, data)
+        self._handle.close()
+        self._handle = open(self.path, 'r+')
+
+
+class _LazyTables(dict):
+    """Database tables keyed by table name, each loaded from its file the first time it is accessed.
+    
+    TinyDB always replaces a table's data by assigning to its key so every assignment marks the
+    table as modified.
+    
+    Attributes:
+        dirty (set): Names of tables that have been modified since they were last written.
+    """
+    def __init__(self, load, names):
+        super(_LazyTables, self).__init__()
+        self.dirty = set()
+        self._load = load
+        self._unloaded = set(names)
+
+    def __missing__(self, name):
+        if name not in self._unloaded:
+            raise KeyError(name)
+        self._unloaded.remove(name)
+        value = self._load(name)
+        super(_LazyTables, self).__setitem__(name, value)
+        return value
+
+    def __setitem__(self, name, value):
+        self._unloaded.discard(name)
+        self.dirty.add(name)
+        super(_LazyTables, self).__setitem__(name, value)
+
+    def __contains__(self, name):
+        return name in self._unloaded or super(_LazyTables, self).__contains__(name)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._unloaded) + super(_LazyTables, self).__len__()
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self._unloaded) + super(_LazyTables, self).keys()
+
+
+class _JsonTableStorage(Storage):
+    """Store each table in its own JSON file in the database directory.
+    
+    Tables are read from disk only when they are accessed and only modified tables are written back.
+    """
+    def __init__(self, path):
+        super(_JsonTableStorage, self).__init__()
+        if not os.path.isdir(path):
+            os.mkdir(path)
+        self.path = path
+        self.readonly = not os.access(path, os.W_OK)
+        LOGGER.debug("'%s' opened %s", path, 'read-only' if self.readonly else 'read-write')
+
+    def _table_file(self, name):
+        return os.path.join(self.path, name + '.json')
+
+    def _load(self, name):
+        with open(self._table_file(name)) as fin:
+            return json.load(fin)
+
+    def read(self):
+        names = [fname[:-5] for fname in os.listdir(self.path) if fname.endswith('.json')]
+        return _LazyTables(self._load, names)
+
+    def write(self, data):
         if self.readonly:
             raise ConfigurationError("Cannot write to '%s'" % self.path, "Check that you have `write` access.")
+        if isinstance(data, _LazyTables):
+            names = data.dirty
         else:
-            super(_JsonFileStorage, self).write(*args, **kwargs)
+            # All tables replaced, e.g. by TinyDB.purge_tables
+            names = set(data)
+            for name in self.read().keys():
+                if name not in names:
+                    os.remove(self._table_file(name))
+        for name in names:
+            _write_json(self._table_file(name), data[name])
+        if isinstance(data, _LazyTables):
+            data.dirty.clear()
+
+    def close(self):
+        pass
+
+
+class _WriteBackMiddleware(CachingMiddleware):
+    """Keep the database in memory and write it to disk only when it has changed.
+    
+    Writes go straight to disk unless `deferred` is True, in which case they are held in memory 
+    until :any:`flush` is called.  Unmodified data is never written back.
+    
+    Attributes:
+        deferred (bool): If True, defer writes until the next call to :any:`flush`.
+        dirty (bool): True if the in-memory data has not been written to disk.
+    """
+    def __init__(self, storage_cls):
+        super(_WriteBackMiddleware, self).__init__(storage_cls)
+        self.deferred = False
+        self.dirty = False
+
+    def write(self, data):
+        self.cache = data
+        self.dirty = True
+        if not self.deferred:
+            self.flush()
+
+    def flush(self):
+        if self.dirty:
+            self.storage.write(self.cache)
+            self.dirty = False
+
+    def mark_clean(self):
+        """Declare that the in-memory data is identical to the data on disk."""
+        self.dirty = False
+        if isinstance(self.cache, _LazyTables):
+            self.cache.dirty.clear()
 
 
 class LocalFileStorage(AbstractStorage):
@@ -89,17 +271,50 @@ class LocalFileStorage(AbstractStorage):
     
     Uses :py:class:`TinyDB` for both the database and the key/value store.
     
+    Each table is stored in its own JSON file in the ``<prefix>/<name>.d`` directory.  A table's file
+    is read the first time the table is accessed and written only when the table is modified, so 
+    operations on small tables (e.g. Target) don't pay for the size of large tables (e.g. Trial).
+    A database in the older single file format, ``<prefix>/<name>.json``, is split into table files
+    when it is first connected, or opened read-only in place if the prefix is not writable.  The 
+    single file is left in place.
+    
+    Lookups by field value (e.g. ``{'name': 'foo'}`` or ``{'experiment': 3, 'number': 1}``) are 
+    answered from in-memory hash indexes rather than by scanning the table.  An index is built the
+    first time a table is queried on a field and is then maintained by every insert, update, unset,
+    and remove so later lookups on that field never scan the table.  :any:`referencing` uses 
+    reverse-reference indexes that are maintained the same way.  Indexes are discarded when a
+    transaction is rolled back or the database is disconnected.
+    
+    Transactions keep an undo log rather than a copy of the database.  The first time a record is
+    modified in the outermost transaction its original value is recorded, so the cost of a transaction
+    is proportional to the number of records it changes.  If the transaction fails then all recorded
+    values are restored in a single write.
+    
+    When :any:`WRITE_BACK` is True, modifications made inside the outermost transaction are kept in
+    memory and the database file is replaced once, atomically, when the transaction completes.
+    Modifications made outside of a transaction are written immediately.
+    
+    Large field values can be kept out of the database entirely by storing them in :any:`blobs`
+    and recording only the returned reference.
+    
     Attributes:
-        dbfile (str): Absolute path to database file.
+        dbfile (str): Absolute path to the database directory.
+        blobs (BlobStore): Content-addressed store for large field values in ``<prefix>/<name>.blobs``.
     """
     
     Record = _JsonRecord
     
+    WRITE_BACK = True
+    """bool: If True, write the database once at the end of the outermost transaction instead of on every change."""
+    
     def __init__(self, name, prefix):
         super(LocalFileStorage, self).__init__(name)
         self._transaction_count = 0
-        self._db_copy = None
+        self._transaction_span = None
+        self._after_commit = []
+        self._undo_log = None
         self._database = None
+        self._indexes = {}
         self._prefix = prefix
         
     def __len__(self):
@@ -173,16 +388,70 @@ class LocalFileStorage(AbstractStorage):
         """Disconnects the store filesystem."""
         self.disconnect_database()
 
+    @property
+    def dbfile(self):
+        return os.path.join(self.prefix, self.name + '.d')
+
+    @property
+    def record_paths(self):
+        # Table files are replaced by rename so the directory changes with every write
+        return [self.dbfile]
+
+    @property
+    def blobs(self):
+        return BlobStore(os.path.join(self.prefix, self.name + '.blobs'))
+
+    @property
+    def _legacy_dbfile(self):
+        """Absolute path to the database file used before tables were split into separate files."""
+        return os.path.join(self.prefix, self.name + '.json')
+
+    def _split_legacy_dbfile(self):
+        """Convert the single file database to one file per table.
+        
+        The table files are written to a temporary directory that is then renamed to :any:`dbfile`
+        so other processes see either the old database or the complete new database.  The old database
+        file is not modified so older versions of TAU Commander sharing the prefix can still read it.
+        """
+        legacy_dbfile = self._legacy_dbfile
+        with open(legacy_dbfile) as fin:
+            try:
+                data = json.load(fin)
+            except ValueError:
+                data = {}
+        tmp_dir = tempfile.mkdtemp(prefix='.%s.' % self.name, dir=self.prefix)
+        try:
+            for name, elements in data.iteritems():
+                _write_json(os.path.join(tmp_dir, name + '.json'), elements)
+            os.chmod(tmp_dir, stat.S_IMODE(os.stat(self.prefix).st_mode))
+            os.rename(tmp_dir, self.dbfile)
+        except OSError:
+            # Another process converted the database first
+            util.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isdir(self.dbfile):
+                raise
+        else:
+            LOGGER.info("Converted %s database '%s' to table files in '%s'.  "
+                        "'%s' is kept for older versions of TAU Commander but is no longer updated.",
+                        self.name, legacy_dbfile, self.dbfile, legacy_dbfile)
+
     def connect_database(self, *args, **kwargs):
         """Open the database for reading and writing."""
         if self._database is None:
             util.mkdirp(self.prefix)
-            dbfile = os.path.join(self.prefix, self.name + '.json')
+            dbfile = self.dbfile
             try:
-                storage = CachingMiddleware(_JsonFileStorage)
-                storage.WRITE_CACHE_SIZE = 0
+                if not os.path.isdir(dbfile) and os.path.exists(self._legacy_dbfile):
+                    if os.access(self.prefix, os.W_OK):
+                        self._split_legacy_dbfile()
+                    else:
+                        dbfile = self._legacy_dbfile
+                if dbfile == self._legacy_dbfile:
+                    storage = _WriteBackMiddleware(_JsonFileStorage)
+                else:
+                    storage = _WriteBackMiddleware(_JsonTableStorage)
                 self._database = tinydb.TinyDB(dbfile, storage=storage)
-            except IOError as err:
+            except (IOError, OSError) as err:
                 raise StorageError("Failed to access %s database '%s': %s" % (self.name, dbfile, err),
                                    "Check that you have `write` access")
             if not util.path_accessible(dbfile):
@@ -192,9 +461,11 @@ class LocalFileStorage(AbstractStorage):
 
     def disconnect_database(self, *args, **kwargs):
         """Close the database for reading and writing."""
-        if self._database:
+        self._changed()
+        if self._database is not None:
             self._database.close()
             self._database = None
+        self._indexes = {}
 
     @property
     def prefix(self):
@@ -207,23 +478,98 @@ class LocalFileStorage(AbstractStorage):
 
     def __enter__(self):
         """Initiates the database transaction."""
-        # Use protected methods to duplicate database in memory rather than on disk.
         # pylint: disable=protected-access
         if self._transaction_count == 0:
+            # Records may have been modified by another process since they were last read
+            self._changed()
+            self._transaction_span = timing.span(self.name + ' transaction', 'storage')
             self.connect_database()
-            self._db_copy = self._database._read()
+            self._undo_log = {}
+            self._database._storage.deferred = self.WRITE_BACK
         self._transaction_count += 1
         return self
 
     def __exit__(self, ex_type, value, traceback):
         """Finalizes the database transaction."""
-        # Use protected methods to duplicate database in memory rather than on disk.
         # pylint: disable=protected-access
         self._transaction_count -= 1
-        if ex_type and self._transaction_count == 0:
-            self._database._write(self._db_copy)
-            self._db_copy = None
-            return False
+        if self._transaction_count == 0:
+            undo_log, self._undo_log = self._undo_log, None
+            span, self._transaction_span = self._transaction_span, None
+            callbacks, self._after_commit = self._after_commit, []
+            try:
+                if self._database is None:
+                    return False
+                storage = self._database._storage
+                if ex_type:
+                    self._changed()
+                    if undo_log:
+                        self._rollback(undo_log)
+                    if storage.deferred:
+                        # Nothing was written during the transaction so the files already hold the original data
+                        storage.mark_clean()
+                storage.deferred = False
+                storage.flush()
+                if ex_type:
+                    return False
+            finally:
+                span.finish()
+            for callback in callbacks:
+                callback()
+
+    def after_commit(self, callback):
+        """Call a function when the current transaction is committed.
+        
+        Use this for changes outside the database that cannot be rolled back, e.g. removing
+        blobs that deleted records referred to.  `callback` is not called if the transaction
+        is rolled back.  Outside of a transaction it is called immediately.
+        
+        Args:
+            callback: Callable accepting no arguments.
+        """
+        if self._transaction_count:
+            self._after_commit.append(callback)
+        else:
+            callback()
+
+    def _log_undo(self, table_name, eid, element):
+        """Record the original value of an element the first time it changes in a transaction.
+        
+        Args:
+            table_name (str): Name of the table containing the element.
+            eid (int): Element identifier.
+            element (dict): The element's value before modification or None if the element is new.
+        """
+        if self._undo_log is not None:
+            key = (table_name, eid)
+            if key not in self._undo_log:
+                self._undo_log[key] = dict(element) if element is not None else None
+
+    def _rollback(self, undo_log):
+        """Restore the original values of all elements in `undo_log` with a single database write."""
+        # Use protected methods to restore elements in memory and write the database once.
+        # pylint: disable=protected-access
+        data = self._database._read()
+        restored = {}
+        for (table_name, eid), element in undo_log.iteritems():
+            name = '_default' if table_name is None else table_name
+            try:
+                elements = restored[name]
+            except KeyError:
+                elements = restored[name] = {int(key): val for key, val in data.get(name, {}).iteritems()}
+            if element is None:
+                elements.pop(eid, None)
+            else:
+                elements[eid] = element
+            self._indexes.pop(table_name, None)
+        for name, elements in restored.iteritems():
+            data[name] = elements
+        self._database._write(data)
+        for name, elements in restored.iteritems():
+            table = self._database.table(name)
+            table._query_cache.clear()
+            table._last_id = max([table._last_id] + elements.keys())
+        LOGGER.debug("%s: rolled back %d records", self.name, len(undo_log))
 
     def table(self, table_name):
         self.connect_database()
@@ -232,20 +578,117 @@ class LocalFileStorage(AbstractStorage):
         else:
             return self._database.table(table_name)
     
+    def _elements(self, table_name):
+        """Return the cached table data as a dictionary of elements keyed by element identifier.
+        
+        The dictionary belongs to the database cache so it must not be modified and must not be
+        retained across writes.  Keys may be strings (as loaded from JSON) or integers (as written). 
+        """
+        # pylint: disable=protected-access
+        return self._database._read('_default' if table_name is None else table_name)
+
     @staticmethod
-    def _query(keys, match_any):
-        """Construct a TinyDB query object."""
-        def _and(lhs, rhs): 
-            return lhs & rhs
-        def _or(lhs, rhs): 
-            return lhs | rhs
-        join = _or if match_any else _and
-        itr = keys.iteritems()
-        key, val = itr.next()
-        query = (tinydb.where(key) == val)
-        for key, value in itr:
-            query = join(query, (tinydb.where(key) == value))
-        return query
+    def _element(elements, eid):
+        """Find an element in the dictionary returned by :any:`_elements`."""
+        try:
+            return elements[eid]
+        except KeyError:
+            return elements.get(str(eid), None)
+        
+    def _field_index(self, table_name, field, kind='value'):
+        """Return the index mapping keys of `field` to element identifiers, building it if needed.
+        
+        See :any:`_index_keys` for the kinds of index.
+        """
+        table_indexes = self._indexes.setdefault(table_name, {})
+        try:
+            return table_indexes[field, kind]
+        except KeyError:
+            index = {}
+            for key, element in self._elements(table_name).iteritems():
+                try:
+                    value = element[field]
+                except KeyError:
+                    continue
+                for index_key in _index_keys(kind, value):
+                    index.setdefault(index_key, set()).add(int(key))
+            table_indexes[field, kind] = index
+            return index
+
+    def _index_add(self, table_name, eid, element):
+        """Add an element to all indexes on its table."""
+        for (field, kind), index in self._indexes.get(table_name, {}).iteritems():
+            try:
+                value = element[field]
+            except KeyError:
+                continue
+            for key in _index_keys(kind, value):
+                index.setdefault(key, set()).add(eid)
+
+    def _index_discard(self, table_name, eid, element):
+        """Remove an element from all indexes on its table."""
+        for (field, kind), index in self._indexes.get(table_name, {}).iteritems():
+            try:
+                value = element[field]
+            except KeyError:
+                continue
+            for key in _index_keys(kind, value):
+                eids = index.get(key, None)
+                if eids is not None:
+                    eids.discard(eid)
+                    if not eids:
+                        del index[key]
+
+    def _find(self, table_name, keys, match_any):
+        """Find the element identifiers of all records with fields matching `keys`.
+        
+        Args:
+            table_name (str): Name of the table to operate on.
+            keys (dict): Fields to match.
+            match_any (bool): If True then any key in `keys` may match or if False then all keys must match.
+            
+        Returns:
+            list: Sorted element identifiers of matching records.
+            
+        Raises:
+            ValueError: `keys` is empty.
+        """
+        if not keys:
+            raise ValueError(keys)
+        matches = [self._field_index(table_name, field).get(_index_key(value), set()) 
+                   for field, value in keys.iteritems()]
+        if match_any:
+            return sorted(set().union(*matches))
+        matches.sort(key=len)
+        return sorted(matches[0].intersection(*matches[1:]))
+
+    def _modify(self, table_name, eids, modify):
+        """Apply `modify` to the table and update the indexes of the affected elements.
+        
+        Args:
+            table_name (str): Name of the table to operate on.
+            eids (list): Identifiers of the elements that `modify` will change.
+            modify: Callable accepting the table object as its only argument.
+        """
+        table = self.table(table_name)
+        indexed = bool(self._indexes.get(table_name))
+        if self._undo_log is None and not indexed:
+            modify(table)
+            return
+        elements = self._elements(table_name)
+        for eid in eids:
+            element = self._element(elements, eid)
+            self._log_undo(table_name, eid, element)
+            if indexed and element is not None:
+                self._index_discard(table_name, eid, element)
+        modify(table)
+        if not indexed:
+            return
+        elements = self._elements(table_name)
+        for eid in eids:
+            element = self._element(elements, eid)
+            if element is not None:
+                self._index_add(table_name, eid, element)
 
     def count(self, table_name=None):
         """Count the records in the database.
@@ -281,22 +724,26 @@ class LocalFileStorage(AbstractStorage):
         Raises:
             ValueError: Invalid value for `keys`.
         """
-        table = self.table(table_name)
+        self.table(table_name)
         if keys is None:
             return None
         elif isinstance(keys, self.Record.eid_type):
             #LOGGER.debug("%s: get(eid=%r)", table_name, keys)
-            element = table.get(eid=keys)
+            eid = keys
         elif isinstance(keys, dict) and keys:
             #LOGGER.debug("%s: get(keys=%r)", table_name, keys)
-            element = table.get(self._query(keys, match_any))
+            eids = self._find(table_name, keys, match_any)
+            if not eids:
+                return None
+            eid = eids[0]
         elif isinstance(keys, (list, tuple)):
             #LOGGER.debug("%s: get(keys=%r)", table_name, keys)
             return [self.get(key, table_name=table_name, match_any=match_any) for key in keys]
         else:
             raise ValueError(keys)
+        element = self._element(self._elements(table_name), eid)
         if element:
-            return self.Record(self, element=element)
+            return self.Record(self, element=element, eid=eid)
         return None
 
     def search(self, keys=None, table_name=None, match_any=False):
@@ -327,11 +774,13 @@ class LocalFileStorage(AbstractStorage):
             return [self.Record(self, element=element) for element in table.all()]
         elif isinstance(keys, self.Record.eid_type):
             #LOGGER.debug("%s: search(eid=%r)", table_name, keys)
-            element = table.get(eid=keys)
-            return [self.Record(self, element=element)] if element else []
+            element = self._element(self._elements(table_name), keys)
+            return [self.Record(self, element=element, eid=keys)] if element else []
         elif isinstance(keys, dict) and keys:
             #LOGGER.debug("%s: search(keys=%r)", table_name, keys)
-            return [self.Record(self, element=element) for element in table.search(self._query(keys, match_any))]
+            elements = self._elements(table_name)
+            return [self.Record(self, element=self._element(elements, eid), eid=eid) 
+                    for eid in self._find(table_name, keys, match_any)]
         elif isinstance(keys, (list, tuple)):
             #LOGGER.debug("%s: search(keys=%r)", table_name, keys)
             result = []
@@ -372,6 +821,26 @@ class LocalFileStorage(AbstractStorage):
             #LOGGER.debug("%s: search(where(%s).matches('.*'))", table_name, field)
             return [self.Record(self, element=elem) for elem in table.search(tinydb.where(field).matches(".*"))]
 
+    def referencing(self, field, eids, table_name=None):
+        """Find records that refer to any of the given element identifiers.
+        
+        A record refers to an element identifier if `field` is set to that identifier or to a 
+        list containing that identifier, i.e. `field` is a `model` or `collection` attribute.
+        
+        Args:
+            field (string): Name of the data field holding references.
+            eids (list): Element identifiers of the referenced records.
+            table_name (str): Name of the table to operate on.  See :any:`AbstractDatabase.table`.
+
+        Returns:
+            list: Referencing data records.
+        """
+        self.table(table_name)
+        index = self._field_index(table_name, field, 'references')
+        matches = set().union(*[index.get(eid, ()) for eid in eids])
+        elements = self._elements(table_name)
+        return [self.Record(self, element=self._element(elements, eid), eid=eid) for eid in sorted(matches)]
+
     def contains(self, keys, table_name=None, match_any=False):
         """Check if the specified table contains at least one matching record.
         
@@ -393,15 +862,15 @@ class LocalFileStorage(AbstractStorage):
         Raises:
             ValueError: Invalid value for `keys`.
         """
-        table = self.table(table_name)
+        self.table(table_name)
         if keys is None:
             return False
         elif isinstance(keys, self.Record.eid_type):
             #LOGGER.debug("%s: contains(eid=%r)", table_name, keys)
-            return table.contains(eid=keys)
+            return bool(self._element(self._elements(table_name), keys))
         elif isinstance(keys, dict) and keys:
             #LOGGER.debug("%s: contains(keys=%r)", table_name, keys)
-            return table.contains(self._query(keys, match_any))
+            return bool(self._find(table_name, keys, match_any))
         elif isinstance(keys, (list, tuple)):
             return [self.contains(keys=key, table_name=table_name, match_any=match_any) for key in keys]
         else:
@@ -419,10 +888,41 @@ class LocalFileStorage(AbstractStorage):
         Returns:
             Record: The new record.
         """
+        self._changed()
         eid = self.table(table_name).insert(data)
+        self._log_undo(table_name, eid, None)
+        self._index_add(table_name, eid, data)
         record = self.Record(self, eid=eid, element=data)
         return record
 
+    def insert_many(self, data, table_name=None):
+        """Create many new records at once.
+        
+        If the table doesn't exist it will be created.
+        
+        Args:
+            data (list): Data dictionaries to insert in table.
+            table_name (str): Name of the table to operate on.  See :any:`AbstractDatabase.table`.
+            
+        Returns:
+            list: The new records in the same order as `data`.
+        """
+        self._changed()
+        table = self.table(table_name)
+        # Table.insert_multiple reads and writes the whole table once per element
+        # pylint: disable=protected-access
+        elements = table._read()
+        eids = []
+        for element in data:
+            eid = table._get_next_id()
+            elements[eid] = element
+            eids.append(eid)
+        table._write(elements)
+        for eid, element in zip(eids, data):
+            self._log_undo(table_name, eid, None)
+            self._index_add(table_name, eid, element)
+        return [self.Record(self, eid=eid, element=element) for eid, element in zip(eids, data)]
+
     def update(self, fields, keys, table_name=None, match_any=False):
         """Update records.
         
@@ -441,18 +941,33 @@ class LocalFileStorage(AbstractStorage):
         Raises:
             ValueError: ``bool(keys) == False`` or invaild value for `keys`.
         """
-        table = self.table(table_name)
+        self._changed()
+        self.table(table_name)
         if isinstance(keys, self.Record.eid_type):
             #LOGGER.debug("%s: update(%r, eid=%r)", table_name, fields, keys)
-            table.update(fields, eids=[keys])
+            eids = [keys]
         elif isinstance(keys, dict):
             #LOGGER.debug("%s: update(%r, keys=%r)", table_name, fields, keys)
-            table.update(fields, self._query(keys, match_any))
+            eids = self._find(table_name, keys, match_any)
         elif isinstance(keys, (list, tuple)):
             #LOGGER.debug("%s: update(%r, eids=%r)", table_name, fields, keys)
-            table.update(fields, eids=keys)
+            eids = keys
         else:
             raise ValueError(keys)
+        self._modify(table_name, eids, lambda table: table.update(fields, eids=eids))
+
+    def update_many(self, changes, table_name=None):
+        """Update many records at once, each with its own data.
+        
+        Args:
+            changes (dict): Data to record keyed by element identifier.
+            table_name (str): Name of the table to operate on.  See :any:`AbstractDatabase.table`.
+        """
+        self._changed()
+        eids = list(changes)
+        def _update(data, eid):
+            data[eid].update(changes[eid])
+        self._modify(table_name, eids, lambda table: table.process_elements(_update, eids=eids))
       
     def unset(self, fields, keys, table_name=None, match_any=False):
         """Update records by unsetting fields.
@@ -475,21 +990,23 @@ class LocalFileStorage(AbstractStorage):
         Raises:
             ValueError: ``bool(keys) == False`` or invaild value for `keys`.
         """
-        table = self.table(table_name)
+        self._changed()
+        self.table(table_name)
         if isinstance(keys, self.Record.eid_type):
-            for field in fields:
-                #LOGGER.debug("%s: unset(%s, eid=%r)", table_name, field, keys)
-                table.update(operations.delete(field), eids=[keys])
+            #LOGGER.debug("%s: unset(%s, eid=%r)", table_name, fields, keys)
+            eids = [keys]
         elif isinstance(keys, dict):
-            for field in fields:
-                #LOGGER.debug("%s: unset(%s, keys=%r)", table_name, field, keys)
-                table.update(operations.delete(field), self._query(keys, match_any))
+            #LOGGER.debug("%s: unset(%s, keys=%r)", table_name, fields, keys)
+            eids = self._find(table_name, keys, match_any)
         elif isinstance(keys, (list, tuple)):
-            for field in fields:
-                #LOGGER.debug("%s: unset(%s, eids=%r)", table_name, field, keys)
-                table.update(operations.delete(field), eids=keys)
+            #LOGGER.debug("%s: unset(%s, eids=%r)", table_name, fields, keys)
+            eids = keys
         else:
             raise ValueError(keys)
+        def _unset(table):
+            for field in fields:
+                table.update(operations.delete(field), eids=eids)
+        self._modify(table_name, eids, _unset)
         
     def remove(self, keys, table_name=None, match_any=False):
         """Delete records.
@@ -508,18 +1025,32 @@ class LocalFileStorage(AbstractStorage):
         Raises:
             ValueError: ``bool(keys) == False`` or invaild value for `keys`.
         """
-        table = self.table(table_name)
+        self._changed()
+        self.table(table_name)
         if isinstance(keys, self.Record.eid_type):
             #LOGGER.debug("%s: remove(eid=%r)", table_name, keys)
-            table.remove(eids=[keys])
+            eids = [keys]
         elif isinstance(keys, dict):
             #LOGGER.debug("%s: remove(keys=%r)", table_name, keys)
-            table.remove(self._query(keys, match_any))
+            eids = self._find(table_name, keys, match_any)
         elif isinstance(keys, (list, tuple)):
             #LOGGER.debug("%s: remove(eids=%r)", table_name, keys)
-            table.remove(eids=keys)
+            eids = keys
         else:
             raise ValueError(keys)
+        self.remove_many(eids, table_name=table_name)
+
+    def remove_many(self, eids, table_name=None):
+        """Delete many records at once.
+        
+        Args:
+            eids (list): Element identifiers of the records to delete.
+            table_name (str): Name of the table to operate on.  See :any:`AbstractDatabase.table`.
+        """
+        self._changed()
+        self.table(table_name)
+        eids = list(eids)
+        self._modify(table_name, eids, lambda table: table.remove(eids=eids))
 
     def purge(self, table_name=None):
         """Delete all records.
@@ -527,5 +1058,11 @@ class LocalFileStorage(AbstractStorage):
         Args:
             table_name (str): Name of the table to operate on.  See :any:`AbstractDatabase.table`.
         """
+        self._changed()
         LOGGER.debug("%s: purge()", table_name)
-        self.table(table_name).purge()
+        table = self.table(table_name)
+        if self._undo_log is not None:
+            for key, element in self._elements(table_name).iteritems():
+                self._log_undo(table_name, int(key), element)
+        table.purge()
+        self._indexes.pop(table_name, None)
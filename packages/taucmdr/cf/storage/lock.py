@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Reader/writer locks on storage containers.
+
+Each storage container has a lock file in its filesystem prefix.  Any number of processes may hold 
+the shared lock while they read related records, but a process must hold the exclusive lock while
+it makes changes that other processes must not observe half-done, e.g. choosing the next trial number.
+The locks are POSIX record locks taken via :any:`fcntl.lockf`, like :any:`fasteners`, so they are
+visible to other hosts on network filesystems that support record locking.
+"""
+
+import os
+import time
+import fcntl
+import errno
+import atexit
+from contextlib import contextmanager
+from taucmdr import logger, util, timing
+from taucmdr.cf.storage import StorageError
+
+LOGGER = logger.get_logger(__name__)
+
+LOCK_FILE = '.lock'
+"""str: Name of the lock file in a storage container's filesystem prefix."""
+
+SHARED = 'shared'
+EXCLUSIVE = 'exclusive'
+
+_OPERATIONS = {SHARED: fcntl.LOCK_SH, EXCLUSIVE: fcntl.LOCK_EX}
+
+
+class StorageLock(object):
+    """A reentrant reader/writer lock shared by all processes.
+    
+    POSIX record locks belong to the process and are all released when any descriptor of the lock 
+    file is closed, so there must be only one StorageLock object per lock file.  Use :any:`get_lock`
+    instead of creating StorageLock objects directly.
+    
+    Nested acquisitions only change the lock when they need a stronger lock than the one held.
+    Acquiring the exclusive lock while holding the shared lock is not atomic: another process may
+    take the exclusive lock in between.  Releasing the nested exclusive lock atomically returns 
+    to the shared lock.
+    
+    Attributes:
+        path (str): Absolute path to the lock file.
+        acquisitions (int): Number of times the lock was taken or converted.
+        waits (int): Number of acquisitions that had to wait for another process.
+        wait_time (float): Total seconds spent waiting for other processes.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.acquisitions = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self._fd = None
+        self._held = []
+        
+    def _mode(self):
+        if EXCLUSIVE in self._held:
+            return EXCLUSIVE
+        return SHARED if self._held else None
+        
+    def _open(self):
+        if self._fd is None:
+            try:
+                util.mkdirp(os.path.dirname(self.path))
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0666)
+            except (IOError, OSError) as err:
+                # A read-only container can still be locked for reading if the lock file exists
+                try:
+                    self._fd = os.open(self.path, os.O_RDONLY)
+                except (IOError, OSError):
+                    raise StorageError("Cannot open lock file '%s': %s" % (self.path, err))
+        return self._fd
+
+    def _lock(self, mode):
+        fd = self._open()
+        operation = _OPERATIONS[mode]
+        try:
+            fcntl.lockf(fd, operation | fcntl.LOCK_NB)
+        except (IOError, OSError) as err:
+            if err.errno not in (errno.EACCES, errno.EAGAIN):
+                raise StorageError("Cannot take %s lock on '%s': %s" % (mode, self.path, err))
+            LOGGER.debug("Waiting for %s lock on '%s'", mode, self.path)
+            start = time.time()
+            try:
+                with timing.span('lock wait', 'storage', path=self.path, mode=mode):
+                    fcntl.lockf(fd, operation)
+            except (IOError, OSError) as err:
+                raise StorageError("Cannot take %s lock on '%s': %s" % (mode, self.path, err))
+            waited = time.time() - start
+            self.waits += 1
+            self.wait_time += waited
+            LOGGER.debug("Waited %.3f seconds for %s lock on '%s'", waited, mode, self.path)
+        self.acquisitions += 1
+
+    def acquire(self, mode):
+        """Acquire the lock.
+        
+        Args:
+            mode (str): :any:`SHARED` or :any:`EXCLUSIVE`.
+            
+        Raises:
+            StorageError: The lock file could not be opened or locked.
+        """
+        held = self._mode()
+        if held is None or (mode == EXCLUSIVE and held == SHARED):
+            self._lock(mode)
+        self._held.append(mode)
+
+    def release(self):
+        """Release the most recent acquisition of the lock."""
+        mode = self._held.pop()
+        held = self._mode()
+        if held is None:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        elif held != mode:
+            fcntl.lockf(self._fd, fcntl.LOCK_SH)
+
+    @contextmanager
+    def _hold(self, mode):
+        self.acquire(mode)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def shared(self):
+        """Context manager that holds the shared lock."""
+        return self._hold(SHARED)
+
+    def exclusive(self):
+        """Context manager that holds the exclusive lock."""
+        return self._hold(EXCLUSIVE)
+
+
+_LOCKS = {}
+
+def get_lock(prefix, name=LOCK_FILE):
+    """Get the lock on a storage container's filesystem prefix.
+    
+    Args:
+        prefix (str): Absolute path to the storage container's filesystem prefix.
+        name (str): Name of the lock file in `prefix`.  Use a different name to lock something 
+                    other than the storage container, e.g. a software installation in the container.
+        
+    Returns:
+        StorageLock: The only lock object for the lock file in this process.
+    """
+    path = os.path.join(prefix, name)
+    try:
+        return _LOCKS[path]
+    except KeyError:
+        lock = _LOCKS[path] = StorageLock(path)
+        return lock
+
+
+def reset_after_fork():
+    """Forget the locks held by the parent process in a forked child process.
+    
+    Record locks are not inherited by :any:`os.fork`, but the child inherits the parent's 
+    :any:`StorageLock` objects, which would otherwise tell it that it holds the parent's locks.
+    Call this in the child before it acquires any lock.
+    """
+    for lock in _LOCKS.itervalues():
+        lock._held = [] # pylint: disable=protected-access
+
+
+def log_stats():
+    """Report lock acquisitions and waits in the debug log."""
+    for lock in _LOCKS.itervalues():
+        if lock.acquisitions:
+            LOGGER.debug("Lock '%s': %d acquisitions, waited %d times for %.3f seconds", 
+                         lock.path, lock.acquisitions, lock.waits, lock.wait_time)
+
+atexit.register(log_stats)
@@ -38,6 +38,7 @@ from taucmdr import logger, util
 from taucmdr import PROJECT_DIR
 from taucmdr.cf.storage import StorageError
 from taucmdr.cf.storage.local_file import LocalFileStorage
+from taucmdr.cf.storage.sqlite_file import SqliteStorage
 
 LOGGER = logger.get_logger(__name__)
 
@@ -62,6 +63,18 @@ class ProjectStorageError(StorageError):
         
 
 
+def _holds_database(prefix, *storages):
+    """Returns True if `prefix` contains the database of any of `storages`.
+    
+    Databases that have not yet been converted from the single ``<name>.json`` file are recognized too.
+    """
+    for storage in storages:
+        for dbfile in os.path.basename(storage.dbfile), storage.name + '.json':
+            if os.path.exists(os.path.join(prefix, dbfile)):
+                return True
+    return False
+
+
 class ProjectStorage(LocalFileStorage):
     """Handle the special case project storage.
     
@@ -81,7 +94,7 @@ class ProjectStorage(LocalFileStorage):
             project_prefix = self.prefix
         except ProjectStorageError:
             project_prefix = os.path.join(os.getcwd(), PROJECT_DIR)
-            if os.path.exists(os.path.join(project_prefix, USER_STORAGE.name + ".json")):
+            if _holds_database(project_prefix, USER_STORAGE):
                 raise StorageError("Cannot create project in home directory. "
                                    "Use '-@ user' option for user level storage.")
             try:
@@ -130,10 +143,7 @@ class ProjectStorage(LocalFileStorage):
             # Only check current working directory for project directory
             prefix = os.path.realpath(os.path.join(cwd, PROJECT_DIR))
             if os.path.isdir(prefix):
-                for exclude_storage in USER_STORAGE, SYSTEM_STORAGE:
-                    if os.path.exists(os.path.join(prefix, exclude_storage.name + ".json")):
-                        break
-                else:
+                if not _holds_database(prefix, USER_STORAGE, SYSTEM_STORAGE):
                     LOGGER.debug("Located project storage prefix '%s'", prefix)
                     self._prefix = prefix
                     return prefix
@@ -147,10 +157,7 @@ class ProjectStorage(LocalFileStorage):
         while root and root != lastroot:
             prefix = os.path.realpath(os.path.join(root, PROJECT_DIR))
             if os.path.isdir(prefix):
-                for exclude_storage in USER_STORAGE, SYSTEM_STORAGE:
-                    if os.path.exists(os.path.join(prefix, exclude_storage.name + ".json")):
-                        break
-                else:
+                if not _holds_database(prefix, USER_STORAGE, SYSTEM_STORAGE):
                     LOGGER.debug("Located project storage prefix '%s'", prefix)
                     self._prefix = prefix
                     return prefix
@@ -163,3 +170,7 @@ class ProjectStorage(LocalFileStorage):
 
     def tau_dir(self, taudir):
         self._tau_directory = taudir
+
+
+class SqliteProjectStorage(ProjectStorage, SqliteStorage):
+    """Project storage using the SQLite backend, see :any:`SqliteStorage`."""
@@ -0,0 +1,488 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+SQLite backend for storage containers.
+
+A persistant, transactional record storage system using :py:mod:`sqlite3` for both the
+database and the key/value store.  Records are stored as JSON documents and every top-level
+field of every record is indexed so lookups by field value take O(log n) time.  The database
+uses write-ahead logging so many processes may read the database while another process writes.
+"""
+
+import os
+import re
+import json
+import sqlite3
+from taucmdr import logger, util, timing
+from taucmdr.error import ConfigurationError
+from taucmdr.cf.storage import StorageError
+from taucmdr.cf.storage.local_file import LocalFileStorage, _JsonRecord
+
+LOGGER = logger.get_logger(__name__)
+
+_SCHEMA = ("CREATE TABLE IF NOT EXISTS tables (name TEXT PRIMARY KEY, last_eid INTEGER NOT NULL)",
+           "CREATE TABLE IF NOT EXISTS records (tbl TEXT NOT NULL, eid INTEGER NOT NULL, data TEXT NOT NULL, "
+           "PRIMARY KEY (tbl, eid))",
+           "CREATE TABLE IF NOT EXISTS fields (tbl TEXT NOT NULL, eid INTEGER NOT NULL, "
+           "field TEXT NOT NULL, value TEXT NOT NULL)",
+           "CREATE INDEX IF NOT EXISTS fields_by_value ON fields (tbl, field, value)",
+           "CREATE INDEX IF NOT EXISTS fields_by_eid ON fields (tbl, eid)",
+           "CREATE TABLE IF NOT EXISTS refs (tbl TEXT NOT NULL, eid INTEGER NOT NULL, "
+           "field TEXT NOT NULL, ref INTEGER NOT NULL)",
+           "CREATE INDEX IF NOT EXISTS refs_by_ref ON refs (tbl, field, ref)",
+           "CREATE INDEX IF NOT EXISTS refs_by_eid ON refs (tbl, eid)")
+
+_SCHEMA_VERSION = 1
+"""int: Incremented when :any:`_SCHEMA` adds tables that must be populated from existing records."""
+
+
+def _encode(value):
+    """Encode a field value so that equal values have equal encodings."""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+def _references(value):
+    """List the element identifiers held by a `model` or `collection` field value."""
+    values = value if isinstance(value, list) else [value]
+    return [val for val in values if isinstance(val, (int, long)) and not isinstance(val, bool)]
+
+
+class SqliteStorage(LocalFileStorage):
+    """A persistant, transactional record storage system.
+
+    Uses :py:mod:`sqlite3` for both the database and the key/value store.  Implements the same
+    interface as :any:`LocalFileStorage` and shares its filesystem handling, but stores records
+    in ``<prefix>/<name>.sqlite`` rather than JSON files.  If the SQLite database does not exist when
+    it is first connected but a :any:`LocalFileStorage` database does, the JSON records are imported.
+
+    Transactions map directly to SQLite transactions: the outermost ``with storage:`` block begins
+    an immediate transaction that is committed when the block exits normally or rolled back if it
+    raises an exception.
+    """
+
+    Record = _JsonRecord
+
+    TIMEOUT = 60
+    """int: Seconds to wait for another process to release its lock on the database."""
+
+    def __init__(self, name, prefix):
+        super(SqliteStorage, self).__init__(name, prefix)
+        self._connection = None
+
+    @property
+    def dbfile(self):
+        return os.path.join(self.prefix, self.name + '.sqlite')
+
+    @property
+    def record_paths(self):
+        # Writes go to the write-ahead log until it is checkpointed into the database file
+        return [self.dbfile, self.dbfile + '-wal']
+
+    def __str__(self):
+        """Human-readable identifier for this database."""
+        return self.dbfile
+
+    def connect_database(self, *args, **kwargs):
+        """Open the database for reading and writing."""
+        if self._connection is None:
+            util.mkdirp(self.prefix)
+            dbfile = self.dbfile
+            exists = os.path.exists(dbfile)
+            try:
+                connection = sqlite3.connect(dbfile, timeout=self.TIMEOUT, isolation_level=None)
+            except sqlite3.Error as err:
+                raise StorageError("Failed to access %s database '%s': %s" % (self.name, dbfile, err),
+                                   "Check that you have `write` access")
+            if not util.path_accessible(dbfile):
+                raise StorageError("Database file '%s' exists but cannot be read." % dbfile,
+                                   "Check that you have `read` access")
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                for statement in _SCHEMA:
+                    connection.execute(statement)
+                if connection.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                    self._upgrade_schema(connection)
+            except sqlite3.OperationalError as err:
+                if exists:
+                    LOGGER.debug("'%s' opened read-only: %s", dbfile, err)
+                else:
+                    raise StorageError("Failed to initialize %s database '%s': %s" % (self.name, dbfile, err),
+                                       "Check that you have `write` access")
+            self._connection = connection
+            LOGGER.debug("Initialized %s database '%s'", self.name, dbfile)
+            if not exists:
+                for json_path in super(SqliteStorage, self).dbfile, self._legacy_dbfile:
+                    if os.path.exists(json_path):
+                        self.import_json(json_path)
+                        break
+
+    @staticmethod
+    def _upgrade_schema(connection):
+        """Populate tables added to :any:`_SCHEMA` since the database was created."""
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM refs")
+            for tbl, eid, data in connection.execute("SELECT tbl, eid, data FROM records").fetchall():
+                for field, value in json.loads(data).iteritems():
+                    for ref in _references(value):
+                        connection.execute("INSERT INTO refs (tbl, eid, field, ref) VALUES (?, ?, ?, ?)",
+                                           (tbl, eid, field, ref))
+            connection.execute("PRAGMA user_version=%d" % _SCHEMA_VERSION)
+        except:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def disconnect_database(self, *args, **kwargs):
+        """Close the database for reading and writing."""
+        self._changed()
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+    def import_json(self, path):
+        """Import all records from a JSON database written by :any:`LocalFileStorage`.
+
+        Element identifiers are preserved so associations between records remain valid.
+        The JSON files are not modified.
+
+        Args:
+            path (str): Path to the JSON database directory, e.g. ``.tau/project.d``, or to 
+                        a single file JSON database, e.g. ``.tau/project.json``.
+
+        Returns:
+            int: Number of imported records.
+        """
+        LOGGER.info("Importing %s records from '%s' into '%s'", self.name, path, self.dbfile)
+        try:
+            if os.path.isdir(path):
+                data = {}
+                for fname in os.listdir(path):
+                    if fname.endswith('.json'):
+                        with open(os.path.join(path, fname)) as fin:
+                            data[fname[:-5]] = json.load(fin)
+            else:
+                with open(path) as fin:
+                    data = json.load(fin)
+        except ValueError:
+            # Empty or truncated JSON file, i.e. a database that was created but never written
+            data = {}
+        except (IOError, OSError) as err:
+            raise StorageError("Failed to read %s database '%s': %s" % (self.name, path, err),
+                               "Check that you have `read` access")
+        count = 0
+        with self:
+            for table_name, elements in data.iteritems():
+                last_eid = 0
+                for key, element in elements.iteritems():
+                    eid = int(key)
+                    self._write_record(table_name, eid, element)
+                    last_eid = max(last_eid, eid)
+                    count += 1
+                row = self._execute("SELECT last_eid FROM tables WHERE name = ?", (table_name,)).fetchone()
+                self._execute("INSERT OR REPLACE INTO tables (name, last_eid) VALUES (?, ?)", 
+                              (table_name, max(last_eid, row[0] if row else 0)))
+        return count
+
+    def _execute(self, statement, params=()):
+        self.connect_database()
+        try:
+            return self._connection.execute(statement, params)
+        except sqlite3.OperationalError as err:
+            if 'readonly' in str(err):
+                raise ConfigurationError("Cannot write to '%s'" % self.dbfile, "Check that you have `write` access.")
+            raise StorageError("%s database '%s': %s" % (self.name, self.dbfile, err))
+
+    def __enter__(self):
+        """Initiates the database transaction."""
+        if self._transaction_count == 0:
+            # Records may have been modified by another process since they were last read
+            self._changed()
+            self._transaction_span = timing.span(self.name + ' transaction', 'storage')
+            self._execute("BEGIN IMMEDIATE")
+        self._transaction_count += 1
+        return self
+
+    def __exit__(self, ex_type, value, traceback):
+        """Finalizes the database transaction."""
+        self._transaction_count -= 1
+        if self._transaction_count == 0:
+            span, self._transaction_span = self._transaction_span, None
+            callbacks, self._after_commit = self._after_commit, []
+            try:
+                if ex_type:
+                    self._changed()
+                    self._execute("ROLLBACK")
+                    return False
+                self._execute("COMMIT")
+            finally:
+                span.finish()
+            for callback in callbacks:
+                callback()
+
+    def table(self, table_name):
+        """Return a handle to a table.
+
+        Args:
+            table_name (str): Name of the table or None.
+
+        Returns:
+            str: Name of the table; records of all tables share one SQLite table.
+        """
+        self.connect_database()
+        return '_default' if table_name is None else table_name
+
+    def _write_record(self, tbl, eid, element):
+        self._execute("INSERT OR REPLACE INTO records (tbl, eid, data) VALUES (?, ?, ?)",
+                      (tbl, eid, json.dumps(element)))
+        self._execute("DELETE FROM fields WHERE tbl = ? AND eid = ?", (tbl, eid))
+        self._execute("DELETE FROM refs WHERE tbl = ? AND eid = ?", (tbl, eid))
+        for field, value in element.iteritems():
+            self._execute("INSERT INTO fields (tbl, eid, field, value) VALUES (?, ?, ?, ?)",
+                          (tbl, eid, field, _encode(value)))
+            for ref in _references(value):
+                self._execute("INSERT INTO refs (tbl, eid, field, ref) VALUES (?, ?, ?, ?)", (tbl, eid, field, ref))
+
+    def _read_record(self, tbl, eid):
+        row = self._execute("SELECT data FROM records WHERE tbl = ? AND eid = ?", (tbl, eid)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _find(self, tbl, keys, match_any):
+        """Find the element identifiers of all records with fields matching `keys`.
+
+        Args:
+            tbl (str): Name of the table to operate on.
+            keys (dict): Fields to match.
+            match_any (bool): If True then any key in `keys` may match or if False then all keys must match.
+
+        Returns:
+            list: Sorted element identifiers of matching records.
+
+        Raises:
+            ValueError: `keys` is empty.
+        """
+        if not keys:
+            raise ValueError(keys)
+        join = ' UNION ' if match_any else ' INTERSECT '
+        query = join.join(["SELECT eid FROM fields WHERE tbl = ? AND field = ? AND value = ?"] * len(keys))
+        params = []
+        for field, value in keys.iteritems():
+            params.extend((tbl, field, _encode(value)))
+        return [row[0] for row in self._execute(query + " ORDER BY eid", params)]
+
+    def _eids(self, tbl, keys, match_any):
+        """Resolve `keys` to a list of element identifiers as described in :any:`update`."""
+        if isinstance(keys, self.Record.eid_type):
+            return [keys]
+        elif isinstance(keys, dict):
+            return self._find(tbl, keys, match_any)
+        elif isinstance(keys, (list, tuple)):
+            return keys
+        raise ValueError(keys)
+
+    def count(self, table_name=None):
+        """See :any:`AbstractStorage.count`."""
+        tbl = self.table(table_name)
+        return self._execute("SELECT COUNT(*) FROM records WHERE tbl = ?", (tbl,)).fetchone()[0]
+
+    def get(self, keys, table_name=None, match_any=False):
+        """See :any:`AbstractStorage.get`."""
+        tbl = self.table(table_name)
+        if keys is None:
+            return None
+        elif isinstance(keys, self.Record.eid_type):
+            eid = keys
+        elif isinstance(keys, dict) and keys:
+            eids = self._find(tbl, keys, match_any)
+            if not eids:
+                return None
+            eid = eids[0]
+        elif isinstance(keys, (list, tuple)):
+            return [self.get(key, table_name=table_name, match_any=match_any) for key in keys]
+        else:
+            raise ValueError(keys)
+        element = self._read_record(tbl, eid)
+        if element:
+            return self.Record(self, element=element, eid=eid)
+        return None
+
+    def search(self, keys=None, table_name=None, match_any=False):
+        """See :any:`AbstractStorage.search`."""
+        tbl = self.table(table_name)
+        if keys is None:
+            rows = self._execute("SELECT eid, data FROM records WHERE tbl = ? ORDER BY eid", (tbl,))
+            return [self.Record(self, element=json.loads(data), eid=eid) for eid, data in rows]
+        elif isinstance(keys, self.Record.eid_type):
+            element = self._read_record(tbl, keys)
+            return [self.Record(self, element=element, eid=keys)] if element else []
+        elif isinstance(keys, dict) and keys:
+            return [self.Record(self, element=self._read_record(tbl, eid), eid=eid)
+                    for eid in self._find(tbl, keys, match_any)]
+        elif isinstance(keys, (list, tuple)):
+            result = []
+            for key in keys:
+                result.extend(self.search(keys=key, table_name=table_name, match_any=match_any))
+            return result
+        else:
+            raise ValueError(keys)
+
+    def match(self, field, table_name=None, regex=None, test=None):
+        """See :any:`AbstractStorage.match`."""
+        tbl = self.table(table_name)
+        if test is None:
+            pattern = re.compile(regex if regex is not None else '.*')
+            test = lambda value: isinstance(value, basestring) and pattern.match(value)
+        rows = self._execute("SELECT eid, value FROM fields WHERE tbl = ? AND field = ? ORDER BY eid", (tbl, field))
+        eids = [eid for eid, value in rows.fetchall() if test(json.loads(value))]
+        return [self.Record(self, element=self._read_record(tbl, eid), eid=eid) for eid in eids]
+
+    def referencing(self, field, eids, table_name=None):
+        """See :any:`AbstractStorage.referencing`."""
+        tbl = self.table(table_name)
+        eids = list(eids)
+        matches = set()
+        try:
+            # Stay below SQLite's limit on the number of query parameters
+            for i in xrange(0, len(eids), 500):
+                chunk = eids[i:i+500]
+                query = "SELECT eid FROM refs WHERE tbl = ? AND field = ? AND ref IN (%s)" % ', '.join('?' * len(chunk))
+                matches.update(eid for eid, in self._connection.execute(query, [tbl, field] + chunk))
+        except sqlite3.OperationalError as err:
+            if 'no such table' not in str(err):
+                raise StorageError("%s database '%s': %s" % (self.name, self.dbfile, err))
+            # Read-only database created before the refs table was added
+            wanted = set(eids)
+            return self.match(field, table_name=table_name, test=lambda value: wanted.intersection(_references(value)))
+        return [self.Record(self, element=self._read_record(tbl, eid), eid=eid) for eid in sorted(matches)]
+
+    def contains(self, keys, table_name=None, match_any=False):
+        """See :any:`AbstractStorage.contains`."""
+        tbl = self.table(table_name)
+        if keys is None:
+            return False
+        elif isinstance(keys, self.Record.eid_type):
+            row = self._execute("SELECT 1 FROM records WHERE tbl = ? AND eid = ?", (tbl, keys)).fetchone()
+            return row is not None
+        elif isinstance(keys, dict) and keys:
+            return bool(self._find(tbl, keys, match_any))
+        elif isinstance(keys, (list, tuple)):
+            return [self.contains(keys=key, table_name=table_name, match_any=match_any) for key in keys]
+        else:
+            raise ValueError(keys)
+
+    def insert(self, data, table_name=None):
+        """See :any:`AbstractStorage.insert`."""
+        self._changed()
+        tbl = self.table(table_name)
+        with self:
+            row = self._execute("SELECT last_eid FROM tables WHERE name = ?", (tbl,)).fetchone()
+            eid = (row[0] if row else 0) + 1
+            self._execute("INSERT OR REPLACE INTO tables (name, last_eid) VALUES (?, ?)", (tbl, eid))
+            self._write_record(tbl, eid, data)
+        return self.Record(self, eid=eid, element=data)
+
+    def insert_many(self, data, table_name=None):
+        """See :any:`AbstractStorage.insert_many`."""
+        self._changed()
+        tbl = self.table(table_name)
+        records = []
+        with self:
+            row = self._execute("SELECT last_eid FROM tables WHERE name = ?", (tbl,)).fetchone()
+            eid = row[0] if row else 0
+            for element in data:
+                eid += 1
+                self._write_record(tbl, eid, element)
+                records.append(self.Record(self, eid=eid, element=element))
+            self._execute("INSERT OR REPLACE INTO tables (name, last_eid) VALUES (?, ?)", (tbl, eid))
+        return records
+
+    def update(self, fields, keys, table_name=None, match_any=False):
+        """See :any:`AbstractStorage.update`."""
+        self._changed()
+        tbl = self.table(table_name)
+        with self:
+            for eid in self._eids(tbl, keys, match_any):
+                element = self._read_record(tbl, eid)
+                if element is None:
+                    raise KeyError(eid)
+                element.update(fields)
+                self._write_record(tbl, eid, element)
+
+    def update_many(self, changes, table_name=None):
+        """See :any:`AbstractStorage.update_many`."""
+        self._changed()
+        tbl = self.table(table_name)
+        with self:
+            for eid, fields in changes.iteritems():
+                element = self._read_record(tbl, eid)
+                if element is None:
+                    raise KeyError(eid)
+                element.update(fields)
+                self._write_record(tbl, eid, element)
+
+    def unset(self, fields, keys, table_name=None, match_any=False):
+        """See :any:`AbstractStorage.unset`."""
+        self._changed()
+        tbl = self.table(table_name)
+        with self:
+            for eid in self._eids(tbl, keys, match_any):
+                element = self._read_record(tbl, eid)
+                if element is None:
+                    raise KeyError(eid)
+                for field in fields:
+                    element.pop(field, None)
+                self._write_record(tbl, eid, element)
+
+    def remove(self, keys, table_name=None, match_any=False):
+        """See :any:`AbstractStorage.remove`."""
+        self._changed()
+        tbl = self.table(table_name)
+        self.remove_many(self._eids(tbl, keys, match_any), table_name=table_name)
+
+    def remove_many(self, eids, table_name=None):
+        """See :any:`AbstractStorage.remove_many`."""
+        self._changed()
+        tbl = self.table(table_name)
+        with self:
+            for eid in eids:
+                # Like LocalFileStorage, fail on a missing record so the whole call is rolled back
+                if not self._execute("DELETE FROM records WHERE tbl = ? AND eid = ?", (tbl, eid)).rowcount:
+                    raise KeyError(eid)
+                self._execute("DELETE FROM fields WHERE tbl = ? AND eid = ?", (tbl, eid))
+                self._execute("DELETE FROM refs WHERE tbl = ? AND eid = ?", (tbl, eid))
+
+    def purge(self, table_name=None):
+        """See :any:`AbstractStorage.purge`."""
+        self._changed()
+        LOGGER.debug("%s: purge()", table_name)
+        tbl = self.table(table_name)
+        with self:
+            self._execute("DELETE FROM records WHERE tbl = ?", (tbl,))
+            self._execute("DELETE FROM fields WHERE tbl = ?", (tbl,))
+            self._execute("DELETE FROM refs WHERE tbl = ?", (tbl,))
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Test functions.
+
+Functions used for unit tests of blob_store.py.
+"""
+
+import os
+import tempfile
+from taucmdr import tests
+from taucmdr.cf.storage import StorageError
+from taucmdr.cf.storage.blob_store import BlobStore
+
+
+class BlobStoreTest(tests.TestCase):
+    """Unit tests for BlobStore."""
+
+    def setUp(self):
+        self.blobs = BlobStore(tempfile.mkdtemp())
+
+    def test_put_get(self):
+        data = repr({'PATH': '/usr/bin:/bin'}) * 100
+        ref = self.blobs.put(data)
+        self.assertTrue(self.blobs.is_ref(ref))
+        self.assertIn(ref, self.blobs)
+        self.assertEqual(self.blobs.get(ref), data)
+        self.assertLess(self.blobs.size(ref), len(data))
+
+    def test_dedupe(self):
+        ref = self.blobs.put('same')
+        self.assertEqual(self.blobs.put('same'), ref)
+        self.assertNotEqual(self.blobs.put('different'), ref)
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(self.blobs.prefix)), 2)
+
+    def test_remove(self):
+        ref = self.blobs.put('data')
+        self.blobs.remove(ref)
+        self.assertNotIn(ref, self.blobs)
+        self.assertIsNone(self.blobs.size(ref))
+        self.assertRaises(StorageError, self.blobs.get, ref)
+        self.blobs.remove(ref)
+
+    def test_not_ref(self):
+        self.assertFalse(self.blobs.is_ref('ZGF0YQ=='))
+        self.assertRaises(ValueError, self.blobs.get, 'ZGF0YQ==')
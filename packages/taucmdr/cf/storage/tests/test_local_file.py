@@ -30,8 +30,275 @@
 Functions used for unit tests of local_file.py.
 """
 
+import os
+import json
+import tempfile
 from taucmdr import tests
+from taucmdr.cf.storage import local_file
+from taucmdr.cf.storage.local_file import LocalFileStorage
+
 
-@tests.not_implemented
 class LocalFileTest(tests.TestCase):
-    pass
+    """Unit tests for LocalFileStorage."""
+    
+    storage_class = LocalFileStorage
+
+    def setUp(self):
+        self.storage = self.storage_class('test', tempfile.mkdtemp())
+        self.storage.connect_database()
+        for name, number, experiment in ('a', 1, 1), ('b', 2, 1), ('c', 1, 2):
+            self.storage.insert({'name': name, 'number': number, 'experiment': experiment, 'trials': [number]}, 
+                                table_name='Trial')
+
+    def tearDown(self):
+        self.storage.disconnect_database()
+
+    def test_get(self):
+        record = self.storage.get({'experiment': 1, 'number': 2}, table_name='Trial')
+        self.assertEqual(record['name'], 'b')
+        self.assertEqual(self.storage.get(record.eid, table_name='Trial'), record)
+        self.assertIsNone(self.storage.get({'name': 'z'}, table_name='Trial'))
+        self.assertIsNone(self.storage.get(100, table_name='Trial'))
+
+    def test_search(self):
+        self.assertEqual(len(self.storage.search({'number': 1}, table_name='Trial')), 2)
+        self.assertEqual(len(self.storage.search({'name': 'a', 'experiment': 2}, table_name='Trial')), 0)
+        self.assertEqual(len(self.storage.search({'name': 'a', 'experiment': 2}, table_name='Trial', match_any=True)), 2)
+        self.assertEqual(len(self.storage.search({'trials': [2]}, table_name='Trial')), 1)
+
+    def test_contains(self):
+        self.assertTrue(self.storage.contains({'name': u'a'}, table_name='Trial'))
+        self.assertFalse(self.storage.contains({'name': 'z'}, table_name='Trial'))
+
+    def test_index_maintained(self):
+        self.assertTrue(self.storage.contains({'name': 'a'}, table_name='Trial'))
+        self.storage.update({'name': 'z'}, {'name': 'a'}, table_name='Trial')
+        self.assertFalse(self.storage.contains({'name': 'a'}, table_name='Trial'))
+        self.assertTrue(self.storage.contains({'name': 'z'}, table_name='Trial'))
+        self.storage.unset(['name'], {'name': 'z'}, table_name='Trial')
+        self.assertFalse(self.storage.contains({'name': 'z'}, table_name='Trial'))
+        self.storage.remove({'experiment': 1}, table_name='Trial')
+        self.assertEqual(self.storage.search({'number': 1}, table_name='Trial')[0]['name'], 'c')
+        record = self.storage.insert({'name': 'd', 'number': 1, 'experiment': 1}, table_name='Trial')
+        self.assertEqual(self.storage.get({'name': 'd'}, table_name='Trial').eid, record.eid)
+
+    def test_persistent(self):
+        self.storage.update({'name': 'z'}, {'name': 'a'}, table_name='Trial')
+        self.storage.disconnect_database()
+        self.assertTrue(os.path.exists(self.storage.dbfile))
+        self.assertEqual(self.storage.get({'name': 'z'}, table_name='Trial')['number'], 1)
+
+    def test_rollback(self):
+        try:
+            with self.storage:
+                self.storage.update({'name': 'z'}, {'name': 'a'}, table_name='Trial')
+                self.storage.insert({'name': 'd'}, table_name='Trial')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertTrue(self.storage.contains({'name': 'a'}, table_name='Trial'))
+        self.assertFalse(self.storage.contains({'name': 'z'}, table_name='Trial'))
+        self.assertEqual(self.storage.count(table_name='Trial'), 3)
+
+    def test_rollback_purge(self):
+        try:
+            with self.storage:
+                self.storage.purge(table_name='Trial')
+                self.storage.insert({'name': 'd'}, table_name='Trial')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(self.storage.count(table_name='Trial'), 3)
+        self.assertFalse(self.storage.contains({'name': 'd'}, table_name='Trial'))
+        record = self.storage.insert({'name': 'e'}, table_name='Trial')
+        self.assertEqual(self.storage.count(table_name='Trial'), 4)
+        self.assertEqual(self.storage.get(record.eid, table_name='Trial')['name'], 'e')
+
+    def test_rollback_persistent(self):
+        try:
+            with self.storage:
+                self.storage.remove({'name': 'a'}, table_name='Trial')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.storage.disconnect_database()
+        self.assertTrue(self.storage.contains({'name': 'a'}, table_name='Trial'))
+
+    def test_referencing(self):
+        self.assertEqual([rec['name'] for rec in self.storage.referencing('experiment', [1], table_name='Trial')],
+                         ['a', 'b'])
+        self.assertEqual([rec['name'] for rec in self.storage.referencing('trials', [1, 2], table_name='Trial')],
+                         ['a', 'b', 'c'])
+        self.storage.update({'trials': [3, 4]}, {'name': 'a'}, table_name='Trial')
+        self.assertEqual([rec['name'] for rec in self.storage.referencing('trials', [1, 4], table_name='Trial')],
+                         ['a', 'c'])
+        self.storage.remove({'name': 'a'}, table_name='Trial')
+        self.assertEqual(self.storage.referencing('trials', [4], table_name='Trial'), [])
+
+    def test_insert_many(self):
+        records = self.storage.insert_many([{'name': 'd', 'number': 3}, {'name': 'e', 'number': 3}], 
+                                           table_name='Trial')
+        self.assertEqual([rec['name'] for rec in records], ['d', 'e'])
+        self.assertEqual(len(set(rec.eid for rec in records)), 2)
+        self.assertEqual(self.storage.count(table_name='Trial'), 5)
+        self.assertEqual(self.storage.get({'name': 'e'}, table_name='Trial').eid, records[1].eid)
+        record = self.storage.insert({'name': 'f'}, table_name='Trial')
+        self.assertNotIn(record.eid, [rec.eid for rec in records])
+
+    def test_update_many(self):
+        eids = dict((rec['name'], rec.eid) for rec in self.storage.search(table_name='Trial'))
+        self.storage.update_many({eids['a']: {'number': 2}, eids['b']: {'number': 1, 'name': 'z'}}, 
+                                 table_name='Trial')
+        self.assertEqual(self.storage.get(eids['a'], table_name='Trial')['number'], 2)
+        self.assertEqual(self.storage.get({'name': 'z'}, table_name='Trial')['number'], 1)
+        self.assertFalse(self.storage.contains({'name': 'b'}, table_name='Trial'))
+
+    def test_remove_many(self):
+        eids = [rec.eid for rec in self.storage.search({'experiment': 1}, table_name='Trial')]
+        self.storage.remove_many(eids, table_name='Trial')
+        self.assertEqual([rec['name'] for rec in self.storage.search(table_name='Trial')], ['c'])
+        self.assertFalse(self.storage.contains({'experiment': 1}, table_name='Trial'))
+
+    def test_missing_eid(self):
+        eid = self.storage.get({'name': 'a'}, table_name='Trial').eid
+        missing = max(rec.eid for rec in self.storage.search(table_name='Trial')) + 1
+        changes = [lambda: self.storage.update({'name': 'z'}, [eid, missing], table_name='Trial'),
+                   lambda: self.storage.update_many({eid: {'name': 'z'}, missing: {'name': 'z'}}, table_name='Trial'),
+                   lambda: self.storage.unset(['name'], [eid, missing], table_name='Trial'),
+                   lambda: self.storage.remove_many([eid, missing], table_name='Trial')]
+        for change in changes:
+            self.assertRaises(KeyError, change)
+            self.assertEqual(self.storage.get(eid, table_name='Trial')['name'], 'a')
+
+    def test_many_rollback(self):
+        try:
+            with self.storage:
+                self.storage.insert_many([{'name': 'd'}, {'name': 'e'}], table_name='Trial')
+                self.storage.update_many({self.storage.get({'name': 'a'}, table_name='Trial').eid: {'name': 'z'}},
+                                         table_name='Trial')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(self.storage.count(table_name='Trial'), 3)
+        self.assertTrue(self.storage.contains({'name': 'a'}, table_name='Trial'))
+        self.assertFalse(self.storage.contains({'name': 'd'}, table_name='Trial'))
+
+    def test_after_commit(self):
+        called = []
+        self.storage.after_commit(lambda: called.append('immediate'))
+        try:
+            with self.storage:
+                self.storage.after_commit(lambda: called.append('rolled back'))
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with self.storage:
+            with self.storage:
+                self.storage.after_commit(lambda: called.append('committed'))
+            self.assertEqual(called, ['immediate'])
+        self.assertEqual(called, ['immediate', 'committed'])
+
+    def test_key_value(self):
+        self.storage['foo'] = 'bar'
+        self.assertIn('foo', self.storage)
+        self.assertEqual(self.storage['foo'], 'bar')
+        del self.storage['foo']
+        self.assertNotIn('foo', self.storage)
+
+
+class WriteBackTest(tests.TestCase):
+    """Unit tests for LocalFileStorage write coalescing."""
+
+    def setUp(self):
+        self.storage = LocalFileStorage('test', tempfile.mkdtemp())
+        self.storage.connect_database()
+        self.storage.insert({'name': 'x'}, table_name='Trial')
+        # pylint: disable=protected-access
+        self.writes = []
+        file_storage = self.storage._database._storage.storage
+        write = file_storage.write
+        def _counted_write(data):
+            self.writes.append(data)
+            write(data)
+        file_storage.write = _counted_write
+
+    def tearDown(self):
+        self.storage.disconnect_database()
+
+    def test_coalesced(self):
+        with self.storage:
+            record = self.storage.insert({'name': 'a'}, table_name='Trial')
+            self.storage.update({'number': 1}, record.eid, table_name='Trial')
+            self.storage.insert({'name': 'b'}, table_name='Trial')
+            self.assertEqual(len(self.writes), 0)
+        self.assertEqual(len(self.writes), 1)
+        self.storage.disconnect_database()
+        self.assertEqual(len(self.writes), 1)
+        self.assertEqual(self.storage.get({'name': 'a'}, table_name='Trial')['number'], 1)
+
+    def test_write_through(self):
+        self.storage.insert({'name': 'a'}, table_name='Trial')
+        self.storage.insert({'name': 'b'}, table_name='Trial')
+        self.assertEqual(len(self.writes), 2)
+
+    def test_rollback_not_written(self):
+        try:
+            with self.storage:
+                self.storage.insert({'name': 'a'}, table_name='Trial')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(len(self.writes), 0)
+        self.assertFalse(self.storage.contains({'name': 'a'}, table_name='Trial'))
+
+
+class TableFilesTest(tests.TestCase):
+    """Unit tests for LocalFileStorage table files."""
+
+    def setUp(self):
+        self.prefix = tempfile.mkdtemp()
+        self.storage = LocalFileStorage('test', self.prefix)
+        self.storage.insert({'name': 'a'}, table_name='Trial')
+        self.storage.insert({'name': 'b'}, table_name='Target')
+        self.storage.disconnect_database()
+
+    def tearDown(self):
+        self.storage.disconnect_database()
+
+    def test_table_files(self):
+        self.assertItemsEqual(os.listdir(self.storage.dbfile), ['_default.json', 'Trial.json', 'Target.json'])
+
+    def test_lazy_load(self):
+        # pylint: disable=protected-access
+        self.assertEqual(self.storage.get({'name': 'b'}, table_name='Target').eid, 1)
+        cache = self.storage._database._storage.cache
+        self.assertTrue(dict.__contains__(cache, 'Target'))
+        self.assertFalse(dict.__contains__(cache, 'Trial'))
+        self.assertIn('Trial', cache)
+
+    def test_write_modified(self):
+        written = []
+        write_json = local_file._write_json # pylint: disable=protected-access
+        def _write_json(path, data):
+            written.append(os.path.basename(path))
+            write_json(path, data)
+        local_file._write_json = _write_json # pylint: disable=protected-access
+        try:
+            self.storage.update({'name': 'c'}, {'name': 'b'}, table_name='Target')
+        finally:
+            local_file._write_json = write_json # pylint: disable=protected-access
+        self.assertEqual(written, ['Target.json'])
+
+    def test_split_legacy(self):
+        with open(os.path.join(self.prefix, 'legacy.json'), 'w') as fout:
+            json.dump({'_default': {}, 'Trial': {'3': {'name': 'x'}, '7': {'name': 'y'}}}, fout)
+        storage = LocalFileStorage('legacy', self.prefix)
+        try:
+            self.assertEqual(storage.get({'name': 'y'}, table_name='Trial').eid, 7)
+            self.assertEqual(storage.insert({'name': 'z'}, table_name='Trial').eid, 8)
+        finally:
+            storage.disconnect_database()
+        # The old database is kept, unchanged, for older versions
+        with open(os.path.join(self.prefix, 'legacy.json')) as fin:
+            self.assertEqual(sorted(json.load(fin)['Trial']), ['3', '7'])
+        self.assertTrue(os.path.exists(os.path.join(storage.dbfile, 'Trial.json')))
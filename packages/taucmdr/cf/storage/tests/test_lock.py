@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Test functions.
+
+Functions used for unit tests of lock.py.
+"""
+
+import os
+import time
+import fcntl
+import tempfile
+from taucmdr import tests
+from taucmdr.cf.storage.lock import StorageLock, get_lock, reset_after_fork, SHARED, EXCLUSIVE
+
+
+class StorageLockTest(tests.TestCase):
+    """Unit tests for StorageLock."""
+
+    def setUp(self):
+        self.prefix = tempfile.mkdtemp()
+        self.lock = get_lock(self.prefix)
+
+    def _hold_in_child(self, mode, seconds):
+        """Hold the lock in another process for a while; return when the lock is held."""
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            lock = StorageLock(self.lock.path)
+            lock.acquire(mode)
+            os.write(write_fd, 'x')
+            time.sleep(seconds)
+            lock.release()
+            os._exit(0)
+        os.read(read_fd, 1)
+        os.close(read_fd)
+        os.close(write_fd)
+        return pid
+
+    def test_get_lock(self):
+        self.assertIs(get_lock(self.prefix), self.lock)
+        self.assertEqual(os.path.dirname(self.lock.path), self.prefix)
+
+    def test_nested(self):
+        with self.lock.shared():
+            with self.lock.exclusive():
+                with self.lock.shared():
+                    self.assertEqual(self.lock._mode(), EXCLUSIVE)
+            self.assertEqual(self.lock._mode(), SHARED)
+        self.assertIsNone(self.lock._mode())
+        self.assertEqual(self.lock.acquisitions, 2)
+
+    def test_shared_does_not_wait(self):
+        pid = self._hold_in_child(SHARED, 0.5)
+        with self.lock.shared():
+            pass
+        os.waitpid(pid, 0)
+        self.assertEqual(self.lock.waits, 0)
+
+    def test_exclusive_waits(self):
+        pid = self._hold_in_child(SHARED, 0.5)
+        with self.lock.exclusive():
+            pass
+        os.waitpid(pid, 0)
+        self.assertEqual(self.lock.waits, 1)
+        self.assertGreater(self.lock.wait_time, 0.1)
+
+    def test_shared_waits(self):
+        pid = self._hold_in_child(EXCLUSIVE, 0.5)
+        with self.lock.shared():
+            pass
+        os.waitpid(pid, 0)
+        self.assertEqual(self.lock.waits, 1)
+
+    def test_reset_after_fork(self):
+        with self.lock.exclusive():
+            pid = os.fork()
+            if pid == 0:
+                reset_after_fork()
+                status = 1 if self.lock._mode() else 0
+                try:
+                    fcntl.lockf(self.lock._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except IOError:
+                    pass
+                else:
+                    # The child must not be able to lock what the parent holds
+                    status = 1
+                os._exit(status)
+            _, status = os.waitpid(pid, 0)
+        self.assertEqual(status, 0)
+        self.assertIsNone(self.lock._mode())
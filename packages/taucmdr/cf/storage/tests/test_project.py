@@ -30,8 +30,31 @@
 Functions used for unit tests of project.py.
 """
 
-from taucmdr import tests
+import os
+from taucmdr import tests, util
+from taucmdr.cf.storage.local_file import LocalFileStorage
+from taucmdr.cf.storage.project import _holds_database
 
 @tests.not_implemented
 class ProjectTest(tests.TestCase):
     pass
+
+
+class HoldsDatabaseTest(tests.TestCase):
+    """Unit tests for recognizing user and system storage prefixes."""
+
+    def setUp(self):
+        self.prefix = os.path.join(os.getcwd(), self._testMethodName)
+        util.mkdirp(self.prefix)
+        self.storage = LocalFileStorage('user', self.prefix)
+
+    def test_empty(self):
+        self.assertFalse(_holds_database(self.prefix, self.storage))
+
+    def test_current_format(self):
+        util.mkdirp(self.storage.dbfile)
+        self.assertTrue(_holds_database(self.prefix, self.storage))
+
+    def test_legacy_format(self):
+        open(os.path.join(self.prefix, 'user.json'), 'w').close()
+        self.assertTrue(_holds_database(self.prefix, self.storage))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Test functions.
+
+Functions used for unit tests of sqlite_file.py.
+"""
+
+import os
+import json
+from taucmdr.cf.storage.sqlite_file import SqliteStorage
+from taucmdr.cf.storage.tests import test_local_file
+
+
+class SqliteTest(test_local_file.LocalFileTest):
+    """Unit tests for SqliteStorage."""
+
+    storage_class = SqliteStorage
+
+    def test_eids_not_reused(self):
+        record = self.storage.insert({'name': 'd'}, table_name='Trial')
+        self.storage.remove(record.eid, table_name='Trial')
+        self.assertGreater(self.storage.insert({'name': 'e'}, table_name='Trial').eid, record.eid)
+        last_eid = self.storage.insert({'name': 'f'}, table_name='Trial').eid
+        self.storage.purge(table_name='Trial')
+        self.assertGreater(self.storage.insert({'name': 'g'}, table_name='Trial').eid, last_eid)
+
+    def test_match(self):
+        self.assertEqual(len(self.storage.match('name', table_name='Trial', regex='[ab]')), 2)
+        self.assertEqual(len(self.storage.match('trials', table_name='Trial', test=lambda x: 1 in x)), 2)
+
+    def test_import_json(self):
+        prefix = self.storage.prefix
+        with open(os.path.join(prefix, 'imported.json'), 'w') as fout:
+            json.dump({'Trial': {'3': {'name': 'x', 'experiment': 1}, '7': {'name': 'y', 'experiment': 1}}}, fout)
+        storage = SqliteStorage('imported', prefix)
+        try:
+            self.assertEqual(storage.get({'name': 'y'}, table_name='Trial').eid, 7)
+            self.assertEqual(storage.insert({'name': 'z'}, table_name='Trial').eid, 8)
+        finally:
+            storage.disconnect_database()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Unit tests for taucmdr.cf.probe"""
+
+import os
+import tempfile
+from subprocess import CalledProcessError
+from taucmdr import util
+from taucmdr.tests import TestCase
+from taucmdr.cf import probe
+from taucmdr.cf.probe import probe_output
+from taucmdr.cf.storage.levels import USER_STORAGE
+
+_SCRIPT = """#!/bin/sh
+echo run >> %(counter)s
+echo "%(output)s"
+exit %(returncode)d
+"""
+
+class ProbeTest(TestCase):
+    """Unit tests for taucmdr.cf.probe"""
+
+    def setUp(self):
+        self.prefix = tempfile.mkdtemp()
+        self.counter = os.path.join(self.prefix, 'counter')
+        self.script = os.path.join(self.prefix, 'probe.sh')
+        self._write_script('probed', 0)
+
+    def _write_script(self, output, returncode):
+        with open(self.script, 'w') as fout:
+            fout.write(_SCRIPT % {'counter': self.counter, 'output': output, 'returncode': returncode})
+        os.chmod(self.script, 0755)
+        # Forget output cached in memory so only the persistent cache can avoid running the script 
+        util.get_command_output.cache = {}
+
+    def _runs(self):
+        with open(self.counter) as fin:
+            return len(fin.readlines())
+
+    def test_cached(self):
+        self.assertEqual(probe_output([self.script, '--version']), 'probed\n')
+        util.get_command_output.cache = {}
+        self.assertEqual(probe_output([self.script, '--version']), 'probed\n')
+        self.assertEqual(self._runs(), 1)
+
+    def test_file_changed(self):
+        self.assertEqual(probe_output([self.script, '-show']), 'probed\n')
+        self._write_script('changed', 0)
+        self.assertEqual(probe_output([self.script, '-show']), 'changed\n')
+        self.assertEqual(self._runs(), 2)
+
+    def test_environment_changed(self):
+        probe_output([self.script, '-V'])
+        os.environ['PE_ENV'] = 'TEST'
+        try:
+            util.get_command_output.cache = {}
+            probe_output([self.script, '-V'])
+        finally:
+            del os.environ['PE_ENV']
+        self.assertEqual(self._runs(), 2)
+
+    def test_failure_cached(self):
+        self._write_script('failed', 3)
+        self.assertRaises(CalledProcessError, probe_output, [self.script, '-v'])
+        util.get_command_output.cache = {}
+        with self.assertRaises(CalledProcessError) as cm:
+            probe_output([self.script, '-v'])
+        self.assertEqual(cm.exception.returncode, 3)
+        self.assertEqual(cm.exception.output, 'failed\n')
+        self.assertEqual(self._runs(), 1)
+
+    def test_user_database_unchanged(self):
+        USER_STORAGE['unrelated'] = 1
+        mtimes = [os.path.getmtime(path) for path in USER_STORAGE.record_paths]
+        probe_output([self.script, '--help'])
+        self.assertEqual([os.path.getmtime(path) for path in USER_STORAGE.record_paths], mtimes)
+
+    def test_pruned(self):
+        max_entries = probe.MAX_ENTRIES
+        probe.MAX_ENTRIES = 2
+        try:
+            for i in xrange(4):
+                probe_output([self.script, '--option%d' % i])
+        finally:
+            probe.MAX_ENTRIES = max_entries
+        cache_dir = os.path.join(USER_STORAGE.prefix, probe.CACHE_DIR)
+        self.assertEqual(len([name for name in os.listdir(cache_dir) if not name.startswith('.')]), 2)
@@ -42,7 +42,9 @@ a subclass of :any:`AbstractCommand`.
 
 import os
 import sys
-from types import ModuleType
+import json
+import pkgutil
+import hashlib
 from taucmdr import TAUCMDR_SCRIPT, EXIT_FAILURE
 from taucmdr import logger, util
 from taucmdr.error import ConfigurationError, InternalError
@@ -60,8 +62,13 @@ USAGE_FORMAT = "console"
     markdown: plain text markdown. 
 """ 
 
+MANIFEST_FILE = 'commands.json'
+"""str: Name of the command manifest file in this package.  See :any:`write_command_manifest`."""
+
 _COMMANDS = {SCRIPT_COMMAND: {}}
 
+_MANIFEST = {}
+
 
 class UnknownCommandError(ConfigurationError):
     """Indicates that a specified command is unknown."""
@@ -100,29 +107,124 @@ def _command_as_list(module_name):
     return [SCRIPT_COMMAND] + parts
 
 
+def _manifest_signature():
+    """Identify the command modules that a command manifest describes.
+    
+    Returns:
+        str: Hash of the command modules' paths, sizes, and modification times, or None if the 
+             modules are not in a filesystem directory, e.g. they are in a zip file.
+    """
+    commands_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'commands')
+    if not os.path.isdir(commands_dir):
+        return None
+    parts = [SCRIPT_COMMAND]
+    for dirpath, dirnames, filenames in os.walk(commands_dir):
+        dirnames[:] = sorted(dirname for dirname in dirnames if dirname != 'tests')
+        for filename in sorted(filenames):
+            if filename.endswith('.py') and filename != '__main__.py':
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                parts.append([os.path.relpath(path, commands_dir), stat.st_mtime, stat.st_size])
+    return hashlib.sha1(json.dumps(parts)).hexdigest()
+
+
+def build_command_manifest():
+    """Import every command module and describe its command.
+    
+    Returns:
+        dict: Command manifest mapping space-separated commands without :any:`SCRIPT_COMMAND`, e.g.
+              'target create', to each command's module name, one-line summary, and group.  The
+              summary and group are None if the module has no COMMAND member.
+    """
+    commands = {}
+    __import__(COMMANDS_PACKAGE_NAME)
+    command_module = sys.modules[COMMANDS_PACKAGE_NAME]
+    for _, module, _ in util.walk_packages(command_module.__path__, prefix=command_module.__name__+'.'):
+        if not (module.endswith('__main__') or '.tests' in module):
+            __import__(module)
+            try:
+                command_obj = sys.modules[module].COMMAND
+            except AttributeError:
+                summary, group = None, None
+            else:
+                summary, group = command_obj.summary.split('\n')[0], command_obj.group
+            commands[' '.join(_command_as_list(module)[1:])] = {'module': module, 'summary': summary, 'group': group}
+    return commands
+
+
+def _save_command_manifest(path, signature, commands):
+    util.atomic_write(path, json.dumps({'signature': signature, 'commands': commands}), 0644)
+
+
+def write_command_manifest(path=None):
+    """Write the command manifest that lets the CLI find commands without importing every command module.
+    
+    Args:
+        path (str): Path to the manifest file, or None to use :any:`MANIFEST_FILE` in this package.
+    """
+    if path is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), MANIFEST_FILE)
+    _save_command_manifest(path, _manifest_signature(), build_command_manifest())
+
+
+def get_command_manifest():
+    """Get the command manifest, rebuilding it if the command modules have changed.
+    
+    Returns:
+        dict: Command manifest as returned by :any:`build_command_manifest`.
+    """
+    if _MANIFEST:
+        return _MANIFEST
+    signature = _manifest_signature()
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), MANIFEST_FILE)
+    try:
+        if signature is None:
+            # Use the zip file's loader
+            data = pkgutil.get_data(__name__, MANIFEST_FILE)
+        else:
+            with open(path) as fin:
+                data = fin.read()
+        manifest = json.loads(data)
+    except (IOError, TypeError, ValueError) as err:
+        LOGGER.debug("Command manifest not loaded: %s", err)
+    else:
+        # Command modules in a zip file can't change so the manifest is always current
+        if signature is None or manifest.get('signature') == signature:
+            _MANIFEST.update(manifest['commands'])
+            return _MANIFEST
+        LOGGER.debug("Command manifest is stale")
+    _MANIFEST.update(build_command_manifest())
+    if signature is not None:
+        try:
+            _save_command_manifest(path, signature, _MANIFEST)
+        except (IOError, OSError) as err:
+            LOGGER.debug("Could not write command manifest: %s", err)
+    return _MANIFEST
+
+
 def _get_commands(package_name):
-    # pylint: disable=line-too-long
-    """Returns a dictionary mapping commands to Python modules.
+    """Returns a dictionary mapping commands to command module names.
     
     Given a root module name, return a dictionary that maps commands and their
-    subcommands to Python modules.  The special key ``__module__`` maps to the
-    command module.  Other strings map to subcommands of the command.
+    subcommands to module names.  The special key ``__module__`` maps to the
+    command module name.  Other strings map to subcommands of the command.
+    Command modules are not imported.
     
     Args:
         package_name (str): A string naming the module to search for cli.
     
     Returns:
-        dict: Strings mapping to dictionaries or modules.
+        dict: Strings mapping to dictionaries or module names.
         
     Example:
     ::
 
         _get_commands('taucmdr.cli.commands.target') ==>
-            {'__module__': <module 'taucmdr.cli.commands.target' from '/home/jlinford/workspace/taucmdr/packages/taucmdr/cli/commands/target/__init__.pyc'>,
-             'create': {'__module__': <module 'taucmdr.cli.commands.target.create' from '/home/jlinford/workspace/taucmdr/packages/taucmdr/cli/commands/target/create.pyc'>},
-             'delete': {'__module__': <module 'taucmdr.cli.commands.target.delete' from '/home/jlinford/workspace/taucmdr/packages/taucmdr/cli/commands/target/delete.pyc'>},
-             'edit': {'__module__': <module 'taucmdr.cli.commands.target.edit' from '/home/jlinford/workspace/taucmdr/packages/taucmdr/cli/commands/target/edit.pyc'>},
-             'list': {'__module__': <module 'taucmdr.cli.commands.target.list' from '/home/jlinford/workspace/taucmdr/packages/taucmdr/cli/commands/target/list.pyc'>}}
+            {'__module__': 'taucmdr.cli.commands.target',
+             'create': {'__module__': 'taucmdr.cli.commands.target.create'},
+             'delete': {'__module__': 'taucmdr.cli.commands.target.delete'},
+             'edit': {'__module__': 'taucmdr.cli.commands.target.edit'},
+             'list': {'__module__': 'taucmdr.cli.commands.target.list'}}
     """
     def lookup(cmd, dct):
         if not cmd:
@@ -132,25 +234,34 @@ def _get_commands(package_name):
         else:
             return lookup(cmd[1:], dct[cmd[0]])
 
-    def walking_import(module, cmd, dct):
-        car, cdr = cmd[0], cmd[1:]
-        if cdr:
-            walking_import(module, cdr, dct[car])
-        elif car not in dct:
-            __import__(module)
-            dct.setdefault(car, {})['__module__'] = sys.modules[module]
-
-    __import__(COMMANDS_PACKAGE_NAME)
-    command_module = sys.modules[COMMANDS_PACKAGE_NAME]
-    for _, module, _ in util.walk_packages(command_module.__path__, prefix=command_module.__name__+'.'):
-        if not (module.endswith('__main__') or '.tests' in module):
-            try:
-                lookup(_command_as_list(module), _COMMANDS)
-            except KeyError:
-                walking_import(module, _command_as_list(module), _COMMANDS)
+    if not _COMMANDS[SCRIPT_COMMAND]:
+        for cmd, entry in get_command_manifest().iteritems():
+            dct = _COMMANDS[SCRIPT_COMMAND]
+            for part in cmd.split():
+                dct = dct.setdefault(part, {})
+            dct['__module__'] = entry['module']
     return lookup(_command_as_list(package_name), _COMMANDS)
 
 
+def _import_command(module_name):
+    """Import a command module and return its COMMAND member.
+    
+    Args:
+        module_name (str): Name of the command module.
+        
+    Raises:
+        InternalError: The module has no COMMAND member.
+
+    Returns:
+        AbstractCommand: Command object for the command.
+    """
+    __import__(module_name)
+    try:
+        return sys.modules[module_name].COMMAND
+    except AttributeError:
+        raise InternalError("'COMMAND' undefined in %r" % module_name)
+
+
 def command_from_module_name(module_name):
     """Converts a module name to a command name string.
     
@@ -180,15 +291,15 @@ def commands_description(package_name=COMMANDS_PACKAGE_NAME):
     """
     usage_fmt = USAGE_FORMAT.lower()
     groups = {}
+    manifest = get_command_manifest()
     commands = sorted([i for i in _get_commands(package_name).iteritems() if i[0] != '__module__'])
-    for cmd, topcmd in commands:
-        module = topcmd['__module__']
-        try:
-            command_obj = module.COMMAND
-        except AttributeError:
-            continue 
-        descr = command_obj.summary.split('\n')[0]
-        group = command_obj.group
+    parent = _command_as_list(package_name)[1:]
+    for cmd, _ in commands:
+        entry = manifest.get(' '.join(parent + [cmd]))
+        if not entry or entry['summary'] is None:
+            continue
+        descr = entry['summary']
+        group = entry['group']
         if usage_fmt == 'console':
             line = '  %s%s' % (util.color_text('{:<14}'.format(cmd), 'green'), descr)
         elif usage_fmt == 'markdown':
@@ -221,9 +332,9 @@ def get_all_commands(package_name=COMMANDS_PACKAGE_NAME):
     for _, topcmd in commands:
         for _, mod in topcmd.iteritems():
             if isinstance(mod, dict):
-                all_commands.append(mod['__module__'].__name__)
-            elif isinstance(mod, ModuleType):
-                all_commands.append(mod.__name__)
+                all_commands.append(mod['__module__'])
+            elif isinstance(mod, basestring):
+                all_commands.append(mod)
             else:
                 raise InternalError("%s is an invalid module." %mod)
     return all_commands
@@ -263,14 +374,13 @@ def find_command(cmd):
     else:
         root = COMMANDS_PACKAGE_NAME
     try:
-        return _get_commands(root)['__module__'].COMMAND
+        module_name = _get_commands(root)['__module__']
     except KeyError:
         LOGGER.debug('%r not recognized as a TAU command', cmd)
         resolved = _resolve(cmd, cmd, _COMMANDS[SCRIPT_COMMAND])
         LOGGER.debug('Resolved ambiguous command %r to %r', cmd, resolved)
         return find_command(resolved)
-    except AttributeError:
-        raise InternalError("'COMMAND' undefined in %r" % cmd)
+    return _import_command(module_name)
 
 
 def _permute(cmd, cmd_args):
@@ -203,7 +203,7 @@ class HelpFormatter(argparse.RawDescriptionHelpFormatter):
     """Custom help string formatter for argument parser.
     
     Provide proper help message alignment, line width, and formatting.
-    Uses console line width (:any:`logger.LINE_WIDTH`) to format help 
+    Uses console line width (:any:`logger.get_line_width`) to format help 
     messages appropriately so they don't wrap in strange ways.
     
     Args:
@@ -215,7 +215,7 @@ class HelpFormatter(argparse.RawDescriptionHelpFormatter):
     
     def __init__(self, prog, indent_increment=2, max_help_position=30, width=None):
         if width is None:
-            width = logger.LINE_WIDTH
+            width = logger.get_line_width()
         super(HelpFormatter, self).__init__(prog, indent_increment, max_help_position, width)
         
     def _split_lines(self, text, width):
@@ -363,7 +363,7 @@ class MarkdownHelpFormatter(HelpFormatter):
     
     first_col_width = 30
     
-    def __init__(self, prog, indent_increment=2, max_help_position=30, width=logger.LINE_WIDTH):
+    def __init__(self, prog, indent_increment=2, max_help_position=30, width=None):
         super(MarkdownHelpFormatter, self).__init__(prog, indent_increment, max_help_position, width)
         trans = {'<': '*', 
                  '>': '*', 
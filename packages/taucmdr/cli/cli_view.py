@@ -289,7 +289,7 @@ class ListCommand(AbstractCliView):
                     raise InternalError("Invalid column definition: %s" % col)
                 row.append(cell)
             rows.append(row)
-        table = Texttable(logger.LINE_WIDTH)
+        table = Texttable(logger.get_line_width())
         table.set_cols_align([col.get('align', 'c') for col in self.dashboard_columns])
         table.add_rows(rows)
         return [title, table.draw(), '']
@@ -343,7 +343,7 @@ class ListCommand(AbstractCliView):
             for key, val in sorted(populated.iteritems()):
                 if key != self.model.key_attribute:
                     rows.append(self._format_long_item(key, val))
-            table = Texttable(logger.LINE_WIDTH)
+            table = Texttable(logger.get_line_width())
             table.set_cols_align(['r', 'c', 'l', 'l'])
             table.set_deco(Texttable.HEADER | Texttable.VLINES)
             table.add_rows(rows)
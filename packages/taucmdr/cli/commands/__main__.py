@@ -37,9 +37,6 @@ import taucmdr
 from taucmdr import cli, logger, util, TAUCMDR_VERSION, TAUCMDR_SCRIPT
 from taucmdr.cli import UnknownCommandError, arguments
 from taucmdr.cli.command import AbstractCommand
-from taucmdr.cli.commands.build import COMMAND as build_command
-from taucmdr.cli.commands.trial.create import COMMAND as trial_create_command
-from taucmdr.model.project import Project
 
 LOGGER = logger.get_logger(__name__)
 
@@ -136,6 +133,8 @@ class MainCommand(AbstractCommand):
         # Check shortcuts
         shortcut = None
         from taucmdr.model.project import Project
+        from taucmdr.cli.commands.build import COMMAND as build_command
+        from taucmdr.cli.commands.trial.create import COMMAND as trial_create_command
         uses_python = Project.selected().experiment().populate()['application'].get_or_default('python')
         if not uses_python and build_command.is_compatible(cmd): # should return false for python
             shortcut = ['build']
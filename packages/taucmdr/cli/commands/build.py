@@ -31,6 +31,9 @@ import os
 from taucmdr.cli import arguments
 from taucmdr.cli.command import AbstractCommand
 from taucmdr.cf.compiler import Knowledgebase
+# Knowledgebases register their compilers when imported.  Other command modules are not imported
+# when this command runs, so import every knowledgebase that Knowledgebase.all_compilers may list.
+from taucmdr.cf.compiler import host, mpi, shmem, cuda, caf, python # pylint: disable=unused-import
 from taucmdr.model.project import Project
 
 HELP_PAGE = """
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""``experiment publish`` subcommand."""
+
+from taucmdr import EXIT_SUCCESS
+from taucmdr.error import ExperimentSelectionError
+from taucmdr.cli import arguments
+from taucmdr.cli.command import AbstractCommand
+from taucmdr.cf.software import build_cache
+from taucmdr.model.project import Project
+from taucmdr.model.experiment import Experiment
+
+
+class ExperimentPublishCommand(AbstractCommand):
+    """``experiment publish`` subcommand."""
+
+    def _construct_parser(self):
+        usage = "%s [experiment_name] [arguments]" % self.command
+        parser = arguments.get_parser(prog=self.command, usage=usage, description=self.summary)
+        parser.add_argument('name', 
+                            help="Experiment name (default: the selected experiment)", 
+                            metavar='<experiment_name>',
+                            nargs='?')
+        parser.add_argument('--cache',
+                            help="Build cache directory, e.g. on a shared filesystem",
+                            metavar='<path>',
+                            default=build_cache.cache_dir())
+        parser.add_argument('--replace',
+                            help="Replace installations that are already in the build cache",
+                            const=True, default=False, action='store_const')
+        return parser
+
+    def main(self, argv):
+        args = self._parse_args(argv)
+        if not args.cache:
+            self.parser.error("No build cache directory.  Use --cache or set __TAUCMDR_BUILD_CACHE__.")
+        proj = Project.selected()
+        if args.name:
+            matching = Experiment.controller().search({'name': args.name, 'project': proj.eid})
+            if not matching:
+                raise ExperimentSelectionError("There is no experiment named '%s' in project '%s'." % 
+                                               (args.name, proj['name']))
+            expr = matching[0]
+        else:
+            expr = proj.experiment()
+        tau = expr.configure()
+        # A forced TAU makefile names a TAU installation that TAU Commander does not manage
+        roots = tau.dependencies.values() if tau.forced_makefile else [tau]
+        published = []
+        for root in roots:
+            published.extend(build_cache.publish(root, args.cache, args.replace))
+        self.logger.info("Published %d installations of experiment '%s'.", len(published), expr['name'])
+        return EXIT_SUCCESS
+
+
+COMMAND = ExperimentPublishCommand(__name__, summary_fmt=("Add an experiment's TAU and software installations "
+                                                          "to the build cache."))
@@ -43,6 +43,8 @@ To list projects in directory: `tau project list`
 To select a specific project `tau project select <project_name>` 
 To copy a project: `tau project copy <project_name> <new_project_name>` 
 [optional - specify measurements, applications, and targets] 
+To export a project: `tau project export <project_name> [--trial-data]` 
+To import an exported project: `tau project import <path>` 
 
 ________________________________________________________________________
 """ 
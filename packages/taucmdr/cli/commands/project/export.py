@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""``project export`` subcommand."""
+
+import os
+import tarfile
+import tempfile
+from taucmdr import EXIT_SUCCESS
+from taucmdr.cli import arguments
+from taucmdr.cli.command import AbstractCommand
+from taucmdr.error import ConfigurationError
+from taucmdr.model.project import Project
+from taucmdr.model.trial import Trial
+
+RECORDS_MEMBER = 'records.jsonl'
+"""str: Name of the exported records in an archive created with ``--trial-data``."""
+
+TRIALS_MEMBER = 'trials'
+"""str: Directory containing trial data, by exported trial eid, in an archive created with ``--trial-data``."""
+
+
+class ProjectExportCommand(AbstractCommand):
+    """``project export`` subcommand."""
+
+    def _construct_parser(self):
+        usage = "%s [project_name] [arguments]" % self.command
+        parser = arguments.get_parser(prog=self.command, usage=usage, description=self.summary)
+        parser.add_argument('name', 
+                            help="Project name (default: the selected project)", 
+                            metavar='<project_name>',
+                            nargs='?',
+                            default=arguments.SUPPRESS)
+        parser.add_argument('--output',
+                            help="Write to this file (default: <project_name>.jsonl or <project_name>.tgz)",
+                            metavar='<path>',
+                            default=arguments.SUPPRESS)
+        parser.add_argument('--trial-data',
+                            help="Also export trial data directories to a gzipped tar archive",
+                            const=True, default=False, action='store_const')
+        return parser
+
+    def _export_archive(self, ctrl, proj, path):
+        """Write exported records and trial data directories to a gzipped tar archive."""
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(path))) as records:
+            exported = ctrl.export_records(records, proj.eid)
+            records.flush()
+            with tarfile.open(path, 'w:gz') as archive:
+                archive.add(records.name, arcname=RECORDS_MEMBER)
+                trial_ctrl = Trial.controller(ctrl.storage)
+                for eid in exported[Trial.name]:
+                    prefix = trial_ctrl.one(eid).prefix
+                    if os.path.isdir(prefix):
+                        self.logger.debug("Adding '%s' to '%s'", prefix, path)
+                        archive.add(prefix, arcname=os.path.join(TRIALS_MEMBER, str(eid)))
+        return exported
+
+    def main(self, argv):
+        args = self._parse_args(argv)
+        ctrl = Project.controller()
+        if hasattr(args, 'name'):
+            proj = ctrl.one({'name': args.name})
+            if not proj:
+                self.parser.error("There is no project configuration named '%s'." % args.name)
+        else:
+            proj = ctrl.selected()
+        path = getattr(args, 'output', '%s.%s' % (proj['name'], 'tgz' if args.trial_data else 'jsonl'))
+        try:
+            if args.trial_data:
+                exported = self._export_archive(ctrl, proj, path)
+            else:
+                with open(path, 'w') as fout:
+                    exported = ctrl.export_records(fout, proj.eid)
+        except (IOError, OSError) as err:
+            raise ConfigurationError("Cannot write '%s': %s" % (path, err))
+        self.logger.info("Exported %d records from project '%s' to '%s'.", 
+                         sum(len(eids) for eids in exported.itervalues()), proj['name'], path)
+        return EXIT_SUCCESS
+
+
+COMMAND = ProjectExportCommand(__name__, summary_fmt=("Export a project and all its records.\n"
+                                                      "Use `project import` to import the exported project."))
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""``project import`` subcommand."""
+
+import os
+import shutil
+import tarfile
+import tempfile
+from taucmdr import EXIT_SUCCESS, util
+from taucmdr.cli import arguments
+from taucmdr.cli.command import AbstractCommand
+from taucmdr.cli.commands.project.export import RECORDS_MEMBER, TRIALS_MEMBER
+from taucmdr.error import ConfigurationError, UniqueAttributeError
+from taucmdr.model.project import Project
+from taucmdr.model.trial import Trial
+
+
+class ProjectImportCommand(AbstractCommand):
+    """``project import`` subcommand."""
+
+    def _construct_parser(self):
+        usage = "%s <path>" % self.command
+        parser = arguments.get_parser(prog=self.command, usage=usage, description=self.summary)
+        parser.add_argument('path', 
+                            help="File created by `project export`", 
+                            metavar='<path>')
+        return parser
+
+    def _import_records(self, ctrl, stream):
+        try:
+            return ctrl.import_records(stream)
+        except UniqueAttributeError as err:
+            self.parser.error(err.value)
+
+    def _import_archive(self, ctrl, path):
+        """Import records and trial data directories from a gzipped tar archive.
+        
+        The archive is read as a stream in a single pass: the records come first and are imported
+        before the trial data that follows them is extracted to the new trials' directories.
+        """
+        eid_map = None
+        trial_ctrl = Trial.controller(ctrl.storage)
+        prefixes = {}
+        with tarfile.open(path, 'r|gz') as archive:
+            for member in archive:
+                if member.name == RECORDS_MEMBER:
+                    with tempfile.TemporaryFile() as records:
+                        shutil.copyfileobj(archive.extractfile(member), records)
+                        eid_map = self._import_records(ctrl, records)
+                    continue
+                parts = os.path.normpath(member.name).split(os.sep)
+                if eid_map is None or parts[0] != TRIALS_MEMBER or len(parts) < 2 or '..' in parts:
+                    raise ConfigurationError("Unexpected member '%s' in '%s'" % (member.name, path))
+                try:
+                    new_eid = eid_map[Trial.name][int(parts[1])]
+                except (KeyError, ValueError):
+                    raise ConfigurationError("Unexpected member '%s' in '%s'" % (member.name, path))
+                try:
+                    prefix = prefixes[new_eid]
+                except KeyError:
+                    prefix = prefixes[new_eid] = trial_ctrl.one(new_eid).prefix
+                dest = os.path.join(prefix, *parts[2:])
+                if member.isdir():
+                    util.mkdirp(dest)
+                elif member.isfile():
+                    util.mkdirp(os.path.dirname(dest))
+                    with open(dest, 'wb') as fout:
+                        shutil.copyfileobj(archive.extractfile(member), fout)
+                    os.chmod(dest, member.mode)
+        if eid_map is None:
+            raise ConfigurationError("'%s' does not contain exported TAU Commander records" % path)
+        return eid_map
+
+    def main(self, argv):
+        args = self._parse_args(argv)
+        ctrl = Project.controller()
+        path = args.path
+        try:
+            if tarfile.is_tarfile(path):
+                eid_map = self._import_archive(ctrl, path)
+            else:
+                with open(path) as fin:
+                    eid_map = self._import_records(ctrl, fin)
+        except (IOError, OSError, tarfile.TarError) as err:
+            raise ConfigurationError("Cannot import '%s': %s" % (path, err))
+        for eid in eid_map[Project.name].itervalues():
+            self.logger.info("Imported project '%s'.", ctrl.one(eid)['name'])
+        return EXIT_SUCCESS
+
+
+COMMAND = ProjectImportCommand(__name__, summary_fmt=("Import a project and all its records.\n"
+                                                      "Use `project export` to export a project."))
@@ -30,10 +30,33 @@
 Functions used for unit tests of export.py.
 """
 
-
+import os
+import json
 from taucmdr import tests
-#from taucmdr.cli.commands.project import export
+from taucmdr.cli.commands.project.export import COMMAND as EXPORT_COMMAND
+
 
-@tests.not_implemented
 class ExportTest(tests.TestCase):
-    pass
+    """Tests for :any:`project.export`."""
+
+    def test_export(self):
+        self.reset_project_storage()
+        stdout, stderr = self.assertCommandReturnValue(0, EXPORT_COMMAND, ['proj1', '--output', 'proj1.jsonl'])
+        self.assertIn("from project 'proj1' to 'proj1.jsonl'", stdout)
+        self.assertFalse(stderr)
+        with open('proj1.jsonl') as fin:
+            self.assertEqual(json.loads(fin.readline())['format'], 'taucmdr-records')
+            models = set(json.loads(line)['model'] for line in fin)
+        self.assertTrue(set(['Project', 'Target', 'Application', 'Measurement']).issubset(models))
+
+    def test_trial_data(self):
+        self.reset_project_storage()
+        stdout, stderr = self.assertCommandReturnValue(0, EXPORT_COMMAND, ['--trial-data'])
+        self.assertIn("to 'proj1.tgz'", stdout)
+        self.assertFalse(stderr)
+        self.assertTrue(os.path.exists('proj1.tgz'))
+
+    def test_no_such_project(self):
+        self.reset_project_storage()
+        _, stderr = self.assertNotCommandReturnValue(0, EXPORT_COMMAND, ['proj2'])
+        self.assertIn("There is no project configuration named 'proj2'", stderr)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Test functions.
+
+Functions used for unit tests of import.py.
+"""
+
+import importlib
+from taucmdr import tests
+from taucmdr.cli.commands.project.export import COMMAND as EXPORT_COMMAND
+from taucmdr.cli.commands.project.list import COMMAND as LIST_COMMAND
+
+# ``import`` is a keyword so the module cannot be named in an import statement
+IMPORT_COMMAND = importlib.import_module('taucmdr.cli.commands.project.import').COMMAND
+
+
+class ImportTest(tests.TestCase):
+    """Tests for :any:`project.import`."""
+
+    def test_import(self):
+        self.reset_project_storage()
+        self.assertCommandReturnValue(0, EXPORT_COMMAND, ['--output', 'proj1.jsonl'])
+        self.reset_project_storage(['--bare', '--project-name', 'proj2'])
+        stdout, stderr = self.assertCommandReturnValue(0, IMPORT_COMMAND, ['proj1.jsonl'])
+        self.assertIn("Imported project 'proj1'", stdout)
+        self.assertFalse(stderr)
+        stdout, _ = self.assertCommandReturnValue(0, LIST_COMMAND, [])
+        self.assertIn('proj1', stdout)
+        self.assertIn('targ1', stdout)
+
+    def test_duplicate(self):
+        self.reset_project_storage()
+        self.assertCommandReturnValue(0, EXPORT_COMMAND, ['--output', 'proj1.jsonl'])
+        _, stderr = self.assertNotCommandReturnValue(0, IMPORT_COMMAND, ['proj1.jsonl'])
+        self.assertIn("already exists", stderr)
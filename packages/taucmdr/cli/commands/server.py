@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""``server`` subcommand."""
+
+import os
+import sys
+import time
+import signal
+import logging
+import multiprocessing
+from taucmdr import EXIT_SUCCESS, EXIT_FAILURE
+from taucmdr import logger, compile_server
+from taucmdr.error import ConfigurationError
+from taucmdr.cli import arguments
+from taucmdr.cli.command import AbstractCommand
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
+
+
+LOGGER = logger.get_logger(__name__)
+
+HELP_PAGE = """
+TAU Commander Compile Server:
+__________________________________________________________________________
+
+The compile server speeds up builds that invoke many `tau` compiler
+commands, e.g. `tau gcc` or the tau_cc.sh wrapper scripts, by preparing
+compiler commands in worker processes that keep TAU Commander loaded.
+Start the server in the project directory before building and stop it
+afterwards.  Compiler commands run exactly as they would without the
+server, and `tau` handles any command the server cannot.
+__________________________________________________________________________
+"""
+
+
+class ServerCommand(AbstractCommand):
+    """``server`` subcommand."""
+
+    def _construct_parser(self):
+        usage = "%s <action> [arguments]" % self.command
+        parser = arguments.get_parser(prog=self.command, usage=usage, description=self.summary)
+        parser.add_argument('action',
+                            help="Start or stop the compile server, or show its status",
+                            metavar='<action>',
+                            choices=['start', 'stop', 'status'])
+        parser.add_argument('--workers',
+                            help="Number of worker processes",
+                            metavar='<count>',
+                            type=int,
+                            default=multiprocessing.cpu_count())
+        parser.add_argument('--foreground',
+                            help="Run the server in this process until interrupted",
+                            const=True, default=False, action='store_const')
+        return parser
+
+    @staticmethod
+    def _start(prefix, workers, foreground):
+        if compile_server.server_pid(prefix):
+            raise ConfigurationError("The compile server is already running.",
+                                     "Use `%s server stop` to stop the server." % os.path.basename(sys.argv[0]))
+        if foreground:
+            compile_server.serve(prefix, workers)
+            return EXIT_SUCCESS
+        pid = os.fork()
+        if pid == 0:
+            os.setsid()
+            devnull = os.open(os.devnull, os.O_RDWR)
+            for fdesc in 0, 1, 2:
+                os.dup2(devnull, fdesc)
+            try:
+                compile_server.serve(prefix, workers)
+            finally:
+                logging.shutdown()
+                os._exit(0) # pylint: disable=protected-access
+        for _ in xrange(100):
+            if compile_server.server_pid(prefix) == pid:
+                LOGGER.info("Started the compile server with %d workers (PID %d)", workers, pid)
+                return EXIT_SUCCESS
+            time.sleep(0.1)
+        raise ConfigurationError("The compile server did not start.",
+                                 "Use `%s server start --foreground` to see why." % os.path.basename(sys.argv[0]))
+
+    @staticmethod
+    def _stop(prefix):
+        pid = compile_server.server_pid(prefix)
+        if not pid:
+            LOGGER.info("The compile server is not running.")
+            return EXIT_SUCCESS
+        os.kill(pid, signal.SIGTERM)
+        for _ in xrange(100):
+            if not compile_server.server_pid(prefix):
+                LOGGER.info("Stopped the compile server (PID %d)", pid)
+                return EXIT_SUCCESS
+            time.sleep(0.1)
+        raise ConfigurationError("The compile server (PID %d) did not stop." % pid)
+
+    def main(self, argv):
+        args = self._parse_args(argv)
+        prefix = PROJECT_STORAGE.prefix
+        if args.action == 'start':
+            return self._start(prefix, args.workers, args.foreground)
+        elif args.action == 'stop':
+            return self._stop(prefix)
+        pid = compile_server.server_pid(prefix)
+        if pid:
+            LOGGER.info("The compile server is running (PID %d)", pid)
+            return EXIT_SUCCESS
+        LOGGER.info("The compile server is not running.")
+        return EXIT_FAILURE
+
+
+COMMAND = ServerCommand(__name__, help_page_fmt=HELP_PAGE, summary_fmt="Start or stop the project's compile server.")
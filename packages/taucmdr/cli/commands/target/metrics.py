@@ -61,10 +61,10 @@ class TargetMetricsCommand(AbstractCommand):
        
     def _draw_table(self, targ, metric, rows):
         parts = [util.hline("%s Metrics on Target '%s'" % (metric, targ['name']), 'cyan')]
-        table = Texttable(logger.LINE_WIDTH)
+        table = Texttable(logger.get_line_width())
         table.set_cols_align(['r', 'l'])
         name_width = max([len(row[0]) for row in rows])
-        table.set_cols_width([name_width+1, logger.LINE_WIDTH-name_width-4])
+        table.set_cols_width([name_width+1, logger.get_line_width()-name_width-4])
         table.set_deco(Texttable.HEADER | Texttable.VLINES)
         table.add_rows(rows)
         parts.extend([table.draw(), ''])
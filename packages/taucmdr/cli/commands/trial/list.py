@@ -33,6 +33,7 @@ from taucmdr.error import InternalError
 from taucmdr.cli.cli_view import ListCommand
 from taucmdr.model.project import Project
 from taucmdr.model.trial import Trial
+from taucmdr.cf.storage.levels import PROJECT_STORAGE
 
 
 DASHBOARD_COLUMNS = [{'header': 'Number', 'value': 'number'},
@@ -58,8 +59,12 @@ class TrialListCommand(ListCommand):
     
     def _format_long_item(self, key, val):
         key, val, flags, description = super(TrialListCommand, self)._format_long_item(key, val)
-        if key == 'environment' or key == 'output':
-            val = '(base64 encoded, %d bytes)' % len(val)
+        if key in Trial.BLOB_ATTRIBUTES:
+            blobs = PROJECT_STORAGE.blobs
+            if blobs.is_ref(val):
+                val = '(%s, %s compressed)' % (val[:19], util.human_size(blobs.size(val)))
+            else:
+                val = '(base64 encoded, %d bytes)' % len(val)
         return [key, val, flags, description]
 
     def dashboard_format(self, records):
@@ -95,7 +100,7 @@ class TrialListCommand(ListCommand):
                     raise InternalError("Invalid column definition: %s" % col)
                 row.append(cell)
             rows.append(row)
-        table = Texttable(logger.LINE_WIDTH)
+        table = Texttable(logger.get_line_width())
         table.set_cols_align([col.get('align', 'c') for col in self.dashboard_columns])
         table.add_rows(rows)
         return [title, table.draw(), '', subtitle, '']
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Test functions.
+
+Functions used for unit tests of the cli package.
+"""
+
+import os
+import sys
+import json
+import zipfile
+import tempfile
+import subprocess
+from taucmdr import tests, cli
+from taucmdr.cli.commands.target.create import COMMAND as target_create_cmd
+
+
+class CommandManifestTest(tests.TestCase):
+    """Unit tests for the command manifest."""
+
+    def test_build_manifest(self):
+        manifest = cli.build_command_manifest()
+        entry = manifest['target create']
+        self.assertEqual(entry['module'], 'taucmdr.cli.commands.target.create')
+        self.assertEqual(entry['summary'], target_create_cmd.summary.split('\n')[0])
+        self.assertNotIn('__main__', manifest)
+        self.assertFalse([cmd for cmd in manifest if 'tests' in cmd])
+
+    def test_get_manifest(self):
+        self.assertEqual(cli.get_command_manifest(), cli.build_command_manifest())
+
+    def test_write_manifest(self):
+        path = os.path.join(tempfile.mkdtemp(), cli.MANIFEST_FILE)
+        cli.write_command_manifest(path)
+        with open(path) as fin:
+            manifest = json.load(fin)
+        self.assertEqual(manifest['signature'], cli._manifest_signature())
+        self.assertEqual(manifest['commands'], cli.build_command_manifest())
+
+    def test_find_command(self):
+        self.assertIs(cli.find_command(['target', 'create']), target_create_cmd)
+        self.assertIs(cli.find_command(['targ', 'cre']), target_create_cmd)
+        self.assertRaises(cli.AmbiguousCommandError, cli.find_command, ['target', 'c'])
+        self.assertRaises(cli.UnknownCommandError, cli.find_command, ['not_a_command'])
+
+    def test_commands_description(self):
+        descr = cli.commands_description()
+        self.assertIn('dashboard', descr)
+        self.assertIn(cli.get_command_manifest()['dashboard']['summary'], descr)
+        self.assertIn('create', cli.commands_description('taucmdr.cli.commands.target'))
+
+    def test_imports_one_command(self):
+        cli.get_command_manifest()
+        code = ("import sys; from taucmdr import cli; cli.commands_description(); cli.find_command(['dash']); "
+                "print ' '.join(mod for mod in sys.modules if mod.startswith('taucmdr.cli.commands.'))")
+        packages = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(cli.__file__))))
+        env = dict(os.environ, PYTHONPATH=packages, __TAUCMDR_SCRIPT__=cli.SCRIPT_COMMAND)
+        imported = subprocess.check_output([sys.executable, '-c', code], env=env).split()
+        self.assertIn('taucmdr.cli.commands.dashboard', imported)
+        self.assertNotIn('taucmdr.cli.commands.target.create', imported)
+
+    def test_build_knows_compilers(self):
+        # Only the build command's module is imported, but it must still list every known compiler
+        cli.get_command_manifest()
+        code = ("from taucmdr import cli; cmd = cli.find_command(['build']); "
+                "print cmd.is_compatible('gcc'), cmd.is_compatible('mpicc'), cmd.is_compatible('nvcc')")
+        packages = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(cli.__file__))))
+        env = dict(os.environ, PYTHONPATH=packages, __TAUCMDR_SCRIPT__=cli.SCRIPT_COMMAND)
+        self.assertEqual(subprocess.check_output([sys.executable, '-c', code], env=env).split(), ['True'] * 3)
+
+    def test_zip_archive(self):
+        # Modules in a zip archive can't change, so the archive's manifest is used as is
+        packages = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(cli.__file__))))
+        archive_path = os.path.join(tempfile.mkdtemp(), 'packages.zip')
+        commands = cli.build_command_manifest()
+        commands['dashboard'] = dict(commands['dashboard'], summary='Summary from the archive')
+        with zipfile.ZipFile(archive_path, 'w') as archive:
+            for dirpath, _, filenames in os.walk(packages):
+                for filename in filenames:
+                    if filename.endswith('.py'):
+                        path = os.path.join(dirpath, filename)
+                        archive.write(path, os.path.relpath(path, packages))
+            archive.writestr('taucmdr/cli/' + cli.MANIFEST_FILE, json.dumps({'signature': None, 'commands': commands}))
+        code = ("from taucmdr import cli; print cli.__file__; print cli.commands_description(); "
+                "print cli.find_command(['target', 'create']).command")
+        env = dict(os.environ, PYTHONPATH=archive_path, __TAUCMDR_SCRIPT__=cli.SCRIPT_COMMAND)
+        output = subprocess.check_output([sys.executable, '-c', code], env=env)
+        self.assertTrue(output.startswith(archive_path))
+        self.assertIn('Summary from the archive', output)
+        self.assertIn('target create', output)
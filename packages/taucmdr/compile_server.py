@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Per-project compile server.
+
+Every ``tau <compiler>`` invocation, including those from the ``tau_<compiler>`` wrapper scripts,
+starts a new Python interpreter that imports TAU Commander, opens the databases, and configures
+the selected experiment before it can start the compiler.  In a parallel build of thousands of
+files that work is repeated for every file.
+
+The compile server keeps a pool of worker processes with TAU Commander already loaded.  It listens
+on a Unix domain socket in the project directory.  The ``tau`` script sends each ``tau build`` 
+command line and each ``tau <compiler>`` command line for a compiler the server lists in 
+:any:`COMMANDS_NAME` to the server, which answers with the compiler command and environment that
+:any:`Experiment.build_command` prepares, and the ``tau`` script executes the compiler itself.  If
+the server is not running, does not answer within :any:`TIMEOUT` seconds, cannot handle the 
+command, or fails for any reason then the ``tau`` script handles the command as usual.
+
+This module is imported by the ``tau`` script before the rest of TAU Commander so only the
+client functions may be used without importing other TAU Commander modules.
+"""
+
+import os
+import sys
+import json
+import errno
+import socket
+from taucmdr import PROJECT_DIR
+
+SOCKET_NAME = 'compile.sock'
+"""str: Name of the compile server's socket in the project directory."""
+
+PID_NAME = 'compile.pid'
+"""str: Name of the file holding the compile server's process ID in the project directory."""
+
+COMMANDS_NAME = 'compile.commands'
+"""str: Name of the file listing the compiler commands the compile server handles in the project directory."""
+
+TIMEOUT = 30
+"""int: Seconds to wait for the compile server before the ``tau`` script handles the command itself."""
+
+
+def find_socket(cwd):
+    """Find the compile server socket of the project containing a directory.
+
+    Args:
+        cwd (str): Directory to search from.
+
+    Returns:
+        str: Path to the socket, or None if the project has no compile server.
+    """
+    root, lastroot = cwd, None
+    while root and root != lastroot:
+        prefix = os.path.realpath(os.path.join(root, PROJECT_DIR))
+        if os.path.isdir(prefix):
+            path = os.path.join(prefix, SOCKET_NAME)
+            return path if os.path.exists(path) else None
+        lastroot, root = root, os.path.dirname(root)
+    return None
+
+
+def _encode(value):
+    return value.encode('utf-8') if isinstance(value, unicode) else value
+
+
+def _is_compile_command(path, command):
+    """Check if the compile server at `path` may handle a ``tau`` command without asking it."""
+    if command == 'build':
+        return True
+    try:
+        with open(os.path.join(os.path.dirname(path), COMMANDS_NAME)) as fin:
+            return os.path.basename(command) in json.load(fin)
+    except (IOError, ValueError):
+        return False
+
+
+def _exchange(path, request):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # A stopped or busy server must not keep the tau script waiting
+    sock.settimeout(TIMEOUT)
+    try:
+        sock.connect(path)
+        sock.sendall(json.dumps(request))
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        sock.close()
+    return json.loads(''.join(chunks))
+
+
+def compile_with_server(argv):
+    """Execute a compiler command prepared by the project's compile server.
+
+    Does not return if the compile server handled the command.
+
+    Args:
+        argv (list): Command line arguments of the ``tau`` script.
+    """
+    if not argv or argv[0].startswith('-'):
+        return
+    cwd = os.getcwd()
+    path = find_socket(cwd)
+    if not path or not _is_compile_command(path, argv[0]):
+        return
+    try:
+        reply = _exchange(path, {'argv': argv, 'cwd': cwd, 'env': dict(os.environ)})
+    except (socket.timeout, socket.error, ValueError):
+        return
+    if reply.get('status') != 'exec':
+        return
+    for text in reply['output']:
+        sys.stdout.write(_encode(text) + '\n')
+    sys.stdout.flush()
+    cmd = [_encode(arg) for arg in reply['cmd']]
+    env = dict((_encode(key), _encode(val)) for key, val in reply['env'].iteritems())
+    os.execvpe(cmd[0], cmd, env)
+
+
+def _forget_process_state():
+    """Discard everything a worker remembers from previous requests.
+
+    Records and compiler probe results are read again so changes made by other ``tau`` processes,
+    e.g. selecting a new experiment or loading different modules, are seen by the next request.
+    Probe results are still answered from the persistent probe cache.
+    """
+    from taucmdr import util
+    from taucmdr.mvc.controller import IDENTITY_MAP
+    from taucmdr.cf.storage.levels import ORDERED_LEVELS
+    from taucmdr.cf.compiler import InstalledCompiler, _CompilerFamily
+    IDENTITY_MAP.invalidate()
+    for storage in ORDERED_LEVELS:
+        storage.disconnect_database()
+    util.get_command_output.cache = {}
+    InstalledCompiler.__instances__.clear()
+    _CompilerFamily._probe_cache.clear() # pylint: disable=protected-access
+
+
+def _handle(request):
+    """Prepare the compiler command for a request from :any:`compile_with_server`.
+
+    Args:
+        request (dict): The ``tau`` script's command line arguments, working directory, and environment.
+
+    Returns:
+        dict: Reply to the ``tau`` script.
+    """
+    import logging
+    from taucmdr import logger
+    from taucmdr.cli.commands.build import COMMAND as build_cmd
+    from taucmdr.model.project import Project
+    argv = request['argv']
+    shortcut = argv[0] != 'build'
+    if not shortcut:
+        argv = argv[1:]
+    if not argv or not build_cmd.is_compatible(argv[0]):
+        return {'status': 'fallback'}
+    os.chdir(request['cwd'])
+    os.environ.clear()
+    os.environ.update((_encode(key), _encode(val)) for key, val in request['env'].iteritems())
+    _forget_process_state()
+    expr = Project.selected().experiment()
+    if shortcut and expr.populate()['application'].get_or_default('python'):
+        # `tau <command>` is `tau trial create <command>` for Python applications
+        return {'status': 'fallback'}
+    compiler_cmd, compiler_args = argv[0], argv[1:]
+    recorder = logger.WarningRecorder()
+    logger.get_logger('taucmdr').addHandler(recorder)
+    try:
+        prepared = expr.build_command(compiler_cmd, compiler_args, install=False)
+    finally:
+        logger.get_logger('taucmdr').removeHandler(recorder)
+    if prepared is None:
+        # Let the tau script install TAU so the user sees its progress
+        return {'status': 'fallback'}
+    cmd, env = prepared
+    # Format warnings as the tau script would print them
+    formatter = logger._STDOUT_HANDLER.formatter # pylint: disable=protected-access
+    output = [formatter.format(logging.makeLogRecord({'msg': msg, 'levelname': 'WARNING', 'levelno': logging.WARNING}))
+              for msg in recorder.messages]
+    return {'status': 'exec', 'cmd': cmd + compiler_args, 'env': env, 'output': output}
+
+
+def _worker(sock):
+    """Handle requests until terminated.
+
+    Args:
+        sock (socket.socket): The server's listening socket, shared by all workers.
+    """
+    import signal
+    import logging
+    from taucmdr import logger
+    LOGGER = logger.get_logger(__name__) # pylint: disable=invalid-name
+    for signum in signal.SIGTERM, signal.SIGINT, signal.SIGCHLD:
+        signal.signal(signum, signal.SIG_DFL)
+    while True:
+        conn, _ = sock.accept()
+        try:
+            chunks = []
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            try:
+                reply = _handle(json.loads(''.join(chunks)))
+            except Exception as err: # pylint: disable=broad-except
+                # The tau script will handle the command and report the error
+                LOGGER.debug("Compile server request failed: %s", err, exc_info=True)
+                reply = {'status': 'fallback'}
+            conn.sendall(json.dumps(reply))
+        except socket.error as err:
+            LOGGER.debug("Compile server connection failed: %s", err)
+        finally:
+            conn.close()
+            # Workers are killed, not exited, so write queued log records while idle
+            for handler in logging.getLogger().handlers:
+                handler.flush()
+
+
+def server_pid(prefix):
+    """Get the process ID of a project's compile server.
+
+    Args:
+        prefix (str): Project directory.
+
+    Returns:
+        int: Process ID of the running compile server, or None if the server is not running.
+    """
+    try:
+        with open(os.path.join(prefix, PID_NAME)) as fin:
+            pid = int(fin.read())
+        os.kill(pid, 0)
+    except (IOError, OSError, ValueError):
+        return None
+    return pid
+
+
+def serve(prefix, workers):
+    """Run a project's compile server in this process until it receives SIGTERM or SIGINT.
+
+    Args:
+        prefix (str): Project directory.
+        workers (int): Number of worker processes.
+
+    Raises:
+        ConfigurationError: The compile server is already running.
+    """
+    import signal
+    import multiprocessing
+    from taucmdr import logger
+    from taucmdr.error import ConfigurationError
+    from taucmdr.cf.compiler import Knowledgebase
+    from taucmdr.cf.compiler import host, mpi, shmem, cuda, caf, python # pylint: disable=unused-variable
+    LOGGER = logger.get_logger(__name__) # pylint: disable=invalid-name
+    path = os.path.join(prefix, SOCKET_NAME)
+    pid_path = os.path.join(prefix, PID_NAME)
+    commands_path = os.path.join(prefix, COMMANDS_NAME)
+    if server_pid(prefix):
+        raise ConfigurationError("The compile server is already running.")
+    try:
+        os.remove(path)
+    except OSError as err:
+        if err.errno != errno.ENOENT:
+            raise
+    def terminate(*_):
+        raise SystemExit(0)
+    # Install handlers before creating any files so that the files are always removed
+    signal.signal(signal.SIGTERM, terminate)
+    signal.signal(signal.SIGINT, terminate)
+    # Wake up to replace workers that exit
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    procs = []
+    try:
+        old_umask = os.umask(0077)
+        try:
+            sock.bind(path)
+        finally:
+            os.umask(old_umask)
+        sock.listen(128)
+        with open(commands_path, 'w') as fout:
+            json.dump(sorted(set(info.command for info in Knowledgebase.all_compilers())), fout)
+        with open(pid_path, 'w') as fout:
+            fout.write(str(os.getpid()))
+        LOGGER.debug("Compile server listening on '%s' with %d workers", path, workers)
+        while True:
+            procs = [proc for proc in procs if proc.is_alive()]
+            while len(procs) < workers:
+                proc = multiprocessing.Process(target=_worker, args=(sock,))
+                proc.daemon = True
+                proc.start()
+                procs.append(proc)
+            signal.pause()
+    finally:
+        for proc in procs:
+            proc.terminate()
+        sock.close()
+        for stale in path, pid_path, commands_path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Download manager.
+
+Downloads files with curl, wget, or Python's urllib2, whichever works first, or copies local files.
+A download is written to ``<dest>.part`` and renamed when it is complete.  A partial file left by a
+failed or interrupted download is resumed with an HTTP range request instead of starting over.  The
+source URL and size of the partial file are kept in ``<dest>.part.source`` so that a partial file is
+only resumed from the same source, and is discarded if it shrank since it was last written.
+:any:`fetch_all` downloads several files at the same time.
+
+Set ``__TAUCMDR_SOURCE_MIRROR__`` to a directory or URL prefix to try a mirror before the original
+URL.  The mirror holds files by their base names and may have a ``SHA256SUMS`` file in the format 
+written by ``sha256sum``.  Files that do not match the mirror's checksums are rejected.
+
+The SHA-256 checksum of every download is written to ``<dest>.sha256``.  :any:`check` compares a file
+with that checksum so that a damaged file is detected before it is used.
+"""
+
+import os
+import socket
+import shutil
+import urllib2
+import hashlib
+import threading
+import subprocess
+from Queue import Queue, Empty
+from taucmdr import logger, util, timing
+from taucmdr.progress import ProgressIndicator
+
+LOGGER = logger.get_logger(__name__)
+
+CHECKSUMS_FILE = 'SHA256SUMS'
+"""str: Name of the checksum file in a mirror."""
+
+MAX_DOWNLOADS = 4
+"""int: Maximum number of files :any:`fetch_all` downloads at the same time."""
+
+_MIRROR_CHECKSUMS = {}
+
+
+def mirror():
+    """Get the source mirror.
+    
+    Returns:
+        str: Value of ``__TAUCMDR_SOURCE_MIRROR__``, or None if there is no mirror.
+    """
+    return os.environ.get('__TAUCMDR_SOURCE_MIRROR__') or None
+
+
+def _is_url(src):
+    return '://' in src and not src.startswith('file://')
+
+
+def _local_path(src):
+    return src[7:] if src.startswith('file://') else src
+
+
+def _mirror_path(mirror_prefix, name):
+    if _is_url(mirror_prefix):
+        return mirror_prefix.rstrip('/') + '/' + name
+    return os.path.join(_local_path(mirror_prefix), name)
+
+
+def file_checksum(path):
+    """Calculate a file's SHA-256 checksum.
+    
+    Args:
+        path (str): Path to the file.
+        
+    Returns:
+        str: The checksum as a hexadecimal string.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fin:
+        for block in iter(lambda: fin.read(0x100000), ''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def mirror_checksums(mirror_prefix, timeout=8):
+    """Read a mirror's checksum file.
+    
+    Args:
+        mirror_prefix (str): Mirror directory or URL prefix.
+        timeout (int): Maximum time in seconds for the connection to the server.  0 for no timeout.
+        
+    Returns:
+        dict: SHA-256 checksums indexed by file name.  Empty if the mirror has no checksum file.
+    """
+    try:
+        return _MIRROR_CHECKSUMS[mirror_prefix]
+    except KeyError:
+        pass
+    path = _mirror_path(mirror_prefix, CHECKSUMS_FILE)
+    checksums = {}
+    try:
+        if _is_url(path):
+            response = urllib2.urlopen(path, timeout=timeout or None)
+            try:
+                text = response.read()
+            finally:
+                response.close()
+        else:
+            with open(path) as fin:
+                text = fin.read()
+    except (IOError, OSError, socket.error) as err:
+        LOGGER.debug("No checksums in mirror '%s': %s", mirror_prefix, err)
+    else:
+        for line in text.splitlines():
+            parts = line.split(None, 1)
+            if len(parts) == 2:
+                checksums[parts[1].strip().lstrip('*')] = parts[0].lower()
+    _MIRROR_CHECKSUMS[mirror_prefix] = checksums
+    return checksums
+
+
+def check(path):
+    """Check a file against the checksum recorded when it was downloaded.
+    
+    The checksum is only calculated if the file changed after the checksum was recorded.
+    Files without a recorded checksum pass.
+    
+    Args:
+        path (str): Path to the file.
+        
+    Raises:
+        IOError: The file does not match its checksum.
+    """
+    checksum_file = path + '.sha256'
+    try:
+        recorded = os.path.getmtime(checksum_file)
+    except OSError:
+        return
+    if os.path.getmtime(path) <= recorded:
+        return
+    with open(checksum_file) as fin:
+        expected = fin.read().split()[0]
+    if file_checksum(path) != expected:
+        raise IOError("'%s' does not match its SHA-256 checksum %s" % (path, expected))
+    os.utime(checksum_file, None)
+
+
+def _run(cmd):
+    with open(os.devnull, 'wb') as devnull:
+        proc = subprocess.Popen(cmd, stdout=devnull, stderr=subprocess.PIPE)
+        _, stderr = proc.communicate()
+    if proc.returncode:
+        raise IOError("%s returned %d: %s" % (os.path.basename(cmd[0]), proc.returncode, stderr.strip()))
+
+
+def _curl(src, part, timeout):
+    cmd = util.which('curl')
+    if not cmd:
+        raise IOError("curl not found")
+    # -C - resumes from the end of the partial file
+    _run([cmd, '-s', '-S', '-f', '-L', '-C', '-', '-o', part, src] + 
+         (['--connect-timeout', str(timeout)] if timeout else []))
+
+
+def _wget(src, part, timeout):
+    cmd = util.which('wget')
+    if not cmd:
+        raise IOError("wget not found")
+    _run([cmd, '-q', '-c', '-O', part, src] + (['--timeout=%d' % timeout] if timeout else []))
+
+
+def _urllib(src, part, timeout):
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    request = urllib2.Request(src)
+    if offset:
+        request.add_header('Range', 'bytes=%d-' % offset)
+    try:
+        response = urllib2.urlopen(request, timeout=timeout or None)
+    except urllib2.HTTPError as err:
+        if offset and err.code == 416:
+            # Nothing left to download
+            return
+        raise IOError("urllib2 failed to download '%s': %s" % (src, err))
+    except (urllib2.URLError, socket.error) as err:
+        raise IOError("urllib2 failed to download '%s': %s" % (src, err))
+    length = response.info().getheader('Content-Length')
+    received = 0
+    try:
+        # The server sends the whole file if it does not support range requests
+        with open(part, 'ab' if response.getcode() == 206 else 'wb') as fout:
+            for block in iter(lambda: response.read(0x100000), ''):
+                fout.write(block)
+                received += len(block)
+    except socket.error as err:
+        raise IOError("urllib2 failed to download '%s': %s" % (src, err))
+    finally:
+        response.close()
+    if length and received != int(length):
+        raise IOError("urllib2 received %d of %s bytes from '%s'" % (received, length, src))
+
+
+def _transfer(src, part, timeout):
+    if not _is_url(src):
+        path = _local_path(src)
+        if not os.path.isfile(path):
+            raise IOError("'%s' does not exist" % path)
+        shutil.copy(path, part)
+        return
+    errors = []
+    for method in _curl, _wget, _urllib:
+        try:
+            return method(src, part, timeout)
+        except IOError as err:
+            LOGGER.debug(err)
+            errors.append(str(err))
+    raise IOError("; ".join(errors))
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _read_part_source(part):
+    try:
+        with open(part + '.source') as fin:
+            size, src = fin.read().rstrip('\n').split(' ', 1)
+        return src, int(size)
+    except (IOError, ValueError):
+        return None, None
+
+
+def _write_part_source(part, src):
+    with open(part + '.source', 'w') as fout:
+        fout.write("%d %s\n" % (_size(part), src))
+
+
+def _remove_part(part):
+    for path in part, part + '.source':
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _fetch(src, dest, timeout, mirror_prefix):
+    util.mkdirp(os.path.dirname(dest))
+    part = dest + '.part'
+    name = os.path.basename(src)
+    expected = mirror_checksums(mirror_prefix, timeout).get(name) if mirror_prefix else None
+    candidates = ([_mirror_path(mirror_prefix, name)] if mirror_prefix else []) + [src]
+    errors = []
+    with timing.span('download', 'download', src=src):
+        for candidate in candidates:
+            LOGGER.debug("Downloading '%s' to '%s'", candidate, dest)
+            part_src, part_size = _read_part_source(part)
+            if os.path.exists(part) and (part_src != candidate or _size(part) < part_size):
+                LOGGER.debug("Discarding '%s' downloaded from '%s'", part, part_src)
+                _remove_part(part)
+            size = None
+            # Try again while each attempt gets more of the file
+            while _size(part) != size:
+                size = _size(part)
+                _write_part_source(part, candidate)
+                try:
+                    _transfer(candidate, part, timeout)
+                except IOError as err:
+                    errors.append(str(err))
+                    continue
+                checksum = file_checksum(part)
+                if expected and checksum != expected:
+                    errors.append("'%s' does not match SHA-256 checksum %s" % (candidate, expected))
+                    _remove_part(part)
+                    break
+                os.rename(part, dest)
+                os.remove(part + '.source')
+                with open(dest + '.sha256', 'w') as fout:
+                    fout.write("%s  %s\n" % (checksum, os.path.basename(dest)))
+                return
+    raise IOError("Failed to download '%s': %s" % (src, "; ".join(errors)))
+
+
+def fetch_all(downloads, timeout=8, mirror_prefix=None):
+    """Download or copy several files at the same time.
+    
+    Args:
+        downloads (list): (source, destination) tuples.  A source may be a file path or URL.
+        timeout (int): Maximum time in seconds for the connection to the server.  0 for no timeout.
+        mirror_prefix (str): Mirror directory or URL prefix, or None to use :any:`mirror`.
+        
+    Returns:
+        dict: IOError objects indexed by the destinations of the downloads that failed.
+    """
+    assert isinstance(timeout, int) and timeout >= 0
+    mirror_prefix = mirror_prefix or mirror()
+    todo = Queue()
+    for src, dest in downloads:
+        if _is_url(src):
+            LOGGER.info("Downloading '%s'", src)
+        todo.put((src, dest))
+    errors = {}
+    def worker():
+        while True:
+            try:
+                src, dest = todo.get_nowait()
+            except Empty:
+                return
+            try:
+                _fetch(src, dest, timeout, mirror_prefix)
+            except IOError as err:
+                LOGGER.debug(err)
+                errors[dest] = err
+    threads = [threading.Thread(target=worker) for _ in xrange(min(MAX_DOWNLOADS, len(downloads)))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    if any(_is_url(src) for src, _ in downloads):
+        with ProgressIndicator("Downloading"):
+            for thread in threads:
+                thread.join()
+    else:
+        for thread in threads:
+            thread.join()
+    return errors
+
+
+def fetch(src, dest, timeout=8, mirror_prefix=None):
+    """Download or copy a file.
+    
+    Args:
+        src (str): Path or URL to source file.
+        dest (str): Path to file copy or download destination.  The destination folder will be 
+                    created if it doesn't exist.
+        timeout (int): Maximum time in seconds for the connection to the server.  0 for no timeout.
+        mirror_prefix (str): Mirror directory or URL prefix, or None to use :any:`mirror`.
+        
+    Raises:
+        IOError: File copy or download failed.
+    """
+    errors = fetch_all([(src, dest)], timeout, mirror_prefix)
+    if errors:
+        raise errors[dest]
@@ -40,11 +40,14 @@ a rotating debug file in the user's TAU Commander project prefix, typically "~/.
 import os
 import sys
 import errno
+import atexit
 import textwrap
 import socket
 import platform
 import string
 import logging
+import threading
+from Queue import Queue
 from logging import handlers
 from datetime import datetime
 from termcolor import termcolor
@@ -52,6 +55,37 @@ from taucmdr import USER_PREFIX, TAUCMDR_VERSION
 
 
 def get_terminal_size():
+    """Get the size of the user's terminal.
+    
+    The terminal is probed the first time this function is called and the result is kept in :any:`TERM_SIZE`.
+    
+    Returns:
+        tuple: (width, height) tuple giving the dimensions of the user's terminal window in characters.
+    """
+    # Use of global statement is justified in this case.
+    # pylint: disable=global-statement
+    global TERM_SIZE
+    if TERM_SIZE is None:
+        TERM_SIZE = _probe_terminal_size()
+    return TERM_SIZE
+
+
+def get_line_width():
+    """Get the width of a line on the terminal.
+    
+    The width is calculated the first time this function is called and kept in :any:`LINE_WIDTH`.
+    
+    Returns:
+        int: Maximum length of a line of output, not counting the line marker.
+    """
+    # pylint: disable=global-statement
+    global LINE_WIDTH
+    if LINE_WIDTH is None:
+        LINE_WIDTH = get_terminal_size()[0] - len(LINE_MARKER)
+    return LINE_WIDTH
+
+
+def _probe_terminal_size():
     """Discover the size of the user's terminal.
     
     Several methods are attempted depending on the user's OS.
@@ -187,6 +221,7 @@ class LogFormatter(logging.Formatter, object):
     
     Args:
         line_width (int): Maximum length of a message line before line is wrapped.
+                          If None, use :any:`get_line_width` when the first message is formatted.
         printable_only (bool): If True, never send unprintable characters to :any:`sys.stdout`.
     """
     # Allow invalid function names to define member functions named after logging levels.
@@ -194,18 +229,31 @@ class LogFormatter(logging.Formatter, object):
     
     _printable_chars = set(string.printable)
     
-    def __init__(self, line_width, printable_only=False, allow_colors=True):
+    def __init__(self, line_width=None, printable_only=False, allow_colors=True):
         super(LogFormatter, self).__init__()
         self.printable_only = printable_only
         self.allow_colors = allow_colors
-        self.line_width = line_width
         self.line_marker = COLORED_LINE_MARKER if allow_colors else LINE_MARKER
-        self._text_wrapper = textwrap.TextWrapper(width=self.line_width+len(self.line_marker),
-                                                  initial_indent=self.line_marker,
-                                                  subsequent_indent=self.line_marker + '    ',
-                                                  break_long_words=False,
-                                                  break_on_hyphens=False,
-                                                  drop_whitespace=False)
+        self._line_width = line_width
+        self._wrapper = None
+
+    @property
+    def line_width(self):
+        if self._line_width is None:
+            self._line_width = get_line_width()
+        return self._line_width
+
+    @property
+    def _text_wrapper(self):
+        if self._wrapper is None:
+            self._wrapper = textwrap.TextWrapper(width=self.line_width+len(self.line_marker),
+                                                 initial_indent=self.line_marker,
+                                                 subsequent_indent=self.line_marker + '    ',
+                                                 break_long_words=False,
+                                                 break_on_hyphens=False,
+                                                 drop_whitespace=False)
+        return self._wrapper
+
     def CRITICAL(self, record):
         return self._msgbox(record, 'X')
         
@@ -322,6 +370,134 @@ def get_logger(name):
     return logging.getLogger(name)
 
 
+class WarningRecorder(logging.Handler):
+    """Records the messages of warnings logged while the handler is attached to a logger."""
+
+    def __init__(self):
+        logging.Handler.__init__(self, logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class BackgroundFileHandler(logging.Handler):
+    """Writes log records to a rotating log file from a background thread.
+    
+    Nothing happens until the first record reaches the handler.  Then the log file's directory is
+    created, the file is opened, and a thread is started to write a banner describing the session
+    followed by each record.  The logging thread only merges the record's arguments into its message
+    and puts it on a queue so formatting and disk I/O happen in the background.
+    
+    Python 2 has no ``logging.handlers.QueueHandler``, so the queue and the thread that services it
+    are part of this handler.  Queued records are written when the handler is flushed or closed and
+    when the program exits.  A process forked after the thread was started starts its own thread
+    when its first record arrives.
+    
+    Args:
+        filename (str): Absolute path to the log file.
+        level (int): Minimum level of records to write.
+    """
+
+    def __init__(self, filename, level=logging.NOTSET):
+        logging.Handler.__init__(self, level)
+        self.filename = filename
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._stop_at_exit = False
+
+    def _start(self):
+        prefix = os.path.dirname(self.filename)
+        try:
+            os.makedirs(prefix)
+        except OSError as exc:
+            if not (exc.errno == errno.EEXIST and os.path.isdir(prefix)):
+                raise
+        target = handlers.TimedRotatingFileHandler(self.filename, when='D', interval=1, backupCount=3)
+        target.setFormatter(LogFormatter(line_width=120, allow_colors=False))
+        queue = Queue()
+        thread = threading.Thread(target=self._write_records, name='taucmdr-log',
+                                  args=(queue, target, _session_info()))
+        thread.daemon = True
+        thread.start()
+        self._pid, self._queue, self._thread = os.getpid(), queue, thread
+        if not self._stop_at_exit:
+            # Registered after logging's own exit handler so this runs first.
+            atexit.register(self._stop)
+            self._stop_at_exit = True
+
+    def _stop(self):
+        if self._pid == os.getpid():
+            self._queue.put(None)
+            self._thread.join()
+        self._pid, self._queue, self._thread = None, None, None
+
+    @staticmethod
+    def _write_records(queue, target, session):
+        target.handle(logging.LogRecord(__name__, logging.DEBUG, __file__, 0, _banner(session), None, None))
+        while True:
+            record = queue.get()
+            try:
+                if record is None:
+                    break
+                target.handle(record)
+            finally:
+                queue.task_done()
+        target.close()
+
+    def emit(self, record):
+        try:
+            if self._pid != os.getpid():
+                self._start()
+            # Arguments may change or hold references to large objects after this call returns.
+            self._queue.put(logging.makeLogRecord(dict(record.__dict__, msg=record.getMessage(),
+                                                       args=None, exc_info=None)))
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except: # pylint: disable=bare-except
+            self.handleError(record)
+
+    def flush(self):
+        """Wait until every queued record has been written."""
+        if self._pid == os.getpid():
+            self._queue.join()
+
+    def close(self):
+        self._stop()
+        logging.Handler.close(self)
+
+
+def _session_info():
+    # Anything that might import a module is gathered here, not in the logging thread.
+    try:
+        cwd = os.getcwd()
+    except OSError as err:
+        cwd = str(err)
+    return {'bar': '#' * get_line_width(),
+            'timestamp': str(datetime.now()),
+            'cwd': cwd,
+            'termsize': 'x'.join([str(_) for _ in get_terminal_size()]),
+            'frozen': getattr(sys, 'frozen', False)}
+
+
+def _banner(session):
+    info = dict(session, hostname=socket.gethostname(), platform=platform.platform(),
+                version=TAUCMDR_VERSION, pyversion=platform.python_version())
+    return ("\n%(bar)s\n"
+            "TAU COMMANDER LOGGING INITIALIZED\n"
+            "\n"
+            "Timestamp         : %(timestamp)s\n"
+            "Hostname          : %(hostname)s\n"
+            "Platform          : %(platform)s\n"
+            "Version           : %(version)s\n"
+            "Python Version    : %(pyversion)s\n"
+            "Working Directory : %(cwd)s\n"
+            "Terminal Size     : %(termsize)s\n"
+            "Frozen            : %(frozen)s\n"
+            "%(bar)s\n") % info
+
+
 def set_log_level(level):
     """Sets :any:`LOG_LEVEL`, the output level for stdout logging objects.
     
@@ -350,51 +526,26 @@ LINE_MARKER = os.environ.get('TAU_LINE_MARKER', '[TAU] ')
 
 COLORED_LINE_MARKER = termcolor.colored(LINE_MARKER, 'red')
 
-TERM_SIZE = get_terminal_size()
-"""tuple: (width, height) tuple of detected terminal dimensions in characters."""
+TERM_SIZE = None
+"""tuple: (width, height) tuple of detected terminal dimensions in characters.
+
+None until the terminal is probed.  Use :any:`get_terminal_size` instead of reading this directly.
+"""
 
-LINE_WIDTH = TERM_SIZE[0] - len(LINE_MARKER)
+LINE_WIDTH = None
 """Width of a line on the terminal.
 
 Uses system specific methods to determine console line width.  If the line
-width cannot be determined, the default is 80.
+width cannot be determined, the default is 80.  None until first needed.
+Use :any:`get_line_width` instead of reading this directly.
 """
 
 _ROOT_LOGGER = logging.getLogger()
 if not _ROOT_LOGGER.handlers:
     _ROOT_LOGGER.setLevel(logging.DEBUG)
-    _LOG_FILE_PREFIX = os.path.dirname(LOG_FILE)
-    try:
-        os.makedirs(_LOG_FILE_PREFIX)
-    except OSError as exc:
-        if not (exc.errno == errno.EEXIST and os.path.isdir(_LOG_FILE_PREFIX)):
-            raise
     _STDOUT_HANDLER = logging.StreamHandler(sys.stdout)
-    _STDOUT_HANDLER.setFormatter(LogFormatter(line_width=LINE_WIDTH, printable_only=True))
+    _STDOUT_HANDLER.setFormatter(LogFormatter(printable_only=True))
     _STDOUT_HANDLER.setLevel(LOG_LEVEL)
     _ROOT_LOGGER.addHandler(_STDOUT_HANDLER)
-    _FILE_HANDLER = handlers.TimedRotatingFileHandler(LOG_FILE, when='D', interval=1, backupCount=3)
-    _FILE_HANDLER.setFormatter(LogFormatter(line_width=120, allow_colors=False))
-    _FILE_HANDLER.setLevel(logging.DEBUG)
+    _FILE_HANDLER = BackgroundFileHandler(LOG_FILE, logging.DEBUG)
     _ROOT_LOGGER.addHandler(_FILE_HANDLER)
-    # pylint: disable=logging-not-lazy
-    _ROOT_LOGGER.debug(("\n%(bar)s\n"
-                        "TAU COMMANDER LOGGING INITIALIZED\n"
-                        "\n"
-                        "Timestamp         : %(timestamp)s\n"
-                        "Hostname          : %(hostname)s\n"
-                        "Platform          : %(platform)s\n"
-                        "Version           : %(version)s\n"
-                        "Python Version    : %(pyversion)s\n"
-                        "Working Directory : %(cwd)s\n"
-                        "Terminal Size     : %(termsize)s\n"
-                        "Frozen            : %(frozen)s\n"
-                        "%(bar)s\n") % {'bar': '#' * LINE_WIDTH,
-                                        'timestamp': str(datetime.now()),
-                                        'hostname': socket.gethostname(),
-                                        'platform': platform.platform(),
-                                        'version': TAUCMDR_VERSION,
-                                        'pyversion': platform.python_version(),
-                                        'cwd': os.getcwd(),
-                                        'termsize': 'x'.join([str(_) for _ in TERM_SIZE]),
-                                        'frozen': getattr(sys, 'frozen', False)})
@@ -33,20 +33,102 @@ The selected experiment will be used for application compilation and trial visua
 """
 
 import os
-import fasteners
-from taucmdr import logger, util
+import json
+import hashlib
+from taucmdr import TAUCMDR_VERSION, logger, util
 from taucmdr.error import ConfigurationError, InternalError, IncompatibleRecordError, ProjectSelectionError
 from taucmdr.error import ExperimentSelectionError
 from taucmdr.mvc.model import Model
 from taucmdr.mvc.controller import Controller
 from taucmdr.model.trial import Trial
 from taucmdr.model.project import Project
+from taucmdr.cf.compiler import PASSTHROUGH_FILE, generate_passthrough, passthrough_stamp
+from taucmdr.cf.probe import PROBE_ENVIRONMENT
 from taucmdr.cf.storage.levels import PROJECT_STORAGE, highest_writable_storage
 
 
 LOGGER = logger.get_logger(__name__)
 
 
+COMPILE_CACHE_DIR = '.compile'
+"""str: Directory in the experiment's prefix holding the commands used by :any:`Experiment.managed_build`."""
+
+COMPILE_CACHE_ENTRIES = 64
+"""int: Maximum number of entries in :any:`COMPILE_CACHE_DIR`.  The least recently used entries are removed."""
+
+# Variables that select compiler wrappers change the compiler command just as they change probe output
+_COMPILE_ENVIRONMENT = PROBE_ENVIRONMENT + ('PATH', 'LD_LIBRARY_PATH', 'DYLD_LIBRARY_PATH', 'LIBRARY_PATH', 'CPATH',
+                                            'CC', 'CXX', 'FC', 'F77', 'F90', 'CFLAGS', 'CXXFLAGS', 'FFLAGS', 'LDFLAGS',
+                                            'PROFILEDIR', 'TRACEDIR', 'DARSHAN_PRELOAD')
+"""tuple: Environment variables read while resolving the compiler and TAU's compile-time configuration."""
+
+_COMPILE_ENVIRONMENT_PREFIXES = ('TAU_', 'SCOREP_', '__TAUCMDR_')
+"""tuple: Prefixes of other environment variables read while configuring compilation with TAU."""
+
+
+def _compile_environment(environ):
+    """Returns the environment variables in `environ` that can change how TAU Commander compiles.
+    
+    Args:
+        environ (dict): Environment variables, e.g. :any:`os.environ`.
+        
+    Returns:
+        list: Sorted (name, value) tuples.
+    """
+    return sorted(item for item in environ.iteritems() 
+                  if item[0] in _COMPILE_ENVIRONMENT or item[0].startswith(_COMPILE_ENVIRONMENT_PREFIXES))
+
+
+def _prune_compile_cache(cache_dir, max_entries):
+    """Removes the least recently used compile cache entries so at most `max_entries` remain.
+    
+    Args:
+        cache_dir (str): Path to a :any:`COMPILE_CACHE_DIR` directory.
+        max_entries (int): Number of entries to keep.
+    """
+    try:
+        names = [name for name in os.listdir(cache_dir) if not name.startswith('.')]
+    except OSError:
+        return
+    if len(names) <= max_entries:
+        return
+    entries = []
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            pass
+    entries.sort()
+    for _, path in entries[:len(entries) - max_entries]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        else:
+            LOGGER.debug("Removed compile cache entry '%s'", path)
+
+
+def _configuration_uid(sources, config):
+    """Calculate a unique identifier for the arguments used to construct a TAU installation.
+    
+    Args:
+        sources (dict): Package sources as passed to :any:`TauInstallation`.
+        config (dict): Keyword arguments passed to :any:`TauInstallation`.
+        
+    Returns:
+        str: The unique identifier.
+    """
+    parts = [repr(sorted(sources.iteritems()))]
+    for key, value in sorted(config.iteritems()):
+        if key == 'compilers':
+            value = sorted(comp.uid for comp in value.itervalues())
+        elif key in ('target_arch', 'target_os'):
+            value = value.name
+        parts.append('%s=%r' % (key, value))
+    return util.calculate_uid(parts)
+
+
 def attributes():
     from taucmdr.model.target import Target
     from taucmdr.model.application import Application
@@ -150,9 +232,10 @@ class ExperimentController(Controller):
         """Default match_any to False to prevent matches outside the selected project."""
         return super(ExperimentController, self)._check_unique(data, match_any)
  
-    def create(self, data):
-        data['project'] = self._project_eid
-        return super(ExperimentController, self).create(data)
+    def create_many(self, data):
+        for element in data:
+            element['project'] = self._project_eid
+        return super(ExperimentController, self).create_many(data)
  
     def update(self, data, keys):
         return super(ExperimentController, self).update(data, self._restrict_project(keys))
@@ -197,6 +280,19 @@ class Experiment(Model):
         else:
             expr = matching[0]
         proj_ctrl.select(proj, expr)
+        # Reload so the populated project shows this experiment as selected
+        expr = expr_ctrl.one(expr.eid)
+        try:
+            tau = expr.configure(install=False)
+        except ConfigurationError as err:
+            LOGGER.debug("Experiment '%s' cannot be configured: %s", name, err)
+            tau = None
+        if tau is None:
+            # The compiler wrapper scripts will call TAU Commander to configure the experiment
+            try:
+                os.remove(os.path.join(proj.storage.prefix, PASSTHROUGH_FILE))
+            except OSError:
+                pass
 
     @classmethod
     def rebuild_required(cls):
@@ -231,8 +327,12 @@ class Experiment(Model):
 
     @property
     def prefix(self):
-        with fasteners.InterProcessLock(os.path.join(PROJECT_STORAGE.prefix, '.lock')):
-            return os.path.join(self.populate('project').prefix, self['name'])
+        # A record's name cannot change: renaming an experiment creates a new model object
+        try:
+            return self._prefix
+        except AttributeError:
+            self._prefix = os.path.join(self.populate('project').prefix, self['name'])
+            return self._prefix
 
     def verify(self):
         """Checks all components of the experiment for mutual compatibility."""
@@ -274,26 +374,207 @@ class Experiment(Model):
                 return i
         return len(trials)
 
-    @fasteners.interprocess_locked(os.path.join(highest_writable_storage().prefix, '.lock'))
-    def configure(self):
+    @property
+    def _configured_stamp(self):
+        return os.path.join(self.prefix, '.configured')
+
+    @property
+    def _configured_uid(self):
+        # Plain text copy of the configuration UID in _configured_stamp for the compiler wrapper scripts
+        return os.path.join(self.prefix, '.configured_uid')
+
+    def _load_configured(self, tau, config_uid):
+        """Prepare `tau` from this experiment's configuration stamp if the stamp is current.
+        
+        Args:
+            tau (TauInstallation): TAU installation for this experiment.
+            config_uid (str): Unique identifier of the experiment's configuration.
+            
+        Returns:
+            bool: True if `tau` is ready to use, False if the experiment must be configured.
+        """
+        try:
+            with open(self._configured_stamp) as fin:
+                stamp = json.load(fin)
+        except (IOError, ValueError) as err:
+            LOGGER.debug("Experiment '%s' configuration stamp not loaded: %s", self['name'], err)
+            return False
+        if stamp.get('uid') != config_uid:
+            LOGGER.debug("Experiment '%s' configuration has changed", self['name'])
+            return False
+        return tau.load_configuration_stamp(stamp)
+
+    def _save_configured(self, tau, config_uid):
+        """Record that `tau` is installed and verified for this experiment's configuration.
+        
+        Args:
+            tau (TauInstallation): TAU installation for this experiment.
+            config_uid (str): Unique identifier of the experiment's configuration.
+        """
+        stamp = dict(tau.configuration_stamp(), uid=config_uid)
+        try:
+            util.atomic_write(self._configured_stamp, json.dumps(stamp))
+            util.atomic_write(self._configured_uid, config_uid + '\n')
+        except (IOError, OSError) as err:
+            LOGGER.debug("Could not write experiment '%s' configuration stamp: %s", self['name'], err)
+
+    def _update_passthrough(self, tau, config_uid):
+        """List the compiler commands that the compiler wrapper scripts can execute directly.
+        
+        Does nothing unless this is the selected experiment.  The list is written to the project
+        directory and stamped with `config_uid`.  The wrapper scripts ignore it when the experiment's
+        configuration UID no longer matches the stamp or any record this experiment depends on is
+        not older than the list, so it is only rewritten in those cases.
+        
+        Args:
+            tau (TauInstallation): TAU installation for this experiment.
+            config_uid (str): Unique identifier of the experiment's configuration.
+        """
+        populated = self.populate()
+        proj = populated['project']
+        if proj.get('experiment') != self.eid:
+            return
+        path = os.path.join(proj.storage.prefix, PASSTHROUGH_FILE)
+        record_paths = [self._configured_stamp]
+        for record in self, proj, populated['target'], populated['application'], populated['measurement']:
+            record_paths.extend(rpath for rpath in record.storage.record_paths if rpath not in record_paths)
+        try:
+            mtime = os.stat(path).st_mtime
+            if (passthrough_stamp(path) == config_uid and 
+                    all(os.stat(rpath).st_mtime < mtime for rpath in record_paths if os.path.exists(rpath))):
+                return
+        except OSError:
+            pass
+        commands = {}
+        for comp in populated['target'].compilers().itervalues():
+            cmd = tau.get_passthrough_command(comp)
+            if cmd:
+                commands[comp.command] = cmd
+        LOGGER.debug("Compiler commands that do not need TAU Commander: %s", commands)
+        try:
+            # Experiments configured by older versions have no plain text UID
+            try:
+                with open(self._configured_uid) as fin:
+                    current = fin.readline().strip() == config_uid
+            except IOError:
+                current = False
+            if not current:
+                util.atomic_write(self._configured_uid, config_uid + '\n')
+            generate_passthrough(path, commands, record_paths, self._configured_uid, config_uid,
+                                 "Compiler commands for experiment '%s' that do not need TAU Commander." % self['name'])
+        except (IOError, OSError) as err:
+            LOGGER.debug("Could not write '%s': %s", path, err)
+
+    def _compile_cache_key(self, compiler_cmd, compiler_args):
+        """Calculate the key of the compile cache entry for a compiler command.
+        
+        The key covers everything :any:`managed_build` reads before it executes the compiler: 
+        the experiment's records, the compiler command, and the environment variables that 
+        affect compiler lookup and TAU's compile-time configuration.  Other variables, e.g. 
+        SSH_* or MAKEFLAGS, are passed through from the current environment when the entry is used.
+        
+        Args:
+            compiler_cmd (str): The compiler command intercepted by TAU Commander.
+            compiler_args (list): Compiler command line arguments intercepted by TAU Commander.
+            
+        Returns:
+            str: The cache key.
+        """
+        populated = self.populate()
+        target = populated['target']
+        # The TAU makefile is chosen by configure() and is checked by modification time instead
+        records = [dict((key, val) for key, val in self.iteritems() if key not in ('trials', 'tau_makefile')),
+                   target, populated['application'], populated['measurement']]
+        records.extend(comp for comp in target.populate().itervalues() if isinstance(comp, Model))
+        parts = [TAUCMDR_VERSION, logger.LOG_LEVEL, compiler_cmd, '-mmic' in compiler_args]
+        parts.extend(sorted(record.iteritems()) for record in records)
+        parts.append(_compile_environment(os.environ))
+        return hashlib.sha1(json.dumps(parts, default=repr)).hexdigest()
+
+    def _load_compile_cache(self, key):
+        """Get the compile cache entry for `key` if the files it depends on have not changed.
+        
+        Args:
+            key (str): Value returned by :any:`_compile_cache_key`.
+            
+        Returns:
+            tuple: (cmd, env, warnings) as passed to :any:`_save_compile_cache`, or None.
+        """
+        entry_path = os.path.join(self.prefix, COMPILE_CACHE_DIR, key)
+        try:
+            with open(entry_path) as fin:
+                entry = json.load(fin)
+            for path, mtime in entry['mtimes'].iteritems():
+                if os.stat(path).st_mtime != mtime:
+                    LOGGER.debug("'%s' has changed", path)
+                    return None
+        except (IOError, OSError, ValueError, KeyError) as err:
+            LOGGER.debug("Compile cache entry '%s' not loaded: %s", key, err)
+            return None
+        try:
+            # Mark the entry as recently used so it is pruned last
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+        env = dict(os.environ)
+        for name in entry['unset']:
+            env.pop(name, None)
+        env.update(entry['env'])
+        return entry['cmd'], env, entry['warnings']
+
+    def _save_compile_cache(self, key, cmd, env, warnings, paths):
+        """Record the command and environment used to compile with this experiment.
+        
+        Args:
+            key (str): Value returned by :any:`_compile_cache_key`.
+            cmd (list): Compiler wrapper command and options.
+            env (dict): Environment variables.
+            warnings (list): Warning messages to repeat when the entry is used.
+            paths (list): Files and directories that invalidate the entry when modified.
+        """
+        entry = {'cmd': cmd, 
+                 'env': dict((name, val) for name, val in env.iteritems() if os.environ.get(name) != val),
+                 'unset': [name for name in os.environ if name not in env],
+                 'warnings': warnings}
+        cache_dir = os.path.join(self.prefix, COMPILE_CACHE_DIR)
+        try:
+            entry['mtimes'] = dict((path, os.stat(path).st_mtime) for path in paths if path)
+            util.atomic_write(os.path.join(cache_dir, key), json.dumps(entry))
+        except (IOError, OSError) as err:
+            LOGGER.debug("Could not write compile cache entry '%s': %s", key, err)
+        else:
+            _prune_compile_cache(cache_dir, COMPILE_CACHE_ENTRIES)
+
+    def configure(self, install=True):
         """Sets up the Experiment for a new trial.
 
         Installs or configures TAU and all its dependencies.  After calling this
         function, the experiment is ready to operate on the user's application.
+        
+        The first call installs and verifies TAU while holding the lock on the highest
+        writable storage level then records a configuration stamp in the experiment's
+        directory.  Later calls, e.g. from every compiler invocation in a parallel build,
+        find a current stamp and return without taking any lock.  The stamp is current
+        if the experiment's target, application, and measurement have not changed and the
+        installations it names still exist.
+
+        Args:
+            install (bool): If False, return None instead of installing or verifying TAU
+                            when the stamp is not current.
 
         Returns:
             TauInstallation: Object handle for the TAU installation.
         """
         from taucmdr.cf.software.tau_installation import TauInstallation
         LOGGER.debug("Configuring experiment %s", self['name'])
-        with fasteners.InterProcessLock(os.path.join(PROJECT_STORAGE.prefix, '.lock')):
-            populated = self.populate(defaults=True)
+        # Storage files are replaced atomically so records can be read without the project lock
+        populated = self.populate(defaults=True)
         target = populated['target']
         application = populated['application']
         measurement = populated['measurement']
         baseline = measurement.get_or_default('baseline')
-        tau = TauInstallation(\
-                    target.sources(),
+        sources = target.sources()
+        config = dict(
                     target_arch=target.architecture(),
                     target_os=target.operating_system(),
                     compilers=target.compilers(),
@@ -358,9 +639,25 @@ class Experiment(Model):
                     forced_makefile=target.get('forced_makefile', None),
                     mpit=measurement.get_or_default('mpit'),
                     unwind_depth=measurement.get_or_default('unwind_depth'))
-        tau.install()
-        if not baseline:
-            self.controller(self.storage).update({'tau_makefile': os.path.basename(tau.get_makefile())}, self.eid)
+        config_uid = _configuration_uid(sources, config)
+        tau = TauInstallation(sources, **config)
+        # Checking for a new nightly build requires the lock
+        if not config['update_nightly'] and self._load_configured(tau, config_uid):
+            LOGGER.debug("Experiment '%s' is configured", self['name'])
+            self._update_passthrough(tau, config_uid)
+            return tau
+        if not install:
+            return None
+        with highest_writable_storage().exclusive_lock():
+            # Another process may have configured the experiment while we waited for the lock
+            if not config['update_nightly'] and self._load_configured(tau, config_uid):
+                self._update_passthrough(tau, config_uid)
+                return tau
+            tau.install()
+            if not baseline:
+                self.controller(self.storage).update({'tau_makefile': os.path.basename(tau.get_makefile())}, self.eid)
+            self._save_configured(tau, config_uid)
+            self._update_passthrough(tau, config_uid)
         return tau
 
     def managed_build(self, compiler_cmd, compiler_args):
@@ -379,7 +676,64 @@ class Experiment(Model):
         Returns:
             int: Build subprocess return code.
         """
+        from taucmdr.cf.software.tau_installation import TauInstallation
+        cmd, env = self.build_command(compiler_cmd, compiler_args)
+        return TauInstallation.execute_compile(cmd + compiler_args, env)
+
+    def build_command(self, compiler_cmd, compiler_args, install=True):
+        """Get the command and environment used to perform a build operation.
+
+        Args:
+            compiler_cmd (str): The compiler command intercepted by TAU Commander.
+            compiler_args (list): Compiler command line arguments intercepted by TAU Commander.
+            install (bool): If False, return None instead of installing or verifying TAU 
+                            when the experiment is not already configured.
+
+        Raises:
+            ConfigurationError: The experiment is not configured to perform the desired build.
+
+        Returns:
+            tuple: (cmd, env) where `cmd` is the compiler wrapper command and options as a list, to which 
+                   `compiler_args` should be appended, and `env` is a dictionary of environment variables.
+                   None if `install` is False and the experiment is not configured.
+        """
         LOGGER.debug("Managed build: %s", [compiler_cmd] + compiler_args)
+        key = self._compile_cache_key(compiler_cmd, compiler_args)
+        cached = self._load_compile_cache(key)
+        if cached:
+            LOGGER.debug("Using compile cache entry '%s'", key)
+            cmd, env, warnings = cached
+            for msg in warnings:
+                LOGGER.warning(msg)
+            return cmd, env
+        recorder = logger.WarningRecorder()
+        logger.get_logger('taucmdr').addHandler(recorder)
+        try:
+            tau, installed_compiler = self._configure_build(compiler_cmd, compiler_args, install)
+            if tau is None:
+                return None
+            cmd, env = tau.compile_command(installed_compiler)
+        finally:
+            logger.get_logger('taucmdr').removeHandler(recorder)
+        # Checking for a new nightly build requires the lock so it cannot be skipped
+        if not tau.update_nightly:
+            paths = [self._configured_stamp, installed_compiler.absolute_path, 
+                     tau.install_prefix, env.get('TAU_MAKEFILE')]
+            self._save_compile_cache(key, cmd, env, recorder.messages, paths)
+        return cmd, env
+
+    def _configure_build(self, compiler_cmd, compiler_args, install=True):
+        """Find the compiler and configure TAU for a build operation.
+
+        Args:
+            compiler_cmd (str): The compiler command intercepted by TAU Commander.
+            compiler_args (list): Compiler command line arguments intercepted by TAU Commander.
+            install (bool): Passed to :any:`configure`.
+
+        Returns:
+            tuple: (TauInstallation, InstalledCompiler) to compile with, or (None, None) if
+                   `install` is False and the experiment is not configured.
+        """
         target = self.populate('target')
         application = self.populate('application')
         target_compilers = target.check_compiler(compiler_cmd, compiler_args)
@@ -392,7 +746,9 @@ class Experiment(Model):
             found_compiler = target_compilers[0]
         # We've found a candidate compiler.  Check that this compiler record is still valid.
         installed_compiler = found_compiler.verify()
-        tau = self.configure()
+        tau = self.configure(install)
+        if tau is None:
+            return None, None
         meas = self.populate('measurement')
         try:
             tau.force_tau_options = meas['force_tau_options']
@@ -407,7 +763,7 @@ class Experiment(Model):
         else:
             #LOGGER.warning("Measurement '%s' adds extra options TAU_OPTIONS='%s'", meas['name'], ' '.join(tau.extra_tau_options))
             LOGGER.warning("Measurement '%s' forces adds '%s' to TAU_OPTIONS", meas['name'], ' '.join(tau.extra_tau_options))
-        return tau.compile(installed_compiler, compiler_args)
+        return tau, installed_compiler
 
     def managed_run(self, launcher_cmd, application_cmds, description=None): 
         """Uses this experiment to run an application command.
@@ -444,7 +800,7 @@ class Experiment(Model):
 
     def managed_rewrite(self, rewrite_package, executable, inst_file):
         from taucmdr.cf.software.tau_installation import TauInstallation
-        with fasteners.InterProcessLock(os.path.join(PROJECT_STORAGE.prefix, '.lock')):
+        with PROJECT_STORAGE.shared_lock():
             populated = self.populate(defaults=True)
         target = populated['target']
         application = populated['application']
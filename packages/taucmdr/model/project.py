@@ -90,10 +90,10 @@ def attributes():
 class ProjectController(Controller):
     """Project data controller."""
     
-    def create(self, data):
+    def create_many(self, data):
         if self.storage is not PROJECT_STORAGE:
             raise InternalError("Projects may only be created in project-level storage")
-        return super(ProjectController, self).create(data)
+        return super(ProjectController, self).create_many(data)
     
     def delete(self, keys):
         super(ProjectController, self).delete(keys)
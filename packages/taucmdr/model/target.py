@@ -37,7 +37,6 @@ compilers are installed then there will target configurations for each compiler
 
 import os
 import glob
-import fasteners
 from taucmdr import logger, util
 from taucmdr.error import ConfigurationError, IncompatibleRecordError 
 from taucmdr.error import ProjectSelectionError, ExperimentSelectionError
@@ -47,7 +46,7 @@ from taucmdr.cf import software
 from taucmdr.cf.platforms import Architecture, OperatingSystem 
 from taucmdr.cf.platforms import HOST_ARCH, INTEL_KNC, HOST_OS, DARWIN, CRAY_CNL
 from taucmdr.cf.compiler import Knowledgebase, InstalledCompilerSet
-from taucmdr.cf.storage.levels import PROJECT_STORAGE, SYSTEM_STORAGE
+from taucmdr.cf.storage.levels import SYSTEM_STORAGE
 
 
 LOGGER = logger.get_logger(__name__)
@@ -548,16 +547,21 @@ class Target(Model):
         return cls(self.sources(), self.architecture(), self.operating_system(), self.compilers())
     
     def acquire_sources(self):
-        """Acquire all source code packages known to this target."""
-        for attr, val in self.iteritems():
-            if val and attr.endswith('_source'):
-                inst = self.get_installation(attr.replace('_source', ''))
-                try:
-                    inst.acquire_source()
-                except ConfigurationError as err:
-                    # Not a warning since using an existing installation is OK and in that case
-                    # there is no source code package to acquire. 
-                    LOGGER.info(err)
+        """Acquire all source code packages known to this target.
+        
+        Source archives that must be downloaded are downloaded at the same time.
+        """
+        from taucmdr.cf.software.installation import acquire_sources
+        installations = [self.get_installation(attr.replace('_source', '')) 
+                         for attr, val in self.iteritems() if val and attr.endswith('_source')]
+        acquire_sources(installations)
+        for inst in installations:
+            try:
+                inst.acquire_source()
+            except ConfigurationError as err:
+                # Not a warning since using an existing installation is OK and in that case
+                # there is no source code package to acquire. 
+                LOGGER.info(err)
 
     def compilers(self):
         """Get information about the compilers used by this target configuration.
@@ -569,9 +573,9 @@ class Target(Model):
             eids = []
             compilers = {}
             for role in Knowledgebase.all_roles():
+                # Storage files are replaced atomically so records can be read without the project lock
                 try:
-                    with fasteners.InterProcessLock(os.path.join(PROJECT_STORAGE.prefix, '.lock')):
-                        compiler_record = self.populate(role.keyword)
+                    compiler_record = self.populate(role.keyword)
                 except KeyError:
                     continue
                 compilers[role.keyword] = compiler_record.installation()
@@ -30,9 +30,36 @@
 Functions used for unit tests of experiment.py.
 """
 
-
-from taucmdr import tests
+import os
+from taucmdr import tests, util
+from taucmdr.model.experiment import _compile_environment, _prune_compile_cache
 
 @tests.not_implemented
 class ExperimentTest(tests.TestCase):
     pass
+
+
+class CompileCacheTest(tests.TestCase):
+    """Unit tests for the compile cache helpers."""
+
+    def test_compile_environment(self):
+        environ = {'PATH': '/usr/bin', 'TAU_OPTIONS': '-optVerbose', 'SCOREP_TOTAL_MEMORY': '1G',
+                   'SSH_CONNECTION': '1.2.3.4 22', 'MAKEFLAGS': '-j8', 'MAKELEVEL': '1', 'TERM': 'xterm',
+                   'DISPLAY': ':0', 'SLURM_JOB_ID': '12345', 'PWD': '/tmp'}
+        self.assertEqual(_compile_environment(environ), 
+                         [('PATH', '/usr/bin'), ('SCOREP_TOTAL_MEMORY', '1G'), ('TAU_OPTIONS', '-optVerbose')])
+        # Variables that select MPI compiler wrappers change the compiler command
+        for name in 'MPICH_CC', 'OMPI_FC', 'I_MPI_CXX', 'CRAYPE_LINK_TYPE', '_LMFILES_':
+            self.assertEqual(_compile_environment({name: 'x', 'TERM': 'xterm'}), [(name, 'x')])
+
+    def test_prune(self):
+        cache_dir = os.path.join(os.getcwd(), self._testMethodName)
+        util.mkdirp(cache_dir)
+        for i in xrange(5):
+            path = os.path.join(cache_dir, 'key%d' % i)
+            open(path, 'w').close()
+            os.utime(path, (1000 + i, 1000 + i))
+        # Entries being written are not counted or removed
+        open(os.path.join(cache_dir, '.key9.tmp'), 'w').close()
+        _prune_compile_cache(cache_dir, 3)
+        self.assertEqual(sorted(os.listdir(cache_dir)), ['.key9.tmp', 'key2', 'key3', 'key4'])
@@ -30,9 +30,70 @@
 Functions used for unit tests of trial.py.
 """
 
-
+import os
+import base64
+import tempfile
 from taucmdr import tests
+from taucmdr.cf.storage.local_file import LocalFileStorage
+from taucmdr.model.trial import Trial
 
 @tests.not_implemented
 class TrialTest(tests.TestCase):
     pass
+
+
+class TrialEnvironmentTest(tests.TestCase):
+    """Unit tests for storing and reconstructing trial environments."""
+
+    def setUp(self):
+        self.storage = LocalFileStorage('test', tempfile.mkdtemp())
+        self.env = {'PATH': '/usr/bin', 'TAU_METRICS': 'TIME'}
+
+    def tearDown(self):
+        self.storage.disconnect_database()
+
+    def _trial(self, number, environment=None):
+        data = {'number': number, 'experiment': 1}
+        if environment:
+            data['environment'] = environment
+        trial = Trial(self.storage.insert(data, table_name=Trial.name))
+        # pylint: disable=protected-access
+        trial._prefix = os.path.join(self.storage.prefix, 'exp', str(number))
+        return trial
+
+    def _perform(self, number):
+        trial = self._trial(number)
+        env = dict(self.env, PROFILEDIR=trial.prefix, TRACEDIR=trial.prefix)
+        # pylint: disable=protected-access
+        environment = Trial.controller(self.storage)._store_environment(trial, env)
+        self.storage.update({'environment': environment}, trial.eid, table_name=Trial.name)
+        trial = Trial(self.storage.get(trial.eid, table_name=Trial.name))
+        trial._prefix = os.path.join(self.storage.prefix, 'exp', str(number))
+        return trial
+
+    def test_shared_environment(self):
+        first, second = self._perform(0), self._perform(1)
+        self.assertEqual(first['environment'], second['environment'])
+        for trial in first, second:
+            self.assertEqual(trial.get_environment(), 
+                             dict(self.env, PROFILEDIR=trial.prefix, TRACEDIR=trial.prefix))
+
+    def test_legacy_environment(self):
+        trial = self._trial(0, base64.b64encode(repr(self.env)))
+        self.assertEqual(trial.get_environment(), self.env)
+
+    def _delete(self, trials, rollback):
+        with self.storage:
+            for trial in trials:
+                self.storage.remove(trial.eid, table_name=Trial.name)
+                trial.on_delete()
+            if rollback:
+                raise RuntimeError
+
+    def test_delete_rolled_back(self):
+        trials = [self._perform(0), self._perform(1)]
+        ref = trials[0]['environment']
+        self.assertRaises(RuntimeError, self._delete, trials, True)
+        self.assertIn(ref, self.storage.blobs)
+        self._delete(trials, False)
+        self.assertNotIn(ref, self.storage.blobs)
@@ -33,15 +33,15 @@ the performance data.
 """
 
 import os
+import ast
 import glob
-import errno
 import base64
+import errno
 import time
 from datetime import datetime
 
 import shutil
 
-import fasteners
 from taucmdr import logger, util
 from taucmdr.error import ConfigurationError, InternalError
 from taucmdr.model.project import Project
@@ -54,6 +54,12 @@ from taucmdr.cf.storage.levels import PROJECT_STORAGE
 
 LOGGER = logger.get_logger(__name__)
 
+TRIAL_PREFIX_VARIABLES = ('PROFILEDIR', 'TRACEDIR', 'SCOREP_EXPERIMENT_DIRECTORY')
+"""tuple: Environment variables set to the trial's data directory when the trial is performed."""
+
+_TRIAL_PREFIX = '@TRIAL_PREFIX@'
+"""str: Stands in for the trial's data directory in stored environments."""
+
 
 def attributes():
     from taucmdr.model.experiment import Experiment
@@ -81,7 +87,7 @@ def attributes():
         },
         'environment': {
             'type': 'string',
-            'description': "shell environment in which the trial was performed, encoded as a base64 string"
+            'description': "shell environment in which the trial was performed, stored in the blob store"
         },
         'begin_time': {
             'type': 'datetime',
@@ -115,7 +121,7 @@ def attributes():
         },
         'output': {
             'type': 'string',
-            'description': "stdout and stderr of program"
+            'description': "stdout and stderr of program, stored in the blob store"
         },
     }
 
@@ -135,7 +141,7 @@ class TrialController(Controller):
     @staticmethod
     def _mark_time(mark, expr):
         timestamp = str(datetime.utcnow())
-        headline = '\n{:=<{}}\n'.format('== %s %s at %s ==' % (mark, expr['name'], timestamp), logger.LINE_WIDTH)
+        headline = '\n{:=<{}}\n'.format('== %s %s at %s ==' % (mark, expr['name'], timestamp), logger.get_line_width())
         LOGGER.info(headline)
         return timestamp
 
@@ -223,7 +229,7 @@ class TrialController(Controller):
             env (dict): Environment variables to set before performing the trial.
             description (str): Description of this trial.
         """
-        with fasteners.InterProcessLock(os.path.join(PROJECT_STORAGE.prefix, '.lock')):
+        with PROJECT_STORAGE.exclusive_lock():
             expr = proj.populate('experiment')
             trial_number = expr.next_trial_number()
             LOGGER.debug("New trial number is %d", trial_number)
@@ -234,14 +240,22 @@ class TrialController(Controller):
                     'phase': 'initializing'}
             if description is not None:
                 data['description'] = str(description)
-            trial = self.create(data)
-        # Tell TAU to send profiles and traces to the trial prefix
-        env['PROFILEDIR'] = trial.prefix
-        env['TRACEDIR'] = trial.prefix
-        measurement = expr.populate('measurement')
-        if measurement['trace'] == 'otf2' or measurement['profile'] == 'cubex':
-            env['SCOREP_EXPERIMENT_DIRECTORY'] = trial.prefix
-        b64env = base64.b64encode(repr(env))
+            environment = None
+            try:
+                with self.storage:
+                    trial = self.create(data)
+                    # Tell TAU to send profiles and traces to the trial prefix
+                    env['PROFILEDIR'] = trial.prefix
+                    env['TRACEDIR'] = trial.prefix
+                    measurement = expr.populate('measurement')
+                    if measurement['trace'] == 'otf2' or measurement['profile'] == 'cubex':
+                        env['SCOREP_EXPERIMENT_DIRECTORY'] = trial.prefix
+                    environment = self._store_environment(trial, env)
+                    self.update({'environment': environment}, trial.eid)
+            except Exception:
+                if environment and not self.storage.contains({'environment': environment}, table_name=self.name):
+                    self.storage.blobs.remove(environment)
+                raise
         is_bluegene = expr.populate('target').architecture().is_bluegene()
         is_cray_login = expr.populate('target').operating_system().is_cray_login()
         if is_cray_login:
@@ -257,15 +271,33 @@ class TrialController(Controller):
                     retval = self._perform_interactive(expr, trial, cmd, cwd, env, record_output)
         except Exception as err:
             try:
-                self.update({'phase': 'failed', 'environment': b64env}, trial.eid)
+                self.update({'phase': 'failed'}, trial.eid)
             except KeyError:
                 # Trial record was deleted
                 pass
             raise err
         else:
-            self.update({'phase': 'completed', 'environment': b64env}, trial.eid)
+            self.update({'phase': 'completed'}, trial.eid)
             return retval
 
+    def _store_environment(self, trial, env):
+        """Store the environment a trial is performed in.
+        
+        Variables in :any:`TRIAL_PREFIX_VARIABLES` that point at the trial's data directory are
+        stored as a placeholder so that trials performed in the same environment share one blob.
+        :any:`Trial.get_environment` restores them.
+        
+        Args:
+            trial (Trial): The trial.
+            env (dict): Environment variables, including those set for the trial.
+            
+        Returns:
+            str: Blob store reference to the stored environment.
+        """
+        normalized = dict(sorted((key, _TRIAL_PREFIX if key in TRIAL_PREFIX_VARIABLES and val == trial.prefix else val)
+                                 for key, val in env.iteritems()))
+        return self.storage.blobs.put(repr(normalized))
+
     def renumber(self, old_trials, new_trials):
         """Renumbers trial id of an experiment.
 
@@ -273,23 +305,17 @@ class TrialController(Controller):
             old_trials (list): old trial numbers.
             new_trials (list): new trial numbers.
         """
-        # First, we renumber everything to available temporary numbers
         assert len(old_trials) == len(new_trials)
         expr = Project.selected().experiment()
-        existing_nums = [trial['number'] for trial in
-                         Trial.controller(storage=PROJECT_STORAGE).search({'experiment': expr.eid})]
-        start_temp_id = max(max(existing_nums), max(new_trials)) + 1
-        temp_id = start_temp_id
-        for old_trial_num in old_trials:
-            old_trial = self.one({'number': old_trial_num, 'experiment': expr.eid})
-            self.update({'number': temp_id}, old_trial.eid)
-            temp_id = temp_id + 1
-        # Then we renumber from the temporaries to the final new numbers
-        temp_id = start_temp_id
-        for new_trial_num in new_trials:
-            intermed_trial = self.one({'number': temp_id, 'experiment': expr.eid})
-            self.update({'number': new_trial_num}, intermed_trial.eid)
-            temp_id = temp_id + 1
+        eids = {trial['number']: trial.eid for trial in self.search({'experiment': expr.eid})}
+        start_temp_id = max(max(eids), max(new_trials)) + 1
+        renumbered = [eids[old_trial_num] for old_trial_num in old_trials]
+        with self.storage:
+            # First, we renumber everything to available temporary numbers so that
+            # no trial data directory is overwritten when the directories are renamed
+            self.update_many({eid: {'number': start_temp_id + i} for i, eid in enumerate(renumbered)})
+            # Then we renumber from the temporaries to the final new numbers
+            self.update_many({eid: {'number': num} for eid, num in zip(renumbered, new_trials)})
 
 
 class Trial(Model):
@@ -298,7 +324,29 @@ class Trial(Model):
     __attributes__ = attributes
 
     __controller__ = TrialController
-    
+
+    BLOB_ATTRIBUTES = ('environment', 'output')
+    """tuple: Attributes with values kept in the storage container's blob store."""
+
+    def get_environment(self):
+        """Get the environment the trial was performed in.
+        
+        Trials recorded by older versions of TAU Commander store the environment inline as a 
+        base64 encoded string.  Those are decoded as well.
+        
+        Returns:
+            dict: Environment variables, or None if the trial did not record its environment.
+        """
+        value = self.get('environment')
+        if value is None:
+            return None
+        blobs = self.storage.blobs
+        env = ast.literal_eval(blobs.get(value) if blobs.is_ref(value) else base64.b64decode(value))
+        for key in TRIAL_PREFIX_VARIABLES:
+            if env.get(key) == _TRIAL_PREFIX:
+                env[key] = self.prefix
+        return env
+
     @classmethod
     def _separate_launcher_cmd(cls, cmd):
         """Separate the launcher command and it's arguments from the application command(s) and arguments.
@@ -404,8 +452,12 @@ class Trial(Model):
 
     @property
     def prefix(self):
-        experiment = self.populate('experiment')
-        return os.path.join(experiment.prefix, str(self['number']))
+        # Renumbering a trial creates a new model object so the prefix cannot change
+        try:
+            return self._prefix
+        except AttributeError:
+            self._prefix = os.path.join(self.populate('experiment').prefix, str(self['number']))
+            return self._prefix
 
     def on_create(self):
         try:
@@ -420,6 +472,15 @@ class Trial(Model):
         except Exception as err:  # pylint: disable=broad-except
             if os.path.exists(self.prefix):
                 LOGGER.error("Could not remove trial data at '%s': %s", self.prefix, err)
+        # Blobs must outlive records restored by a rollback, so only remove them once the delete is committed
+        for key in self.BLOB_ATTRIBUTES:
+            ref = self.get(key)
+            if self.storage.blobs.is_ref(ref):
+                self.storage.after_commit(lambda key=key, ref=ref: self._remove_unused_blob(key, ref))
+
+    def _remove_unused_blob(self, key, ref):
+        if not self.storage.contains({key: ref}, table_name=self.name):
+            self.storage.blobs.remove(ref)
 
     def on_update(self, changes):
         try:
@@ -555,7 +616,7 @@ class Trial(Model):
             elapsed = time.time() - begin_time
             if record_output:
                 retval = ret[0]
-                output = base64.b64encode(repr(ret[1]))
+                output = self.storage.blobs.put(repr(ret[1]))
             else:
                 retval = ret
         except OSError as err:
@@ -27,11 +27,24 @@
 #
 """TODO: FIXME: Docs"""
 
+import json
+import atexit
+import base64
 from taucmdr import logger
-from taucmdr.error import InternalError, UniqueAttributeError, ModelError
+from taucmdr.error import ConfigurationError, InternalError, UniqueAttributeError, ModelError
+from taucmdr.cf.storage import AbstractStorage
 
 LOGGER = logger.get_logger(__name__)
 
+EXPORT_FORMAT = 'taucmdr-records'
+"""str: Value of the `format` field in the first line of exported records."""
+
+EXPORT_FORMAT_VERSION = 1
+"""int: Value of the `version` field in the first line of exported records."""
+
+IMPORT_BATCH_SIZE = 1000
+"""int: Number of records inserted or updated at once when importing records."""
+
 # Suppress debugging messages in optimized code
 if __debug__:
     _heavy_debug = LOGGER.debug   # pylint: disable=invalid-name
@@ -41,6 +54,118 @@ else:
         pass
 
 
+def _foreign_model(props):
+    """Return the data model named by an attribute's `model` or `collection` property, or None."""
+    return props.get('model', props.get('collection', None))
+
+
+def _check_pending_unique(model_cls, unique, pending):
+    """Check that a new record does not share a unique attribute value with records not yet stored.
+    
+    Matches :any:`Controller._check_unique`: records conflict if any one unique attribute is equal.
+    
+    Args:
+        model_cls: Data model of the new record.
+        unique (dict): Unique attribute values of the new record.
+        pending (dict): Unique attribute values of records not yet stored, keyed by model name and then
+                        by attribute name.  Updated with `unique`.
+        
+    Raises:
+        UniqueAttributeError: A pending record has the same value for one of the unique attributes.
+    """
+    values = pending.setdefault(model_cls.name, {})
+    for attr, value in unique.iteritems():
+        if value in values.get(attr, ()):
+            raise UniqueAttributeError(model_cls, {attr: value})
+    for attr, value in unique.iteritems():
+        values.setdefault(attr, set()).add(value)
+
+
+def _related_models(model_cls):
+    """Find every data model reachable from `model_cls` through `model` and `collection` attributes.
+    
+    Returns:
+        dict: Data models keyed by model name, including `model_cls`.
+    """
+    models = {}
+    pending = [model_cls]
+    while pending:
+        cls = pending.pop()
+        if cls.name not in models:
+            models[cls.name] = cls
+            pending.extend(_foreign_model(props) for props in cls.attributes.itervalues() if _foreign_model(props))
+    return models
+
+
+class IdentityMap(object):
+    """Records fetched while populating models, keyed by storage container, table name, and element identifier.
+    
+    Populating a record fetches its associated records, and populating those fetches theirs, so the 
+    same few records (e.g. the selected Project and Experiment) are requested many times by a single
+    command.  The identity map returns the same model object for each request so the record is read 
+    from storage once and the model's own populate cache is shared by all callers.
+    
+    All entries for a storage container are discarded whenever the container reports that its 
+    records may have changed, see :any:`AbstractStorage.add_change_listener`.
+    
+    Attributes:
+        hits (int): Number of lookups answered from the map.
+        misses (int): Number of lookups that read from storage.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self.hits = 0
+        self.misses = 0
+
+    def one(self, model_cls, storage, eid):
+        """Get a record by element identifier.
+        
+        Args:
+            model_cls (Model): The record's data model.
+            storage (AbstractStorage): Storage container holding the record.
+            eid: The record's element identifier.
+            
+        Returns:
+            Model: The model for the matching record or None if no such record exists.
+        """
+        key = (model_cls.name, eid)
+        try:
+            model = self._records[storage][key]
+        except KeyError:
+            self.misses += 1
+            model = model_cls.controller(storage).one(eid)
+            if model is not None:
+                self._records.setdefault(storage, {})[key] = model
+        else:
+            self.hits += 1
+        return model
+
+    def invalidate(self, storage=None):
+        """Discard records.
+        
+        Args:
+            storage (AbstractStorage): Discard records from this storage container, or all records if None.
+        """
+        if storage is None:
+            self._records.clear()
+        else:
+            self._records.pop(storage, None)
+
+    def log_stats(self):
+        """Report lookup statistics in the debug log."""
+        if self.hits or self.misses:
+            LOGGER.debug("Identity map: %d hits, %d misses", self.hits, self.misses)
+
+
+IDENTITY_MAP = IdentityMap()
+"""IdentityMap: Records populated by all controllers."""
+
+atexit.register(IDENTITY_MAP.log_stats)
+
+AbstractStorage.add_change_listener(IDENTITY_MAP.invalidate)
+
+
 class Controller(object):
     """The "C" in `MVC`_.
 
@@ -180,9 +305,14 @@ class Controller(object):
             except KeyError:
                 return value
             else:
-                return foreign.controller(self.storage).search(value)
+                if not isinstance(value, list):
+                    return foreign.controller(self.storage).search(value)
+                records = (IDENTITY_MAP.one(foreign, self.storage, eid) for eid in value)
+                return [record for record in records if record is not None]
         else:
-            return foreign.controller(self.storage).one(value)
+            if value is None:
+                return None
+            return IDENTITY_MAP.one(foreign, self.storage, value)
 
     def _check_unique(self, data, match_any=True):
         unique = {attr: data[attr] for attr, props in self.model.attributes.iteritems() if 'unique' in props}
@@ -201,20 +331,49 @@ class Controller(object):
         Returns:
             Model: The newly created data. 
         """
-        data = self.model.validate(data)
-        self._check_unique(data)
+        return self.create_many([data])[0]
+
+    def create_many(self, data):
+        """Atomically store many new records and update associations.
+        
+        Equivalent to ``[create(element) for element in data]`` except that all records are stored
+        with one write and each associated record is updated once.
+        
+        Invokes the `on_create` callback of each new record **after** all data is recorded.  If any 
+        callback raises an exception then the whole operation is reverted.
+        
+        Args:
+            data (list): Data to record.
+            
+        Returns:
+            list: The newly created data in the same order as `data`.
+        """
+        data = [self.model.validate(element) for element in data]
+        unique = [attr for attr, props in self.model.attributes.iteritems() if 'unique' in props]
+        pending = {}
+        for element in data:
+            self._check_unique(element)
+            _check_pending_unique(self.model, dict((attr, element[attr]) for attr in unique), pending)
         with self.storage as database:
-            record = database.insert(data, table_name=self.model.name)
-            for attr, foreign in self.model.associations.iteritems():
-                if 'model' or 'collection' in self.model.attributes[attr]:
+            records = database.insert_many(data, table_name=self.model.name)
+            links = {}
+            for record in records:
+                for attr, foreign in self.model.associations.iteritems():
                     affected = record.get(attr, None)
                     if affected:
-                        foreign_cls, via = foreign
-                        self._associate(record, foreign_cls, affected, via)
-            model = self.model(record)
-            model.check_compatibility(model)
-            model.on_create()
-            return model
+                        if not isinstance(affected, list):
+                            affected = [affected]
+                        foreign_links = links.setdefault(foreign, {})
+                        for key in affected:
+                            foreign_links.setdefault(key, []).append(record.eid)
+            for (foreign_cls, via), foreign_links in links.iteritems():
+                self._associate(foreign_links, foreign_cls, via)
+            models = [self.model(record) for record in records]
+            for model in models:
+                model.check_compatibility(model)
+            for model in models:
+                model.on_create()
+            return models
     
     def update(self, data, keys):
         """Change recorded data and update associations.
@@ -235,14 +394,39 @@ class Controller(object):
         for attr in data:
             if attr not in self.model.attributes:
                 raise ModelError(self.model, "no attribute named '%s'" % attr)
+        with self.storage:
+            self.update_many(dict((model.eid, data) for model in self.search(keys)))
+
+    def update_many(self, changes):
+        """Change the recorded data of many records, each in its own way, and update associations.
+        
+        Equivalent to ``[update(data, eid) for eid, data in changes.iteritems()]`` except that all
+        records are modified with one write.
+        
+        Invokes the `on_update` callback of each modified record **after** all data is modified.  
+        If any callback raises an exception then the whole operation is reverted.
+
+        Args:
+            changes (dict): New data for existing records keyed by element identifier.
+        """
+        for data in changes.itervalues():
+            for attr in data:
+                if attr not in self.model.attributes:
+                    raise ModelError(self.model, "no attribute named '%s'" % attr)
+        if not changes:
+            return
         with self.storage as database:
+            eids = sorted(changes)
             # Get the list of affected records **before** updating the data so foreign keys are correct
-            old_records = self.search(keys)
-            database.update(data, keys, table_name=self.model.name)
-            changes = {}
+            old_records = self.search(eids)
+            database.update_many(changes, table_name=self.model.name)
+            diffs = {}
+            added = {}
+            deled = {}
             for model in old_records:
-                changes[model.eid] = {attr: (model.get(attr), new_value) for attr, new_value in data.iteritems()
-                                      if not (attr in model and model.get(attr) == new_value)}
+                data = changes[model.eid]
+                diffs[model.eid] = {attr: (model.get(attr), new_value) for attr, new_value in data.iteritems()
+                                    if not (attr in model and model.get(attr) == new_value)}
                 for attr, foreign in self.model.associations.iteritems():
                     try:
                         # 'collection' attribute is iterable
@@ -260,17 +444,23 @@ class Controller(object):
                         old_foreign_keys = set((model[attr],))
                     except KeyError:
                         old_foreign_keys = set()
-                    foreign_cls, via = foreign
-                    added = list(new_foreign_keys - old_foreign_keys)
-                    deled = list(old_foreign_keys - new_foreign_keys)
-                    if added:
-                        self._associate(model, foreign_cls, added, via)
-                    if deled:
-                        self._disassociate(model, foreign_cls, deled, via)
-            updated_records = self.search(keys)
+                    for key in new_foreign_keys - old_foreign_keys:
+                        added.setdefault(foreign, {}).setdefault(key, []).append(model.eid)
+                    for key in old_foreign_keys - new_foreign_keys:
+                        deled.setdefault(foreign, {}).setdefault(key, []).append(model.eid)
+            for (foreign_cls, via), links in added.iteritems():
+                self._associate(links, foreign_cls, via)
+            for (foreign_cls, via), links in deled.iteritems():
+                # Disassociate each group of records from all of its foreign records at once
+                groups = {}
+                for key, linked in links.iteritems():
+                    groups.setdefault(tuple(linked), []).append(key)
+                for linked, keys in groups.iteritems():
+                    self._disassociate(list(linked), foreign_cls, sorted(keys), via)
+            updated_records = self.search(eids)
             for model in updated_records:
                 model.check_compatibility(model)
-                model.on_update(changes[model.eid])
+                model.on_update(diffs[model.eid])
 
     def unset(self, fields, keys):
         """Unset recorded data fields and update associations.
@@ -303,7 +493,7 @@ class Controller(object):
                         foreign_cls, via = foreign
                         old_foreign_keys = model.get(attr, None)
                         if old_foreign_keys:
-                            self._disassociate(model, foreign_cls, old_foreign_keys, via)
+                            self._disassociate([model.eid], foreign_cls, old_foreign_keys, via)
             updated_records = self.search(keys)
             for model in updated_records:
                 model.check_compatibility(model)
@@ -318,6 +508,10 @@ class Controller(object):
             * list or tuple: delete all records matching the elements of `keys`.
             * ``bool(keys) == False``: raise ValueError.
 
+        All matching records are deleted together: records associated with or referring to any of
+        them are found with one query per relationship and updated once, so deleting many records
+        (e.g. ``delete([eid1, eid2, ...])``) costs little more than deleting one.
+
         Invokes the `on_delete` callback **after** the data is deleted.  If this callback raises
         an exception then the operation is reverted.
 
@@ -326,124 +520,260 @@ class Controller(object):
             keys: Fields or element identifiers to match.
         """
         with self.storage as database:
-            removed_data = []
             changing = self.search(keys)
+            if not changing:
+                return
+            eids = [model.eid for model in changing]
+            associated = {}
             for model in changing:
                 for attr, foreign in model.associations.iteritems():
-                    foreign_model, via = foreign
                     affected_keys = model.get(attr, None)
                     if affected_keys:
-                        _heavy_debug("Deleting %s(%s) affects '%s' in %s(%s)", 
-                                     self.model.name, model.eid, via, foreign_model.name, affected_keys)
-                        self._disassociate(model, foreign_model, affected_keys, via)
-                for foreign_model, via in model.references:
-                    # pylint complains because `model` is changing on every iteration so we'll have
-                    # a different lambda function `test` on each iteration.  This is exactly what
-                    # we want so we disble the warning. 
-                    # pylint: disable=cell-var-from-loop, undefined-loop-variable
-                    test = lambda x: model.eid in x if isinstance(x, list) else model.eid == x
-                    affected = database.match(via, test=test, table_name=foreign_model.name)
-                    affected_keys = [record.eid for record in affected]
-                    if affected_keys:
-                        _heavy_debug("Deleting %s(%s) affects '%s' in %s(%s)", 
-                                     self.model.name, model.eid, via, foreign_model.name, affected_keys)
-                        self._disassociate(model, foreign_model, affected_keys, via)
-                removed_data.append(dict(model))
-            database.remove(keys, table_name=self.model.name)
-            for model in changing:
+                        if not isinstance(affected_keys, list):
+                            affected_keys = [affected_keys]
+                        associated.setdefault(foreign, set()).update(affected_keys)
+            for (foreign_model, via), affected_keys in associated.iteritems():
+                _heavy_debug("Deleting %s(%s) affects '%s' in %s(%s)", 
+                             self.model.name, eids, via, foreign_model.name, affected_keys)
+                self._disassociate(eids, foreign_model, sorted(affected_keys), via)
+            for foreign_model, via in self.model.references:
+                affected = database.referencing(via, eids, table_name=foreign_model.name)
+                affected_keys = [record.eid for record in affected]
+                if affected_keys:
+                    _heavy_debug("Deleting %s(%s) affects '%s' in %s(%s)", 
+                                 self.model.name, eids, via, foreign_model.name, affected_keys)
+                    self._disassociate(eids, foreign_model, affected_keys, via)
+            # Records may have been deleted already by a cascading delete
+            deleted = [model for model in changing if database.contains(model.eid, table_name=self.model.name)]
+            if deleted:
+                database.remove_many([model.eid for model in deleted], table_name=self.model.name)
+            for model in deleted:
                 model.on_delete()
 
-    @staticmethod
-    def import_records(data):
-        """Import data records.
+    def export_records(self, stream, keys=None):
+        """Export data records and all their associated records as JSON Lines.
         
-        TODO: Docs
-        """
+        The first line is a header identifying the format.  Each following line is an object with
+        `model`, `eid`, and `data` fields holding one record.  Records are written as they are found
+        while walking the association graph so only their element identifiers are kept in memory.
+        Records of this controller's model are only exported if they match `keys`.
         
-    @classmethod
-    def export_records(cls, keys=None, eids=None):
-        """Export data records.
-        
-        Constructs a dictionary containing records matching `keys` or `eids` and all their
-        associated records.  Association fields (`model` and `collection`) are **not** updated
-        and may contain eids of undefined records. 
+        Association fields (`model` and `collection`) are **not** updated and may contain eids of 
+        records that were not exported.  Values kept in the blob store (see 
+        :any:`Model.BLOB_ATTRIBUTES`) are exported inline as base64 encoded strings.
 
         Args:
-            keys (dict): Attributes to match.
-            eids (list): Record identifiers to match.
+            stream: File-like object open for writing.
+            keys: Fields or element identifiers to match.  See :any:`AbstractStorage.search`.
 
         Returns:
-            dict: Dictionary of tables containing records.
+            dict: Lists of exported element identifiers keyed by model name.
             
         Example:
         ::
             
-            {
-             'Brewery': {100: {'address': '4615 Hollins Ferry Rd, Halethorpe, MD 21227',
-                               'brews': [10, 12, 14]}},
-             'Beer': {10: {'origin': 100, 'color': 'gold', 'ibu': 45},
-                      12: {'origin': 100, 'color': 'dark', 'ibu': 15},
-                      14: {'origin': 100, 'color': 'pale', 'ibu': 30}}
-            }
-        
-            Beer.export_records(eids=[10])
+            Beer.controller(storage).export_records(stream, [10])
+            
+            {"format": "taucmdr-records", "version": 1}
+            {"model": "Beer", "eid": 10, "data": {"origin": 100, "color": "gold", "ibu": 45}}
+            {"model": "Brewery", "eid": 100, "data": {"address": "4615 Hollins Ferry Rd", "brews": [10, 12, 14]}}
+        """
+        models = _related_models(self.model)
+        exported = dict((name, []) for name in models)
+        visited = set()
+        pending = [(self.model, model.eid) for model in reversed(self.search(keys))]
+        stream.write(json.dumps({'format': EXPORT_FORMAT, 'version': EXPORT_FORMAT_VERSION}) + '\n')
+        while pending:
+            model_cls, eid = pending.pop()
+            if (model_cls.name, eid) in visited:
+                continue
+            visited.add((model_cls.name, eid))
+            record = self.storage.get(eid, table_name=model_cls.name)
+            if record is None:
+                continue
+            data = dict(record)
+            for attr in model_cls.BLOB_ATTRIBUTES:
+                value = data.get(attr, None)
+                if self.storage.blobs.is_ref(value):
+                    data[attr] = base64.b64encode(self.storage.blobs.get(value))
+            stream.write(json.dumps({'model': model_cls.name, 'eid': eid, 'data': data}) + '\n')
+            exported[model_cls.name].append(eid)
+            for attr, props in model_cls.attributes.iteritems():
+                foreign_cls = _foreign_model(props)
+                value = record.get(attr, None)
+                # Records of this controller's model are only exported if they match `keys`
+                if foreign_cls is None or foreign_cls is self.model or value is None:
+                    continue
+                for foreign_eid in value if isinstance(value, list) else [value]:
+                    if (foreign_cls.name, foreign_eid) not in visited:
+                        pending.append((foreign_cls, foreign_eid))
+        return exported
+
+    def import_records(self, stream):
+        """Import data records exported by :any:`export_records`.
+        
+        Records are inserted in batches and given new element identifiers.  Their association fields
+        are then updated to refer to the new identifiers and references to records that were not
+        exported are discarded.  `stream` is read twice, once for each step, so only the map from
+        exported to new element identifiers is kept in memory.
+        
+        Invokes the `on_create` callback of each new record **after** all data is imported.  If any
+        callback raises an exception then the whole operation is reverted.
+
+        Args:
+            stream: Seekable file-like object open for reading.
+
+        Returns:
+            dict: New element identifiers keyed by model name and then by exported element identifier.
+            
+        Raises:
+            ConfigurationError: `stream` does not contain exported records.
+            UniqueAttributeError: An imported record conflicts with an existing record.
+        """
+        models = _related_models(self.model)
+        eid_map = dict((name, {}) for name in models)
+        with self.storage as database:
+            batch = []
+            # Unique attribute values in the batch, which database.contains can't see yet
+            pending = {}
+            for model_cls, eid, data in self._read_exported(stream, models):
+                for attr, props in model_cls.attributes.iteritems():
+                    if _foreign_model(props):
+                        data.pop(attr, None)
+                for attr in model_cls.BLOB_ATTRIBUTES:
+                    value = data.get(attr, None)
+                    if value is not None and not database.blobs.is_ref(value):
+                        data[attr] = database.blobs.put(base64.b64decode(value))
+                unique = {attr: data[attr] for attr, props in model_cls.attributes.iteritems() 
+                          if 'unique' in props and attr in data}
+                # Unique combinations that include an association cannot conflict since the eids are new
+                if unique and not any(_foreign_model(props) for props in model_cls.attributes.itervalues() 
+                                      if 'unique' in props):
+                    if database.contains(unique, match_any=True, table_name=model_cls.name):
+                        raise UniqueAttributeError(model_cls, unique)
+                    _check_pending_unique(model_cls, unique, pending)
+                batch.append((model_cls, eid, data))
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    self._import_batch(database, batch, eid_map)
+                    batch = []
+                    pending = {}
+            self._import_batch(database, batch, eid_map)
+            changes = dict((name, {}) for name in models)
+            for model_cls, eid, data in self._read_exported(stream, models):
+                fields = {}
+                for attr, props in model_cls.attributes.iteritems():
+                    foreign_cls = _foreign_model(props)
+                    value = data.get(attr, None)
+                    if foreign_cls is None or value is None:
+                        continue
+                    foreign_eids = eid_map[foreign_cls.name]
+                    if isinstance(value, list):
+                        fields[attr] = [foreign_eids[key] for key in value if key in foreign_eids]
+                    elif value in foreign_eids:
+                        fields[attr] = foreign_eids[value]
+                if fields:
+                    model_changes = changes[model_cls.name]
+                    model_changes[eid_map[model_cls.name][eid]] = fields
+                    if len(model_changes) >= IMPORT_BATCH_SIZE:
+                        database.update_many(model_changes, table_name=model_cls.name)
+                        model_changes.clear()
+            for name, model_changes in changes.iteritems():
+                if model_changes:
+                    database.update_many(model_changes, table_name=name)
+            for name, new_eids in eid_map.iteritems():
+                model_cls = models[name]
+                for eid in new_eids.itervalues():
+                    model = model_cls(database.get(eid, table_name=name))
+                    model.check_compatibility(model)
+                    model.on_create()
+        return eid_map
+
+    @staticmethod
+    def _read_exported(stream, models):
+        """Iterate over records written by :any:`export_records`.
+        
+        Args:
+            stream: Seekable file-like object open for reading.  Reading starts at the beginning.
+            models (dict): Data models keyed by model name.
+            
+        Yields:
+            tuple: (Model, int, dict) data model, exported element identifier, and record data.
             
-            {
-             'Brewery': {100: {'address': '4615 Hollins Ferry Rd, Halethorpe, MD 21227',
-                               'brews': [10, 12, 14]}},
-             'Beer': {10: {'origin': 100, 'color': 'gold', 'ibu': 45}}
-            }
+        Raises:
+            ConfigurationError: `stream` does not contain exported records.
+        """
+        stream.seek(0)
+        try:
+            header = json.loads(stream.readline())
+            if header['format'] != EXPORT_FORMAT or header['version'] != EXPORT_FORMAT_VERSION:
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            raise ConfigurationError("'%s' does not contain exported TAU Commander records" % 
+                                     getattr(stream, 'name', stream))
+        for lineno, line in enumerate(stream, 2):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                yield models[item['model']], item['eid'], item['data']
+            except (ValueError, KeyError, TypeError):
+                raise ConfigurationError("Invalid record on line %d of '%s'" % (lineno, getattr(stream, 'name', stream)))
 
+    @staticmethod
+    def _import_batch(database, batch, eid_map):
+        """Insert a batch of imported records and record their new element identifiers.
+        
+        Args:
+            database (AbstractStorage): Storage container to insert records into.
+            batch (list): (Model, int, dict) tuples as yielded by :any:`_read_exported`.
+            eid_map (dict): Updated with the new element identifiers as described in :any:`import_records`.
         """
-        def export_record(record, root):
-            if isinstance(record, cls) and record is not root:
-                return
-            data = all_data.setdefault(record.model_name, {})
-            if record.eid not in data:
-                data[record.eid] = record.data
-                for attr, foreign in record.associations.iteritems():
-                    for foreign_record in foreign[0].search(eids=record[attr]):
-                        export_record(foreign_record, root)
-        all_data = {}
-        for record in cls.search(keys, eids):
-            export_record(record, record)
-        return all_data
-          
-    def _associate(self, record, foreign_model, affected, via):
-        """Associates a record with another record.
+        by_model = {}
+        for model_cls, eid, data in batch:
+            eids, elements = by_model.setdefault(model_cls.name, ([], []))
+            eids.append(eid)
+            elements.append(data)
+        for name, (eids, elements) in by_model.iteritems():
+            records = database.insert_many(elements, table_name=name)
+            eid_map[name].update(zip(eids, [record.eid for record in records]))
+
+    def _associate(self, links, foreign_model, via):
+        """Associates records with other records.
+        
+        Each foreign record is updated once no matter how many records are associated with it.
         
         Args:
-            record (Record): Record to associate.
+            links (dict): Lists of identifiers of records to associate keyed by the identifier of 
+                          the foreign record that will be updated to associate with them.
             foreign_model (Model): Foreign record's data model.
-            affected (list): Identifiers for the records that will be updated to associate with `record`.
             via (str): The name of the associated foreign attribute.
         """ 
-        _heavy_debug("Adding %s to '%s' in %s(eids=%s)", record.eid, via, foreign_model.name, affected)
-        if not isinstance(affected, list):
-            affected = [affected]
+        _heavy_debug("Adding %s to '%s' in %s", links, via, foreign_model.name)
+        changes = {}
         with self.storage as database:
-            for key in affected:
+            for key, eids in links.iteritems():
                 foreign_record = database.get(key, table_name=foreign_model.name)
                 if not foreign_record:
                     raise ModelError(foreign_model, "No record with ID '%s'" % key)
                 if 'model' in foreign_model.attributes[via]:
-                    updated = record.eid
+                    updated = eids[-1]
                 elif 'collection' in foreign_model.attributes[via]:
-                    updated = list(set(foreign_record[via] + [record.eid]))
+                    updated = list(set(foreign_record[via] + eids))
                 else:
                     raise InternalError("%s.%s has neither 'model' nor 'collection'" % (foreign_model.name, via))
-                foreign_model.controller(database).update({via: updated}, key)
+                changes[key] = {via: updated}
+            foreign_model.controller(database).update_many(changes)
 
-    def _disassociate(self, record, foreign_model, affected, via):
-        """Disassociates a record from another record.
+    def _disassociate(self, eids, foreign_model, affected, via):
+        """Disassociates records from other records.
         
         Args:
-            record (Record): Record to disassociate.
+            eids (list): Identifiers for the records to disassociate.
             foreign_model (Model): Foreign record's data model.
-            affected (list): Identifiers for the records that will be updated to disassociate from `record`.
+            affected (list): Identifiers for the records that will be updated to disassociate from `eids`.
             via (str): The name of the associated foreign attribute.
         """ 
-        _heavy_debug("Removing %s from '%s' in %s(eids=%s)", record.eid, via, foreign_model.name, affected)
+        _heavy_debug("Removing %s from '%s' in %s(eids=%s)", eids, via, foreign_model.name, affected)
         if not isinstance(affected, list):
             affected = [affected]
         foreign_props = foreign_model.attributes[via]
@@ -458,7 +788,10 @@ class Controller(object):
             with self.storage as database:
                 for key in affected:
                     foreign_record = database.get(key, table_name=foreign_model.name)
-                    updated = list(set(foreign_record[via]) - set([record.eid]))
+                    if foreign_record is None:
+                        # Already deleted by a cascading delete
+                        continue
+                    updated = list(set(foreign_record[via]) - set(eids))
                     if 'required' in foreign_props and len(updated) == 0:
                         _heavy_debug("Empty required attr '%s': deleting %s(key=%s)", via, foreign_model.name, key)
                         foreign_model.controller(database).delete(key)
@@ -94,6 +94,7 @@ class Model(StorageRecord):
         references (set): (Controller, str) tuples listing foreign models referencing this model.  
         attributes (dict): Model attributes.
         key_attribute (str): Name of an attribute that serves as a unique identifier. 
+        BLOB_ATTRIBUTES (tuple): Attributes with values kept in the storage container's blob store.
         
     .. _MVC: https://en.wikipedia.org/wiki/Model-view-controller
     """
@@ -107,6 +108,7 @@ class Model(StorageRecord):
     references = set()
     attributes = {}
     key_attribute = None
+    BLOB_ATTRIBUTES = ()
     
     def __init__(self, record):
         deprecated = [attr for attr in record if attr not in self.attributes]
@@ -30,10 +30,213 @@
 Functions used for unit tests of controller.py.
 """
 
-
+import tempfile
+import StringIO
 from taucmdr import tests
-#from taucmdr.mvc import controller
+from taucmdr.error import ConfigurationError, UniqueAttributeError
+from taucmdr.cf.storage.local_file import LocalFileStorage
+from taucmdr.mvc.model import Model
+from taucmdr.mvc.controller import IDENTITY_MAP
+
+
+class Brewery(Model):
+    """Test model."""
+    __attributes__ = lambda: {'name': {'type': 'string', 'primary_key': True},
+                              'brews': {'collection': Beer, 'via': 'origin'}}
+
+
+class Beer(Model):
+    """Test model."""
+    __attributes__ = lambda: {'name': {'type': 'string', 'primary_key': True},
+                              'origin': {'model': Brewery, 'via': 'brews'}}
+
+
+class Pub(Model):
+    """Test model."""
+    __attributes__ = lambda: {'name': {'type': 'string', 'primary_key': True},
+                              'special': {'model': Beer}}
+
+
+class Brewpub(Model):
+    """Test model."""
+    __attributes__ = lambda: {'name': {'type': 'string', 'primary_key': True, 'unique': True},
+                              'address': {'type': 'string', 'unique': True}}
+
 
 class ControllerTest(tests.TestCase):
     def test_controller(self):
-        self.assertEqual(1, 1) 
+        self.assertEqual(1, 1)
+
+
+class IdentityMapTest(tests.TestCase):
+    """Unit tests for the controller identity map."""
+
+    def setUp(self):
+        self.storage = LocalFileStorage('test', tempfile.mkdtemp())
+        brewery = Brewery.controller(self.storage).create({'name': 'Heavy Seas'})
+        self.beers = Beer.controller(self.storage)
+        self.beers.create({'name': 'Loose Cannon', 'origin': brewery.eid})
+        self.beers.create({'name': 'Small Craft', 'origin': brewery.eid})
+
+    def tearDown(self):
+        self.storage.disconnect_database()
+
+    def test_shared(self):
+        hits = IDENTITY_MAP.hits
+        first, second = self.beers.all()
+        brewery = first.populate('origin')
+        self.assertIs(second.populate('origin'), brewery)
+        self.assertEqual(IDENTITY_MAP.hits, hits + 1)
+        self.assertItemsEqual([beer['name'] for beer in brewery.populate('brews')], ['Loose Cannon', 'Small Craft'])
+
+    def test_invalidated(self):
+        beer = self.beers.one({'name': 'Loose Cannon'})
+        brewery = beer.populate('origin')
+        Brewery.controller(self.storage).update({'name': 'Heavy Seas Beer'}, brewery.eid)
+        self.assertEqual(self.beers.one(beer.eid).populate('origin')['name'], 'Heavy Seas Beer') 
+
+    def _assert_invalidated_by(self, change):
+        beer = self.beers.one({'name': 'Loose Cannon'})
+        brewery = beer.populate('origin')
+        change()
+        self.assertIsNot(self.beers.one(beer.eid).populate('origin'), brewery)
+
+    def test_storage_write(self):
+        # Writes that bypass the controllers
+        self._assert_invalidated_by(lambda: self.storage.update({'name': 'Heavy Seas Beer'}, 1, table_name='Brewery'))
+        self._assert_invalidated_by(lambda: self.storage.__setitem__('key', 'value'))
+
+    def test_disconnect(self):
+        self._assert_invalidated_by(self.storage.disconnect_database)
+
+    def test_purge(self):
+        self._assert_invalidated_by(lambda: self.storage.purge(table_name='Pub'))
+
+
+class DeleteTest(tests.TestCase):
+    """Unit tests for cascading deletes."""
+
+    def setUp(self):
+        self.storage = LocalFileStorage('test', tempfile.mkdtemp())
+        self.breweries = Brewery.controller(self.storage)
+        self.beers = Beer.controller(self.storage)
+        for brewery_name in 'Heavy Seas', 'Union':
+            brewery = self.breweries.create({'name': brewery_name})
+            for i in xrange(3):
+                self.beers.create({'name': '%s %d' % (brewery_name, i), 'origin': brewery.eid})
+
+    def tearDown(self):
+        self.storage.disconnect_database()
+
+    def test_delete_many(self):
+        heavy_seas = self.breweries.one({'name': 'Heavy Seas'})
+        doomed = [beer.eid for beer in self.beers.all() if beer['origin'] == heavy_seas.eid][:2]
+        doomed.append(self.beers.one({'name': 'Union 0'}).eid)
+        self.beers.delete(doomed)
+        self.assertEqual(self.beers.count(), 3)
+        self.assertEqual(len(self.breweries.one(heavy_seas.eid)['brews']), 1)
+        self.assertEqual(len(self.breweries.one({'name': 'Union'})['brews']), 2)
+
+    def test_delete_associations(self):
+        self.breweries.delete({'name': 'Union'})
+        self.assertEqual(self.beers.count(), 6)
+        self.assertNotIn('origin', self.beers.one({'name': 'Union 1'}))
+
+    def test_delete_references(self):
+        pubs = Pub.controller(self.storage)
+        beers = self.beers.all()
+        for i, beer in enumerate(beers):
+            pubs.create({'name': 'Pub %d' % i, 'special': beer.eid})
+        self.beers.delete([beer.eid for beer in beers[1:4]])
+        self.assertEqual(len(pubs.search({'special': beers[0].eid})), 1)
+        self.assertEqual(len([pub for pub in pubs.all() if 'special' not in pub]), 3)
+
+
+class BatchTest(tests.TestCase):
+    """Unit tests for batch create and update."""
+
+    def setUp(self):
+        self.storage = LocalFileStorage('test', tempfile.mkdtemp())
+        self.breweries = Brewery.controller(self.storage)
+        self.beers = Beer.controller(self.storage)
+        self.heavy_seas, self.union = self.breweries.create_many([{'name': 'Heavy Seas'}, {'name': 'Union'}])
+
+    def tearDown(self):
+        self.storage.disconnect_database()
+
+    def test_create_many(self):
+        beers = self.beers.create_many([{'name': 'Beer %d' % i, 'origin': self.heavy_seas.eid} for i in xrange(3)])
+        self.assertEqual([beer['name'] for beer in beers], ['Beer 0', 'Beer 1', 'Beer 2'])
+        self.assertItemsEqual(self.breweries.one(self.heavy_seas.eid)['brews'], [beer.eid for beer in beers])
+
+    def test_create_many_unique(self):
+        # Records conflict if any unique attribute matches, as they would if created one at a time
+        brewpubs = Brewpub.controller(self.storage)
+        self.assertRaises(UniqueAttributeError, brewpubs.create_many, 
+                          [{'name': 'Pratt Street', 'address': '206 W Pratt St'}, 
+                           {'name': 'Pratt Street Ale House', 'address': '206 W Pratt St'}])
+        self.assertEqual(brewpubs.count(), 0)
+        brewpubs.create({'name': 'Pratt Street', 'address': '206 W Pratt St'})
+        self.assertRaises(UniqueAttributeError, brewpubs.create, 
+                          {'name': 'Pratt Street Ale House', 'address': '206 W Pratt St'})
+
+    def test_update_many(self):
+        first, second = self.beers.create_many([{'name': 'First', 'origin': self.heavy_seas.eid},
+                                                {'name': 'Second', 'origin': self.heavy_seas.eid}])
+        self.beers.update_many({first.eid: {'origin': self.union.eid}, second.eid: {'name': 'Last'}})
+        self.assertEqual(self.breweries.one(self.heavy_seas.eid)['brews'], [second.eid])
+        self.assertEqual(self.breweries.one(self.union.eid)['brews'], [first.eid])
+        self.assertEqual(self.beers.one(second.eid)['name'], 'Last')
+
+
+class ExportImportTest(tests.TestCase):
+    """Unit tests for exporting and importing records."""
+
+    def setUp(self):
+        self.storage = LocalFileStorage('test', tempfile.mkdtemp())
+        breweries = Brewery.controller(self.storage)
+        beers = Beer.controller(self.storage)
+        pubs = Pub.controller(self.storage)
+        for brewery_name in 'Heavy Seas', 'Union':
+            brewery = breweries.create({'name': brewery_name})
+            beers.create_many([{'name': '%s %d' % (brewery_name, i), 'origin': brewery.eid} for i in xrange(3)])
+        pubs.create({'name': 'Pub', 'special': beers.one({'name': 'Union 1'}).eid})
+        self.dest = LocalFileStorage('dest', tempfile.mkdtemp())
+        # Offset element identifiers in the destination so they must be remapped
+        Beer.controller(self.dest).create({'name': 'Other'})
+
+    def tearDown(self):
+        self.storage.disconnect_database()
+        self.dest.disconnect_database()
+
+    def test_export(self):
+        stream = StringIO.StringIO()
+        union = Brewery.controller(self.storage).one({'name': 'Union'})
+        exported = Brewery.controller(self.storage).export_records(stream, union.eid)
+        self.assertEqual(len(exported['Brewery']), 1)
+        self.assertEqual(len(exported['Beer']), 3)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 5)
+
+    def test_import(self):
+        stream = StringIO.StringIO()
+        Pub.controller(self.storage).export_records(stream)
+        eid_map = Pub.controller(self.dest).import_records(stream)
+        self.assertEqual(len(eid_map['Beer']), 3)
+        pub = Pub.controller(self.dest).one({'name': 'Pub'})
+        self.assertEqual(pub.populate('special')['name'], 'Union 1')
+        union = pub.populate('special').populate('origin')
+        self.assertItemsEqual([beer['name'] for beer in union.populate('brews')], ['Union 0', 'Union 1', 'Union 2'])
+        self.assertEqual(Beer.controller(self.dest).count(), 4)
+        
+    def test_import_duplicates(self):
+        # Records in the same import batch conflict with each other, not just with stored records
+        for name in 'Pratt Street', 'Pratt Street Ale House':
+            self.storage.insert({'name': name, 'address': '206 W Pratt St'}, table_name=Brewpub.name)
+        stream = StringIO.StringIO()
+        Brewpub.controller(self.storage).export_records(stream)
+        self.assertRaises(UniqueAttributeError, Brewpub.controller(self.dest).import_records, stream)
+        self.assertEqual(Brewpub.controller(self.dest).count(), 0)
+
+    def test_invalid(self):
+        self.assertRaises(ConfigurationError, Pub.controller(self.dest).import_records, StringIO.StringIO('{}\n'))
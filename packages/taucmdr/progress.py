@@ -126,7 +126,7 @@ class ProgressIndicator(object):
     def _line_reset(self):
         sys.stdout.write('\r')
         sys.stdout.write(logger.COLORED_LINE_MARKER)
-        self._line_remaining = logger.LINE_WIDTH
+        self._line_remaining = logger.get_line_width()
         
     def _line_append(self, text):
         from taucmdr import util
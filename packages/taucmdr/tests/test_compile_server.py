@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Test functions.
+
+Functions used for unit tests of compile_server.py.
+"""
+
+import os
+import time
+import json
+import signal
+import socket
+import tempfile
+from taucmdr import tests, compile_server
+
+
+class CompileServerTest(tests.TestCase):
+    """Unit tests for the compile server."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.root, '.tau')
+        os.mkdir(self.prefix)
+        self.cwd = os.path.join(self.root, 'src', 'lib')
+        os.makedirs(self.cwd)
+
+    def _start_server(self):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                compile_server.serve(self.prefix, 1)
+            finally:
+                os._exit(0)
+        for _ in xrange(100):
+            if compile_server.server_pid(self.prefix) == pid:
+                return pid
+            time.sleep(0.1)
+        self.fail("Compile server did not start")
+
+    def _stop_server(self, pid):
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+
+    def test_find_socket(self):
+        self.assertIsNone(compile_server.find_socket(self.cwd))
+        path = os.path.join(self.prefix, compile_server.SOCKET_NAME)
+        open(path, 'w').close()
+        self.assertEqual(compile_server.find_socket(self.cwd), os.path.realpath(path))
+
+    def test_fallback(self):
+        pid = self._start_server()
+        try:
+            path = compile_server.find_socket(self.cwd)
+            self.assertIsNotNone(path)
+            request = {'argv': ['build', 'not-a-compiler'], 'cwd': self.cwd, 'env': dict(os.environ)}
+            self.assertEqual(compile_server._exchange(path, request), {'status': 'fallback'})
+            request['argv'] = ['build']
+            self.assertEqual(compile_server._exchange(path, request), {'status': 'fallback'})
+        finally:
+            self._stop_server(pid)
+        self.assertIsNone(compile_server.server_pid(self.prefix))
+        self.assertIsNone(compile_server.find_socket(self.cwd))
+
+    def test_commands(self):
+        pid = self._start_server()
+        try:
+            path = compile_server.find_socket(self.cwd)
+            self.assertTrue(compile_server._is_compile_command(path, 'build'))
+            self.assertTrue(compile_server._is_compile_command(path, '/usr/bin/gcc'))
+            self.assertFalse(compile_server._is_compile_command(path, 'project'))
+        finally:
+            self._stop_server(pid)
+        self.assertFalse(os.path.exists(os.path.join(self.prefix, compile_server.COMMANDS_NAME)))
+
+    def test_unresponsive_server(self):
+        # The socket accepts connections but nothing ever answers
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(os.path.join(self.prefix, compile_server.SOCKET_NAME))
+        sock.listen(1)
+        with open(os.path.join(self.prefix, compile_server.COMMANDS_NAME), 'w') as fout:
+            json.dump(['gcc'], fout)
+        cwd, timeout = os.getcwd(), compile_server.TIMEOUT
+        os.chdir(self.cwd)
+        compile_server.TIMEOUT = 0.5
+        try:
+            start = time.time()
+            self.assertIsNone(compile_server.compile_with_server(['gcc', '--version']))
+            self.assertIsNone(compile_server.compile_with_server(['project', 'list']))
+            self.assertLess(time.time() - start, 5)
+        finally:
+            compile_server.TIMEOUT = timeout
+            os.chdir(cwd)
+            sock.close()
+
+    def test_no_server(self):
+        # Returns instead of executing a command when there is no server to ask
+        cwd = os.getcwd()
+        os.chdir(self.cwd)
+        try:
+            self.assertIsNone(compile_server.compile_with_server(['gcc', '--version']))
+        finally:
+            os.chdir(cwd)
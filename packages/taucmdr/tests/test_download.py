@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Test functions.
+
+Functions used for unit tests of download.py.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from SocketServer import ThreadingMixIn
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from taucmdr import tests, download
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    """Serves :any:`FILES` like a source archive server, with range requests."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), _Handler)
+        self.files = {}
+        self.requests = []
+        self.truncate = set()
+        self.delay = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self.server_address[1]
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def log_message(self, *_):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.getheader('Range')))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            data = server.files.get(self.path)
+            if data is None:
+                self.send_error(404)
+                return
+            start = 0
+            byte_range = self.headers.getheader('Range')
+            if byte_range:
+                start = int(byte_range.split('=')[1].split('-')[0])
+                if start >= len(data):
+                    self.send_error(416)
+                    return
+                self.send_response(206)
+                self.send_header('Content-Range', 'bytes %d-%d/%d' % (start, len(data) - 1, len(data)))
+            else:
+                self.send_response(200)
+            self.send_header('Content-Length', str(len(data) - start))
+            self.end_headers()
+            if self.path in server.truncate:
+                # Drop the connection halfway through the file, once
+                server.truncate.remove(self.path)
+                self.wfile.write(data[start:start + (len(data) - start) // 2])
+                self.wfile.flush()
+                self.connection.shutdown(2)
+                return
+            self.wfile.write(data[start:])
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+class DownloadTest(tests.TestCase):
+    """Unit tests for :any:`download`."""
+
+    def setUp(self):
+        self.server = _Server()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.data = os.urandom(256 * 1024)
+        self.server.files['/pkg.tgz'] = self.data
+        self.workdir = os.path.join(os.getcwd(), self._testMethodName)
+        self.dest = os.path.join(self.workdir, 'src', 'pkg.tgz')
+        download._MIRROR_CHECKSUMS.clear() # pylint: disable=protected-access
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _read(self, path):
+        with open(path, 'rb') as fin:
+            return fin.read()
+
+    def test_fetch(self):
+        download.fetch(self.server.url + '/pkg.tgz', self.dest)
+        self.assertEqual(self._read(self.dest), self.data)
+        self.assertFalse(os.path.exists(self.dest + '.part'))
+        self.assertEqual(self._read(self.dest + '.sha256').split(),
+                         [hashlib.sha256(self.data).hexdigest(), 'pkg.tgz'])
+
+    def test_missing(self):
+        with self.assertRaises(IOError):
+            download.fetch(self.server.url + '/missing.tgz', self.dest)
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_resume(self):
+        self.server.truncate.add('/pkg.tgz')
+        download.fetch(self.server.url + '/pkg.tgz', self.dest)
+        self.assertEqual(self._read(self.dest), self.data)
+        ranges = [byte_range for path, byte_range in self.server.requests if path == '/pkg.tgz']
+        self.assertEqual(ranges[0], None)
+        self.assertEqual(ranges[-1], 'bytes=%d-' % (len(self.data) // 2))
+
+    def _write_part(self, data, source=None):
+        os.makedirs(os.path.dirname(self.dest))
+        with open(self.dest + '.part', 'wb') as fout:
+            fout.write(data)
+        if source:
+            with open(self.dest + '.part.source', 'w') as fout:
+                fout.write("%d %s\n" % source)
+
+    def test_resume_partial_file(self):
+        self._write_part(self.data[:1000], (1000, self.server.url + '/pkg.tgz'))
+        download.fetch(self.server.url + '/pkg.tgz', self.dest)
+        self.assertEqual(self._read(self.dest), self.data)
+        self.assertEqual(self.server.requests, [('/pkg.tgz', 'bytes=1000-')])
+        self.assertFalse(os.path.exists(self.dest + '.part.source'))
+
+    def test_partial_file_other_source(self):
+        self._write_part('mirrored', (8, self.server.url + '/mirror/pkg.tgz'))
+        download.fetch(self.server.url + '/pkg.tgz', self.dest)
+        self.assertEqual(self._read(self.dest), self.data)
+        self.assertEqual(self.server.requests, [('/pkg.tgz', None)])
+
+    def test_partial_file_unknown_source(self):
+        self._write_part(self.data[:1000])
+        download.fetch(self.server.url + '/pkg.tgz', self.dest)
+        self.assertEqual(self._read(self.dest), self.data)
+        self.assertEqual(self.server.requests, [('/pkg.tgz', None)])
+
+    def test_partial_file_shrank(self):
+        self._write_part(self.data[:1000], (2000, self.server.url + '/pkg.tgz'))
+        download.fetch(self.server.url + '/pkg.tgz', self.dest)
+        self.assertEqual(self._read(self.dest), self.data)
+        self.assertEqual(self.server.requests, [('/pkg.tgz', None)])
+
+    def test_fetch_all(self):
+        self.server.delay = 0.5
+        downloads = []
+        for i in xrange(3):
+            self.server.files['/pkg%d.tgz' % i] = str(i) * 1000
+            downloads.append((self.server.url + '/pkg%d.tgz' % i, os.path.join(self.workdir, 'pkg%d.tgz' % i)))
+        downloads.append((self.server.url + '/missing.tgz', os.path.join(self.workdir, 'missing.tgz')))
+        errors = download.fetch_all(downloads)
+        self.assertEqual(errors.keys(), [os.path.join(self.workdir, 'missing.tgz')])
+        for i in xrange(3):
+            self.assertEqual(self._read(os.path.join(self.workdir, 'pkg%d.tgz' % i)), str(i) * 1000)
+        self.assertGreater(self.server.max_active, 1)
+
+    def test_mirror_directory(self):
+        mirror = os.path.join(self.workdir, 'mirror')
+        os.makedirs(mirror)
+        with open(os.path.join(mirror, 'pkg.tgz'), 'wb') as fout:
+            fout.write('mirrored')
+        download.fetch(self.server.url + '/pkg.tgz', self.dest, mirror_prefix=mirror)
+        self.assertEqual(self._read(self.dest), 'mirrored')
+        self.assertEqual(self.server.requests, [])
+
+    def test_mirror_url(self):
+        self.server.files['/mirror/SHA256SUMS'] = '%s  pkg.tgz\n' % hashlib.sha256('mirrored').hexdigest()
+        self.server.files['/mirror/pkg.tgz'] = 'mirrored'
+        download.fetch('http://127.0.0.1:1/pkg.tgz', self.dest, mirror_prefix=self.server.url + '/mirror')
+        self.assertEqual(self._read(self.dest), 'mirrored')
+
+    def test_mirror_checksum(self):
+        self.server.files['/mirror/SHA256SUMS'] = '%s *pkg.tgz\n' % hashlib.sha256(self.data).hexdigest()
+        self.server.files['/mirror/pkg.tgz'] = 'corrupted'
+        download.fetch(self.server.url + '/pkg.tgz', self.dest, mirror_prefix=self.server.url + '/mirror')
+        self.assertEqual(self._read(self.dest), self.data)
+
+    def test_check(self):
+        download.fetch(self.server.url + '/pkg.tgz', self.dest)
+        download.check(self.dest)
+        with open(self.dest, 'r+b') as fout:
+            fout.write('damaged')
+        mtime = os.path.getmtime(self.dest + '.sha256') + 1
+        os.utime(self.dest, (mtime, mtime))
+        with self.assertRaises(IOError):
+            download.check(self.dest)
@@ -30,9 +30,73 @@
 Functions used for unit tests of logger.py.
 """
 
+import os
+import sys
+import logging
+import subprocess
+import taucmdr
+from taucmdr import tests, logger
 
-from taucmdr import tests
 
-@tests.not_implemented
-class LoggerTest(tests.TestCase):
-    pass
+class LogFormatterTest(tests.TestCase):
+    """Unit tests for :any:`logger.LogFormatter`."""
+
+    def test_default_line_width(self):
+        formatter = logger.LogFormatter()
+        self.assertEqual(formatter.line_width, logger.get_line_width())
+
+    def test_line_width(self):
+        formatter = logger.LogFormatter(line_width=20, allow_colors=False)
+        record = logging.makeLogRecord({'levelname': 'INFO', 'msg': 'word ' * 10})
+        for line in formatter.format(record).split('\n'):
+            self.assertLessEqual(len(line), 20 + len(logger.LINE_MARKER))
+
+
+class BackgroundFileHandlerTest(tests.TestCase):
+    """Unit tests for :any:`logger.BackgroundFileHandler`."""
+
+    def setUp(self):
+        self.filename = os.path.join(os.getcwd(), self._testMethodName, 'debug_log')
+        self.handler = logger.BackgroundFileHandler(self.filename)
+        self.logger = logging.getLogger('taucmdr.tests.test_logger.%s' % self.id())
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
+    def test_no_records(self):
+        self.handler.flush()
+        self.assertFalse(os.path.exists(os.path.dirname(self.filename)))
+
+    def test_records(self):
+        args = ['first']
+        self.logger.debug("Message %s", args)
+        args.append('second')
+        self.logger.error("Another message")
+        self.handler.flush()
+        with open(self.filename) as fin:
+            text = fin.read()
+        self.assertIn("TAU COMMANDER LOGGING INITIALIZED", text)
+        self.assertIn("Message ['first']", text)
+        self.assertIn("Another message", text)
+        self.assertLess(text.index("INITIALIZED"), text.index("Message"))
+        self.assertLess(text.index("Message"), text.index("Another message"))
+
+    def test_close(self):
+        self.logger.debug("Before close")
+        self.handler.close()
+        with open(self.filename) as fin:
+            self.assertIn("Before close", fin.read())
+
+    def test_import(self):
+        prefix = os.path.join(os.getcwd(), 'user')
+        packages = os.path.dirname(os.path.dirname(os.path.abspath(taucmdr.__file__)))
+        env = dict(os.environ, PYTHONPATH=packages, __TAUCMDR_USER_PREFIX__=prefix)
+        subprocess.check_call([sys.executable, '-c', 'import taucmdr.logger'], env=env)
+        self.assertFalse(os.path.exists(prefix))
+        code = 'from taucmdr import logger; logger.get_logger("test").debug("Quiet")'
+        subprocess.check_call([sys.executable, '-c', code], env=env)
+        with open(os.path.join(prefix, 'debug_log')) as fin:
+            self.assertIn("Quiet", fin.read())
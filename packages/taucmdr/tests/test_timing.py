@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Test functions.
+
+Functions used for unit tests of timing.py.
+"""
+
+import os
+import sys
+import json
+import subprocess
+import taucmdr
+from taucmdr import tests, timing
+
+
+_SCRIPT = """
+from taucmdr import timing
+for i in range(3):
+    with timing.span('step', 'test', index=i):
+        pass
+@timing.timed('decorated', 'test')
+def decorated():
+    return 42
+assert decorated() == 42
+assert decorated.__name__ == 'decorated'
+"""
+
+
+class TimingTest(tests.TestCase):
+    """Unit tests for :any:`timing`."""
+
+    def _run(self, output):
+        packages = os.path.dirname(os.path.dirname(os.path.abspath(taucmdr.__file__)))
+        env = dict(os.environ, PYTHONPATH=packages, __TAUCMDR_TIMING__=output)
+        subprocess.check_call([sys.executable, '-c', _SCRIPT], env=env)
+
+    def test_disabled(self):
+        if timing.ENABLED:
+            self.skipTest("__TAUCMDR_TIMING__ is set")
+        self.assertIs(timing.span('anything'), timing.span('else', 'test', arg=1))
+        func = lambda: None
+        self.assertIs(timing.timed('func')(func), func)
+
+    def test_summary(self):
+        spans = [('a', 'test', 0.0, 1.0, 1, {}), ('a', 'test', 1.0, 3.0, 1, {}), ('b', 'other', 0.0, 0.5, 1, {})]
+        lines = timing.summary(spans).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('Span'))
+        self.assertEqual(lines[1].split(), ['test:', 'a', '2', '4.000', '2000.000', '3000.000'])
+        self.assertEqual(lines[2].split()[:3], ['other:', 'b', '1'])
+
+    def test_trace_events(self):
+        spans = [('a', 'test', 1.5, 0.25, 7, {'key': 'value'})]
+        meta, event = timing.trace_events(spans, 123, 'tau test')
+        self.assertEqual(meta['ph'], 'M')
+        self.assertEqual(meta['args']['name'], 'tau test')
+        self.assertEqual(event, {'name': 'a', 'cat': 'test', 'ph': 'X', 'pid': 123, 'tid': 7, 
+                                 'ts': 1500000, 'dur': 250000, 'args': {'key': 'value'}})
+
+    def test_write_trace(self):
+        path = os.path.join(os.getcwd(), self._testMethodName + '.json')
+        self._run(path)
+        self._run(path)
+        with open(path) as fin:
+            events = json.loads(fin.read().rstrip().rstrip(',') + ']')
+        names = [event['name'] for event in events if event['ph'] == 'X']
+        self.assertEqual(names.count('step'), 6)
+        self.assertEqual(names.count('decorated'), 2)
+        self.assertEqual(names.count('process'), 2)
+        self.assertEqual(len(set(event['pid'] for event in events)), 2)
+
+    def test_write_summary(self):
+        path = os.path.join(os.getcwd(), self._testMethodName + '.txt')
+        self._run(path)
+        with open(path) as fin:
+            text = fin.read()
+        self.assertIn('test: step', text)
+        self.assertIn('test: decorated', text)
@@ -30,7 +30,8 @@
 Functions used for unit tests of util.py.
 """
 
-
+import os
+import tarfile
 from taucmdr import util, tests
 
 
@@ -82,3 +83,110 @@ class CamelCaseTest(tests.TestCase):
 
     def test_camelcase(self):
         self.assertEqual(util.camelcase("abc_def_ghi"), "AbcDefGhi")
+
+
+class AtomicWriteTest(tests.TestCase):
+    """Class to test the atomic_write function in utils."""
+
+    def setUp(self):
+        self.workdir = os.path.join(os.getcwd(), self._testMethodName)
+        self.path = os.path.join(self.workdir, 'sub', 'file.txt')
+
+    def test_write(self):
+        util.atomic_write(self.path, 'first')
+        util.atomic_write(self.path, 'second')
+        with open(self.path) as fin:
+            self.assertEqual(fin.read(), 'second')
+        # No temporary files are left behind
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['file.txt'])
+
+    def test_mode(self):
+        with util.umask(022):
+            util.atomic_write(self.path, 'data', 0444)
+            self.assertEqual(os.stat(self.path).st_mode & 0777, 0444)
+            os.chmod(self.path, 0664)
+            # The existing file's permissions are kept even if the umask would mask them
+            util.atomic_write(self.path, 'data')
+            self.assertEqual(os.stat(self.path).st_mode & 0777, 0664)
+
+
+class ExtractArchiveTest(tests.TestCase):
+    """Class to test the extract_archive and archive_toplevel functions in utils."""
+
+    def setUp(self):
+        self.workdir = os.path.join(os.getcwd(), self._testMethodName)
+        self.dest = os.path.join(self.workdir, 'out')
+
+    def _make_archive(self, names, dirs=True):
+        src = os.path.join(self.workdir, 'src')
+        for name in names:
+            util.mkdirp(os.path.dirname(os.path.join(src, name)))
+            with open(os.path.join(src, name), 'w') as fout:
+                fout.write(name)
+        topdir = names[0].split('/')[0]
+        os.chmod(os.path.join(src, topdir), 0555)
+        archive = os.path.join(self.workdir, 'pkg.tgz')
+        with tarfile.open(archive, 'w:gz') as fout:
+            if dirs:
+                fout.add(os.path.join(src, topdir), topdir)
+            else:
+                for name in names:
+                    fout.add(os.path.join(src, name), name)
+        os.chmod(os.path.join(src, topdir), 0755)
+        return archive
+
+    def test_extract(self):
+        archive = self._make_archive(['pkg-1.0/configure', 'pkg-1.0/src/main.c'])
+        self.assertEqual(util.archive_toplevel(archive), 'pkg-1.0')
+        full_dest = util.extract_archive(archive, self.dest, show_progress=False)
+        self.assertEqual(full_dest, os.path.join(self.dest, 'pkg-1.0'))
+        with open(os.path.join(full_dest, 'src', 'main.c')) as fin:
+            self.assertEqual(fin.read(), 'pkg-1.0/src/main.c')
+        self.assertEqual(os.stat(full_dest).st_mode & 0777, 0555)
+        os.chmod(full_dest, 0755)
+
+    def test_no_directory_members(self):
+        archive = self._make_archive(['pkg-1.0/configure', 'pkg-1.0/src/main.c'], dirs=False)
+        self.assertFalse(os.path.exists(archive + '.index'))
+        self.assertEqual(util.archive_toplevel(archive), 'pkg-1.0')
+        self.assertTrue(os.path.exists(archive + '.index'))
+        full_dest = util.extract_archive(archive, self.dest)
+        self.assertTrue(os.path.isfile(os.path.join(full_dest, 'configure')))
+
+    def test_toplevel_file(self):
+        src = os.path.join(self.workdir, 'src')
+        util.mkdirp(os.path.join(src, 'pkg-1.0'))
+        for name in 'README', 'pkg-1.0/configure':
+            with open(os.path.join(src, name), 'w') as fout:
+                fout.write(name)
+        for dirs in True, False:
+            archive = os.path.join(self.workdir, 'pkg%s.tgz' % dirs)
+            with tarfile.open(archive, 'w:gz') as fout:
+                # A file comes first and has a shorter name than the directory
+                fout.add(os.path.join(src, 'README'), 'README')
+                if dirs:
+                    fout.add(os.path.join(src, 'pkg-1.0'), 'pkg-1.0')
+                else:
+                    fout.add(os.path.join(src, 'pkg-1.0', 'configure'), 'pkg-1.0/configure')
+            full_dest = util.extract_archive(archive, os.path.join(self.dest, str(dirs)), show_progress=False)
+            self.assertEqual(os.path.basename(full_dest), 'pkg-1.0')
+            os.remove(archive + '.index')
+            self.assertEqual(util.archive_toplevel(archive), 'pkg-1.0')
+
+    def test_index(self):
+        archive = self._make_archive(['pkg-1.0/configure'])
+        mtime = 1500000000
+        os.utime(archive, (mtime, mtime))
+        util.extract_archive(archive, self.dest, show_progress=False)
+        self.assertTrue(os.path.exists(archive + '.index'))
+        # The index answers without reading the archive
+        with open(archive, 'r+b') as fout:
+            fout.write('garbage')
+        os.utime(archive, (mtime, mtime))
+        self.assertEqual(util.archive_toplevel(archive), 'pkg-1.0')
+        # A changed archive is read again
+        os.utime(archive, (mtime + 1, mtime + 1))
+        with self.assertRaises(IOError):
+            util.archive_toplevel(archive)
+        with self.assertRaises(IOError):
+            util.extract_archive(archive, self.dest, show_progress=False)
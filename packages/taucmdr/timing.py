@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2015, ParaTools, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# (1) Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+# (2) Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+# (3) Neither the name of ParaTools, Inc. nor the names of its contributors may
+#     be used to endorse or promote products derived from this software without
+#     specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""Named timing spans for profiling TAU Commander itself.
+
+Spans mark interesting intervals such as storage transactions, lock waits, subprocesses, downloads,
+archive extraction, and software installation phases.  Set ``__TAUCMDR_TIMING__`` to record them:
+
+    * ``stderr``: Print a summary table on stderr when the program exits.
+    * A path ending in ``.json``: Append Chrome trace events (chrome://tracing, Perfetto) to the file.
+    * Any other path: Append a summary table to the file.
+
+Several processes, e.g. every ``tau`` invocation in a parallel build, may append to the same file.
+
+When ``__TAUCMDR_TIMING__`` is not set :any:`span` returns a shared object that does nothing and
+:any:`timed` returns the decorated function unchanged, so the instrumentation can stay in place.
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import atexit
+from functools import wraps
+from thread import get_ident
+
+OUTPUT = os.environ.get('__TAUCMDR_TIMING__')
+"""str: Where to write spans, or None if spans are not recorded."""
+
+ENABLED = bool(OUTPUT)
+"""bool: True if spans are recorded."""
+
+_SPANS = []
+
+_START = time.time()
+
+
+class _Span(object):
+    """A named interval that starts when it is created."""
+    
+    __slots__ = ('name', 'category', 'args', 'start', 'thread')
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.thread = get_ident()
+        self.start = time.time()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ex_type, value, traceback):
+        self.finish()
+        return False
+
+    def finish(self):
+        """End the span."""
+        _SPANS.append((self.name, self.category, self.start, time.time() - self.start, self.thread, self.args))
+
+
+class _NullSpan(object):
+    """A span that records nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ex_type, value, traceback):
+        return False
+
+    def finish(self):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, category='taucmdr', **args):
+    """Start a timing span.
+    
+    Use the span as a context manager or call its ``finish`` method to end it.
+    
+    Args:
+        name (str): Name of the span.  Spans with the same name and category are summarized together.
+        category (str): Category of the span, e.g. 'storage' or 'subprocess'.
+        **args: Details to show with the span in a trace viewer.  Keep these cheap to compute.
+        
+    Returns:
+        object: The span.
+    """
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, category, args)
+
+
+def timed(name, category='taucmdr'):
+    """Decorator that records each call of the decorated function as a span.
+    
+    Args:
+        name (str): Name of the span.
+        category (str): Category of the span.
+
+    Returns:
+        callable: The decorator.  If spans are not recorded then the decorator returns the function unchanged.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(name, category, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summary(spans):
+    """Summarize spans in a table.
+    
+    Args:
+        spans (list): Spans as recorded by this module.
+        
+    Returns:
+        str: Table of the number of calls and the total, mean, and maximum time of each span, 
+             longest total time first.
+    """
+    totals = {}
+    for name, category, _, duration, _, _ in spans:
+        count, total, longest = totals.get((category, name), (0, 0.0, 0.0))
+        totals[category, name] = count + 1, total + duration, max(longest, duration)
+    rows = sorted(totals.iteritems(), key=lambda item: item[1][1], reverse=True)
+    width = max([len('%s: %s' % key) for key, _ in rows] + [4])
+    lines = ['%-*s %8s %12s %12s %12s' % (width, 'Span', 'Calls', 'Total (s)', 'Mean (ms)', 'Max (ms)')]
+    for (category, name), (count, total, longest) in rows:
+        lines.append('%-*s %8d %12.3f %12.3f %12.3f' % (width, '%s: %s' % (category, name), count, total, 
+                                                           1000 * total / count, 1000 * longest))
+    return '\n'.join(lines) + '\n'
+
+
+def trace_events(spans, pid, process_name):
+    """Convert spans to Chrome trace events.
+    
+    Args:
+        spans (list): Spans as recorded by this module.
+        pid (int): Process ID of the process that recorded the spans.
+        process_name (str): Name of the process to show in a trace viewer.
+        
+    Returns:
+        list: Trace event dictionaries, one complete ('X') event per span. 
+    """
+    events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': process_name}}]
+    for name, category, start, duration, thread, args in spans:
+        events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': thread, 
+                       'ts': int(start * 1e6), 'dur': int(duration * 1e6), 'args': args})
+    return events
+
+
+def _append(path, data, header=''):
+    # Processes sharing the file take turns so the file is valid when all of them exit
+    with open(path, 'a') as fout:
+        fcntl.lockf(fout, fcntl.LOCK_EX)
+        try:
+            if header and not os.fstat(fout.fileno()).st_size:
+                fout.write(header)
+            fout.write(data)
+            fout.flush()
+        finally:
+            fcntl.lockf(fout, fcntl.LOCK_UN)
+
+
+def write(output=None):
+    """Write recorded spans and forget them.
+    
+    Called automatically when the program exits if spans are recorded.
+    
+    Args:
+        output (str): Where to write spans as described in this module's documentation, 
+                      or None to use :any:`OUTPUT`.
+    """
+    output = output or OUTPUT
+    spans = _SPANS[:]
+    del _SPANS[:]
+    if not output:
+        return
+    process_name = ' '.join([os.path.basename(sys.argv[0])] + sys.argv[1:]) if sys.argv else 'python'
+    spans.append(('process', 'taucmdr', _START, time.time() - _START, get_ident(), {'argv': sys.argv}))
+    if output == 'stderr':
+        sys.stderr.write(summary(spans))
+    elif output.endswith('.json'):
+        # The JSON array format allows a missing closing bracket and a trailing comma, 
+        # so each process can append its events
+        events = trace_events(spans, os.getpid(), process_name)
+        _append(output, ''.join(json.dumps(event) + ',\n' for event in events), header='[\n')
+    else:
+        _append(output, '%s (pid %d)\n%s\n' % (process_name, os.getpid(), summary(spans)))
+
+
+if ENABLED:
+    atexit.register(write)
@@ -32,13 +32,15 @@ Handles system manipulation and status tasks, e.g. subprocess management or file
 
 import re
 import os
+import copy
+import json
+import zlib
 import sys
 import time
 import atexit
 import subprocess
 import errno
 import shutil
-import urllib
 import pkgutil
 import tarfile
 import gzip
@@ -51,7 +53,7 @@ from zipimport import zipimporter
 from zipfile import ZipFile
 from termcolor import termcolor
 from unidecode import unidecode
-from taucmdr import logger
+from taucmdr import logger, timing
 from taucmdr.error import InternalError
 from taucmdr.progress import ProgressIndicator
 
@@ -137,6 +139,46 @@ def mkdirp(*args):
                 if not (exc.errno == errno.EEXIST and os.path.isdir(path)):
                     raise
 
+def atomic_write(path, data, mode=None):
+    """Atomically replace the file at `path` with `data`.
+    
+    The data is written to a temporary file in the same directory, synced to disk, and renamed
+    over `path` so other processes never see a partially written file.
+    
+    Args:
+        path (str): Path to the file.  The file and its parent directories may not exist.
+        data (str): File contents.
+        mode (int): Permission bits of the new file, masked by the current umask.  If None then keep the
+                    permission bits of the existing file, or use 0666 masked by the umask if there is no such file.
+    
+    Raises:
+        IOError, OSError: The file could not be written.
+    """
+    dirname, basename = os.path.split(path)
+    try:
+        keep_mode = mode is None and os.stat(path).st_mode & 07777
+    except OSError:
+        keep_mode = None
+    if keep_mode:
+        mode = keep_mode
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = (0666 if mode is None else mode) & ~umask
+    mkdirp(dirname)
+    fd, tmp_path = tempfile.mkstemp(prefix='.%s.' % basename, dir=dirname)
+    try:
+        with os.fdopen(fd, 'w') as fout:
+            fout.write(data)
+            fout.flush()
+            os.fsync(fout.fileno())
+        os.chmod(tmp_path, mode)
+        os.rename(tmp_path, path)
+    except:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 def add_error_stack(path):
     _DTEMP_ERROR_STACK.append(path)
 
@@ -224,7 +266,7 @@ def download(src, dest, timeout=8):
     """Downloads or copies files.
     
     `src` may be a file path or URL.  The destination folder will be created 
-    if it doesn't exist.  Download is via curl, wget, or Python's urllib as appropriate.
+    if it doesn't exist.  See :any:`taucmdr.download.fetch`.
     
     Args:
         src (str): Path or URL to source file.
@@ -234,67 +276,53 @@ def download(src, dest, timeout=8):
     Raises:
         IOError: File copy or download failed.
     """
-    assert isinstance(timeout, int) and timeout >= 0
-    if src.startswith('file://'):
-        src = src[6:]
-    if os.path.isfile(src):
-        LOGGER.debug("Copying '%s' to '%s'", src, dest)
-        mkdirp(os.path.dirname(dest))
-        shutil.copy(src, dest)
-    else:
-        LOGGER.debug("Downloading '%s' to '%s'", src, dest)
-        LOGGER.info("Downloading '%s'", src)
-        mkdirp(os.path.dirname(dest))
-        for cmd in "curl", "wget":
-            abs_cmd = which(cmd)
-            if abs_cmd and _create_dl_subprocess(abs_cmd, src, dest, timeout) == 0:
-                return
-            LOGGER.warning("%s failed to download '%s'. Retrying with a different method...", cmd, src)                    
-        # Fallback: urllib is usually **much** slower than curl or wget and doesn't support timeout
-        if timeout:
-            raise IOError("Failed to download '%s'" % src)
-        with ProgressIndicator("Downloading") as progress_bar:
-            try:
-                urllib.urlretrieve(src, dest, reporthook=progress_bar.update)
-            except Exception as err:
-                LOGGER.warning("urllib failed to download '%s': %s", src, err)
-                raise IOError("Failed to download '%s'" % src)
-
-
-def _create_dl_subprocess(abs_cmd, src, dest, timeout):
-    if "curl" in os.path.basename(abs_cmd):
-        size_cmd = [abs_cmd, '-sI', src, '--location', '--max-time', str(timeout)]
-        get_cmd = [abs_cmd, '-s', '-L', src, '-o', dest, '--connect-timeout', str(timeout)]
-    elif "wget" in os.path.basename(abs_cmd):
-        size_cmd = [abs_cmd, src, '--spider', '--server-response', '--timeout=%d' % timeout, '--tries=1']
-        get_cmd = [abs_cmd, '-q', src, '-O', dest, '--timeout=%d' % timeout]
-    else:
-        raise InternalError("Invalid command parameter: %s" % abs_cmd)
+    from taucmdr.download import fetch
+    fetch(src, dest, timeout)
+
+
+def _archive_index_path(archive):
+    return archive + '.index'
+
+
+def _read_archive_index(archive):
+    """Returns the member index stored next to `archive`, or None if it is missing or out of date."""
     try:
-        proc_output = get_command_output(size_cmd)
-    except subprocess.CalledProcessError as err:
-        return err.returncode
-    _heavy_debug(proc_output)
+        stat = os.stat(archive)
+        with open(_archive_index_path(archive)) as fin:
+            index = json.load(fin)
+    except (IOError, OSError, ValueError):
+        return None
+    if index.get('size') != stat.st_size or index.get('mtime') != stat.st_mtime:
+        return None
+    return index
+
+
+def _write_archive_index(archive, toplevel, members, size):
+    """Stores the member index of `archive` next to it.  Failure to write the index is not an error."""
+    stat = os.stat(archive)
+    index = {'size': stat.st_size, 'mtime': stat.st_mtime, 'toplevel': toplevel, 'members': members,
+             'unpacked_size': size}
+    path = _archive_index_path(archive)
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
     try:
-        file_size = int(proc_output.partition('Content-Length')[2].split()[1])
-    except (ValueError, IndexError):
-        LOGGER.warning("Invalid response while retrieving download file size")
-        file_size = -1
-    with ProgressIndicator("Downloading", total_size=file_size) as progress_bar:
-        with open(os.devnull, 'wb') as devnull:
-            proc = subprocess.Popen(get_cmd, stdout=devnull, stderr=subprocess.STDOUT)
-            while proc.poll() is None:
-                try:
-                    current_size = os.stat(dest).st_size
-                except OSError:
-                    pass
-                else:
-                    progress_bar.update(current_size)
-                time.sleep(0.1)
-            proc.wait()
-            retval = proc.returncode
-            LOGGER.debug("%s returned %d", get_cmd, retval)
-            return retval
+        with open(tmp_path, 'w') as fout:
+            json.dump(index, fout)
+        os.rename(tmp_path, path)
+    except (IOError, OSError) as err:
+        LOGGER.debug("Unable to write archive index '%s': %s", path, err)
+
+
+def _toplevel_name(member):
+    """Returns the name of the top-level element holding a tar member and whether that element is a directory."""
+    parts = member.name.lstrip('/').split('/', 1)
+    return parts[0], member.isdir() or len(parts) > 1
+
+
+def _choose_toplevel(names):
+    # Archives with multiple top-level elements get the shortest directory, like archive_toplevel always did
+    dirs = [name for name, is_dir in names if is_dir]
+    return min(dirs or [name for name, _ in names], key=len)
+
 
 def archive_toplevel(archive):
     """Returns the name of the top-level directory in an archive.
@@ -307,6 +335,9 @@ def archive_toplevel(archive):
     The top-level directory here is "foo"
     This routine will return stupid results for archives with multiple top-level elements.
     
+    The answer comes from the archive's member index if :any:`extract_archive` or an earlier 
+    call has stored one, so the archive is only read when it has changed.
+    
     Args:
         archive (str): Path to archive file.
         
@@ -316,42 +347,84 @@ def archive_toplevel(archive):
     Returns:
         str: Directory name.
     """
-    _heavy_debug("Determining top-level directory name in '%s'", archive)
-    try:
-        fin = tarfile.open(archive)
-    except tarfile.ReadError:
-        raise IOError
-    else:
-        if fin.firstmember.isdir():
-            topdir = fin.firstmember.name
-        else:
-            dirs = [d.name for d in fin.getmembers() if d.isdir()]
-            if dirs:
-                topdir = min(dirs, key=len)
-            else:
-                dirs = set()
-                names = [d.name for d in fin.getmembers() if d.isfile()]
-                for name in names:
-                    dirname, basename = os.path.split(name)
-                    while dirname:
-                        dirname, basename = os.path.split(dirname)
-                    dirs.add(basename)
-                topdir = min(dirs, key=len)
-        LOGGER.debug("Top-level directory in '%s' is '%s'", archive, topdir)
+    index = _read_archive_index(archive)
+    if index:
+        topdir = index['toplevel']
+        _heavy_debug("Top-level directory in '%s' is '%s' (from index)", archive, topdir)
         return topdir
+    _heavy_debug("Determining top-level directory name in '%s'", archive)
+    with timing.span('top-level directory', 'archive', archive=archive):
+        try:
+            with tarfile.open(archive, 'r|*') as fin:
+                first = fin.next()
+                if first is None:
+                    raise IOError("'%s' is empty" % archive)
+                if first.isdir():
+                    # Usual case: only the first block must be decompressed
+                    topdir = _toplevel_name(first)[0]
+                else:
+                    names = set([_toplevel_name(first)])
+                    members, size = 1, first.size
+                    for member in fin:
+                        names.add(_toplevel_name(member))
+                        members += 1
+                        size += member.size
+                    topdir = _choose_toplevel(names)
+                    _write_archive_index(archive, topdir, members, size)
+        except (tarfile.TarError, EOFError, zlib.error) as err:
+            raise IOError("Unable to read '%s': %s" % (archive, err))
+    LOGGER.debug("Top-level directory in '%s' is '%s'", archive, topdir)
+    return topdir
+
+
+def _extract_members(fin, raw, dest, progress):
+    """Extracts members of a streaming tar archive in one pass.
+    
+    Follows :any:`tarfile.TarFile.extractall`: directories are created writable and get their
+    permissions and times after everything else is extracted.
+    
+    Args:
+        fin (tarfile.TarFile): Archive opened in streaming mode.
+        raw (file): The archive file underneath `fin`, for progress.
+        dest (str): Destination folder.
+        progress (ProgressIndicator): Progress bar or None.
 
+    Returns:
+        tuple: (top-level names from :any:`_toplevel_name`, number of members, total size of members).
+    """
+    names = set()
+    directories = []
+    members, size = 0, 0
+    for member in fin:
+        names.add(_toplevel_name(member))
+        members += 1
+        size += member.size
+        if member.isdir():
+            directories.append(member)
+            member = copy.copy(member)
+            member.mode = 0700
+        fin.extract(member, dest)
+        if progress is not None:
+            progress.update(raw.tell())
+    directories.sort(key=lambda member: member.name, reverse=True)
+    for member in directories:
+        dirpath = os.path.join(dest, member.name)
+        try:
+            fin.chown(member, dirpath)
+            fin.utime(member, dirpath)
+            fin.chmod(member, dirpath)
+        except tarfile.ExtractError as err:
+            LOGGER.debug("Unable to set attributes of '%s': %s", dirpath, err)
+    return names, members, size
 
-def _show_extract_progress(members):
-    with ProgressIndicator("Extracting", total_size=len(members), show_cpu=False) as progress_bar:
-        for i, member in enumerate(members):
-            progress_bar.update(i)
-            yield member
 
 def extract_archive(archive, dest, show_progress=True):
     """Extracts archive file to dest.
     
     Supports compressed and uncompressed tar archives. Destination folder will
-    be created if it doesn't exist.
+    be created if it doesn't exist.  The archive is decompressed once, as a stream,
+    and the top-level directory is found while extracting.  The archive's member index 
+    is stored next to it for :any:`archive_toplevel`.
     
     Args:
         archive (str): Path to archive file to extract.
@@ -363,21 +436,26 @@ def extract_archive(archive, dest, show_progress=True):
     Raises:
         IOError: Failed to extract archive.
     """
-    topdir = archive_toplevel(archive)
-    full_dest = os.path.join(dest, topdir)
     mkdirp(dest)
-    with tarfile.open(archive) as fin:
-        if show_progress:
-            LOGGER.info("Checking contents of '%s'", archive)
-            with ProgressIndicator("Extracting archive", show_cpu=False):
-                members = fin.getmembers()
-            LOGGER.info("Extracting '%s' to create '%s'", archive, full_dest)
-            fin.extractall(dest, members=_show_extract_progress(members))
-        else:
-            LOGGER.info("Extracting '%s' to create '%s'", archive, full_dest)
-            fin.extractall(dest)
+    LOGGER.info("Extracting '%s' to '%s'", archive, dest)
+    with timing.span('extract', 'archive', archive=archive), open(archive, 'rb') as raw:
+        total_size = os.fstat(raw.fileno()).st_size
+        try:
+            if show_progress:
+                progress_context = ProgressIndicator("Extracting", total_size=total_size, show_cpu=False)
+            else:
+                progress_context = _null_context("Extracting")
+            with tarfile.open(fileobj=raw, mode='r|*') as fin, progress_context as progress_bar:
+                names, members, size = _extract_members(fin, raw, dest, progress_bar)
+        except (tarfile.TarError, EOFError, zlib.error) as err:
+            raise IOError("Unable to extract '%s': %s" % (archive, err))
+    if not names:
+        raise IOError("'%s' is empty" % archive)
+    topdir = _choose_toplevel(names)
+    full_dest = os.path.join(dest, topdir)
     if not os.path.isdir(full_dest):
         raise IOError("Extracting '%s' does not create '%s'" % (archive, full_dest))
+    _write_archive_index(archive, topdir, members, size)
     return full_dest
 
 
@@ -496,7 +574,7 @@ def create_subprocess(cmd, cwd=None, env=None, stdout=True, log=True, show_progr
                 _heavy_debug("%s=%s", key, val)
     LOGGER.debug("Creating subprocess: cmd=%s, cwd='%s'\n", cmd, cwd)
     context = ProgressIndicator if show_progress else _null_context
-    with context(""):
+    with timing.span(os.path.basename(cmd[0]), 'subprocess', cmd=cmd, cwd=cwd), context(""):
         if error_buf:
             buf = deque(maxlen=error_buf)
         output = []
@@ -551,7 +629,8 @@ def get_command_output(cmd):
     else:
         _heavy_debug("Using cached output for command: %s", cmd)
     LOGGER.debug("Checking subprocess output: %s", cmd)
-    stdout = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
+    with timing.span(os.path.basename(cmd[0]), 'command output', cmd=cmd):
+        stdout = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
     get_command_output.cache[key] = stdout
     _heavy_debug(stdout)
     LOGGER.debug("%s returned 0", cmd)
@@ -659,7 +738,7 @@ def camelcase(name):
 def hline(title, *args, **kwargs):
     """Build a colorful horizontal rule for console output.
     
-    Uses :any:`logger.LINE_WIDTH` to generate a string of '=' characters
+    Uses :any:`logger.get_line_width` to generate a string of '=' characters
     as wide as the terminal.  `title` is included in the string near the
     left of the horizontal line. 
     
@@ -671,7 +750,7 @@ def hline(title, *args, **kwargs):
     Returns:
         str: The horizontal rule.
     """
-    text = "{:=<{}}\n".format('== %s ==' % title, logger.LINE_WIDTH)
+    text = "{:=<{}}\n".format('== %s ==' % title, logger.get_line_width())
     return color_text(text, *args, **kwargs)
 
 
@@ -704,24 +783,24 @@ def uncolor_text(text):
     return re.sub(_COLOR_CONTROL_RE, '', text)
 
 
-def walk_packages(path, prefix):
+def walk_packages(path, prefix, _seen=None):
     """Fix :any:`pkgutil.walk_packages` to work with Python zip files.
 
     Python's default :any:`zipimporter` doesn't provide an `iter_modules` method so
     :any:`pkgutil.walk_packages` silently fails to list modules and packages when
     they are in a zip file.  This implementation works around this.
     """
-    def seen(path, dct={}):     # pylint: disable=dangerous-default-value
-        if path in dct:
-            return True
-        dct[path] = True
+    # Like pkgutil.walk_packages, only skip paths already seen during this walk
+    if _seen is None:
+        _seen = set()
     for importer, name, ispkg in _iter_modules(path, prefix):
         yield importer, name, ispkg
         if ispkg:
             __import__(name)
             path = getattr(sys.modules[name], '__path__', None) or []
-            path = [p for p in path if not seen(p)]
-            for item in walk_packages(path, name+'.'):
+            path = [p for p in path if p not in _seen]
+            _seen.update(path)
+            for item in walk_packages(path, name+'.', _seen):
                 yield item
 
 
@@ -95,6 +95,7 @@ import sys
 import shutil
 import pickle
 import fnmatch
+import zipfile
 import tempfile
 import fileinput
 import subprocess
@@ -240,7 +241,7 @@ class Test(TestCommand):
 
 
 class InstallLib(InstallLibCommand):
-    """Custom install_lib command to always compile with optimization."""
+    """Custom install_lib command to always compile with optimization and write the command manifest."""
 
     def initialize_options(self):
         InstallLibCommand.initialize_options(self)
@@ -253,6 +254,11 @@ class InstallLib(InstallLibCommand):
 
     def run(self):
         InstallLibCommand.run(self)
+        # Import the installed command modules in a new interpreter so the manifest describes them
+        # as the `tau` script will see them
+        env = dict(os.environ, PYTHONPATH=self.install_dir, __TAUCMDR_SCRIPT__='tau')
+        subprocess.check_call([sys.executable, '-c', 'from taucmdr import cli; cli.write_command_manifest()'], 
+                              env=env, cwd=self.install_dir)
 
 
 class Install(InstallCommand):
@@ -279,6 +285,55 @@ class Install(InstallCommand):
                     os.path.join(self.prefix, 'system', 'configure'))
         
 
+class BuildZipapp(Command):
+    """Build a single archive holding TAU Commander and its Python packages."""
+
+    description = "Build a single zip archive of all Python packages with precompiled bytecode"
+
+    user_options = [('output=', None, "Path to the archive [default: packages.zip beside the packages directory]")]
+
+    def initialize_options(self):
+        # Distuilts defines attributes outside __init__
+        # pylint: disable=attribute-defined-outside-init
+        self.output = None
+
+    def finalize_options(self):
+        # Distuilts defines attributes outside __init__
+        # pylint: disable=attribute-defined-outside-init
+        if self.output is None:
+            self.output = os.path.join(PACKAGE_TOPDIR, 'packages.zip')
+        self.output = os.path.abspath(self.output)
+
+    def run(self):
+        staging = tempfile.mkdtemp()
+        try:
+            packages = os.path.join(staging, 'packages')
+            ignore = shutil.ignore_patterns('*.pyc', '*.pyo', 'tests', '*.egg-info', '.gitignore', 'commands.json')
+            shutil.copytree(os.path.join(PACKAGE_TOPDIR, 'packages'), packages, ignore=ignore)
+            # The archive is only used by the `tau` script and the archive's modules can't change, 
+            # so write the command manifest now
+            env = dict(os.environ, PYTHONPATH=packages, __TAUCMDR_SCRIPT__='tau')
+            subprocess.check_call([sys.executable, '-c', 'from taucmdr import cli; cli.write_command_manifest()'], 
+                                  env=env, cwd=staging)
+            # Tracebacks show paths inside the archive, and `tau` may run with or without -O
+            for flags in [], ['-O']:
+                subprocess.check_call([sys.executable] + flags + ['-m', 'compileall', '-q', '-d', self.output, '.'],
+                                      cwd=packages)
+            self.mkpath(os.path.dirname(self.output))
+            tmp_path = self.output + '.tmp'
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for dirpath, dirnames, filenames in os.walk(packages):
+                    dirnames.sort()
+                    for filename in sorted(filenames):
+                        path = os.path.join(dirpath, filename)
+                        # zipimport compares each bytecode file's timestamp to its source file's entry
+                        archive.write(path, os.path.relpath(path, packages))
+            os.rename(tmp_path, self.output)
+            print "wrote %s" % self.output
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+
 class Release(SDistCommand):
     """Build release packages."""
     
@@ -586,6 +641,7 @@ setuptools.setup(
               'install_lib': InstallLib,
               'test': Test,
               'build_sphinx': BuildSphinx,
+              'build_zipapp': BuildZipapp,
               'release': Release,
               'build_markdown': BuildMarkdown}
 )